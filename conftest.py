@@ -29,7 +29,9 @@ from libertem.executor.delayed import DelayedJobExecutor
 from libertem.io.dataset.hdf5 import H5DataSet
 from libertem.io.dataset.raw import RawFileDataSet
 from libertem.io.dataset.memory import MemoryDataSet
-from libertem.io.dataset.base import BufferedBackend, MMapBackend, DirectBackend
+from libertem.io.dataset.base import (
+    BufferedBackend, MMapBackend, DirectBackend, UringBackend,
+)
 from libertem.executor.dask import DaskJobExecutor, cluster_spec
 from libertem.executor.concurrent import ConcurrentJobExecutor
 from libertem.common.threading import set_num_threads_env
@@ -344,6 +346,25 @@ def direct_raw(tmpdir_factory, default_raw_data):
     yield ds
 
 
+@pytest.fixture(scope='session')
+def uring_raw(tmpdir_factory, default_raw_data):
+    lt_ctx = lt.Context(executor=InlineJobExecutor())
+    datadir = tmpdir_factory.mktemp('data')
+    filename = datadir + '/raw-test-uring'
+    default_raw_data.tofile(str(filename))
+    del default_raw_data
+
+    ds = lt_ctx.load(
+        "raw",
+        path=str(filename),
+        dtype="float32",
+        nav_shape=(16, 16),
+        sig_shape=(128, 128),
+        io_backend=UringBackend(),
+    )
+    yield ds
+
+
 @pytest.fixture(scope='session')
 def big_endian_raw(tmpdir_factory):
     datadir = tmpdir_factory.mktemp('data')
@@ -178,6 +178,8 @@ setup(
         'cupy': 'cupy',
         'bqplot': ['bqplot', 'bqplot-image-gl', 'ipython'],
         'hdf5plugin': 'hdf5plugin',
+        # TLS certificates for the shared worker pool
+        'shared-pool': 'cryptography',
         'tracing': [
             'opentelemetry-distro',
             'opentelemetry-exporter-otlp',
@@ -189,6 +191,7 @@ setup(
         'console_scripts': [
             'libertem-server=libertem.web.cli:main',
             'libertem-worker=libertem.executor.cli:main',
+            'libertem-pool=libertem.executor.cli:pool',
         ]
     },
     cmdclass={
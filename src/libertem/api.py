@@ -16,6 +16,7 @@ from libertem.executor.concurrent import ConcurrentJobExecutor
 from libertem.executor.inline import InlineJobExecutor
 from libertem.io.dataset import load, filetypes
 from libertem.io.dataset.base import DataSet
+from libertem.io.writers.archive import export_dataset
 from libertem.common.buffers import BufferWrapper
 from libertem.executor.dask import DaskJobExecutor
 from libertem.executor.delayed import DelayedJobExecutor
@@ -59,6 +60,7 @@ ExecutorSpecType = Union[
     Literal['dask-make-default'],
     Literal['delayed'],
     Literal['pipelined'],
+    Literal['shared-pool'],
 ]
 IterableRoiT = Iterable[Tuple[Tuple[int], bool]]
 RoiT = Optional[Union[np.ndarray, 'SparseArray', 'spmatrix', Tuple[int], IterableRoiT]]
@@ -159,6 +161,13 @@ class Context:
                 Create a :class:`~libertem.executor.pipelined.PipelinedExecutor`,
                 which is suitable for multi-process streaming live processing
                 using `LiberTEM-live <https://libertem.github.io/LiberTEM-live/>`_.
+            "shared-pool":
+                Attach to a long-lived local worker pool that can be shared between
+                several :class:`Context` instances and processes, starting it in the
+                background if it is not running yet.
+                See :mod:`libertem.executor.shared_pool` for more information.
+
+                .. versionadded:: 0.12.0
         *args, **kwargs
             Passed to :class:`Context`.
 
@@ -179,11 +188,14 @@ class Context:
             executor = DelayedJobExecutor()
         elif executor_spec == 'pipelined':
             executor = PipelinedExecutor()
+        elif executor_spec == 'shared-pool':
+            from libertem.executor.shared_pool import connect_pool
+            executor = connect_pool()
         else:
             raise ValueError(
                 f'Argument `executor_spec` is {executor_spec}. Allowed are '
                 f'synchronous", "inline", "threads", "dask-integration", '
-                f'"dask-make-default" or "pipelined".'
+                f'"dask-make-default", "pipelined" or "shared-pool".'
             )
         return cls(executor=executor, *args, **kwargs)
 
@@ -815,8 +827,15 @@ class Context:
         Run :code:`udf` on :code:`dataset`, restricted to the region of interest :code:`roi`.
         Yields partial results after each merge operation.
 
+        If the data set was loaded with the :code:`follow` parameter, partitions
+        are processed as soon as their frames are written, and partial results
+        are yielded until the acquisition has ended.
+
         .. versionadded:: 0.7.0
 
+        .. versionchanged:: 0.12.0
+            Support for data sets that are still being written
+
         Parameters
         ----------
         dataset
@@ -1395,6 +1414,84 @@ class Context:
         )
         return results['result']
 
+    def export_dataset(
+        self,
+        dataset: DataSet,
+        path: str,
+        codec: Optional[str] = "zlib",
+        level: int = 1,
+        shuffle: bool = True,
+        corrections: Optional[CorrectionSet] = None,
+        overwrite: bool = False,
+        progress: Union[bool, ProgressReporter] = False,
+    ) -> DataSet:
+        """
+        Convert :code:`dataset` to a LiberTEM archive, a chunked and optionally
+        compressed format that can be read back quickly with
+        :code:`ctx.load("archive", path=path)`.
+
+        This is useful for formats that are slow to read, or that need to be
+        read many times: the conversion cost is paid once. The partitions are
+        read, encoded and written in parallel by the workers, so :code:`path`
+        must be accessible from all workers under the same name. The chunks
+        span complete rows and about 1 MiB of data, matching the tiles of
+        the default tiling schemes.
+
+        The corrections are applied before writing, so that the data in the
+        archive gives the same results as the original data set. In that case,
+        the data is stored as floating point numbers.
+
+        .. versionadded:: 0.12.0
+
+        Parameters
+        ----------
+        dataset
+            The data set to export
+
+        path : str
+            A new or empty directory for the archive
+
+        codec : str or None
+            :code:`"zlib"`, :code:`"lz4"` (requires the :code:`lz4` package)
+            or :code:`None` to store the data uncompressed
+
+        level : int
+            Compression level for the :code:`"zlib"` codec
+
+        shuffle : bool
+            Group the bytes of the items by significance before compressing,
+            which usually improves the compression of detector data
+
+        corrections
+            Corrections to apply before writing. If none are given,
+            the corrections that are part of the :code:`DataSet` are used,
+            if there are any. See also :ref:`corrections`.
+
+        overwrite : bool
+            Replace an existing archive at :code:`path`
+
+        progress : bool | ProgressReporter
+            Show progress bar. Toggle with boolean flag or supply instance of
+            :class:`libertem.common.progress.ProgressReporter` for custom
+            handling of progress display.
+
+        Returns
+        -------
+        DataSet : libertem.io.dataset.archive.ArchiveDataSet
+            The archive, loaded as a data set
+
+        Examples
+        --------
+
+        >>> ds_archive = ctx.export_dataset(dataset, path_to_archive)  # doctest: +SKIP
+        >>> res = ctx.run_udf(dataset=ds_archive, udf=SumUDF())  # doctest: +SKIP
+        """
+        export_dataset(
+            self, dataset=dataset, path=path, codec=codec, level=level, shuffle=shuffle,
+            corrections=corrections, overwrite=overwrite, progress=progress,
+        )
+        return self.load("archive", path=path)
+
     def _create_local_executor(self):
         return DaskJobExecutor.make_local()
 
@@ -1,5 +1,6 @@
 import functools
 import logging
+from typing import Dict, Tuple
 
 import sparse
 import scipy.sparse
@@ -16,6 +17,122 @@ from libertem.common import Slice
 
 log = logging.getLogger(__name__)
 
+def _label_entries(sig_coords: np.ndarray, slices: np.ndarray) -> np.ndarray:
+    """
+    Index of the slice that contains each entry, -1 for entries outside of all
+    slices. :code:`slices` is :attr:`TilingScheme.slices_array`.
+    """
+    num_slices, _, sig_dims = slices.shape
+    origins = slices[:, 0]
+    stops = origins + slices[:, 1]
+    # The slices of a tiling scheme usually form a grid, so that the slice
+    # of each entry can be found with a binary search per dimension:
+    bounds = [np.unique(origins[:, dim]) for dim in range(sig_dims)]
+    slice_cells = tuple(
+        np.searchsorted(bounds[dim], origins[:, dim]) for dim in range(sig_dims)
+    )
+    # ...if each slice covers exactly one cell of the grid:
+    is_grid = len(set(zip(*slice_cells))) == num_slices
+    for dim in range(sig_dims):
+        last = slice_cells[dim] == len(bounds[dim]) - 1
+        upper = bounds[dim][np.minimum(slice_cells[dim] + 1, len(bounds[dim]) - 1)]
+        is_grid = is_grid and bool(np.all(last | (stops[:, dim] == upper)))
+    labels = np.full(sig_coords.shape[1], -1, dtype=np.int64)
+    if is_grid:
+        grid = np.full(tuple(len(b) for b in bounds), -1, dtype=np.int64)
+        grid[slice_cells] = np.arange(num_slices)
+        cells = tuple(
+            np.searchsorted(bounds[dim], sig_coords[dim], side='right') - 1
+            for dim in range(sig_dims)
+        )
+        inside = np.all([c >= 0 for c in cells], axis=0)
+        labels[inside] = grid[tuple(c[inside] for c in cells)]
+        # entries beyond the last slice in a dimension:
+        for dim in range(sig_dims):
+            select = labels >= 0
+            outside = sig_coords[dim][select] >= stops[labels[select], dim]
+            labels[np.flatnonzero(select)[outside]] = -1
+    else:
+        for idx in range(num_slices):
+            inside = np.all([
+                (sig_coords[dim] >= origins[idx, dim]) & (sig_coords[dim] < stops[idx, dim])
+                for dim in range(sig_dims)
+            ], axis=0)
+            labels[inside] = idx
+    return labels
+
+
+class CSRMaskIndex:
+    """
+    A stack of sparse masks, cut into the signal slices of a
+    :class:`~libertem.io.dataset.base.tiling_scheme.TilingScheme` and
+    converted to CSR format, with one row per mask. The column indices
+    refer to the flattened signal dimension of each slice, so that the
+    arrays can be used with :func:`libertem.common.numba.csr.csr_rmatmul`
+    on flattened tiles without further conversion.
+
+    All slices are built at once, with a single sort of the non-zero entries.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    masks : sparse.COO
+        The mask stack, with shape :code:`(num_masks, *sig_shape)`
+
+    slices : numpy.ndarray
+        :attr:`TilingScheme.slices_array`
+
+    dtype : numpy.dtype
+        dtype of the mask values
+    """
+    def __init__(self, masks: sparse.COO, slices: np.ndarray, dtype):
+        num_masks = masks.shape[0]
+        self._num_masks = num_masks
+        mask_idx = masks.coords[0]
+        sig_coords = masks.coords[1:]
+        labels = _label_entries(sig_coords, slices)
+        # flat index inside of the slice:
+        select = labels >= 0
+        labels = labels[select]
+        mask_idx = mask_idx[select]
+        sig_coords = sig_coords[:, select]
+        origins = slices[labels, 0]
+        shapes = slices[labels, 1]
+        local = np.zeros(len(labels), dtype=np.int64)
+        for dim in range(sig_coords.shape[0]):
+            local = local * shapes[:, dim] + (sig_coords[dim] - origins[:, dim])
+        order = np.lexsort((local, mask_idx, labels))
+        labels = labels[order]
+        mask_idx = mask_idx[order]
+        indices = local[order].astype(np.intp)
+        data = np.asarray(masks.data[select][order], dtype=dtype)
+        bounds = np.searchsorted(labels, np.arange(len(slices) + 1))
+        self._slices = []
+        for idx in range(len(slices)):
+            start, stop = bounds[idx], bounds[idx + 1]
+            counts = np.bincount(mask_idx[start:stop], minlength=num_masks)
+            indptr = np.zeros(num_masks + 1, dtype=np.intp)
+            np.cumsum(counts, out=indptr[1:])
+            self._slices.append((data[start:stop], indices[start:stop], indptr))
+
+    def __len__(self):
+        return len(self._slices)
+
+    @property
+    def num_masks(self) -> int:
+        return self._num_masks
+
+    def __getitem__(self, idx: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :code:`(data, indices, indptr)` for the slice with index :code:`idx`
+        """
+        return self._slices[idx]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for s in self._slices for a in s)
+
 
 def _build_sparse(m, dtype, sparse_backend, backend):
     if sparse_backend == 'sparse.pydata' and backend == 'numpy':
@@ -94,12 +211,43 @@ class MaskContainer:
             backend = 'numpy'
         self.backend = backend
         self._get_masks_for_slice = {}
+        # CSR indices by dtype and tiling scheme, see `get_csr_index`:
+        self._csr_indices: Dict[Tuple, CSRMaskIndex] = {}
         self.validate_mask_functions()
 
+    @classmethod
+    def stack(cls, containers) -> "MaskContainer":
+        '''
+        Combine the masks of several containers into a new container,
+        in order. The containers must agree on :code:`dtype`, :code:`use_sparse`
+        and :code:`backend`.
+
+        The masks are computed right away, so this is meant for use on
+        the worker and the result should not be sent anywhere.
+
+        .. versionadded:: 0.12.0
+        '''
+        first = containers[0]
+        for c in containers[1:]:
+            if (c.dtype, c.use_sparse, c.backend) != (first.dtype, first.use_sparse, first.backend):
+                raise ValueError("can only stack containers with the same dtype, "
+                                 "use_sparse and backend")
+        if first.use_sparse:
+            masks = sparse.concatenate([c.computed_masks for c in containers])
+        else:
+            masks = np.concatenate([c.computed_masks for c in containers])
+        result = cls(
+            mask_factories=[], dtype=first.dtype, use_sparse=first.use_sparse,
+            count=len(masks), backend=first.backend,
+        )
+        result._computed_masks = masks
+        return result
+
     def __getstate__(self):
         # don't even try to pickle mask cache
-        state = self.__dict__
+        state = dict(self.__dict__)
         state['_get_masks_for_slice'] = {}
+        state['_csr_indices'] = {}
         return state
 
     def validate_mask_functions(self):
@@ -239,6 +387,23 @@ class MaskContainer:
             )
         return self._get_masks_for_slice[key](slice_)
 
+    def get_csr_index(self, tiling_scheme: TilingScheme, dtype=None) -> CSRMaskIndex:
+        """
+        The masks as a :class:`CSRMaskIndex` for all signal slices of
+        :code:`tiling_scheme`. The index is built once and kept in this
+        container, so that it is shared by all tiles that the container is
+        used for. It is not pickled with the container.
+
+        .. versionadded:: 0.12.0
+        """
+        if dtype is None:
+            dtype = self.dtype
+        slices = tiling_scheme.slices_array
+        key = (np.dtype(dtype).str, slices.shape, slices.tobytes())
+        if key not in self._csr_indices:
+            self._csr_indices[key] = CSRMaskIndex(to_sparse(self.computed_masks), slices, dtype)
+        return self._csr_indices[key]
+
     @property
     def computed_masks(self):
         if self._computed_masks is None:
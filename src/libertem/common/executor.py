@@ -295,6 +295,28 @@ class JobExecutor:
     def get_udf_runner(self) -> Type['UDFRunner']:
         raise NotImplementedError
 
+    def get_merge_group_size(self, num_tasks: int) -> int:
+        """
+        Number of tasks for consecutive partitions that are run together
+        and merged on a worker, so that the main node only has to merge
+        the pre-merged results. By default, the result of each partition
+        is sent to the main node separately.
+
+        .. versionadded:: 0.12.0
+        """
+        return 1
+
+
+def merge_group_size(num_tasks: int, num_workers: int, groups_per_worker: int = 2) -> int:
+    """
+    Group size for merging task results on the workers, so that the main
+    node receives about :code:`groups_per_worker` results per worker. A few
+    groups per worker are kept to still balance the load between them.
+
+    .. versionadded:: 0.12.0
+    """
+    return max(1, num_tasks // max(1, num_workers * groups_per_worker))
+
 
 class AsyncJobExecutor:
     '''
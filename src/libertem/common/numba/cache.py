@@ -59,6 +59,16 @@ def hasher(x):
     return hashlib.sha256(x).hexdigest()
 
 
+def _code_key(fn):
+    """
+    Identify a function by its bytecode and the names it references:
+    functions that only differ in the globals they call have the same
+    bytecode, for example.
+    """
+    code = fn.__code__
+    return (fn.__module__, fn.__qualname__, code.co_code, code.co_names)
+
+
 if dispatcher_registry is not None:
     class MyFunctionCache(FunctionCache):
         def _get_dependencies(self, cvar):
@@ -67,12 +77,12 @@ if dispatcher_registry is not None:
                 # TODO: does the cache key need to depend on any other
                 # attributes of the Dispatcher?
                 closure = cvar.py_func.__closure__
-                deps = [cvar.py_func.__code__.co_code]
+                deps = [_code_key(cvar.py_func)]
             elif hasattr(cvar, '__closure__'):
                 closure = cvar.__closure__
                 # if cvar is a function and closes over a Dispatcher, the
                 # cache will be busted because of the uuid that is regenerated
-                deps = [cvar.__code__.co_code]
+                deps = [_code_key(cvar)]
             else:
                 closure = None
             if closure is not None:
@@ -0,0 +1,143 @@
+"""
+Numba kernels that work directly on the :code:`data`, :code:`indices` and
+:code:`indptr` arrays of a :class:`scipy.sparse.csr_matrix`, so that tiles
+of sparse data can be processed without densifying them.
+
+The tiles are 2D with one row per frame and the flattened signal dimension
+as columns. Duplicate entries are summed up, like in :mod:`scipy.sparse`.
+:func:`csr_rmatmul` works the other way round, with a stack of sparse masks
+and dense tiles.
+
+.. versionadded:: 0.12.0
+"""
+import numba
+import numpy as np
+import scipy.sparse
+
+from libertem.common.numba import numba_dtypes
+
+
+def is_numba_csr(arr) -> bool:
+    '''
+    Check if :code:`arr` is a :class:`scipy.sparse.csr_matrix` that
+    the kernels in this module can be used with.
+    '''
+    return (
+        isinstance(arr, scipy.sparse.csr_matrix)
+        and all(
+            a.dtype in numba_dtypes
+            for a in (arr.data, arr.indices, arr.indptr)
+        )
+    )
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_sum_rows(data, indptr, out):
+    '''
+    Add the sum of each row to :code:`out`, which has one entry per row.
+    '''
+    for row in range(len(indptr) - 1):
+        for k in range(indptr[row], indptr[row + 1]):
+            out[row] += data[k]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_sum_columns(data, indices, indptr, out):
+    '''
+    Add the sum of each column to :code:`out`, which has one entry per column.
+    '''
+    for k in range(indptr[0], indptr[len(indptr) - 1]):
+        out[indices[k]] += data[k]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_scatter(data, indices, indptr, out):
+    '''
+    Add the entries to the 2D array :code:`out`, which has the shape of the
+    sparse matrix. Rows of :code:`out` that should only contain the sparse
+    data have to be zeroed beforehand.
+    '''
+    for row in range(len(indptr) - 1):
+        for k in range(indptr[row], indptr[row + 1]):
+            out[row, indices[k]] += data[k]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_matmul_dense(data, indices, indptr, right, out):
+    '''
+    Add the matrix product of the sparse matrix with the dense 2D
+    matrix :code:`right` to :code:`out`, with shape :code:`(rows, right.shape[1])`.
+    Only the rows of :code:`right` that belong to non-zero columns are read.
+    '''
+    n_cols = right.shape[1]
+    for row in range(len(indptr) - 1):
+        for k in range(indptr[row], indptr[row + 1]):
+            value = data[k]
+            right_row = indices[k]
+            for col in range(n_cols):
+                out[row, col] += value * right[right_row, col]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_sum_varsum_columns(data, indices, indptr, sumsum, varsum):
+    '''
+    Calculate the sum and the sum of variances of each column into the
+    zeroed 1D arrays :code:`sumsum` and :code:`varsum`.
+
+    The zeros that are not stored contribute to the sum of variances with the
+    squared mean of their column. The matrix has to be in canonical format,
+    without duplicate entries.
+    '''
+    n_rows = len(indptr) - 1
+    n_columns = len(sumsum)
+    counts = np.zeros(n_columns, dtype=np.int64)
+    for k in range(indptr[0], indptr[n_rows]):
+        sumsum[indices[k]] += data[k]
+        counts[indices[k]] += 1
+    mean = sumsum / n_rows
+    for k in range(indptr[0], indptr[n_rows]):
+        col = indices[k]
+        varsum[col] += np.abs(data[k] - mean[col])**2
+    for col in range(n_columns):
+        varsum[col] += (n_rows - counts[col]) * np.abs(mean[col])**2
+
+
+@numba.njit(inline='always', fastmath=True, nogil=True)
+def _csr_rmatmul_row(left, data, indices, indptr, row, out):
+    start = indptr[row]
+    stop = indptr[row + 1]
+    if start == stop:
+        return
+    for frame in range(left.shape[0]):
+        acc = out[frame, row]
+        for k in range(start, stop):
+            acc += left[frame, indices[k]] * data[k]
+        out[frame, row] = acc
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def csr_rmatmul(left, data, indices, indptr, out):
+    '''
+    Add the product of the dense 2D matrix :code:`left` with the transpose
+    of the sparse matrix to :code:`out`, with shape
+    :code:`(left.shape[0], rows)`. Each row of the sparse matrix is a mask
+    over the columns of :code:`left`, so that :code:`out` can be the
+    result buffer of a tile directly.
+
+    .. versionadded:: 0.12.0
+    '''
+    for row in range(len(indptr) - 1):
+        _csr_rmatmul_row(left, data, indices, indptr, row, out)
+
+
+@numba.njit(parallel=True, fastmath=True, cache=True, nogil=True)
+def csr_rmatmul_parallel(left, data, indices, indptr, out):
+    '''
+    Same as :func:`csr_rmatmul`, with the rows of the sparse matrix
+    distributed over the Numba threads. Each thread writes to its own
+    columns of :code:`out`.
+
+    .. versionadded:: 0.12.0
+    '''
+    for row in numba.prange(len(indptr) - 1):
+        _csr_rmatmul_row(left, data, indices, indptr, row, out)
@@ -0,0 +1,167 @@
+"""
+Read and decode tiles in a background thread while the previous tile is
+being processed.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import queue
+import threading
+from typing import Generator, Iterator, Optional
+
+import numpy as np
+
+from libertem.common.buffers import BufferPool
+from libertem.io.dataset.base.tiling import DataTile
+
+
+def get_prefetch_depth() -> int:
+    '''
+    Number of tiles to read ahead in :class:`~libertem.udf.base.UDFPartRunner`,
+    as set by the :code:`LIBERTEM_TILE_PREFETCH` environment variable.
+    0, the default, means tiles are read in the processing thread.
+    '''
+    return int(os.environ.get("LIBERTEM_TILE_PREFETCH", "0"))
+
+
+class _Failed:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+_local = threading.local()
+
+
+def _thread_buffer_pool() -> BufferPool:
+    # keep the buffers around between partitions that are processed
+    # by the same worker thread:
+    try:
+        return _local.pool
+    except AttributeError:
+        _local.pool = BufferPool()
+        return _local.pool
+
+
+class _Slot:
+    '''
+    A growable, pool-allocated buffer that holds a copy of a single tile
+    '''
+    def __init__(self, pool: BufferPool, alignment: int):
+        self._pool = pool
+        self._alignment = alignment
+        self._size = 0
+        self._buf = None
+
+    def view(self, shape, dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        nbytes = count * dtype.itemsize
+        if nbytes > self._size:
+            self.release()
+            self._buf = self._pool.checkout_bytes(nbytes, self._alignment)
+            self._size = nbytes
+        return np.frombuffer(self._buf, dtype=dtype, count=count).reshape(shape)
+
+    def release(self):
+        if self._buf is not None:
+            self._pool.checkin_bytes(self._size, self._alignment, self._buf)
+            self._buf = None
+            self._size = 0
+
+
+class TilePrefetcher:
+    '''
+    Iterate over :code:`tiles` in a background thread, so that the next tile
+    is read and decoded while the consumer is working on the current one.
+
+    Dataset backends usually decode into a single buffer that is re-used
+    for every tile, so each tile is copied into one of :code:`depth` buffers
+    that are taken from :code:`buffer_pool`. A buffer is handed back to the
+    background thread once the consumer asks for the next tile, which means
+    a tile must not be used after advancing the iterator.
+
+    Only dense NumPy tiles are supported.
+
+    Parameters
+    ----------
+    tiles
+        The tile generator, usually from
+        :meth:`~libertem.io.dataset.base.Partition.get_tiles`. It is consumed
+        and closed in the background thread.
+
+    depth
+        Number of tiles that can be ready ahead of the consumer
+
+    buffer_pool
+        Pool to take the tile buffers from. By default, a pool that is
+        private to the calling thread is used.
+    '''
+    def __init__(
+        self,
+        tiles: Iterator[DataTile],
+        depth: int = 2,
+        buffer_pool: Optional[BufferPool] = None,
+        alignment: int = 4096,
+    ):
+        if depth < 1:
+            raise ValueError(f"depth must be at least 1, is {depth}")
+        if buffer_pool is None:
+            buffer_pool = _thread_buffer_pool()
+        self._tiles = tiles
+        self._depth = depth
+        self._pool = buffer_pool
+        self._alignment = alignment
+
+    def _produce(self, free: queue.Queue, ready: queue.Queue, stop: threading.Event):
+        try:
+            for tile in self._tiles:
+                slot = free.get()
+                if stop.is_set():
+                    return
+                data = tile.data
+                dest = slot.view(data.shape, data.dtype)
+                np.copyto(dest, data)
+                ready.put((DataTile(dest, tile.tile_slice, tile.scheme_idx), slot))
+                if stop.is_set():
+                    return
+            ready.put(_DONE)
+        except BaseException as e:
+            ready.put(_Failed(e))
+        finally:
+            close = getattr(self._tiles, 'close', None)
+            if close is not None:
+                close()
+
+    def __iter__(self) -> Generator[DataTile, None, None]:
+        slots = [_Slot(self._pool, self._alignment) for _ in range(self._depth)]
+        free: queue.Queue = queue.Queue()
+        ready: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        for slot in slots:
+            free.put(slot)
+        thread = threading.Thread(
+            target=self._produce,
+            args=(free, ready, stop),
+            name="libertem-tile-prefetch",
+            daemon=True,
+        )
+        thread.start()
+        try:
+            while True:
+                item = ready.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failed):
+                    raise item.exc
+                tile, slot = item
+                yield tile
+                free.put(slot)
+        finally:
+            stop.set()
+            # wake up the producer if it is waiting for a free slot:
+            free.put(None)
+            thread.join()
+            for slot in slots:
+                slot.release()
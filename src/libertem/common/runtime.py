@@ -0,0 +1,146 @@
+"""
+Private per-user directories for sockets, keys and caches that must not be
+readable or writable by other users of the same machine, and locks for
+coordinating processes that use them.
+
+.. versionadded:: 0.12.0
+"""
+import contextlib
+import os
+import stat
+import sys
+import tempfile
+import time
+from typing import Generator, Optional
+
+
+def _get_user_suffix() -> str:
+    if hasattr(os, 'getuid'):
+        return str(os.getuid())
+    import getpass
+    return getpass.getuser()
+
+
+def make_private_dir(path: str) -> str:
+    """
+    Create the directory :code:`path` with mode 0700, or check that an
+    existing one is owned by the current user and not accessible by others.
+    On Windows, the permissions are not checked.
+
+    Parameters
+    ----------
+    path
+        The directory to create; the parent directories must exist
+
+    Returns
+    -------
+    str
+        :code:`path`
+
+    Raises
+    ------
+    PermissionError
+        If :code:`path` exists, but belongs to another user, is accessible
+        by other users, or is not a directory
+    """
+    try:
+        os.mkdir(path, mode=0o700)
+    except FileExistsError:
+        pass
+    if sys.platform == 'win32':
+        return path
+    # don't follow symlinks that someone else may have planted:
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user (uid {st.st_uid})")
+    if st.st_mode & 0o077:
+        raise PermissionError(
+            f"{path} is accessible by other users (mode {stat.S_IMODE(st.st_mode):o}), "
+            "it should have mode 0700"
+        )
+    return path
+
+
+def get_private_dir(base: Optional[str] = None, name: str = "libertem") -> str:
+    """
+    A directory that is private to the current user, created on first use.
+
+    Parameters
+    ----------
+    base
+        Parent directory, defaults to :code:`XDG_RUNTIME_DIR` if it is set,
+        and the temporary directory otherwise
+    name
+        Prefix of the directory name, which is suffixed with the user ID
+
+    Raises
+    ------
+    PermissionError
+        See :func:`make_private_dir`
+    """
+    if base is None:
+        base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return make_private_dir(os.path.join(base, f"{name}-{_get_user_suffix()}"))
+
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: Optional[float] = None) -> Generator[None, None, None]:
+    """
+    Hold an exclusive lock on the file :code:`path`, which is created with
+    mode 0600 if it doesn't exist. The lock is shared between processes
+    and between threads of the same process, and it is released if the
+    process exits.
+
+    Parameters
+    ----------
+    path
+        The lock file, usually in a directory from :func:`get_private_dir`
+    timeout
+        Raise :code:`TimeoutError` if the lock couldn't be acquired after
+        this many seconds, wait forever by default
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        t0 = time.monotonic()
+        while not _try_lock(fd):
+            if timeout is not None and time.monotonic() - t0 > timeout:
+                raise TimeoutError(f"could not lock {path} in {timeout}s")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+if sys.platform == 'win32':
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        # `flock` locks belong to the open file description, so separate
+        # `open` calls in threads of the same process exclude each other:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(fd: int):
+        fcntl.flock(fd, fcntl.LOCK_UN)
@@ -84,3 +84,56 @@ def main(kind, scheduler, local_directory, n_cpus, cudas,
             log_level=numeric_level,
             preload=preload,
         )
+
+
+@click.command()
+@click.option('-a', '--address', type=str, default=None,
+              help='TLS address to listen on, like tls://127.0.0.1:8789. Default: a free port '
+              'on localhost, which is stored in the private pool directory of the current user.')
+@click.option('-c', '--n-cpus', type=int, default=None,
+              help='Number of CPUs to use, defaults to number of CPU cores without hyperthreading.')
+@click.option('--cpus', type=str, default=None,
+              help='List of CPU worker IDs to use instead of --n-cpus.')
+@click.option('-u', '--cudas', type=str, default=None,
+              help='List of CUDA device IDs to use, defaults to all detected CUDA devices. '
+              'Use "" to deactivate CUDA.')
+@click.option('-t', '--idle-timeout', type=float, default=None,
+              help='Shut down after being idle for this many seconds. Default: run until '
+              'shut down explicitly.')
+@click.option('-l', '--log-level', help=f"set logging level. Default is 'info'. {log_values}",
+              default='INFO')
+@click.option('--preload', help=preload_help,
+              default=None, type=str, multiple=True)
+def pool(address, n_cpus, cpus, cudas, idle_timeout, log_level, preload: Tuple[str]):
+    """
+    Run a long-lived local worker pool that several LiberTEM Contexts
+    can attach to, see :mod:`libertem.executor.shared_pool`.
+    """
+    from libertem.cli_tweaks import console_tweaks
+    from libertem.executor.shared_pool import run_pool
+    console_tweaks()
+
+    numeric_level = getattr(logging, log_level.upper(), None)
+    if not isinstance(numeric_level, int):
+        raise click.UsageError(f'Invalid log level: {log_level}.\n{log_values}')
+    logging.basicConfig(level=numeric_level)
+
+    if cpus is not None:
+        if n_cpus is not None:
+            raise click.UsageError('--cpus and --n-cpus are mutually exclusive')
+        cpus = list(map(int, cpus.split(','))) if cpus else []
+    else:
+        cpus = n_cpus
+
+    if cudas == '':
+        cudas = []
+    elif cudas is not None:
+        cudas = list(map(int, cudas.split(',')))
+
+    run_pool(
+        address=address,
+        cpus=cpus,
+        cudas=cudas,
+        idle_timeout=idle_timeout,
+        preload=preload,
+    )
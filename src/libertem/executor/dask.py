@@ -13,6 +13,7 @@ from libertem.common.threading import set_num_threads_env
 from .base import BaseJobExecutor, AsyncAdapter
 from libertem.common.executor import (
     JobCancelledError, TaskCommHandler, TaskProtocol, Environment, WorkerContext,
+    merge_group_size,
 )
 from libertem.common.async_utils import sync_to_async
 from libertem.common.scheduler import Worker, WorkerSet
@@ -387,10 +388,17 @@ class DaskJobExecutor(CommonDaskMixin, BaseJobExecutor):
     lt_resources : bool
         Specify if the cluster has LiberTEM resource tags and environment
         variables for GPU processing. Autodetected by default.
+    tree_reduce : bool
+        Process several consecutive partitions per task and merge their
+        results on the workers, so that the main node only receives about two
+        results per worker. See :class:`~libertem.udf.base.MergedUDFTask`.
+
+        .. versionadded:: 0.12.0
     '''
     def __init__(self, client: dd.Client, is_local: bool = False,
-                lt_resources: bool = None):
+                lt_resources: bool = None, tree_reduce: bool = False):
         self.is_local = is_local
+        self.tree_reduce = tree_reduce
         self.client = client
         if lt_resources is None:
             lt_resources = self.has_libertem_resources()
@@ -401,6 +409,14 @@ class DaskJobExecutor(CommonDaskMixin, BaseJobExecutor):
     def scatter(self, obj):
         yield self.client.scatter(obj, broadcast=True)
 
+    def get_merge_group_size(self, num_tasks: int) -> int:
+        if not self.tree_reduce:
+            return 1
+        workers = self.get_available_workers()
+        if self.lt_resources:
+            workers = workers.filter(lambda w: bool(w.resources.get('compute', False)))
+        return merge_group_size(num_tasks, num_workers=workers.concurrency())
+
     def run_tasks(
         self,
         tasks: Iterable[TaskProtocol],
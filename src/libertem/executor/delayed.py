@@ -28,6 +28,8 @@ from .utils import delayed_unpack
 
 
 class DelayedUDFRunner(UDFRunner):
+    _supports_worker_accumulation = False
+
     def __init__(self, udfs: List[UDF], debug: bool = False, progress_reporter: Any = None):
         self._part_results = defaultdict(lambda: {})
         super().__init__(udfs, debug=debug)
@@ -21,12 +21,15 @@ from libertem.common.backend import set_use_cpu, set_use_cuda
 
 from libertem.common.executor import (
     Environment, TaskProtocol, WorkerContext, WorkerQueue,
-    WorkerQueueEmpty, TaskCommHandler, SimpleMPWorkerQueue,
+    WorkerQueueEmpty, TaskCommHandler, SimpleMPWorkerQueue, merge_group_size,
 )
 from libertem.common.scheduler import Worker, WorkerSet
 from libertem.common.tracing import add_partition_to_span, attach_to_parent, maybe_setup_tracing
 
 from .utils import assign_cudas
+from .utils.shmqueue import (
+    ShmPayload, dump_shm_payload, load_shm_payload, discard_shm_payload,
+)
 from .base import BaseJobExecutor
 
 try:
@@ -35,6 +38,7 @@ except ImportError:
     prctl = None
 
 if TYPE_CHECKING:
+    from multiprocessing import shared_memory
     from opentelemetry.trace import SpanContext
 
 tracer = trace.get_tracer(__name__)
@@ -182,6 +186,7 @@ def worker_run_task(
     queues: WorkerQueues,
     worker_idx: int,
     env: Environment,
+    shm_min_size: Optional[int] = None,
 ):
     """
     Called from the worker main loop when a RUN_TASK message is received
@@ -203,6 +208,10 @@ def worker_run_task(
 
     env
         The Environment for preparing thread counts etc. for the UDF run
+
+    shm_min_size
+        Result buffers of at least this size in bytes are sent back
+        via shared memory
     """
     with tracer.start_as_current_span("RUN_TASK") as span:
         try:
@@ -216,9 +225,13 @@ def worker_run_task(
             partition = task.get_partition()
             add_partition_to_span(partition)
             result = task(params, env)
+            payload, shm = dump_shm_payload(result, min_size=shm_min_size)
+            if shm is not None:
+                # the main process unlinks the segment after reading the result:
+                shm.close()
             queues.response.put({
                 "type": "RESULT",
-                "result": result,
+                "result": payload,
                 "task_id": header["task_id"],
                 "uuid": header["uuid"],
                 "worker_id": worker_idx,
@@ -272,11 +285,26 @@ def worker_run_function(header, queues, worker_idx):
             })
 
 
+def _close_scattered_shm(shm_list: List["shared_memory.SharedMemory"]):
+    """
+    Close the shared memory segments in :code:`shm_list`, keeping those that
+    are still referenced by live objects for a later attempt.
+    """
+    still_used = []
+    for shm in shm_list:
+        try:
+            shm.close()
+        except BufferError:
+            still_used.append(shm)
+    shm_list[:] = still_used
+
+
 def worker_loop(
     queues: WorkerQueues,
     work_mem: Dict,
     worker_idx: int,
-    env: Environment
+    env: Environment,
+    shm_min_size: Optional[int] = None,
 ):
     """
     The worker main loop, called when the worker setup is done.
@@ -297,7 +325,15 @@ def worker_loop(
 
     env
         The Environment for preparing thread counts etc. for the UDF run
+
+    shm_min_size
+        Result buffers of at least this size in bytes are sent back
+        via shared memory
     """
+    # shared memory backing scattered values, by key:
+    work_shm: Dict[str, "shared_memory.SharedMemory"] = {}
+    # segments of deleted values that could not be closed yet:
+    stale_shm: List["shared_memory.SharedMemory"] = []
     while True:
         try:
             with queues.request.get() as msg:
@@ -305,7 +341,9 @@ def worker_loop(
                 header_type = header["type"]
                 if header_type == "RUN_TASK":
                     with attach_to_parent(header["span_context"]):
-                        worker_run_task(header, work_mem, queues, worker_idx, env)
+                        worker_run_task(
+                            header, work_mem, queues, worker_idx, env, shm_min_size,
+                        )
                         # NOTE: in case of an error, need to drain the request queue
                         # (anything that is left over from the detector-specific
                         # data that was sent in `TaskCommHandler.handle_task`):
@@ -325,7 +363,6 @@ def worker_loop(
                                     if header_type == "END_TASK":
                                         break
                 elif header_type == "SCATTER":
-                    # FIXME: array data could be transferred and stored in SHM instead
                     key = header["key"]
                     if key in work_mem:
                         queues.response.put({
@@ -334,7 +371,16 @@ def worker_loop(
                             "worker_id": worker_idx,
                         })
                         continue
-                    work_mem[key] = header["value"]
+                    try:
+                        value, shm = load_shm_payload(header["payload"])
+                    except FileNotFoundError:
+                        # the main process has already left the `scatter`
+                        # context and unlinked the segment, which means no
+                        # tasks that use this value will be sent to us:
+                        continue
+                    work_mem[key] = value
+                    if shm is not None:
+                        work_shm[key] = shm
                     continue
                 elif header_type == "RUN_FUNCTION":
                     with attach_to_parent(header["span_context"]):
@@ -343,6 +389,9 @@ def worker_loop(
                     key = header["key"]
                     if key in work_mem:
                         del work_mem[key]
+                    if key in work_shm:
+                        stale_shm.append(work_shm.pop(key))
+                    _close_scattered_shm(stale_shm)
                     continue
                 elif header_type == "SHUTDOWN":
                     with attach_to_parent(header["span_context"]):
@@ -398,6 +447,7 @@ def pipelined_worker(
     spec: WorkerSpec,
     span_context: "SpanContext",
     early_setup: Optional[Callable] = None,
+    shm_min_size: Optional[int] = None,
 ):
     """
     Main pipelined worker function.
@@ -420,6 +470,10 @@ def pipelined_worker(
     early_setup
         Function that will be called very early in the setup code,
         allowing to inject custom functionality or specific warmup code
+
+    shm_min_size
+        Result buffers of at least this size in bytes are sent back
+        via shared memory
     """
     # FIXME: propagate to parent process with a pipe or similar?
     sys.stderr.close()
@@ -461,7 +515,7 @@ def pipelined_worker(
                 "worker_id": worker_idx,
             })
 
-        return worker_loop(queues, work_mem, worker_idx, env)
+        return worker_loop(queues, work_mem, worker_idx, env, shm_min_size)
     except Exception as e:
         queues.response.put({
             "type": "ERROR",
@@ -538,6 +592,17 @@ def _order_results(results_in: ResultWithID) -> ResultT:
         last_sent_id = task_id
 
 
+def _least_loaded_worker(worker_in_flight: List[int], start: int) -> int:
+    """
+    Return the index of the worker with the fewest tasks in flight. Ties are
+    broken in round-robin order, beginning at :code:`start`, so that work is
+    spread evenly over idle workers.
+    """
+    num_workers = len(worker_in_flight)
+    order = [(start + i) % num_workers for i in range(num_workers)]
+    return min(order, key=lambda idx: worker_in_flight[idx])
+
+
 def _make_spec(
     cpus: Union[int, Iterable[int]],
     cudas: Union[int, Iterable[int]],
@@ -604,6 +669,14 @@ def _raise_from_msg(msg: Dict, err_prefix: str):
         raise RuntimeError(f"{err_prefix}: {msg['error']}")
 
 
+def _discard_result(msg: Dict):
+    """
+    Release resources held by a RESULT message that is not going to be used
+    """
+    if msg.get("type") == "RESULT" and isinstance(msg.get("result"), ShmPayload):
+        discard_shm_payload(msg["result"])
+
+
 def _inspect_startup(msg, span):
     if msg["type"] == "ERROR":
         _raise_from_msg(msg, "error on startup")
@@ -644,6 +717,46 @@ class PipelinedExecutor(BaseJobExecutor):
         Callable that will be run as early as possible on each worker process.
         Useful for custom warmup code or testing.
 
+    shm_min_size
+        Array data of at least this size in bytes, both in scattered parameters
+        and in task results, is transferred via shared memory instead of
+        being pickled through the queues. Scattered parameters are then shared
+        read-only between all workers, so UDFs that modify their parameters
+        in place need to copy them first. :code:`None` disables the use of
+        shared memory, which is also the case on Python 3.7.
+
+        .. versionadded:: 0.12.0
+
+    scheduling
+        How tasks are assigned to workers. With :code:`'round-robin'`, all
+        tasks are distributed to the workers up front, in a fixed pattern. With
+        :code:`'dynamic'`, each worker only holds up to :code:`max_tasks_per_worker`
+        tasks at a time, and the next task is given to the worker that has
+        the fewest tasks in flight. This reduces tail latency if workers
+        run at different speeds, or if partitions differ in cost, for example
+        because of a ROI. Dynamic scheduling works best with more partitions than
+        workers, which can be set using the :code:`num_partitions` parameter
+        of most datasets.
+
+        .. versionadded:: 0.12.0
+
+    max_tasks_per_worker
+        For :code:`scheduling='dynamic'`, the maximum number of tasks that
+        are queued on a single worker. Values larger than one allow the next
+        task to be sent while the current one is running.
+
+        .. versionadded:: 0.12.0
+
+    tree_reduce
+        Process several consecutive partitions per task and merge their results
+        on the workers, so that the main node only receives about two results
+        per worker. This removes the main node as a bottleneck for merging large
+        results, like sig-shaped buffers for big detectors, at the cost of
+        coarser progress reporting. See
+        :class:`~libertem.udf.base.MergedUDFTask`.
+
+        .. versionadded:: 0.12.0
+
     Note
     ----
     This executor is not thread-safe - concurrent calls into :meth:`run_tasks` or
@@ -656,13 +769,27 @@ class PipelinedExecutor(BaseJobExecutor):
         startup_timeout: float = 30.0,
         cleanup_timeout: float = 10.0,
         early_setup: Optional[Callable] = None,
+        shm_min_size: Optional[int] = 2**20,
+        scheduling: Literal['round-robin', 'dynamic'] = 'round-robin',
+        max_tasks_per_worker: int = 2,
+        tree_reduce: bool = False,
     ) -> None:
+        if scheduling not in ('round-robin', 'dynamic'):
+            raise ValueError(
+                f"unknown scheduling {scheduling!r}, expected 'round-robin' or 'dynamic'"
+            )
+        if max_tasks_per_worker < 1:
+            raise ValueError("max_tasks_per_worker must be at least 1")
         self._pin_workers = pin_workers
         if spec is None:
             spec = self._default_spec()
         self._spec = spec
         self._closed = True
         self._early_setup = early_setup
+        self._shm_min_size = shm_min_size
+        self._scheduling = scheduling
+        self._max_tasks_per_worker = max_tasks_per_worker
+        self._tree_reduce = tree_reduce
 
         # timeout for cleanup, either from exception or when joining processes
         self._cleanup_timeout = cleanup_timeout
@@ -680,6 +807,7 @@ class PipelinedExecutor(BaseJobExecutor):
                     pipelined_worker,
                     pin=self._pin_workers,
                     early_setup=self._early_setup,
+                    shm_min_size=self._shm_min_size,
                 ),
                 spec=self._spec,
             )
@@ -769,6 +897,8 @@ class PipelinedExecutor(BaseJobExecutor):
         in_flight = [0]
         id_to_task = {}
         tasks_uuid = str(uuid.uuid4())
+        # number of tasks in flight, per worker:
+        worker_in_flight = [0] * self._pool.size
 
         try:
             self._validate_worker_state()
@@ -785,28 +915,37 @@ class PipelinedExecutor(BaseJobExecutor):
                                 "mismatched result, ignoring: %s != %s",
                                 result.get('uuid'), tasks_uuid,
                             )
+                            _discard_result(result)
                             return
                         in_flight[0] -= 1
+                        worker_in_flight[result["worker_id"]] -= 1
                         if result["type"] == "ERROR":
                             _raise_from_msg(result, "failed to run tasks")
                         result_task_id = result["task_id"]
-                        yield (result["result"], id_to_task[result_task_id], result_task_id)
+                        task_result, _ = load_shm_payload(result["result"], copy=True)
+                        yield (task_result, id_to_task[result_task_id], result_task_id)
                         del id_to_task[result_task_id]
                         assert len(id_to_task) == in_flight[0]
                 except WorkerQueueEmpty:
                     self._validate_worker_state()
 
             for task_idx, task in enumerate(tasks):
+                if self._scheduling == 'dynamic':
+                    # wait until any worker can take on another task, and
+                    # give the task to the one with the shortest queue:
+                    while min(worker_in_flight) >= self._max_tasks_per_worker:
+                        yield from yield_result_if_found(block=True, timeout=0.1)
+                    worker_idx = _least_loaded_worker(worker_in_flight, start=task_idx)
+                else:
+                    # NOTE: this implements simple round-robin "scheduling"
+                    worker_idx = task_idx % self._pool.size
+
                 in_flight[0] += 1
+                worker_in_flight[worker_idx] += 1
                 id_to_task[task_idx] = task
 
                 assert len(id_to_task) == in_flight[0]
 
-                # NOTE: this implements simple round-robin "scheduling";
-                # as noted by @matbryan52 selecting the worker with the
-                # currently shortest request queue could be a simple extension
-                # and provide minimal load balancing
-                worker_idx = task_idx % self._pool.size
                 worker_queues = self._pool.get_worker_queues(worker_idx)
                 worker_queues.request.put({
                     "type": "RUN_TASK",
@@ -873,6 +1012,7 @@ class PipelinedExecutor(BaseJobExecutor):
                 ) as (result, _):
                     t0 = time.time()
                     in_flight -= 1
+                    _discard_result(result)
                     # we only raise the first exception; log the others here:
                     if result["type"] == "ERROR":
                         logger.error(f"Error response from worker: {result['error']}")
@@ -896,6 +1036,11 @@ class PipelinedExecutor(BaseJobExecutor):
                     tasks, params_handle, cancel_id, task_comm_handler,
                 ))
 
+    def get_merge_group_size(self, num_tasks: int) -> int:
+        if not self._tree_reduce:
+            return 1
+        return merge_group_size(num_tasks, num_workers=len(self._spec))
+
     def get_available_workers(self) -> WorkerSet:
         resources_by_kind = {
             "CPU": {"compute": 1, "CPU": 1, "ndarray": 1},
@@ -933,6 +1078,7 @@ class PipelinedExecutor(BaseJobExecutor):
                     try:
                         with worker_info.queues.response.get(block=False) as msg:
                             logger.warning(f"got message on close: {msg[0]}")
+                            _discard_result(msg[0])
                     except WorkerQueueEmpty:
                         break
                 worker_info.process.join(timeout=self._cleanup_timeout)
@@ -981,7 +1127,7 @@ class PipelinedExecutor(BaseJobExecutor):
         result = {}
         for idx, worker_info in enumerate(self._pool.workers):
             result[worker_info.spec["name"]] = self._run_function(
-                fn, worker_idx=idx, *args, **kwargs
+                fn, idx, *args, **kwargs
             )
         return result
 
@@ -992,13 +1138,16 @@ class PipelinedExecutor(BaseJobExecutor):
     def scatter(self, obj):
         self._validate_worker_state()
         key = str(uuid.uuid4())
-        for worker_info in self._pool.workers:
-            worker_info.queues.request.put({
-                "type": "SCATTER",
-                "key": key,
-                "value": obj,
-            })
+        # pickle only once, and put large arrays into shared memory that
+        # all workers map read-only:
+        payload, shm = dump_shm_payload(obj, min_size=self._shm_min_size)
         try:
+            for worker_info in self._pool.workers:
+                worker_info.queues.request.put({
+                    "type": "SCATTER",
+                    "key": key,
+                    "payload": payload,
+                })
             yield key
         finally:
             if not self._closed:
@@ -1007,6 +1156,11 @@ class PipelinedExecutor(BaseJobExecutor):
                         "type": "DELETE",
                         "key": key,
                     })
+            if shm is not None:
+                # workers that already received the value keep their mapping;
+                # the others skip it, as they won't receive any tasks for it:
+                shm.close()
+                shm.unlink()
 
     def map(self, fn, iterable):
         # FIXME: replace with efficient impl if needed
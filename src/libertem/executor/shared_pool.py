@@ -0,0 +1,423 @@
+"""
+A long-lived local worker pool that several :class:`~libertem.api.Context`
+instances, for example in different notebook kernels, can attach to.
+
+The pool is a Dask scheduler with LiberTEM workers that runs in a separate,
+detached process and listens on a local TCP port. Its worker processes keep
+their imports, numba JIT caches and other per-process state between runs,
+so short interactive jobs don't pay for starting and warming up workers.
+
+Since anyone who can submit work to the pool can run code as its owner, the
+pool only accepts TLS connections with a certificate that is private to the
+user who started it. The certificate and the address of the running pool are
+kept in a directory that only this user can access, see :func:`get_pool_dir`.
+Other users on the same machine can neither connect to the pool, nor trick a
+:class:`~libertem.api.Context` into attaching to their own pool.
+
+.. versionadded:: 0.12.0
+"""
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Iterable, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import dask
+from dask import distributed as dd
+
+from libertem.common.runtime import file_lock, get_private_dir
+from libertem.common.threading import set_num_threads_env
+from .dask import DaskJobExecutor, cluster_spec
+
+log = logging.getLogger(__name__)
+
+#: Host that the pool listens on if no address is given. The port is chosen
+#: by the operating system, and stored in :func:`get_pool_dir`.
+DEFAULT_HOST = "127.0.0.1"
+
+# names of the files in the pool directory:
+_CREDENTIALS_NAME = "pool.pem"
+_ADDRESS_NAME = "pool-address"
+_LOCK_NAME = "start.lock"
+
+# modules that are imported by the workers on startup, in addition to
+# `libertem.preload`, which is always included by `cluster_spec`:
+WARMUP_PRELOAD = ('libertem.udf.base', 'libertem.api')
+
+# scheduler metadata key that is set once all workers are running:
+_READY_KEY = ['libertem-shared-pool', 'num_workers']
+
+
+def get_pool_dir() -> str:
+    """
+    The directory with the credentials and the address of the pool of the
+    current user. It is created with mode 0700 on first use, and an existing
+    directory is only used if it belongs to the current user and is not
+    accessible by anyone else.
+    """
+    return get_private_dir(name="libertem-pool")
+
+
+def _write_exclusive(path: str, content: str) -> bool:
+    # write to a temporary file first, so that other processes never see a
+    # partial file, and only create `path` if it doesn't exist yet:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.link(tmp_path, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(tmp_path)
+
+
+def get_security() -> dd.Security:
+    """
+    TLS settings for the pool of the current user, with a self-signed
+    certificate that is used by the scheduler, the workers and the clients.
+    Connections in both directions are only accepted with this
+    certificate. It is created on first use, which requires the
+    :code:`cryptography` package.
+    """
+    path = os.path.join(get_pool_dir(), _CREDENTIALS_NAME)
+    if not os.path.exists(path):
+        temporary = dd.Security.temporary()
+        # certificate and key in one file, so that they are replaced together:
+        _write_exclusive(path, temporary.tls_scheduler_cert + temporary.tls_scheduler_key)
+    return dd.Security(
+        tls_ca_file=path,
+        tls_client_cert=path,
+        tls_scheduler_cert=path,
+        tls_worker_cert=path,
+        require_encryption=True,
+    )
+
+
+def _normalize_address(address: str) -> str:
+    parsed = urlparse(address if "://" in address else f"tls://{address}")
+    if parsed.scheme != "tls":
+        raise ValueError(
+            f"the shared pool only accepts TLS connections, use tls://{parsed.netloc} "
+            f"instead of {address}"
+        )
+    return parsed.geturl()
+
+
+def _read_address() -> Optional[str]:
+    try:
+        with open(os.path.join(get_pool_dir(), _ADDRESS_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def get_default_address() -> Optional[str]:
+    """
+    The address of the pool of the current user, from the
+    :code:`LIBERTEM_POOL_ADDRESS` environment variable if it is set,
+    or from the pool directory. :code:`None` if it is not known.
+    """
+    address = os.environ.get("LIBERTEM_POOL_ADDRESS")
+    if address:
+        return _normalize_address(address)
+    return _read_address()
+
+
+def _publish_address(address: str):
+    path = os.path.join(get_pool_dir(), _ADDRESS_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(address)
+    os.replace(tmp_path, path)
+
+
+def _unpublish_address(address: str):
+    # only remove the address if it wasn't replaced by another pool:
+    if _read_address() == address:
+        try:
+            os.unlink(os.path.join(get_pool_dir(), _ADDRESS_NAME))
+        except FileNotFoundError:
+            pass
+
+
+async def _run_pool(
+    address: Optional[str], spec: dict, idle_timeout: Optional[float], security: dd.Security,
+):
+    if address is None:
+        host, port = DEFAULT_HOST, 0
+    else:
+        parsed = urlparse(address)
+        host, port = parsed.hostname, parsed.port
+    async with dd.Scheduler(
+        host=host,
+        port=port,
+        protocol="tls",
+        security=security,
+        dashboard=False,
+        idle_timeout=idle_timeout,
+    ) as scheduler:
+        workers = [
+            worker_spec['cls'](
+                scheduler.address, name=name, security=security, **worker_spec['options']
+            )
+            for name, worker_spec in spec.items()
+        ]
+        await asyncio.gather(*workers)
+        scheduler.set_metadata(keys=_READY_KEY, value=len(workers))
+        if address is None:
+            _publish_address(scheduler.address)
+        log.info("shared pool with %d workers listening on %s", len(workers), scheduler.address)
+        try:
+            await scheduler.finished()
+            await asyncio.gather(*[w.close() for w in workers])
+        finally:
+            if address is None:
+                _unpublish_address(scheduler.address)
+
+
+def run_pool(
+    address: Optional[str] = None,
+    cpus: Optional[Union[int, Iterable[int]]] = None,
+    cudas: Optional[Union[int, Iterable[int]]] = None,
+    has_cupy: Optional[bool] = None,
+    idle_timeout: Optional[float] = None,
+    preload: Tuple[str, ...] = (),
+):
+    """
+    Run the shared pool in the current process, blocking until it
+    is shut down using :func:`shutdown_pool` or the idle timeout expires.
+    Usually, you will want to use :func:`start_pool` or the
+    :code:`libertem-pool` command instead.
+
+    Parameters
+    ----------
+    address
+        Address for the scheduler to listen on, like :code:`tls://127.0.0.1:8789`.
+        By default, a free port on :data:`DEFAULT_HOST` is chosen, and the
+        address is stored in :func:`get_pool_dir`, where :func:`connect_pool`
+        finds it.
+
+    cpus, cudas, has_cupy
+        Devices to start workers for, as in :func:`~libertem.executor.dask.cluster_spec`.
+        Defaults to the result of :func:`libertem.utils.devices.detect`.
+
+    idle_timeout
+        Shut down after no work was done for this many seconds.
+        :code:`None` means the pool runs until it is shut down explicitly.
+
+    preload
+        Additional modules to preload on the workers
+    """
+    from libertem.utils.devices import detect
+    if address is not None:
+        address = _normalize_address(address)
+    security = get_security()
+    detected = detect()
+    spec = cluster_spec(
+        cpus=detected['cpus'] if cpus is None else cpus,
+        cudas=detected['cudas'] if cudas is None else cudas,
+        has_cupy=detected['has_cupy'] if has_cupy is None else has_cupy,
+        name='shared-pool',
+        preload=tuple(preload) + WARMUP_PRELOAD,
+    )
+    with set_num_threads_env(n=1):
+        # Mitigation for https://github.com/dask/distributed/issues/6776
+        with dask.config.set({"distributed.worker.profile.enabled": False}):
+            asyncio.run(_run_pool(address, spec, idle_timeout, security))
+
+
+def _connect(address: str, timeout: float) -> dd.Client:
+    return dd.Client(
+        address=address, timeout=timeout, set_as_default=False, security=get_security(),
+    )
+
+
+def _is_running(address: Optional[str]) -> bool:
+    if address is None:
+        return False
+    try:
+        with _connect(address, timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def start_pool(
+    address: Optional[str] = None,
+    cpus: Optional[Union[int, Iterable[int]]] = None,
+    cudas: Optional[Union[int, Iterable[int]]] = None,
+    idle_timeout: Optional[float] = None,
+    preload: Tuple[str, ...] = (),
+    startup_timeout: float = 120.0,
+) -> str:
+    """
+    Start the shared pool in a detached background process, and wait until
+    all workers are running. The pool keeps running after the calling
+    process has exited.
+
+    If the pool is already running, or is being started by another process,
+    it is not started a second time, and this function only waits until it
+    is ready.
+
+    Parameters
+    ----------
+    address
+        Address for the scheduler to listen on, see :func:`run_pool`
+
+    cpus, cudas
+        Devices to start workers for, defaults to all detected devices.
+        As in :func:`~libertem.executor.dask.cluster_spec`, an integer is
+        the number of workers, and an iterable contains the IDs of the workers.
+
+    idle_timeout
+        Shut down after no work was done for this many seconds
+
+    preload
+        Additional modules to preload on the workers
+
+    startup_timeout
+        Raise :code:`TimeoutError` if the pool isn't ready after this many seconds
+
+    Returns
+    -------
+    str
+        The address of the pool
+    """
+    if address is not None:
+        address = _normalize_address(address)
+    # credentials are created here rather than by the pool, so that
+    # an error is raised in the calling process:
+    get_security()
+    # checking for a running pool and spawning a new one happens under a lock,
+    # so that concurrent callers don't start more than one pool:
+    with file_lock(os.path.join(get_pool_dir(), _LOCK_NAME)):
+        running = _read_address() if address is None else address
+        if _is_running(running):
+            return _wait_ready(address, timeout=startup_timeout)
+        if address is None and running is not None:
+            # don't wait for a pool that is no longer running:
+            _unpublish_address(running)
+        _spawn_pool(address, cpus, cudas, idle_timeout, preload)
+        return _wait_ready(address, timeout=startup_timeout)
+
+
+def _spawn_pool(
+    address: Optional[str],
+    cpus: Optional[Union[int, Iterable[int]]],
+    cudas: Optional[Union[int, Iterable[int]]],
+    idle_timeout: Optional[float],
+    preload: Tuple[str, ...],
+):
+    args = [
+        sys.executable, '-c', 'from libertem.executor.cli import pool; pool()',
+    ]
+    if address is not None:
+        args.extend(['--address', address])
+    if cpus is not None:
+        if isinstance(cpus, int):
+            args.extend(['--n-cpus', str(cpus)])
+        else:
+            args.extend(['--cpus', ','.join(map(str, cpus))])
+    if cudas is not None:
+        if isinstance(cudas, int):
+            cudas = range(cudas)
+        args.extend(['--cudas', ','.join(map(str, cudas))])
+    if idle_timeout is not None:
+        args.extend(['--idle-timeout', str(idle_timeout)])
+    for item in preload:
+        args.extend(['--preload', item])
+    if sys.platform == 'win32':
+        kwargs = {
+            'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP,
+        }
+    else:
+        kwargs = {'start_new_session': True}
+    subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs
+    )
+
+
+def _wait_ready(address: Optional[str], timeout: float) -> str:
+    """
+    Wait until all workers of the pool at :code:`address`, or the pool
+    of the current user, are running, and return its address.
+    """
+    t0 = time.monotonic()
+    while True:
+        remaining = timeout - (time.monotonic() - t0)
+        if remaining <= 0:
+            where = "of the current user" if address is None else f"at {address}"
+            raise TimeoutError(f"shared pool {where} did not start in {timeout}s")
+        current = _read_address() if address is None else address
+        if current is not None:
+            try:
+                with _connect(current, timeout=min(remaining, 5)) as client:
+                    num_workers = client.get_metadata(_READY_KEY, default=None)
+                    if num_workers is not None:
+                        client.wait_for_workers(num_workers, timeout=remaining)
+                        return current
+            except OSError:
+                pass
+        time.sleep(0.2)
+
+
+def connect_pool(
+    address: Optional[str] = None,
+    start: bool = True,
+    startup_timeout: float = 120.0,
+    **kwargs,
+) -> DaskJobExecutor:
+    """
+    Create a :class:`~libertem.executor.dask.DaskJobExecutor` that is attached
+    to the shared pool. Closing the executor only disconnects from the pool,
+    which keeps running.
+
+    Parameters
+    ----------
+    address
+        Address of the pool, defaults to the pool of the current user,
+        see :func:`get_default_address`
+
+    start
+        Start the pool using :func:`start_pool` if it isn't running yet
+
+    startup_timeout
+        Wait this many seconds for the pool to become ready
+
+    **kwargs
+        Passed to :func:`start_pool`
+    """
+    if address is None:
+        address = os.environ.get("LIBERTEM_POOL_ADDRESS") or None
+    if address is not None:
+        address = _normalize_address(address)
+    if start:
+        address = start_pool(address, startup_timeout=startup_timeout, **kwargs)
+    else:
+        address = _wait_ready(address, timeout=startup_timeout)
+    return DaskJobExecutor.connect(address, client_kwargs={'security': get_security()})
+
+
+def shutdown_pool(address: Optional[str] = None):
+    """
+    Shut down the shared pool, including all its workers.
+    """
+    if address is None:
+        address = get_default_address()
+        if address is None:
+            raise RuntimeError("the shared pool of the current user is not running")
+    else:
+        address = _normalize_address(address)
+    with _connect(address, timeout=10) as client:
+        client.shutdown()
@@ -1,8 +1,10 @@
 import multiprocessing as mp
 import contextlib
 import math
+import pickle
 import queue
-from typing import TYPE_CHECKING, Any, Generator, NamedTuple, Optional, Tuple
+import sys
+from typing import TYPE_CHECKING, Any, Generator, List, NamedTuple, Optional, Tuple
 
 import cloudpickle
 import numpy as np
@@ -12,6 +14,10 @@ from libertem.common.executor import WorkerQueue, WorkerQueueEmpty
 if TYPE_CHECKING:
     from multiprocessing import shared_memory
 
+# out-of-band pickling (protocol 5) and `multiprocessing.shared_memory` are
+# only available from Python 3.8; before that, payloads are pickled in-band:
+HAS_OUT_OF_BAND = sys.version_info >= (3, 8)
+
 
 class PoolAllocation(NamedTuple):
     shm_name: str
@@ -110,6 +116,135 @@ class PoolShmAllocator:
         return self._shm.name
 
 
+class ShmPayload(NamedTuple):
+    """
+    A pickled object, where large contiguous buffers (i.e. the data of
+    numpy arrays) are stored out-of-band in a shared memory segment instead
+    of being part of the pickled bytes.
+    """
+    data: bytes
+    shm_name: Optional[str]
+    buffers: Tuple[Tuple[int, int], ...]  # (offset, size) pairs into the shm segment
+
+
+def dump_shm_payload(
+    obj: Any,
+    min_size: Optional[int],
+) -> Tuple[ShmPayload, Optional["shared_memory.SharedMemory"]]:
+    """
+    Pickle :code:`obj`, moving all buffers that are at least :code:`min_size`
+    bytes large into a single, newly created shared memory segment.
+
+    Returns the payload, which is cheap to send via a queue, and the shared
+    memory segment, if one was created. The caller is responsible for closing
+    the segment, and for making sure it is unlinked after use, either by
+    calling :code:`unlink` directly or by consuming the payload with
+    :func:`load_shm_payload` using :code:`copy=True`.
+
+    Parameters
+    ----------
+    obj
+        The object to pickle
+
+    min_size
+        Buffers smaller than this size in bytes are pickled in-band as usual.
+        :code:`None` disables the use of shared memory, which is also the
+        case on Python versions older than 3.8.
+    """
+    if min_size is None or not HAS_OUT_OF_BAND:
+        return ShmPayload(data=cloudpickle.dumps(obj), shm_name=None, buffers=()), None
+    from multiprocessing import shared_memory
+    large: List[memoryview] = []
+
+    def _buffer_callback(buf: "pickle.PickleBuffer") -> bool:
+        # returning a true value means the buffer is serialized in-band
+        try:
+            raw = buf.raw()
+        except BufferError:
+            # non-contiguous
+            return True
+        if raw.nbytes < min_size:
+            return True
+        large.append(raw)
+        return False
+
+    data = cloudpickle.dumps(obj, protocol=5, buffer_callback=_buffer_callback)
+    if len(large) == 0:
+        return ShmPayload(data=data, shm_name=None, buffers=()), None
+
+    buffers = []
+    offset = 0
+    for raw in large:
+        buffers.append((offset, raw.nbytes))
+        offset += PoolShmAllocator.ALIGN_TO * math.ceil(raw.nbytes / PoolShmAllocator.ALIGN_TO)
+    shm = shared_memory.SharedMemory(create=True, size=offset)
+    for raw, (offset, size) in zip(large, buffers):
+        dest = np.frombuffer(shm.buf, dtype=np.uint8, count=size, offset=offset)
+        dest[:] = np.frombuffer(raw, dtype=np.uint8)
+    del dest
+    return ShmPayload(data=data, shm_name=shm.name, buffers=tuple(buffers)), shm
+
+
+def load_shm_payload(
+    payload: ShmPayload,
+    copy: bool = False,
+) -> Tuple[Any, Optional["shared_memory.SharedMemory"]]:
+    """
+    Load an object that was pickled with :func:`dump_shm_payload`.
+
+    Parameters
+    ----------
+    payload
+        The payload, as returned by :func:`dump_shm_payload`
+
+    copy
+        If :code:`False`, arrays in the loaded object are read-only views
+        into the shared memory segment, which is returned, and needs to be
+        kept open as long as the object is in use. If :code:`True`, the
+        buffers are copied into private memory and the shared memory segment
+        is closed and unlinked, so the payload can't be loaded again.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the shared memory segment was already unlinked
+    """
+    if payload.shm_name is None:
+        return pickle.loads(payload.data), None
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=payload.shm_name, create=False)
+    if copy:
+        try:
+            buffers = [
+                bytearray(shm.buf[offset:offset + size])
+                for offset, size in payload.buffers
+            ]
+            return pickle.loads(payload.data, buffers=buffers), None
+        finally:
+            shm.close()
+            shm.unlink()
+    buffers = [
+        shm.buf[offset:offset + size].toreadonly()
+        for offset, size in payload.buffers
+    ]
+    return pickle.loads(payload.data, buffers=buffers), shm
+
+
+def discard_shm_payload(payload: ShmPayload):
+    """
+    Release the shared memory of a payload that is not going to be loaded.
+    """
+    if payload.shm_name is None:
+        return
+    from multiprocessing import shared_memory
+    try:
+        shm = shared_memory.SharedMemory(name=payload.shm_name, create=False)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
 def drain_queue(q: mp.Queue):
     while True:
         try:
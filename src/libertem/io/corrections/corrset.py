@@ -1,12 +1,23 @@
-import functools
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
 import numpy as np
 import numba
 import sparse
 
 from libertem.common import Slice
-from libertem.io.corrections.detector import correct, RepairDescriptor
+from libertem.io.corrections.detector import (
+    correct, get_correction_kernel, RepairDescriptor, RepairPlan,
+)
+
+if TYPE_CHECKING:
+    import numpy.typing as nt
+
+# (repair plan key, tile shape, sig shape, base shape) -> adjusted tile shape,
+# shared by all tasks of a worker process:
+_adjusted_cache: Dict[Tuple, Tuple[int, ...]] = {}
+_adjusted_cache_lock = threading.Lock()
+_ADJUSTED_CACHE_SIZE = 4096
 
 
 @numba.njit(cache=True)
@@ -96,28 +107,51 @@ class CorrectionSet:
     allow_empty : bool
         Do not throw an exception if a repair environment for an excluded pixel
         is empty. The pixel is left uncorrected in that case.
+
+    keep_integer : bool
+        For integer counting detectors with only excluded pixels: keep the
+        integer dtype of the data instead of converting it to float, and
+        replace the excluded pixels with the rounded mean of their
+        environment. Only has an effect for UDFs that accept the native
+        dtype of the data set.
+
+        .. versionadded:: 0.12.0
+
+    .. versionchanged:: 0.12.0
+        The repair environments of the excluded pixels are computed once, in
+        a :class:`~libertem.io.corrections.detector.RepairPlan` that is sent
+        to the workers together with the corrections.
     """
     def __init__(
         self,
         dark: Optional[np.ndarray] = None,
         gain: Optional[np.ndarray] = None,
         excluded_pixels: Optional[sparse.COO] = None,
-        allow_empty: bool = False
+        allow_empty: bool = False,
+        keep_integer: bool = False,
     ):
         self._dark = dark
         self._gain = gain
+        self._repair_plan = None
         if excluded_pixels is not None:
             excluded_pixels = sparse.COO(excluded_pixels, prune=True)
-        self._excluded_pixels = excluded_pixels
-        self._allow_empty = allow_empty
-        if not allow_empty and excluded_pixels is not None:
-            # Construct the environment for checking so that an exception is thrown
-            # when the CorrectionSet is instantiated and not when workers try to apply it.
-            _ = RepairDescriptor(
+            # This also checks for empty repair environments, so that an exception
+            # is thrown when the CorrectionSet is instantiated and not when
+            # workers try to apply it.
+            self._repair_plan = RepairPlan(
                 sig_shape=excluded_pixels.shape,
                 excluded_pixels=excluded_pixels.coords,
-                allow_empty=False
+                allow_empty=allow_empty,
             )
+        self._excluded_pixels = excluded_pixels
+        self._allow_empty = allow_empty
+        self._keep_integer = keep_integer
+        self._dark_gain_cache = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_dark_gain_cache'] = {}
+        return state
 
     def get_dark_frame(self) -> Optional[np.ndarray]:
         return self._dark
@@ -128,6 +162,15 @@ class CorrectionSet:
     def get_excluded_pixels(self) -> Optional[sparse.COO]:
         return self._excluded_pixels
 
+    def get_repair_plan(self) -> Optional[RepairPlan]:
+        """
+        The repair plan for the excluded pixels, or :code:`None` if no
+        pixels are excluded.
+
+        .. versionadded:: 0.12.0
+        """
+        return self._repair_plan
+
     def have_corrections(self) -> bool:
         corrs = [
             self.get_dark_frame(),
@@ -136,6 +179,21 @@ class CorrectionSet:
         ]
         return any(c is not None for c in corrs)
 
+    def get_read_dtype(self, dtype: "nt.DTypeLike") -> np.dtype:
+        """
+        The dtype that data of type `dtype` is converted to before the
+        corrections are applied.
+
+        .. versionadded:: 0.12.0
+        """
+        dtype = np.dtype(dtype)
+        if not self.have_corrections():
+            return dtype
+        only_repair = self.get_dark_frame() is None and self.get_gain_map() is None
+        if self._keep_integer and only_repair and dtype.kind in ('u', 'i'):
+            return dtype
+        return np.result_type(np.float32, dtype)
+
     def apply(self, data: np.ndarray, tile_slice: Slice) -> None:
         """
         Apply corrections in-place to `data`, cropping the
@@ -164,25 +222,96 @@ class CorrectionSet:
             allow_empty=self._allow_empty
         )
 
-    @functools.lru_cache(maxsize=512)
-    def repair_descriptor(self, sig_slice):
-        excluded_pixels = self.get_excluded_pixels()
-        if excluded_pixels is not None:
-            excluded_pixels = excluded_pixels[sig_slice.get(sig_only=True)]
-            excluded_pixels = excluded_pixels.coords
-        return RepairDescriptor(
-            sig_shape=tuple(sig_slice.shape.sig),
-            excluded_pixels=excluded_pixels,
-            allow_empty=self._allow_empty
+    def get_dark_gain(
+        self, sig_slice: Slice
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        The dark frame and gain map, cropped to `sig_slice` and flattened.
+        The I/O backends apply them while decoding a tile, and then only
+        call :meth:`repair` instead of :meth:`apply`.
+
+        .. versionadded:: 0.12.0
+        """
+        try:
+            return self._dark_gain_cache[sig_slice]
+        except KeyError:
+            pass
+        sig_only = sig_slice.get(sig_only=True)
+        dark_frame = self.get_dark_frame()
+        gain_map = self.get_gain_map()
+        if dark_frame is not None:
+            dark_frame = np.ascontiguousarray(dark_frame[sig_only]).reshape((-1,))
+        if gain_map is not None:
+            gain_map = np.ascontiguousarray(gain_map[sig_only]).reshape((-1,))
+        self._dark_gain_cache[sig_slice] = (dark_frame, gain_map)
+        return dark_frame, gain_map
+
+    def repair(self, data: np.ndarray, tile_slice: Slice) -> None:
+        """
+        Patch the excluded pixels in-place, cropping them to the
+        `tile_slice`. This is the part of :meth:`apply` that remains after
+        the dark frame and gain map from :meth:`get_dark_gain` were applied.
+
+        .. versionadded:: 0.12.0
+        """
+        if self.get_excluded_pixels() is None:
+            return
+        repair_descriptor = self.repair_descriptor(tile_slice.discard_nav())
+        if len(repair_descriptor.exclude_flat) == 0:
+            return
+        kernel = get_correction_kernel(data.dtype)
+        kernel(
+            data.reshape((tile_slice.shape.nav.size, -1)),
+            None,
+            None,
+            repair_descriptor.exclude_flat,
+            repair_descriptor.repair_flat,
+            repair_descriptor.repair_counts,
         )
 
+    def repair_descriptor(self, sig_slice):
+        """
+        The :class:`~libertem.io.corrections.detector.RepairDescriptor` for
+        the part of the signal given by `sig_slice`, cut out of the
+        :meth:`repair plan <get_repair_plan>`.
+
+        .. versionchanged:: 0.12.0
+            Looked up in the repair plan instead of being computed for each
+            slice.
+        """
+        if self._repair_plan is None:
+            max_repair_count = 3**sig_slice.shape.sig.dims - 1
+            return RepairDescriptor.from_flat(
+                np.zeros(0, dtype=np.intp),
+                np.zeros((0, max_repair_count), dtype=np.intp),
+                np.zeros(0, dtype=np.intp),
+            )
+        return self._repair_plan.get_descriptor(sig_slice)
+
     def adjust_tileshape(self, tile_shape, sig_shape, base_shape):
         excluded_pixels = self.get_excluded_pixels()
         if excluded_pixels is None:
             return tile_shape
         if excluded_pixels.nnz == 0:
             return tile_shape
-        excluded_list = excluded_pixels.coords
+        key = (
+            self._repair_plan.key,
+            tuple(int(s) for s in tile_shape),
+            tuple(int(s) for s in sig_shape),
+            tuple(int(s) for s in base_shape),
+        )
+        with _adjusted_cache_lock:
+            if key in _adjusted_cache:
+                return _adjusted_cache[key]
+        adjusted = self._adjust_tileshape(tile_shape, sig_shape, base_shape)
+        with _adjusted_cache_lock:
+            if len(_adjusted_cache) >= _ADJUSTED_CACHE_SIZE:
+                _adjusted_cache.clear()
+            _adjusted_cache[key] = adjusted
+        return adjusted
+
+    def _adjust_tileshape(self, tile_shape, sig_shape, base_shape):
+        excluded_list = self._repair_plan.coords
         adjusted_shape = np.array(tile_shape)
         sig_shape = np.array(sig_shape)
         base_shape = np.array(base_shape)
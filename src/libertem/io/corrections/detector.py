@@ -1,3 +1,7 @@
+import uuid
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import numba
 import sparse
@@ -5,101 +9,180 @@ import sparse
 from libertem.common.math import prod
 from libertem.common.sparse import is_sparse
 from libertem.common.numba import (
-    numba_ravel_multi_index_multi, numba_unravel_index_multi
+    cached_njit, numba_ravel_multi_index_multi, numba_unravel_index_multi
 )
 
 
-@numba.njit(cache=True, nogil=True)
-def _correct_numba_inplace(buffer, dark_image, gain_map, exclude_pixels, repair_environments,
-        repair_counts):
+def _make_correction_kernel(have_dark, have_gain, have_repair, integer,
+                            nav_blocksize, sig_blocksize):
+    '''
+    Create a kernel to perform detector corrections, specialized for the
+    corrections that are present and for the block sizes. The parameters are
+    compile-time constants, so the branches for absent corrections are removed
+    and the inner loops can be vectorized.
+
+    The data is processed in blocks of `nav_blocksize` frames and
+    `sig_blocksize` pixels, so that the dark frame and the gain map are loaded
+    from the cache once for each block of frames. Excluded pixels are patched
+    for each block of frames, while it is still in the cache.
     '''
-    Numerical work horse to perform detector corrections
+    @cached_njit(cache=True, nogil=True, boundscheck=False)
+    def _correct_kernel(buffer, dark_image, gain_map, exclude_pixels, repair_environments,
+                        repair_counts):
+        num_nav = buffer.shape[0]
+        num_sig = buffer.shape[1]
+        for nav_start in range(0, num_nav, nav_blocksize):
+            nav_stop = min(num_nav, nav_start + nav_blocksize)
+            if have_dark or have_gain:
+                for sig_start in range(0, num_sig, sig_blocksize):
+                    sig_stop = min(num_sig, sig_start + sig_blocksize)
+                    # contiguous 1D views, so that the inner loop is vectorized:
+                    if have_dark:
+                        dark = dark_image[sig_start:sig_stop]
+                    if have_gain:
+                        gain = gain_map[sig_start:sig_stop]
+                    for nav in range(nav_start, nav_stop):
+                        row = buffer[nav, sig_start:sig_stop]
+                        for i in range(row.shape[0]):
+                            if have_dark and have_gain:
+                                row[i] = (row[i] - dark[i]) * gain[i]
+                            elif have_dark:
+                                row[i] = row[i] - dark[i]
+                            else:
+                                row[i] = row[i] * gain[i]
+            if have_repair:
+                for i in range(exclude_pixels.shape[0]):
+                    count = repair_counts[i]
+                    if count == 0:  # Avoid div0
+                        continue
+                    p = exclude_pixels[i]
+                    for nav in range(nav_start, nav_stop):
+                        row = buffer[nav]
+                        if integer:
+                            iacc = 0
+                            for j in range(count):
+                                iacc += row[repair_environments[i, j]]
+                            # rounded mean:
+                            row[p] = (iacc + count // 2) // count
+                        else:
+                            acc = 0
+                            for j in range(count):
+                                acc += row[repair_environments[i, j]]
+                            row[p] = acc / count
+        return buffer
+    return _correct_kernel
+
+
+_correction_kernels = {}
+
+
+def get_block_sizes(itemsize, aux_itemsize=0, nav_blocksize=4):
+    '''
+    Block sizes for the correction kernels, so that a block of frames and the
+    matching part of the dark frame and gain map fill half of the L2 cache of
+    a core.
 
-    This function uses blocked processing for cache efficiency, hence the nested loops. It is
-    about 4x faster than a naive numpy implementation.
+    .. versionadded:: 0.12.0
 
     Parameters
     ----------
+    itemsize : int
+        Size of an item of the data, in bytes
 
-    buffer:
-        (n, m) with data, modified in-place.
+    aux_itemsize : int
+        Combined item size of the dark frame and gain map, in bytes
 
-    dark_image:
-        (m) with dark frame to be subtracted first
+    nav_blocksize : int
+        Number of frames in a block
 
-    gain_map:
-        (m) with gain map to multiply the data with after subtraction
+    Returns
+    -------
+    nav_blocksize, sig_blocksize : Tuple[int, int]
+    '''
+    from libertem.utils.devices import get_cache_size
+    budget = get_cache_size(level=2) // 2
+    sig_blocksize = budget // (nav_blocksize * itemsize + aux_itemsize)
+    # multiples of 64 items, to keep the inner loops aligned:
+    sig_blocksize = max(64, sig_blocksize // 64 * 64)
+    return nav_blocksize, sig_blocksize
 
-    exclude_pixels:
-        int(k) array of indices in the flattened signal dimension to patch
 
-    repair_environments:
-        Array with environments for each pixel to use as a reference.
-        Array of shape (k, max_repair_counts)
+def get_correction_kernel(dtype, dark_image=None, gain_map=None, have_repair=True):
+    '''
+    Pick the correction kernel for data of type `dtype` and the given
+    corrections. The kernels are compiled on first use, and kept for the
+    lifetime of the process.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    dtype : numpy.dtype
+        dtype of the buffer that is corrected in-place. Integer dtypes are
+        only supported without dark frame and gain map; the excluded pixels
+        are then replaced with the rounded mean of their environment.
 
-    repair_counts:
-        Array(int) of length k with number of valid entries in each entry in repair_environments.
+    dark_image, gain_map : numpy.ndarray or None
+        Only used to decide which corrections are applied, and for their
+        item size
 
+    have_repair : bool
+        Include the repair of excluded pixels
 
     Returns
     -------
-    buffer (modified in-place)
+    A function :code:`kernel(buffer, dark_image, gain_map, exclude_pixels,
+    repair_environments, repair_counts)` that works on a buffer of shape
+    (n, m), like :func:`correct`.
+    '''
+    dtype = np.dtype(dtype)
+    have_dark = dark_image is not None
+    have_gain = gain_map is not None
+    integer = dtype.kind in ('u', 'i', 'b')
+    if integer and (have_dark or have_gain):
+        raise TypeError("Dark frame and gain map are only supported for floating point data.")
+    aux_itemsize = sum(a.dtype.itemsize for a in (dark_image, gain_map) if a is not None)
+    nav_blocksize, sig_blocksize = get_block_sizes(dtype.itemsize, aux_itemsize)
+    key = (have_dark, have_gain, have_repair, integer, nav_blocksize, sig_blocksize)
+    kernel = _correction_kernels.get(key)
+    if kernel is None:
+        kernel = _make_correction_kernel(*key)
+        _correction_kernels[key] = kernel
+    return kernel
+
+
+@numba.njit(inline='always', cache=True, nogil=True)
+def dark_gain_inplace(buffer, dark_image, gain_map):
     '''
-    nav_blocksize = 4
-    sig_blocksize = 2**20 // (512 * 4 * nav_blocksize)
-
-    nav_blocks = buffer.shape[0] // nav_blocksize
-    nav_remainder = buffer.shape[0] % nav_blocksize
-
-    sig_blocks = buffer.shape[1] // sig_blocksize
-    sig_remainder = buffer.shape[1] % sig_blocksize
-
-    def _get_dark_px(sig):
-        if dark_image is None:
-            return 0
-        return dark_image[sig]
-
-    def _get_gain_px(sig):
-        if gain_map is None:
-            return 1
-        return gain_map[sig]
-
-    for nav_block in range(nav_blocks):
-        # Dark and gain blocked in sig
-        for sig_block in range(sig_blocks):
-            for nav in range(nav_block * nav_blocksize, (nav_block + 1) * nav_blocksize):
-                for sig in range(sig_block * sig_blocksize, (sig_block + 1) * sig_blocksize):
-                    buffer[nav, sig] = (buffer[nav, sig] - _get_dark_px(sig)) * _get_gain_px(sig)
-
-        # Dark and gain remainder of sig blocks
-        for nav in range(nav_block * nav_blocksize, (nav_block + 1) * nav_blocksize):
-            for sig in range(sig_blocks*sig_blocksize, sig_blocks*sig_blocksize + sig_remainder):
-                buffer[nav, sig] = (buffer[nav, sig] - _get_dark_px(sig)) * _get_gain_px(sig)
-
-        # Hole repair blocked in nav
-        for i, p in enumerate(exclude_pixels):
-            if repair_counts[i] > 0:  # Avoid div0
-                for nav in range(nav_block * nav_blocksize, (nav_block + 1) * nav_blocksize):
-                    acc = 0
-                    for index in repair_environments[i, :repair_counts[i]]:
-                        acc += buffer[nav, index]
-                    buffer[nav, p] = acc / repair_counts[i]
-
-    # Processing unblocked nav remainder
-    for nav in range(nav_blocks * nav_blocksize, nav_blocks * nav_blocksize + nav_remainder):
-        # Dark and gain unblocked in sig
-        for sig in range(buffer.shape[1]):
-            buffer[nav, sig] = (buffer[nav, sig] - _get_dark_px(sig)) * _get_gain_px(sig)
-
-        # Hole repair
-        for i, p in enumerate(exclude_pixels):
-            if repair_counts[i] > 0:  # Avoid div0
-                acc = 0
-                for index in repair_environments[i, :repair_counts[i]]:
-                    acc += buffer[nav, index]
-                buffer[nav, p] = acc / repair_counts[i]
-
-    return buffer
+    Subtract the dark frame and multiply with the gain map in-place. Meant
+    to be called from the readers of the I/O backends, right after a tile
+    was decoded, so that the tile is corrected while it is still in the CPU
+    cache. The branches for absent corrections are removed at compile time.
+
+    Parameters
+    ----------
+
+    buffer:
+        (n, m) with data, modified in-place.
+
+    dark_image:
+        (m) with dark frame to be subtracted first, or None
+
+    gain_map:
+        (m) with gain map to multiply the data with after subtraction, or None
+    '''
+    if dark_image is not None and gain_map is not None:
+        for nav in range(buffer.shape[0]):
+            for sig in range(buffer.shape[1]):
+                buffer[nav, sig] = (buffer[nav, sig] - dark_image[sig]) * gain_map[sig]
+    elif dark_image is not None:
+        for nav in range(buffer.shape[0]):
+            for sig in range(buffer.shape[1]):
+                buffer[nav, sig] = buffer[nav, sig] - dark_image[sig]
+    elif gain_map is not None:
+        for nav in range(buffer.shape[0]):
+            for sig in range(buffer.shape[1]):
+                buffer[nav, sig] = buffer[nav, sig] * gain_map[sig]
 
 
 @numba.njit(cache=True, nogil=True)
@@ -193,7 +276,11 @@ def correct(
     Function to perform detector corrections
 
     This function delegates the processing to a function written with numba that is
-    about 4x faster than a naive numpy implementation.
+    about 4x faster than a naive numpy implementation, see :func:`get_correction_kernel`.
+
+    .. versionchanged:: 0.12.0
+        Integer buffers can be corrected in-place if only excluded pixels are
+        patched. They are replaced with the rounded mean of their environment.
 
     Parameters
     ----------
@@ -236,7 +323,8 @@ def correct(
     nav_shape = s[0:-len(sig_shape)]
 
     if inplace:
-        if buffer.dtype.kind not in ('f', 'c'):
+        only_repair = dark_image is None and gain_map is None
+        if buffer.dtype.kind not in ('f', 'c') and not only_repair:
             raise TypeError("In-place correction only supported for floating point data.")
         out = buffer
     else:
@@ -254,7 +342,11 @@ def correct(
         if excluded_pixels is not None:
             raise ValueError("Invalid arguments: Bot repair_descriptor and excluded_pixels set")
 
-    _correct_numba_inplace(
+    kernel = get_correction_kernel(
+        dtype=out.dtype, dark_image=dark_image, gain_map=gain_map,
+        have_repair=len(repair_descriptor.exclude_flat) > 0,
+    )
+    kernel(
         buffer=out.reshape((prod(nav_shape), prod(sig_shape))),
         dark_image=dark_image,
         gain_map=gain_map,
@@ -290,6 +382,158 @@ class RepairDescriptor:
                     f"Empty repair environments for pixel(s) number {empty}."
                 )
 
+    @classmethod
+    def from_flat(cls, exclude_flat, repair_flat, repair_counts):
+        """
+        Create a descriptor from already flattened and filtered arrays, as
+        returned by :func:`flatten_filter`.
+
+        .. versionadded:: 0.12.0
+        """
+        desc = cls.__new__(cls)
+        desc.exclude_flat = exclude_flat
+        desc.repair_flat = repair_flat
+        desc.repair_counts = repair_counts
+        return desc
+
+
+@numba.njit(cache=True, nogil=True)
+def _crop_repair_plan(coords, env_coords, env_counts, start, stop, origin, shape):
+    '''
+    Select the excluded pixels with index `start` to `stop` that are inside
+    the hyperrectangle given by `origin` and `shape`, and drop the pixels of
+    their repair environments that are outside of it. Returns flat indices
+    relative to the hyperrectangle, like :func:`flatten_filter`.
+    '''
+    sig_dims = coords.shape[0]
+    max_repair_count = env_coords.shape[2]
+    exclude_flat = np.zeros(stop - start, dtype=np.intp)
+    repair_flat = np.zeros((stop - start, max_repair_count), dtype=np.intp)
+    repair_counts = np.zeros(stop - start, dtype=np.intp)
+    n = 0
+    for i in range(start, stop):
+        flat = 0
+        inside = True
+        for dim in range(sig_dims):
+            coord = coords[dim, i] - origin[dim]
+            if coord < 0 or coord >= shape[dim]:
+                inside = False
+                break
+            flat = flat * shape[dim] + coord
+        if not inside:
+            continue
+        exclude_flat[n] = flat
+        count = 0
+        for j in range(env_counts[i]):
+            flat = 0
+            inside = True
+            for dim in range(sig_dims):
+                coord = env_coords[i, dim, j] - origin[dim]
+                if coord < 0 or coord >= shape[dim]:
+                    inside = False
+                    break
+                flat = flat * shape[dim] + coord
+            if inside:
+                repair_flat[n, count] = flat
+                count += 1
+        repair_counts[n] = count
+        n += 1
+    return exclude_flat[:n], repair_flat[:n], repair_counts[:n]
+
+
+# (plan key, sig origin, sig shape) -> RepairDescriptor, shared by all
+# tasks of a worker process:
+_descriptor_cache: "OrderedDict" = OrderedDict()
+_descriptor_cache_lock = threading.Lock()
+_DESCRIPTOR_CACHE_SIZE = 512
+
+
+class RepairPlan:
+    """
+    The repair environments of all excluded pixels of a detector, computed
+    once for the whole signal shape. The plan is small enough to be sent to
+    the workers with the :class:`~libertem.io.corrections.CorrectionSet`, and
+    the :class:`RepairDescriptor` for any part of the signal is then cut out
+    of it, instead of computing the environments again for each tile shape.
+
+    The descriptors are cached per worker process, so repeated lookups for
+    the same slice cost a dictionary access.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    sig_shape : Tuple[int, ...]
+        Signal shape of the detector
+
+    excluded_pixels : numpy.ndarray
+        Coordinates of the excluded pixels, shape (sig_dims, k), sorted
+        lexicographically as in a :code:`sparse.COO` array
+
+    allow_empty : bool
+        Don't raise an exception for pixels with an empty repair environment
+    """
+    def __init__(self, sig_shape, excluded_pixels, allow_empty=False):
+        self.sig_shape = tuple(int(s) for s in sig_shape)
+        self.allow_empty = allow_empty
+        self.coords = np.ascontiguousarray(excluded_pixels, dtype=np.intp)
+        if self.coords.shape[1] > 1:
+            order = np.lexsort(self.coords[::-1])
+            self.coords = np.ascontiguousarray(self.coords[:, order])
+        repairs, repair_counts = environments(self.coords, np.array(self.sig_shape))
+        _, repair_flat, self.repair_counts = flatten_filter(
+            self.coords, repairs, repair_counts, self.sig_shape
+        )
+        self.env_coords = np.ascontiguousarray(
+            np.stack(np.unravel_index(repair_flat, self.sig_shape), axis=1),
+            dtype=np.intp,
+        )
+        # identifies the plan in the per-process caches, also after pickling:
+        self.key = uuid.uuid4().hex
+        if not allow_empty:
+            RepairDescriptor.from_flat(None, None, self.repair_counts).check_empty_repairs(
+                allow_empty=False
+            )
+
+    @property
+    def num_pixels(self) -> int:
+        return self.coords.shape[1]
+
+    def _crop(self, origin, shape) -> RepairDescriptor:
+        # the coordinates are sorted by the first signal dimension, so only
+        # the pixels in the rows of the slice need to be checked:
+        start, stop = np.searchsorted(
+            self.coords[0], (origin[0], origin[0] + shape[0]), side='left',
+        )
+        desc = RepairDescriptor.from_flat(*_crop_repair_plan(
+            self.coords, self.env_coords, self.repair_counts, start, stop,
+            np.array(origin, dtype=np.intp), np.array(shape, dtype=np.intp),
+        ))
+        desc.check_empty_repairs(allow_empty=self.allow_empty)
+        return desc
+
+    def get_descriptor(self, sig_slice) -> RepairDescriptor:
+        """
+        The :class:`RepairDescriptor` for the part of the signal given by
+        `sig_slice`. Pixels of the repair environments that are outside of
+        the slice are not used, as if the slice was the whole frame.
+        """
+        sig_dims = len(self.sig_shape)
+        origin = tuple(int(o) for o in sig_slice.origin[-sig_dims:])
+        shape = tuple(int(s) for s in sig_slice.shape.sig)
+        key = (self.key, origin, shape)
+        with _descriptor_cache_lock:
+            desc = _descriptor_cache.get(key)
+            if desc is not None:
+                _descriptor_cache.move_to_end(key)
+                return desc
+        desc = self._crop(origin, shape)
+        with _descriptor_cache_lock:
+            _descriptor_cache[key] = desc
+            while len(_descriptor_cache) > _DESCRIPTOR_CACHE_SIZE:
+                _descriptor_cache.popitem(last=False)
+        return desc
+
 
 def correct_dot_masks(masks, gain_map, excluded_pixels=None, allow_empty=False):
     mask_shape = masks.shape
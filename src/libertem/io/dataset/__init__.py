@@ -27,6 +27,7 @@ filetypes = {
     "mrc": "libertem.io.dataset.mrc.MRCDataSet",
     "tvips": "libertem.io.dataset.tvips.TVIPSDataSet",
     "npy": "libertem.io.dataset.npy.NPYDataSet",
+    "archive": "libertem.io.dataset.archive.ArchiveDataSet",
     "dask": "libertem.io.dataset.dask.DaskDataSet",
     "memory": "libertem.io.dataset.memory.MemoryDataSet",
 }
@@ -0,0 +1,494 @@
+"""
+Reading of LiberTEM archives, a chunked and optionally compressed format
+that any :class:`~libertem.io.dataset.base.DataSet` can be exported to
+with :meth:`libertem.api.Context.export_dataset`.
+
+An archive is a directory with an :code:`archive.json` description and one
+file per partition. Each partition file contains the encoded chunks,
+followed by an index with the offset and size of each chunk and a fixed-size
+trailer that points to the index. The frames are stored in flattened
+navigation order, and a chunk spans a number of consecutive frames and
+rows, and the complete remaining signal dimensions.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import json
+import mmap
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sparseconverter import CUDA, NUMPY, ArrayBackend
+
+from libertem.common.math import prod, flat_nonzero
+from libertem.common import Slice, Shape
+from libertem.common.messageconverter import MessageConverter
+from libertem.io.corrections import CorrectionSet
+from .base import (
+    DataSet, Partition, DataTile, DataSetException, DataSetMeta,
+    TilingScheme,
+)
+from .base.chunks import ChunkReader
+
+
+ARCHIVE_FORMAT = "libertem-archive"
+ARCHIVE_VERSION = 1
+INFO_NAME = "archive.json"
+PART_MAGIC = b"LTARPART"
+
+# offset of the index and number of chunks, at the end of each partition file:
+PART_TRAILER = struct.Struct("<QQ8s")
+
+#: Approximate size of a decoded chunk, in bytes
+CHUNK_BYTES = 1024 * 1024
+
+
+def _get_lz4():
+    try:
+        import lz4.block
+    except ImportError:
+        return None
+    return lz4.block
+
+
+def get_archive_codecs() -> List[Optional[str]]:
+    """
+    The codecs that can be used for archives in this environment. :code:`None`
+    stores the chunks uncompressed, :code:`"lz4"` requires the optional
+    :code:`lz4` package.
+    """
+    codecs: List[Optional[str]] = ["zlib"]
+    if _get_lz4() is not None:
+        codecs.append("lz4")
+    codecs.append(None)
+    return codecs
+
+
+def choose_chunks(
+    sig_shape: Tuple[int, ...], dtype, max_depth: Optional[int] = None,
+    chunk_bytes: int = CHUNK_BYTES,
+) -> Tuple[int, ...]:
+    """
+    Chunk shape in flattened navigation dimensions for data with the given
+    :code:`sig_shape` and :code:`dtype`.
+
+    Chunks always span complete rows, like the tiles of the default tiling
+    schemes. Large frames are split into stripes of rows, and small frames
+    are stacked to reach about :code:`chunk_bytes` per chunk, limited to
+    :code:`max_depth` frames.
+    """
+    sig_shape = tuple(sig_shape)
+    itemsize = np.dtype(dtype).itemsize
+    frame_bytes = prod(sig_shape) * itemsize
+    if frame_bytes >= chunk_bytes:
+        row_bytes = prod(sig_shape[1:]) * itemsize
+        rows = max(1, min(sig_shape[0], chunk_bytes // row_bytes))
+        return (1, rows) + sig_shape[1:]
+    depth = max(1, chunk_bytes // frame_bytes)
+    if max_depth is not None:
+        depth = max(1, min(depth, max_depth))
+    return (depth,) + sig_shape
+
+
+def encode_chunk(chunk: np.ndarray, codec: Optional[str], level: int, shuffle: bool) -> bytes:
+    """
+    Encode a complete chunk. With :code:`shuffle`, the bytes of the items are
+    regrouped by their significance before compressing, which compresses
+    detector data much better.
+    """
+    data = np.ascontiguousarray(chunk).reshape((-1,)).view(np.uint8)
+    itemsize = chunk.dtype.itemsize
+    if shuffle and itemsize > 1:
+        data = np.ascontiguousarray(data.reshape((-1, itemsize)).T)
+    if codec is None:
+        return data.tobytes()
+    elif codec == "zlib":
+        return zlib.compress(data, level)
+    elif codec == "lz4":
+        return _get_lz4().compress(data, store_size=False)
+    raise ValueError(f"unknown codec {codec!r}")
+
+
+def decode_chunk(
+    raw: bytes, codec: Optional[str], shuffle: bool, dtype, chunks: Tuple[int, ...],
+) -> np.ndarray:
+    """
+    Inverse of :func:`encode_chunk`
+    """
+    dtype = np.dtype(dtype)
+    size = prod(chunks) * dtype.itemsize
+    if codec is None:
+        decoded = raw
+    elif codec == "zlib":
+        decoded = zlib.decompress(raw, bufsize=size)
+    elif codec == "lz4":
+        decoded = _get_lz4().decompress(raw, uncompressed_size=size)
+    else:
+        raise ValueError(f"unknown codec {codec!r}")
+    data = np.frombuffer(decoded, dtype=np.uint8)
+    if shuffle and dtype.itemsize > 1:
+        data = np.ascontiguousarray(data.reshape((dtype.itemsize, -1)).T)
+    return data.view(dtype).reshape(chunks)
+
+
+def get_part_name(start: int) -> str:
+    return "part-%012d.bin" % start
+
+
+def get_info_path(path: str) -> str:
+    if os.path.isdir(path):
+        return os.path.join(path, INFO_NAME)
+    return path
+
+
+def read_archive_info(path: str) -> dict:
+    """
+    Read the description of the archive at :code:`path`, which is either the
+    archive directory or its :code:`archive.json` file.
+    """
+    info_path = get_info_path(path)
+    try:
+        with open(info_path) as f:
+            info = json.load(f)
+    except (OSError, ValueError) as e:
+        raise DataSetException(f"could not read archive description {info_path}: {e}")
+    if not isinstance(info, dict) or info.get("format") != ARCHIVE_FORMAT:
+        raise DataSetException(f"{info_path} does not describe a LiberTEM archive")
+    if info.get("version") != ARCHIVE_VERSION:
+        raise DataSetException(
+            f"unsupported archive version {info.get('version')!r} in {info_path}"
+        )
+    return info
+
+
+class ArchiveDatasetParams(MessageConverter):
+    SCHEMA = {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "$id": "http://libertem.org/ArchiveDatasetParams.schema.json",
+        "title": "ArchiveDatasetParams",
+        "type": "object",
+        "properties": {
+            "type": {"const": "ARCHIVE"},
+            "path": {"type": "string"},
+        },
+        "required": ["type", "path"],
+    }
+
+    def convert_to_python(self, raw_data):
+        return {
+            "path": raw_data["path"],
+        }
+
+
+class ArchiveDataSet(DataSet):
+    """
+    Read a LiberTEM archive, as written by
+    :meth:`libertem.api.Context.export_dataset`.
+
+    The chunks are decoded in parallel in a thread pool on each worker. The
+    partitioning is the one of the data set that was exported.
+
+    .. versionadded:: 0.12.0
+
+    Examples
+    --------
+
+    >>> ctx.export_dataset(dataset, path_to_archive)  # doctest: +SKIP
+    >>> ds = ctx.load("archive", path=path_to_archive)  # doctest: +SKIP
+
+    Parameters
+    ----------
+    path : str
+        Path to the archive directory, or to the :code:`archive.json` file in it
+
+    decompress_threads : int, optional
+        Number of threads per partition that decode chunks. Defaults to the
+        number of threads that the executor assigns to each worker, which is
+        one for most executors.
+    """
+    def __init__(self, path, decompress_threads: Optional[int] = None, io_backend=None):
+        super().__init__(io_backend=io_backend)
+        if io_backend is not None:
+            raise ValueError("ArchiveDataSet currently doesn't support alternative I/O backends")
+        self._path = path
+        self._decompress_threads = decompress_threads
+        self._info = None
+
+    @property
+    def _base_path(self) -> str:
+        return os.path.dirname(os.path.abspath(get_info_path(self._path)))
+
+    def _do_initialize(self):
+        info = read_archive_info(self._path)
+        shape = Shape(tuple(info["shape"]), sig_dims=info["sig_dims"])
+        self._info = info
+        self._image_count = shape.nav.size
+        self._nav_shape_product = shape.nav.size
+        self._meta = DataSetMeta(
+            shape=shape,
+            raw_dtype=np.dtype(info["dtype"]),
+            sync_offset=0,
+            image_count=self._image_count,
+        )
+        self._sync_offset_info = self.get_sync_offset_info()
+        return self
+
+    def initialize(self, executor):
+        return executor.run_function(self._do_initialize)
+
+    @classmethod
+    def get_msg_converter(cls):
+        return ArchiveDatasetParams
+
+    @classmethod
+    def get_supported_extensions(cls):
+        return {"json"}
+
+    @classmethod
+    def get_supported_io_backends(cls):
+        return []
+
+    @classmethod
+    def detect_params(cls, path, executor):
+        try:
+            executor.run_function(read_archive_info, path)
+        except DataSetException:
+            return False
+        return {
+            "parameters": {
+                "path": path,
+            },
+            "info": {},
+        }
+
+    @property
+    def dtype(self):
+        return self.meta.raw_dtype
+
+    @property
+    def shape(self):
+        if self._meta is None:
+            raise RuntimeError("please call initialize")
+        return self._meta.shape
+
+    @property
+    def chunks(self) -> Tuple[int, ...]:
+        """
+        The chunk shape in flattened navigation dimensions
+        """
+        return tuple(self._info["chunks"])
+
+    @property
+    def codec(self) -> Optional[str]:
+        return self._info["codec"]
+
+    def check_valid(self):
+        if self.codec not in get_archive_codecs():
+            raise DataSetException(
+                f"the archive codec {self.codec!r} is not available, is its package installed?"
+            )
+        for part in self._info["parts"]:
+            part_path = os.path.join(self._base_path, part["file"])
+            if not os.path.isfile(part_path):
+                raise DataSetException(f"archive partition {part_path} is missing")
+        return True
+
+    def get_cache_key(self):
+        return {
+            "path": os.path.abspath(get_info_path(self._path)),
+        }
+
+    def get_diagnostics(self):
+        return [
+            {"name": "Chunks", "value": str(self.chunks)},
+            {"name": "Codec", "value": str(self.codec)},
+            {"name": "Source", "value": str(self._info.get("source"))},
+        ]
+
+    def get_base_shape(self, roi: Optional[np.ndarray]) -> Tuple[int, ...]:
+        # tiles should consist of complete chunk stripes:
+        chunks = self.chunks
+        return (1, chunks[1]) + tuple(self.shape.sig)[1:]
+
+    def need_decode(self, read_dtype, roi, corrections):
+        return True
+
+    def get_partitions(self):
+        sig_shape = tuple(self.shape.sig)
+        sig_dims = self.shape.sig.dims
+        for part in self._info["parts"]:
+            start, stop = part["start"], part["stop"]
+            partition_slice = Slice(
+                origin=(start,) + (0,) * sig_dims,
+                shape=Shape((stop - start,) + sig_shape, sig_dims=sig_dims),
+            )
+            yield ArchivePartition(
+                meta=self._meta,
+                partition_slice=partition_slice,
+                path=os.path.join(self._base_path, part["file"]),
+                chunks=self.chunks,
+                codec=self.codec,
+                shuffle=self._info["shuffle"],
+                decompress_threads=self._decompress_threads,
+                io_backend=None,
+                decoder=None,
+            )
+
+    def __repr__(self):
+        return f"<ArchiveDataSet of {self.dtype} shape={self.shape}>"
+
+
+class _ArchiveChunkReader(ChunkReader):
+    """
+    Decode the chunks of a partition file, with tile slices relative to the
+    start of the partition.
+    """
+    def __init__(self, buf, index: np.ndarray, chunks, dtype, codec, shuffle,
+                 num_stripes: int, num_threads: int, max_bytes: int):
+        super().__init__(
+            chunks=chunks, dtype=dtype, fillvalue=0,
+            num_threads=num_threads, max_bytes=max_bytes,
+        )
+        self._buf = buf
+        self._index = index
+        self._codec = codec
+        self._shuffle = shuffle
+        self._num_stripes = num_stripes
+
+    def _decode_chunk(self, offset):
+        chunk_id = (offset[0] // self._chunks[0]) * self._num_stripes + offset[1] // self._chunks[1]
+        start, size = self._index[chunk_id]
+        if size < 0:
+            # never written, for example because of a sync_offset in the source
+            return None
+        return decode_chunk(
+            self._buf[start:start + size], codec=self._codec, shuffle=self._shuffle,
+            dtype=self._dtype, chunks=self._chunks,
+        )
+
+
+def _read_part_index(buf) -> np.ndarray:
+    index_offset, num_chunks, magic = PART_TRAILER.unpack(buf[-PART_TRAILER.size:])
+    if magic != PART_MAGIC:
+        raise DataSetException("invalid archive partition, is it complete?")
+    index = np.frombuffer(
+        buf[index_offset:index_offset + num_chunks * 16], dtype="<i8",
+    )
+    return index.reshape((num_chunks, 2))
+
+
+class ArchivePartition(Partition):
+    def __init__(self, path: str, chunks: Tuple[int, ...], codec: Optional[str],
+                 shuffle: bool, decompress_threads: Optional[int] = None, *args, **kwargs):
+        self._path = path
+        self._chunks = chunks
+        self._codec = codec
+        self._shuffle = shuffle
+        self._decompress_threads = decompress_threads
+        self._corrections = None
+        super().__init__(*args, **kwargs)
+
+    def set_corrections(self, corrections: CorrectionSet):
+        self._corrections = corrections
+
+    def get_locations(self):
+        return None
+
+    def _get_num_threads(self) -> int:
+        if self._decompress_threads is not None:
+            return self._decompress_threads
+        # each worker reads its own partitions, so stay within its thread budget:
+        return self._threads_per_worker or 1
+
+    def _get_read_plan(self, tiling_scheme: TilingScheme, roi: Optional[np.ndarray]):
+        """
+        Group the frames to read into tiles of up to the depth of the tiling
+        scheme. Yields :code:`(scheme_idx, tile_slice, runs)`, where
+        :code:`runs` are the slices relative to the partition start that make
+        up the tile, as runs of consecutive frames, and :code:`tile_slice` is
+        the slice of the resulting tile in the (compressed) navigation
+        coordinates of the data set.
+        """
+        start = self.slice.origin[0]
+        num_frames = self.slice.shape[0]
+        if roi is None:
+            frames = np.arange(num_frames)
+            c_nav_start = start
+        else:
+            flat_roi = roi.reshape((-1,))
+            frames = flat_nonzero(flat_roi[start:start + num_frames])
+            c_nav_start = int(np.count_nonzero(flat_roi[:start]))
+        depth = tiling_scheme.depth
+        sig_dims = self.shape.sig.dims
+        for group_start in range(0, len(frames), depth):
+            group = frames[group_start:group_start + depth]
+            # split into runs of consecutive frames:
+            breaks = np.flatnonzero(np.diff(group) != 1) + 1
+            bounds = [0] + breaks.tolist() + [len(group)]
+            for scheme_idx, sig_slice in tiling_scheme.slices:
+                runs = [
+                    Slice(
+                        origin=(int(group[a]),) + tuple(sig_slice.origin),
+                        shape=Shape((b - a,) + tuple(sig_slice.shape), sig_dims=sig_dims),
+                    )
+                    for a, b in zip(bounds[:-1], bounds[1:])
+                ]
+                tile_slice = Slice(
+                    origin=(c_nav_start + group_start,) + tuple(sig_slice.origin),
+                    shape=Shape((len(group),) + tuple(sig_slice.shape), sig_dims=sig_dims),
+                )
+                yield scheme_idx, tile_slice, runs
+
+    def _read_tiles(self, buf, tiling_scheme: TilingScheme, dest_dtype, roi):
+        plan = list(self._get_read_plan(tiling_scheme, roi))
+        index = _read_part_index(buf)
+        chunks = self._chunks
+        num_stripes = -(-self.shape.sig[0] // chunks[1])
+        reader = _ArchiveChunkReader(
+            buf, index=index, chunks=chunks, dtype=self.meta.raw_dtype,
+            codec=self._codec, shuffle=self._shuffle, num_stripes=num_stripes,
+            num_threads=self._get_num_threads(), max_bytes=128 * 1024 * 1024,
+        )
+        read_flat = np.zeros(tiling_scheme.shape, dtype=dest_dtype).reshape((-1,))
+        tile_flat = np.zeros(tiling_scheme.shape, dtype=dest_dtype).reshape((-1,))
+        buffers = reader.read_tiles(
+            [run for _, _, runs in plan for run in runs],
+            read_flat,
+        )
+        try:
+            for scheme_idx, tile_slice, runs in plan:
+                if len(runs) == 1:
+                    yield scheme_idx, tile_slice, next(buffers)
+                    continue
+                # gather the frames selected by the roi:
+                tile_data = tile_flat[:tile_slice.shape.size].reshape(tuple(tile_slice.shape))
+                dest = 0
+                for run in runs:
+                    num = run.shape[0]
+                    tile_data[dest:dest + num] = next(buffers)
+                    dest += num
+                yield scheme_idx, tile_slice, tile_data
+        finally:
+            # make sure the decoding is done before the file is closed:
+            buffers.close()
+
+    def get_tiles(self, tiling_scheme: TilingScheme, dest_dtype="float32", roi=None,
+            array_backend: Optional[ArrayBackend] = None):
+        if array_backend is None:
+            array_backend = self.meta.array_backends[0]
+        assert array_backend in (NUMPY, CUDA)
+        tiling_scheme = tiling_scheme.adjust_for_partition(self)
+        with open(self._path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            for scheme_idx, tile_slice, tile_data in self._read_tiles(
+                buf, tiling_scheme, dest_dtype, roi,
+            ):
+                if self._corrections is not None:
+                    self._corrections.apply(tile_data, tile_slice)
+                yield DataTile(
+                    tile_data,
+                    tile_slice=tile_slice,
+                    scheme_idx=scheme_idx,
+                )
@@ -5,6 +5,8 @@ from .backend import IOBackend
 from .backend_mmap import MMapBackend
 from .backend_buffered import BufferedBackend
 from .backend_direct import DirectBackend
+from .backend_uring import UringBackend
+from .follow import Follow
 from .dataset import DataSet, WritableDataSet
 from .partition import Partition, BasePartition, WritablePartition
 from .utils import FileTree
@@ -14,6 +16,7 @@ from .tiling import (
     DataTile, default_get_read_ranges, make_get_read_ranges,
 )
 from .tiling_scheme import TilingScheme, Negotiator
+from .autotune import AutoTuneNegotiator
 from .decode import (
     Decoder, DtypeConversionDecoder, decode_swap_2, decode_swap_4,
 )
@@ -22,11 +25,11 @@ from .coordinates import get_coordinates
 __all__ = [
     'DataSetException', 'DataSetMeta', 'PartitionStructure',
     '_roi_to_nd_indices',
-    'DataSet', 'WritableDataSet', 'Partition', 'WritablePartition', 'BasePartition',
+    'Follow', 'DataSet', 'WritableDataSet', 'Partition', 'WritablePartition', 'BasePartition',
     'DataTile', 'FileSet', 'File',
     'FileTree', 'TilingScheme',
     'default_get_read_ranges', 'make_get_read_ranges',
-    'Decoder', 'DtypeConversionDecoder', 'Negotiator',
+    'Decoder', 'DtypeConversionDecoder', 'Negotiator', 'AutoTuneNegotiator',
     'decode_swap_2', 'decode_swap_4', 'get_coordinates',
-    'IOBackend', 'BufferedBackend', 'MMapBackend', 'DirectBackend',
+    'IOBackend', 'BufferedBackend', 'MMapBackend', 'DirectBackend', 'UringBackend',
 ]
@@ -0,0 +1,294 @@
+"""
+Choose tile shapes by timing a few candidate tiling schemes on a sample
+partition, and remember the fastest one in an on-disk cache.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import platform
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from libertem.io.corrections import CorrectionSet
+from libertem.common import Shape
+from libertem.common.math import prod
+from libertem.common.udf import UDFProtocol
+from .tiling_scheme import Negotiator, TilingScheme
+from .index_cache import get_cache_home, read_json, write_json_atomic
+
+if TYPE_CHECKING:
+    from numpy import typing as nt
+    from libertem.io.dataset.base import DataSet, Partition
+
+log = logging.getLogger(__name__)
+
+
+def get_autotune_enabled() -> bool:
+    '''
+    Whether :class:`AutoTuneNegotiator` should be used for running UDFs,
+    as set by the :code:`LIBERTEM_TILING_AUTOTUNE` environment variable.
+    Disabled by default.
+    '''
+    return os.environ.get("LIBERTEM_TILING_AUTOTUNE", "0").lower() not in ("", "0", "false")
+
+
+def make_negotiator() -> Negotiator:
+    '''
+    Create the :class:`Negotiator` that is used for running UDFs, see
+    :func:`get_autotune_enabled`.
+    '''
+    if get_autotune_enabled():
+        return AutoTuneNegotiator()
+    return Negotiator()
+
+
+def get_default_cache_path() -> str:
+    '''
+    Location of the tuning cache, from the :code:`LIBERTEM_TILING_AUTOTUNE_CACHE`
+    environment variable, or in the user's cache directory otherwise.
+    '''
+    path = os.environ.get("LIBERTEM_TILING_AUTOTUNE_CACHE")
+    if path:
+        return path
+    return os.path.join(get_cache_home(), "tiling-autotune.json")
+
+
+def get_cpu_model() -> str:
+    '''
+    Human-readable CPU model, as far as it can be determined on this platform
+    '''
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+class TuningCache:
+    '''
+    JSON file that maps tuning keys to the tile shape that was fastest.
+
+    Writes replace the whole file atomically. If several processes tune at
+    the same time, the last write wins, which only means that some schemes
+    are tuned again later.
+    '''
+    def __init__(self, path: str):
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _load(self) -> Dict[str, Dict]:
+        entries = read_json(self._path)
+        if not isinstance(entries, dict):
+            return {}
+        return entries
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self._load().get(key)
+
+    def put(self, key: str, entry: Dict):
+        entries = self._load()
+        entries[key] = entry
+        write_json_atomic(self._path, entries)
+
+
+class AutoTuneNegotiator(Negotiator):
+    """
+    :class:`Negotiator` that times candidate tiling schemes on a sample
+    partition and picks the one with the highest throughput.
+
+    The candidates are generated by scaling the tile size that the static
+    heuristics of :class:`Negotiator` would choose, so they satisfy the same
+    constraints of the UDFs, the dataset and the corrections. The time is
+    measured for reading, decoding and summing tiles of the first partition,
+    up to :code:`sample_bytes` per candidate. Schemes for processing whole
+    partitions are not tuned.
+
+    The winner is stored in a :class:`TuningCache`, keyed by
+    :meth:`~libertem.io.dataset.base.DataSet.get_cache_key`, the UDF classes
+    and the CPU model. Datasets without a cache key are not tuned, and use
+    the default scheme.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    cache_path
+        Path of the JSON cache file, see :func:`get_default_cache_path`.
+
+    size_factors
+        Factors that are applied to the default tile size to generate candidates
+
+    sample_bytes
+        Number of bytes to read from the sample partition for each candidate
+
+    repeats
+        Number of timing runs per candidate, the fastest one counts
+    """
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        size_factors: Sequence[float] = (0.25, 0.5, 1, 2, 4),
+        sample_bytes: int = 64*2**20,
+        repeats: int = 2,
+    ):
+        if cache_path is None:
+            cache_path = get_default_cache_path()
+        self._cache = TuningCache(cache_path)
+        self._size_factors = tuple(size_factors)
+        self._sample_bytes = sample_bytes
+        self._repeats = repeats
+        self._local_cache: Dict[str, Tuple[int, ...]] = {}
+
+    def get_scheme(
+            self,
+            udfs: Sequence[UDFProtocol],
+            dataset,
+            read_dtype: "nt.DTypeLike",
+            approx_partition_shape: Shape,
+            roi: Optional[np.ndarray] = None,
+            corrections: Optional[CorrectionSet] = None,
+            array_backends: Optional[Iterable[str]] = None,
+    ) -> TilingScheme:
+        default = super().get_scheme(
+            udfs=udfs, dataset=dataset, read_dtype=read_dtype,
+            approx_partition_shape=approx_partition_shape, roi=roi,
+            corrections=corrections, array_backends=array_backends,
+        )
+        if default.intent == "partition":
+            return default
+        key = self._get_key(udfs, dataset, read_dtype, approx_partition_shape, roi, corrections)
+        if key is None:
+            # the result couldn't be reused, and timing reads a partition
+            # several times on the main node for each run:
+            return default
+        candidates = self._get_candidates(
+            default, udfs, dataset, read_dtype, approx_partition_shape, roi, corrections,
+            array_backends,
+        )
+        if len(candidates) == 1:
+            return default
+        by_shape = {tuple(c.shape): c for c in candidates}
+
+        cached = self._lookup(key)
+        if cached is not None and cached in by_shape:
+            return by_shape[cached]
+
+        try:
+            timings = self._time_candidates(candidates, dataset, read_dtype, roi, corrections)
+        except Exception:
+            log.warning("tiling auto-tune failed, using default scheme", exc_info=True)
+            return default
+        best = max(timings, key=lambda shape: timings[shape])
+        log.info("tiling auto-tune: %r, choosing %r", timings, best)
+        self._store(key, best, timings)
+        return by_shape[best]
+
+    def _get_candidates(
+        self, default: TilingScheme, udfs, dataset, read_dtype,
+        approx_partition_shape, roi, corrections, array_backends=None,
+    ) -> List[TilingScheme]:
+        candidates = {tuple(default.shape): default}
+        for factor in self._size_factors:
+            try:
+                scheme = self._get_scheme(
+                    udfs=udfs, dataset=dataset, read_dtype=read_dtype,
+                    approx_partition_shape=approx_partition_shape, roi=roi,
+                    corrections=corrections, array_backends=array_backends,
+                    size_factor=factor,
+                )
+            except ValueError:
+                # scaled size not compatible with the constraints
+                continue
+            candidates.setdefault(tuple(scheme.shape), scheme)
+        return list(candidates.values())
+
+    def _get_key(
+        self, udfs, dataset, read_dtype, approx_partition_shape, roi, corrections,
+    ) -> Optional[str]:
+        try:
+            ds_key = dataset.get_cache_key()
+            io_backend = type(dataset.get_io_backend()).__name__
+        except (NotImplementedError, TypeError, AttributeError):
+            return None
+        key = {
+            "dataset": [type(dataset).__name__, ds_key],
+            "io_backend": io_backend,
+            "udfs": [f"{type(udf).__module__}.{type(udf).__qualname__}" for udf in udfs],
+            "cpu": get_cpu_model(),
+            "read_dtype": str(np.dtype(read_dtype)),
+            "partition_shape": tuple(approx_partition_shape),
+            "roi": roi is not None,
+            "corrections": corrections is not None and corrections.have_corrections(),
+        }
+        try:
+            key_str = json.dumps(key, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[Tuple[int, ...]]:
+        if key in self._local_cache:
+            return self._local_cache[key]
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        return tuple(entry["tileshape"])
+
+    def _store(self, key: str, best: Tuple[int, ...], timings):
+        self._local_cache[key] = best
+        self._cache.put(key, {
+            "tileshape": list(best),
+            "throughput": {str(list(shape)): rate for shape, rate in timings.items()},
+            "created": time.time(),
+        })
+
+    def _time_candidates(
+        self, candidates: List[TilingScheme], dataset: "DataSet", read_dtype, roi, corrections,
+    ) -> Dict[Tuple[int, ...], float]:
+        partition = next(dataset.get_partitions())
+        partition.set_corrections(corrections)
+        # warm up caches, so that the first candidate isn't at a disadvantage:
+        self._time_scheme(partition, candidates[0], read_dtype, roi)
+        timings = {}
+        for scheme in candidates:
+            timings[tuple(scheme.shape)] = max(
+                self._time_scheme(partition, scheme, read_dtype, roi)
+                for _ in range(self._repeats)
+            )
+        return timings
+
+    def _time_scheme(
+        self, partition: "Partition", scheme: TilingScheme, read_dtype, roi,
+    ) -> float:
+        '''
+        Throughput in bytes per second for reading and touching tiles of :code:`partition`
+        '''
+        itemsize = np.dtype(read_dtype).itemsize
+        nbytes = 0
+        tiles = partition.get_tiles(tiling_scheme=scheme, dest_dtype=read_dtype, roi=roi)
+        t0 = time.perf_counter()
+        try:
+            for tile in tiles:
+                # touch the data like a UDF would, otherwise reading is
+                # free for backends that hand out views of mapped files:
+                tile.data.sum()
+                nbytes += prod(tile.tile_slice.shape) * itemsize
+                if nbytes >= self._sample_bytes:
+                    break
+        finally:
+            close = getattr(tiles, 'close', None)
+            if close is not None:
+                close()
+        elapsed = time.perf_counter() - t0
+        return nbytes / max(elapsed, 1e-9)
@@ -124,6 +124,22 @@ class IOBackendImpl:
             return
         corrections.apply(data, tile_slice)
 
+    def fuse_corrections(self, corrections, read_dtype) -> bool:
+        """
+        Whether the dark frame and gain map of `corrections` can be applied
+        by the reader right after decoding, instead of in a separate pass
+        in :meth:`preprocess`. In that case, only the excluded pixels are
+        patched afterwards, see
+        :meth:`~libertem.io.corrections.CorrectionSet.repair`.
+
+        .. versionadded:: 0.12.0
+        """
+        if corrections is None or not corrections.have_corrections():
+            return False
+        # in-place corrections are only supported for floating point data,
+        # otherwise `preprocess` raises the appropriate error:
+        return np.dtype(read_dtype).kind in ('f', 'c')
+
     def get_tiles(
         self, tiling_scheme, fileset, read_ranges, roi, native_dtype, read_dtype, decoder,
         sync_offset, corrections, array_backend: ArrayBackend,
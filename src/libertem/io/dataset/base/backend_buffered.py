@@ -16,6 +16,7 @@ from libertem.common.buffers import BufferPool, ManagedBuffer
 from libertem.common.numba import cached_njit
 from .tiling import DataTile
 from .decode import DtypeConversionDecoder
+from libertem.io.corrections.detector import dark_gain_inplace
 
 _r_n_d_cache = {}
 
@@ -27,7 +28,7 @@ def _make_buffered_reader_and_decoder(decode):
     @cached_njit(boundscheck=False, nogil=True)
     def _buffered_tilereader(outer_idx, buffers, sig_dims, tile_read_ranges,
                            out_decoded, native_dtype, do_zero,
-                           origin, shape, ds_shape, offsets):
+                           origin, shape, ds_shape, offsets, dark, gain):
         if do_zero:
             out_decoded[:] = 0
         for rr_idx in range(tile_read_ranges.shape[0]):
@@ -46,6 +47,8 @@ def _make_buffered_reader_and_decoder(decode):
                 shape=shape,
                 ds_shape=ds_shape,
             )
+        # applied while the tile is still in the CPU cache:
+        dark_gain_inplace(out_decoded, dark, gain)
         return out_decoded
     return _buffered_tilereader
 
@@ -302,6 +305,7 @@ class BufferedBackendImpl(IOBackendImpl):
         buf_shape = (tiling_scheme.depth,) + tuple(largest_slice.shape)
 
         need_clear = decoder.do_clear()
+        fuse = self.fuse_corrections(corrections, read_dtype)
 
         slices = read_ranges[0]
         # Use NumPy prod for multidimensional array and axis parameter
@@ -312,81 +316,96 @@ class BufferedBackendImpl(IOBackendImpl):
 
         with self._buffer_pool.empty(buf_shape, dtype=read_dtype) as out_decoded:
             out_decoded = out_decoded.reshape((-1,))
-            for block_idx in range(0, slices.shape[0], tile_block_size):
-                block_ranges = ranges[block_idx:block_idx + tile_block_size]
-
-                fill_factor, req_buf_size, min_per_file, max_per_file = block_get_min_fill_factor(
-                    block_ranges
-                )
-                # TODO: if it makes sense, implement sparse variant
-                # if req_buf_size > self._max_buffer_size or fill_factor < self._sparse_threshold:
-                yield from self._read_block_dense(
-                    block_idx, tile_block_size, min_per_file, max_per_file, open_files,
+            blocks = self._read_blocks(open_files, ranges, tile_block_size)
+            for block_idx, min_per_file, buffers in blocks:
+                yield from self._decode_block(
+                    block_idx, tile_block_size, min_per_file, buffers,
                     slices, ranges, scheme_indices, shape_prods, out_decoded, r_n_d,
-                    sig_dims, ds_shape, need_clear, native_dtype, corrections,
+                    sig_dims, ds_shape, need_clear, native_dtype, corrections, fuse,
                 )
 
-    def _read_block_dense(
-        self, block_idx, tile_block_size, min_per_file, max_per_file, open_files,
+    def _read_blocks(self, open_files, ranges, tile_block_size):
+        """
+        Read the data for each block of `tile_block_size` read range entries,
+        yielding `(block_idx, min_per_file, buffers)`. The buffers are only
+        valid until the next block is requested.
+        """
+        for block_idx in range(0, ranges.shape[0], tile_block_size):
+            block_ranges = ranges[block_idx:block_idx + tile_block_size]
+
+            fill_factor, req_buf_size, min_per_file, max_per_file = block_get_min_fill_factor(
+                block_ranges
+            )
+            # TODO: if it makes sense, implement sparse variant
+            # if req_buf_size > self._max_buffer_size or fill_factor < self._sparse_threshold:
+            buffers = Dict()
+
+            # this list manages the lifetime of the ManagedBuffer instances;
+            # after `buf_ref` goes out of scope, the buffers are returned to
+            # the buffer pool, so make sure that this matches with the usage
+            # of the buffers!
+            buf_ref = []
+            for fileno in min_per_file.keys():
+                fh = open_files[fileno]
+                # add align_to to allow for alignment cut:
+                align_to = fh.get_blocksize()
+                read_size = max_per_file[fileno] - min_per_file[fileno] + align_to
+                # ManagedBuffer gives us memory in 4k blocks, so the size is 4k aligned
+                mb = ManagedBuffer(self._buffer_pool, read_size, alignment=fh.get_blocksize())
+                arr = np.frombuffer(mb.buf, dtype=np.uint8)
+                buf_ref.append(mb)
+                seek_pos = min_per_file[fileno]
+                alignment = 0
+                # seek_pos needs to be aligned to 4k block size, too:
+                if seek_pos % align_to != 0:
+                    alignment = seek_pos % align_to
+                    seek_pos = align_to * (seek_pos // align_to)
+                fh.seek(seek_pos)
+                read_result = fh.readinto(arr)
+                # read may be truncated, if the buffer is larger than the file; we
+                # truncate the buffer, too, to make sure we don't use any
+                # uninitialized values. Also cut off `alignment` bytes at the beginning,
+                # which were read to make O_DIRECT happy:
+                buffers[fileno] = read_result[alignment:]
+            yield block_idx, min_per_file, buffers
+
+    def _decode_block(
+        self, block_idx, tile_block_size, min_per_file, buffers,
         slices, ranges, scheme_indices, shape_prods, out_decoded, r_n_d,
-        sig_dims, ds_shape, need_clear, native_dtype, corrections,
+        sig_dims, ds_shape, need_clear, native_dtype, corrections, fuse=False,
     ):
         """
-        Reads a block of tiles, starting at `block_idx`, having a size of
-        `tile_block_size` read range entries.
+        Decode a block of tiles, starting at `block_idx`, having a size of
+        `tile_block_size` read range entries, from the data that was read
+        into `buffers`. If `fuse` is set, the dark frame and gain map are
+        applied by the reader, see :meth:`IOBackendImpl.fuse_corrections`.
         """
-        # phase 1: read
-        buffers = Dict()
-
-        # this list manages the lifetime of the ManagedBuffer instances;
-        # after `buf_ref` goes out of scope, the buffers are returned to
-        # the buffer pool, so make sure that this matches with the usage
-        # of the buffers!
-        buf_ref = []
-        for fileno in min_per_file.keys():
-            fh = open_files[fileno]
-            # add align_to to allow for alignment cut:
-            align_to = fh.get_blocksize()
-            read_size = max_per_file[fileno] - min_per_file[fileno] + align_to
-            # ManagedBuffer gives us memory in 4k blocks, so the size is 4k aligned
-            mb = ManagedBuffer(self._buffer_pool, read_size, alignment=fh.get_blocksize())
-            arr = np.frombuffer(mb.buf, dtype=np.uint8)
-            buf_ref.append(mb)
-            seek_pos = min_per_file[fileno]
-            alignment = 0
-            # seek_pos needs to be aligned to 4k block size, too:
-            if seek_pos % align_to != 0:
-                alignment = seek_pos % align_to
-                seek_pos = align_to * (seek_pos // align_to)
-            fh.seek(seek_pos)
-            read_result = fh.readinto(arr)
-            # read may be truncated, if the buffer is larger than the file; we
-            # truncate the buffer, too, to make sure we don't use any
-            # uninitialized values. Also cut off `alignment` bytes at the beginning,
-            # which were read to make O_DIRECT happy:
-            buffers[fileno] = read_result[alignment:]
-
-        # phase 2: decode tiles from the data that was read
+        dark = gain = None
         for idx in range(block_idx, block_idx + tile_block_size):
             origin = slices[idx, 0]
             shape = slices[idx, 1]
             tile_ranges = ranges[idx]
             scheme_idx = scheme_indices[idx]
             out_cut = out_decoded[:shape_prods[idx]].reshape((shape[0], -1))
+            tile_slice = Slice(
+                origin=origin,
+                shape=Shape(shape, sig_dims=sig_dims)
+            )
+            if fuse:
+                dark, gain = corrections.get_dark_gain(tile_slice.discard_nav())
 
             data = r_n_d(
                 idx,
                 buffers, sig_dims, tile_ranges,
                 out_cut, native_dtype, do_zero=need_clear,
                 origin=origin, shape=shape, ds_shape=ds_shape,
-                offsets=min_per_file,
-            )
-            tile_slice = Slice(
-                origin=origin,
-                shape=Shape(shape, sig_dims=sig_dims)
+                offsets=min_per_file, dark=dark, gain=gain,
             )
             data = data.reshape(shape)
-            self.preprocess(data, tile_slice, corrections)
+            if fuse:
+                corrections.repair(data, tile_slice)
+            else:
+                self.preprocess(data, tile_slice, corrections)
             yield DataTile(
                 data,
                 tile_slice=tile_slice,
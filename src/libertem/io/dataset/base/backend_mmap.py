@@ -16,6 +16,8 @@ from libertem.common.buffers import BufferPool
 from libertem.common.numba import cached_njit
 from .tiling import DataTile
 from .decode import DtypeConversionDecoder
+from libertem.io.corrections.detector import dark_gain_inplace
+from .readahead import make_readahead
 
 
 _r_n_d_cache = {}
@@ -28,9 +30,10 @@ def _make_mmap_reader_and_decoder(decode):
     @cached_njit(boundscheck=False, cache=True, nogil=True)
     def _mmap_tilereader_w_copy(outer_idx, mmaps, sig_dims, tile_read_ranges,
                            out_decoded, native_dtype, do_zero,
-                           origin, shape, ds_shape):
+                           origin, shape, ds_shape, dark, gain):
         """
-        Read and decode a single tile
+        Read and decode a single tile, and apply the dark frame and gain
+        map, if given, while the tile is still in the CPU cache
         """
         if do_zero:
             out_decoded[:] = 0
@@ -49,6 +52,7 @@ def _make_mmap_reader_and_decoder(decode):
                 shape=shape,
                 ds_shape=ds_shape,
             )
+        dark_gain_inplace(out_decoded, dark, gain)
         return out_decoded
     return _mmap_tilereader_w_copy
 
@@ -75,12 +79,36 @@ class MMapBackend(IOBackend, id_="mmap"):
     ----------
     enable_readahead_hints : bool
         Linux only. Try to influence readahead behavior (experimental).
+
+    readahead_bytes : int
+        Linux only. Ask the kernel to read up to this many bytes ahead of the
+        current tile, following the read plan of the partition. This helps to
+        keep the device busy on storage with high latency, like network file
+        systems. Disabled by default.
+
+        .. versionadded:: 0.12.0
+
+    drop_behind : bool
+        Linux only. Release data from the page cache once it is no longer needed
+        for the current partition, so that reading a large dataset doesn't evict
+        other data from the cache. Note that this also means that repeated runs
+        on the same data have to read it from storage again.
+
+        .. versionadded:: 0.12.0
     """
-    def __init__(self, enable_readahead_hints=False):
+    def __init__(self, enable_readahead_hints=False, readahead_bytes=0, drop_behind=False):
+        if readahead_bytes < 0:
+            raise ValueError(f"readahead_bytes must not be negative, is {readahead_bytes}")
         self._enable_readahead = enable_readahead_hints
+        self._readahead_bytes = readahead_bytes
+        self._drop_behind = drop_behind
 
     def get_impl(self):
-        return MMapBackendImpl(self._enable_readahead)
+        return MMapBackendImpl(
+            self._enable_readahead,
+            readahead_bytes=self._readahead_bytes,
+            drop_behind=self._drop_behind,
+        )
 
     @classmethod
     def from_json(cls, msg):
@@ -169,9 +197,11 @@ class MMapFile(MMapFileBase):
 class MMapBackendImpl(IOBackendImpl):
     FILE_CLS: typing.Type = MMapFile
 
-    def __init__(self, enable_readahead_hints=False):
+    def __init__(self, enable_readahead_hints=False, readahead_bytes=0, drop_behind=False):
         super().__init__()
         self._enable_readahead = enable_readahead_hints
+        self._readahead_bytes = readahead_bytes
+        self._drop_behind = drop_behind
         self._buffer_pool = BufferPool()
 
     @contextlib.contextmanager
@@ -186,7 +216,7 @@ class MMapBackendImpl(IOBackendImpl):
 
     def _get_tiles_straight(
         self, tiling_scheme, open_files: typing.List[MMapFile], read_ranges,
-        sync_offset=0
+        sync_offset=0, readahead=None,
     ):
         """
         Read straight from the file system cache, via memory mapping, without
@@ -212,12 +242,17 @@ class MMapBackendImpl(IOBackendImpl):
             As returned by `get_read_ranges`
 
         sync_offset : int
+
+        readahead : ReadaheadScheduler or None
+            Is advanced before each tile
         """
 
         ds_sig_shape = tuple(tiling_scheme.dataset_shape.sig)
         sig_dims = tiling_scheme.shape.sig.dims
         slices, ranges, scheme_indices = read_ranges
         for idx in range(slices.shape[0]):
+            if readahead is not None:
+                readahead.advance(idx)
             origin, shape = slices[idx]
             tile_ranges = ranges[idx]
             scheme_idx = scheme_indices[idx]
@@ -260,7 +295,7 @@ class MMapBackendImpl(IOBackendImpl):
 
     def _get_tiles_w_copy(
         self, tiling_scheme, open_files, read_ranges, read_dtype, native_dtype,
-        decoder=None, corrections=None,
+        decoder=None, corrections=None, readahead=None,
     ):
         if decoder is None:
             decoder = DtypeConversionDecoder()
@@ -285,6 +320,8 @@ class MMapBackendImpl(IOBackendImpl):
 
         buf_shape = (tiling_scheme.depth,) + tuple(largest_slice.shape)
         need_clear = decoder.do_clear()
+        fuse = self.fuse_corrections(corrections, read_dtype)
+        dark = gain = None
 
         with self._buffer_pool.empty(buf_shape, dtype=read_dtype) as out_decoded:
             out_decoded = out_decoded.reshape((-1,))
@@ -294,6 +331,8 @@ class MMapBackendImpl(IOBackendImpl):
             ranges = read_ranges[1]
             scheme_indices = read_ranges[2]
             for idx in range(slices.shape[0]):
+                if readahead is not None:
+                    readahead.advance(idx)
                 origin = slices[idx, 0]
                 shape = slices[idx, 1]
                 tile_slice = Slice(
@@ -302,18 +341,21 @@ class MMapBackendImpl(IOBackendImpl):
                 )
                 tile_ranges = ranges[idx]
                 scheme_idx = scheme_indices[idx]
-                # if idx < slices.shape[0] - 1:
-                #     self._prefetch_for_tile(fileset, ranges[idx + 1])
-                #     pass
                 out_cut = out_decoded[:shape_prods[idx]].reshape((shape[0], -1))
+                if fuse:
+                    dark, gain = corrections.get_dark_gain(tile_slice.discard_nav())
                 data = r_n_d(
                     idx,
                     mmaps, sig_dims, tile_ranges,
                     out_cut, native_dtype, do_zero=need_clear,
                     origin=origin, shape=shape, ds_shape=ds_shape,
+                    dark=dark, gain=gain,
                 )
                 data = data.reshape(shape)
-                self.preprocess(data, tile_slice, corrections)
+                if fuse:
+                    corrections.repair(data, tile_slice)
+                else:
+                    self.preprocess(data, tile_slice, corrections)
                 yield DataTile(
                     data,
                     tile_slice=tile_slice,
@@ -332,6 +374,11 @@ class MMapBackendImpl(IOBackendImpl):
         with self.open_files(fileset) as open_files:
             if self._enable_readahead:
                 self._set_readahead_hints(roi, open_files)
+            readahead = make_readahead(
+                open_files, read_ranges[1],
+                budget=self._readahead_bytes,
+                drop_behind=self._drop_behind,
+            )
             if not self.need_copy(
                 decoder=decoder,
                 tiling_scheme=tiling_scheme,
@@ -344,6 +391,7 @@ class MMapBackendImpl(IOBackendImpl):
             ):
                 yield from self._get_tiles_straight(
                     tiling_scheme, open_files, read_ranges, sync_offset,
+                    readahead=readahead,
                 )
             else:
                 yield from self._get_tiles_w_copy(
@@ -354,6 +402,7 @@ class MMapBackendImpl(IOBackendImpl):
                     native_dtype=native_dtype,
                     decoder=decoder,
                     corrections=corrections,
+                    readahead=readahead,
                 )
 
     def _prefetch_for_tile(self, fileset, tile_ranges):
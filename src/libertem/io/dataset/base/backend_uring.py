@@ -0,0 +1,221 @@
+import os
+import logging
+import platform
+from collections import deque, defaultdict
+
+import numpy as np
+from numba.typed import Dict
+
+from .backend import IOBackend
+from .backend_buffered import BufferedBackendImpl, block_get_min_fill_factor
+from .uring import IoUring, uring_supported
+
+log = logging.getLogger(__name__)
+
+
+class UringBackend(IOBackend, id_="uring"):
+    """
+    I/O backend that uses Linux io_uring to read the data. Instead of reading
+    one range after the other, all reads for a block of tiles are submitted
+    at once, split into chunks with many of them in flight, and the reads for
+    the next block are already running while the current one is decoded.
+    The reads go into buffers that are registered with the kernel, if the
+    locked memory limit permits.
+
+    This is most useful on fast storage, like NVMe RAIDs, which only reach
+    their full bandwidth with many concurrent requests, especially in
+    combination with :code:`direct_io=True`.
+
+    If io_uring is not available, for example on kernels older than 5.1 or
+    because it is disabled by a sandbox, this backend falls back to the
+    implementation of :class:`~libertem.io.dataset.base.BufferedBackend`
+    or :class:`~libertem.io.dataset.base.DirectBackend`, depending on
+    :code:`direct_io`.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    max_buffer_size : int
+        Maximum buffer size, in bytes. This is passed to the tileshape
+        negotiation to select the right depth.
+
+    direct_io : bool
+        Open the files with :code:`O_DIRECT`, bypassing the page cache.
+
+    queue_depth : int
+        Maximum number of reads in flight
+
+    chunk_size : int
+        Size of the individual reads, in bytes. Must be a multiple of 4096.
+    """
+    def __init__(
+        self, max_buffer_size=16*1024*1024, direct_io=False, queue_depth=64,
+        chunk_size=1024*1024,
+    ):
+        if chunk_size <= 0 or chunk_size % 4096 != 0:
+            raise ValueError(f"chunk_size must be a multiple of 4096, is {chunk_size}")
+        self._max_buffer_size = max_buffer_size
+        self._direct_io = direct_io
+        self._queue_depth = queue_depth
+        self._chunk_size = chunk_size
+
+    @classmethod
+    def from_json(cls, msg):
+        """
+        Construct an instance from the already-decoded `msg`, which
+        contains the parameters of :meth:`__init__`.
+        """
+        params = ("max_buffer_size", "direct_io", "queue_depth", "chunk_size")
+        return cls(**{k: msg[k] for k in params if k in msg})
+
+    @classmethod
+    def platform_supported(cls):
+        return platform.system() == "Linux"
+
+    def get_impl(self):
+        if not uring_supported():
+            log.warning("io_uring is not available, falling back to buffered reading")
+            return BufferedBackendImpl(
+                max_buffer_size=self._max_buffer_size,
+                direct_io=self._direct_io,
+            )
+        return UringBackendImpl(
+            max_buffer_size=self._max_buffer_size,
+            direct_io=self._direct_io,
+            queue_depth=self._queue_depth,
+            chunk_size=self._chunk_size,
+        )
+
+
+def _round_up(value, multiple):
+    return -(-value // multiple) * multiple
+
+
+class _BlockPlan:
+    """
+    Where the data of one block of tiles is read from, and where it goes
+    in the staging buffer.
+    """
+    def __init__(self, block_idx, min_per_file, max_per_file, open_files, file_sizes):
+        self.block_idx = block_idx
+        self.min_per_file = min_per_file
+        # (fileno, position in staging buffer, file offset, read size, alignment, valid size)
+        self.reads = []
+        pos = 0
+        for fileno in min_per_file.keys():
+            align_to = open_files[fileno].get_blocksize()
+            start = min_per_file[fileno]
+            alignment = start % align_to
+            seek_pos = start - alignment
+            end = min(max_per_file[fileno], file_sizes[fileno])
+            read_size = _round_up(max(0, end - seek_pos), align_to)
+            self.reads.append((fileno, pos, seek_pos, read_size, alignment, end - seek_pos))
+            pos += _round_up(read_size, 4096)
+        self.size = pos
+
+
+class _BatchReader:
+    """
+    Keeps the submission queue of `ring` filled with chunked reads and
+    tracks which blocks are complete.
+    """
+    def __init__(self, ring: IoUring, chunk_size: int):
+        self._ring = ring
+        self._chunk_size = chunk_size
+        self._queue = deque()
+        self._by_user_data = {}
+        self._outstanding = defaultdict(int)
+        self._next_user_data = 0
+
+    def add(self, seq, fd, buf, offset, buf_index):
+        for chunk_start in range(0, len(buf), self._chunk_size):
+            chunk = buf[chunk_start:chunk_start + self._chunk_size]
+            self._queue.append((seq, fd, chunk, offset + chunk_start, buf_index))
+            self._outstanding[seq] += 1
+
+    def _pump(self):
+        ring = self._ring
+        while self._queue and ring.in_flight < ring.entries:
+            seq, fd, chunk, offset, buf_index = req = self._queue.popleft()
+            user_data = self._next_user_data
+            self._next_user_data += 1
+            self._by_user_data[user_data] = req
+            ring.prep_read(fd, chunk, offset, user_data=user_data, buf_index=buf_index)
+
+    def wait(self, seq):
+        while self._outstanding[seq] > 0:
+            self._pump()
+            for user_data, res in self._ring.completions(wait_for=1):
+                req_seq, fd, chunk, offset, buf_index = self._by_user_data.pop(user_data)
+                if res < 0:
+                    raise OSError(-res, os.strerror(-res))
+                if 0 < res < len(chunk):
+                    # short read, continue where it stopped:
+                    self._queue.appendleft(
+                        (req_seq, fd, chunk[res:], offset + res, buf_index)
+                    )
+                    continue
+                # complete, or end of file:
+                self._outstanding[req_seq] -= 1
+        del self._outstanding[seq]
+
+
+class UringBackendImpl(BufferedBackendImpl):
+    def __init__(self, max_buffer_size, direct_io=False, queue_depth=64, chunk_size=1024*1024):
+        super().__init__(max_buffer_size=max_buffer_size, direct_io=direct_io)
+        self._queue_depth = queue_depth
+        self._chunk_size = chunk_size
+
+    def _read_blocks(self, open_files, ranges, tile_block_size):
+        file_sizes = [os.fstat(f.handle.fileno()).st_size for f in open_files]
+        plans = []
+        for block_idx in range(0, ranges.shape[0], tile_block_size):
+            _, _, min_per_file, max_per_file = block_get_min_fill_factor(
+                ranges[block_idx:block_idx + tile_block_size]
+            )
+            plans.append(_BlockPlan(
+                block_idx, min_per_file, max_per_file, open_files, file_sizes,
+            ))
+        if not plans:
+            return
+        # two staging buffers: one is decoded while the next block is read into the other
+        staging_size = _round_up(max(1, max(plan.size for plan in plans)), self._chunk_size)
+        staging = [
+            self._buffer_pool.checkout_bytes(staging_size, 4096)
+            for _ in range(2)
+        ]
+        try:
+            with IoUring(entries=self._queue_depth) as ring:
+                views = [memoryview(buf)[:staging_size] for buf in staging]
+                registered = ring.register_buffers(views)
+                reader = _BatchReader(ring, self._chunk_size)
+
+                def submit(seq):
+                    plan = plans[seq]
+                    slot = seq % 2
+                    for fileno, pos, seek_pos, read_size, _, _ in plan.reads:
+                        reader.add(
+                            seq,
+                            open_files[fileno].handle.fileno(),
+                            views[slot][pos:pos + read_size],
+                            seek_pos,
+                            slot if registered else None,
+                        )
+
+                submit(0)
+                for seq, plan in enumerate(plans):
+                    if seq + 1 < len(plans):
+                        submit(seq + 1)
+                    reader.wait(seq)
+                    arr = np.frombuffer(views[seq % 2], dtype=np.uint8)
+                    buffers = Dict()
+                    for fileno, pos, _, _, alignment, valid in plan.reads:
+                        # cut off `alignment` bytes at the beginning, which were
+                        # read to make O_DIRECT happy, and anything beyond the end
+                        # of the file:
+                        buffers[fileno] = arr[pos + alignment:pos + max(alignment, valid)]
+                    yield plan.block_idx, plan.min_per_file, buffers
+        finally:
+            for buf in staging:
+                self._buffer_pool.checkin_bytes(staging_size, 4096, buf)
@@ -0,0 +1,113 @@
+"""
+Reading of chunked data, where each chunk has to be decoded as a whole, for
+example because it is compressed. The chunks are decoded in a thread pool,
+ahead of the tiles that need them.
+"""
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from libertem.common.math import prod
+from libertem.common import Slice
+
+
+class ChunkReader:
+    """
+    Read tiles from chunked data by decoding the chunks in a thread pool.
+    The chunks of upcoming tiles are decoded ahead of time, up to
+    :code:`max_bytes` of decoded data, and each chunk is kept until the
+    last tile that needs it was read.
+
+    Subclasses implement :meth:`_decode_chunk`.
+
+    Parameters
+    ----------
+    chunks : Tuple[int, ...]
+        The shape of a chunk
+
+    dtype : numpy.dtype
+        The dtype of the decoded chunks
+
+    fillvalue
+        Value for chunks that don't exist
+
+    num_threads : int
+
+    max_bytes : int
+        How many bytes of decoded chunks to keep around
+    """
+    def __init__(
+        self, chunks: Tuple[int, ...], dtype, fillvalue, num_threads: int, max_bytes: int,
+    ):
+        self._num_threads = num_threads
+        self._chunks = tuple(chunks)
+        self._dtype = np.dtype(dtype)
+        self._fillvalue = fillvalue
+        self._chunk_bytes = prod(self._chunks) * self._dtype.itemsize
+        self._max_bytes = max(max_bytes, 2 * num_threads * self._chunk_bytes)
+
+    def _decode_chunk(self, offset: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """
+        Decode the chunk starting at :code:`offset` into an array of the
+        chunk shape, or return :code:`None` if it only contains the fill value.
+        Called from the thread pool.
+        """
+        raise NotImplementedError()
+
+    def _get_chunk_offsets(self, tile_slice: Slice) -> List[Tuple[int, ...]]:
+        per_dim = [
+            range((o // c) * c, o + s, c)
+            for o, s, c in zip(tile_slice.origin, tile_slice.shape, self._chunks)
+        ]
+        return list(itertools.product(*per_dim))
+
+    def _copy_chunk(self, out: np.ndarray, tile_slice: Slice, offset, chunk):
+        src = []
+        dest = []
+        for o, s, co, c in zip(tile_slice.origin, tile_slice.shape, offset, self._chunks):
+            start = max(o, co)
+            stop = min(o + s, co + c)
+            src.append(slice(start - co, stop - co))
+            dest.append(slice(start - o, stop - o))
+        if chunk is None:
+            out[tuple(dest)] = self._fillvalue
+        else:
+            out[tuple(dest)] = chunk[tuple(src)]
+
+    def read_tiles(self, tile_slices: Sequence[Slice], out_flat: np.ndarray):
+        """
+        Read the data for each of :code:`tile_slices` into :code:`out_flat`,
+        converting to its dtype, and yield the data cut to the shape of the slice.
+        The buffer is re-used for the next tile.
+        """
+        plan = [self._get_chunk_offsets(tile_slice) for tile_slice in tile_slices]
+        last_use: Dict[Tuple[int, ...], int] = {}
+        for tile_idx, offsets in enumerate(plan):
+            for offset in offsets:
+                last_use[offset] = tile_idx
+        futures = {}
+        submit_idx = 0
+        pool = ThreadPoolExecutor(max_workers=self._num_threads)
+        try:
+            for tile_idx, tile_slice in enumerate(tile_slices):
+                while submit_idx < len(plan) and (
+                    submit_idx <= tile_idx
+                    or len(futures) * self._chunk_bytes < self._max_bytes
+                ):
+                    for offset in plan[submit_idx]:
+                        if offset not in futures:
+                            futures[offset] = pool.submit(self._decode_chunk, offset)
+                    submit_idx += 1
+                out = out_flat[:tile_slice.shape.size].reshape(tuple(tile_slice.shape))
+                for offset in plan[tile_idx]:
+                    self._copy_chunk(out, tile_slice, offset, futures[offset].result())
+                    if last_use[offset] == tile_idx:
+                        del futures[offset]
+                yield out
+        finally:
+            # `cancel_futures` of `shutdown` is only available from Python 3.9:
+            for future in futures.values():
+                future.cancel()
+            pool.shutdown(wait=True)
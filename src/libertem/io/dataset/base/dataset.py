@@ -1,3 +1,5 @@
+import copy
+import time
 import typing
 from typing import Generator, Optional, Sequence, Tuple
 
@@ -11,6 +13,7 @@ from libertem.io.dataset.base import DataSetException, MMapBackend
 from libertem.common.messageconverter import MessageConverter
 from libertem.io.corrections.corrset import CorrectionSet
 from .partition import BasePartition, Partition
+from .follow import Follow
 
 if typing.TYPE_CHECKING:
     from libertem.common.executor import JobExecutor, TaskCommHandler
@@ -30,6 +33,7 @@ class DataSet:
         self._nav_shape_product = 0
         self._io_backend = io_backend
         self._meta: Optional[DataSetMeta] = None
+        self._follow: Optional[Follow] = None
 
     def initialize(self, executor) -> "DataSet":
         """
@@ -55,22 +59,86 @@ class DataSet:
         """
         Check sync_offset specified and returns number of frames skipped and inserted
         """
-        if not -1*self._image_count < self._sync_offset < self._image_count:
+        image_count = self._image_count
+        if self._follow is not None:
+            # frames that are not written yet are expected to arrive later:
+            image_count = max(image_count, self._nav_shape_product + self._sync_offset)
+        if not -1*image_count < self._sync_offset < image_count:
             raise DataSetException(
                 "sync_offset should be in (%s, %s), which is (-image_count, image_count)"
-                % (-1*self._image_count, self._image_count)
+                % (-1*image_count, image_count)
             )
         return {
             "frames_skipped_start": max(0, self._sync_offset),
             "frames_ignored_end": max(
-                0, self._image_count - self._nav_shape_product - self._sync_offset
+                0, image_count - self._nav_shape_product - self._sync_offset
             ),
             "frames_inserted_start": abs(min(0, self._sync_offset)),
             "frames_inserted_end": max(
-                0, self._nav_shape_product - self._image_count + self._sync_offset
+                0, self._nav_shape_product - image_count + self._sync_offset
             )
         }
 
+    @property
+    def follow(self) -> Optional[Follow]:
+        """
+        The :class:`~libertem.io.dataset.base.follow.Follow` parameters if
+        this data set is still being written and should be followed while
+        processing, :code:`None` otherwise.
+
+        .. versionadded:: 0.12.0
+        """
+        return self._follow
+
+    def refresh(self, executor: "JobExecutor") -> int:
+        """
+        Check the files of a followed data set for new frames and update
+        the number of available frames accordingly. Should be overridden by
+        :class:`DataSet` implementations that support the :code:`follow`
+        parameter.
+
+        .. versionadded:: 0.12.0
+
+        Parameters
+        ----------
+        executor : JobExecutor
+            Used to access the files, like in :meth:`initialize`
+
+        Returns
+        -------
+        int
+            The number of frames that are available now
+        """
+        raise NotImplementedError()
+
+    def _wait_for_first_frame(self, executor: "JobExecutor") -> None:
+        """
+        Wait until a followed data set contains at least one complete frame,
+        so that its files can be opened.
+        """
+        if self._follow is None:
+            return
+        deadline = time.monotonic() + self._follow.timeout
+        while self._image_count == 0:
+            if time.monotonic() >= deadline:
+                raise DataSetException(
+                    "no complete frame was written within %ss" % self._follow.timeout
+                )
+            time.sleep(self._follow.poll_interval)
+            self.refresh(executor)
+
+    def _set_image_count(self, image_count: int) -> None:
+        """
+        Update the number of frames that are available for reading, for
+        example after the files of a followed data set have grown.
+        """
+        self._image_count = image_count
+        if self._meta is not None:
+            # partitions of earlier runs may still reference the old meta object
+            meta = copy.copy(self._meta)
+            meta.image_count = image_count
+            self._meta = meta
+
     def get_num_partitions(self) -> int:
         """
         Returns the number of partitions the dataset should be split into.
@@ -245,7 +313,7 @@ class DataSet:
         Get the supported I/O backends as list of their IDs. Some DataSet
         implementations with a custom backend may return an empty list here.
         """
-        return ["mmap", "buffered", "direct"]
+        return ["mmap", "buffered", "direct", "uring"]
 
     def get_io_backend(self) -> "IOBackend":
         if self._io_backend is None:
@@ -118,13 +118,12 @@ class File:
         file_offset = self._file_header
         skip_end = 0
 
-        # cut off any extra data at the end of the file:
-        if size % int(prod(self._sig_shape)):
-            new_mmap_size = self.num_frames * (
-                (itemsize * frame_size) + self._frame_header + self._frame_footer
-            )
-            skip_end = (size - file_offset) - new_mmap_size
-        assert skip_end >= 0
+        # cut off any extra data at the end of the file, like a trailer or
+        # frames that were written after the data set was initialized:
+        new_mmap_size = self.num_frames * (
+            (itemsize * frame_size) + self._frame_header + self._frame_footer
+        )
+        skip_end = max(0, (size - file_offset) - new_mmap_size)
 
         return OffsetsSizes(
             file_offset=file_offset,
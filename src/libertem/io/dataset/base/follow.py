@@ -0,0 +1,59 @@
+"""
+Support for processing data sets while they are still being written.
+
+.. versionadded:: 0.12.0
+"""
+from typing import Optional, Union
+
+
+class Follow:
+    """
+    Parameters for following a data set whose files are still being written,
+    for example by a detector during an acquisition.
+
+    The files are polled for new frames. Partitions are processed as soon
+    as all their frames are available, until the expected number of frames
+    for the navigation shape of the data set was written, or until the files
+    didn't grow for :code:`timeout` seconds. Partitions that are incomplete
+    at that point are processed with the frames that are available, the
+    remaining positions are left at the initial value of the result buffers.
+
+    Loading a followed data set waits for the first complete frame, up to
+    :code:`timeout` seconds.
+
+    Pass an instance, or :code:`True` for the default values, as the
+    :code:`follow` parameter of a data set that supports it.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    poll_interval : float
+        Time between checks for new frames, in seconds
+    timeout : float
+        The acquisition is considered finished if no new frames were written
+        for this time, in seconds
+    """
+    def __init__(self, poll_interval: float = 0.5, timeout: float = 10.0):
+        if poll_interval <= 0:
+            raise ValueError("poll_interval must be positive")
+        if timeout < 0:
+            raise ValueError("timeout must not be negative")
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+
+    @classmethod
+    def from_param(cls, follow: Union[bool, "Follow", None]) -> Optional["Follow"]:
+        """
+        Normalize the :code:`follow` parameter of a data set
+        """
+        if follow is None or follow is False:
+            return None
+        if follow is True:
+            return cls()
+        if isinstance(follow, cls):
+            return follow
+        raise TypeError(f"follow should be a bool or a Follow instance, got {follow!r}")
+
+    def __repr__(self):
+        return f"<Follow poll_interval={self.poll_interval} timeout={self.timeout}>"
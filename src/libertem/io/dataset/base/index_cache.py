@@ -0,0 +1,80 @@
+"""
+Helpers for small JSON files that cache information about data sets, like
+parsed headers or the result of a synchronization scan, so that they don't
+have to be computed each time a data set is opened.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import json
+import logging
+import tempfile
+from typing import Any, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+def get_cache_home() -> str:
+    '''
+    The user's cache directory for LiberTEM
+    '''
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "libertem")
+
+
+def get_index_dir(env_var: str, name: str) -> Optional[str]:
+    '''
+    Directory for index files, from the environment variable :code:`env_var`,
+    or :code:`name` in the user's cache directory otherwise. Setting the
+    variable to :code:`0` disables the index, and :code:`None` is returned.
+    '''
+    path = os.environ.get(env_var)
+    if path is not None:
+        if path.lower() in ("", "0", "false"):
+            return None
+        return path
+    return os.path.join(get_cache_home(), name)
+
+
+def get_file_stamp(stat: os.stat_result) -> Dict[str, int]:
+    '''
+    Size and modification time of a file, used to check whether an index
+    entry is still valid
+    '''
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_json(path: str) -> Optional[Any]:
+    '''
+    Content of the JSON file at :code:`path`, or :code:`None` if it
+    doesn't exist or can't be parsed.
+    '''
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_atomic(path: str, content: Any) -> bool:
+    '''
+    Replace the JSON file at :code:`path` atomically, creating the directory
+    if needed. Failures are logged, and :code:`False` is returned.
+    '''
+    dirname = os.path.dirname(path) or "."
+    try:
+        os.makedirs(dirname, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(content, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        log.warning("could not write %s: %s", path, e)
+        return False
+    return True
@@ -60,6 +60,7 @@ class Partition:
         self._io_backend = io_backend
         self._decoder = decoder
         self._idx: Optional[int] = None
+        self._threads_per_worker: Optional[int] = None
         if partition_slice.shape.nav.dims != 1:
             raise ValueError("nav dims should be flat")
 
@@ -109,6 +110,18 @@ class Partition:
     def set_worker_context(self, worker_context: "WorkerContext"):
         pass
 
+    def set_threads_per_worker(self, threads_per_worker: Optional[int]):
+        """
+        Set the number of threads that reading this partition may use, see
+        :attr:`libertem.common.executor.Environment.threads_per_worker`.
+        Partitions that decode data in a thread pool use this as the default
+        number of threads, so that they don't oversubscribe the machine if
+        several workers read at the same time.
+
+        .. versionadded:: 0.12.0
+        """
+        self._threads_per_worker = threads_per_worker
+
     def get_tiles(self, tiling_scheme, dest_dtype="float32", roi=None,
             array_backend: Optional[ArrayBackend] = None):
         raise NotImplementedError()
@@ -0,0 +1,175 @@
+import os
+import mmap
+import logging
+from typing import List, Optional, Tuple
+
+import numba
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+_PAGE_SIZE = mmap.PAGESIZE
+
+
+@numba.njit(cache=True, nogil=True)
+def _get_tile_extents(num_files, ranges):
+    """
+    For each tile, the smallest and largest byte offset that is read from
+    each file, or -1 if the tile doesn't read from that file.
+    """
+    res = np.full((ranges.shape[0], num_files, 2), -1, dtype=np.int64)
+    for tile_idx in range(ranges.shape[0]):
+        for rr_idx in range(ranges.shape[1]):
+            rr = ranges[tile_idx, rr_idx]
+            if rr[1] == rr[2] == 0:
+                continue
+            extent = res[tile_idx, rr[0]]
+            if extent[0] == -1 or rr[1] < extent[0]:
+                extent[0] = rr[1]
+            if rr[2] > extent[1]:
+                extent[1] = rr[2]
+    return res
+
+
+def _get_advise_target(f) -> Tuple[Optional[int], Optional[mmap.mmap]]:
+    """
+    File descriptor and memory map of an open file, if it is backed by a real file
+    """
+    try:
+        fileno = f.handle.fileno()
+    except (AttributeError, RuntimeError, OSError, ValueError):
+        return None, None
+    mm = getattr(f, "_mmap", None)
+    if not isinstance(mm, mmap.mmap):
+        mm = None
+    return fileno, mm
+
+
+class ReadaheadScheduler:
+    """
+    Give the kernel hints about the read pattern of a partition, based on
+    the complete read-range plan. Before each tile is read, the ranges of the
+    following tiles are announced with :code:`POSIX_FADV_WILLNEED`, until
+    :code:`budget` bytes are announced ahead of the current tile. With
+    :code:`drop_behind`, ranges that are not needed for the rest of the
+    partition are released from the page cache, so that reading a large
+    dataset doesn't evict other data.
+
+    Files that are not backed by a real file descriptor are ignored.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    open_files
+        The open files that the read ranges refer to
+
+    ranges : np.ndarray
+        Read ranges of the partition, as returned by :code:`get_read_ranges`
+
+    budget : int
+        Number of bytes to announce ahead of the current tile
+
+    drop_behind : bool
+        Release ranges from the page cache once they are no longer needed
+    """
+    def __init__(self, open_files, ranges: np.ndarray, budget: int, drop_behind: bool = False):
+        self._budget = budget
+        self._drop_behind = drop_behind
+        self._targets = [_get_advise_target(f) for f in open_files]
+        num_files = len(open_files)
+        extents = _get_tile_extents(num_files, ranges)
+        self._extents = extents
+        used = extents[..., 0] != -1
+        sizes = np.where(used, extents[..., 1] - extents[..., 0], 0)
+        # bytes of tiles [0, i) for i in 0..n:
+        self._cum_bytes = np.concatenate(([0], np.cumsum(sizes.sum(axis=1))))
+        if drop_behind:
+            big = np.iinfo(np.int64).max
+            starts = np.where(used, extents[..., 0], big)
+            # smallest offset that is still needed by tiles [i, n):
+            self._needed_from = np.minimum.accumulate(starts[::-1], axis=0)[::-1]
+            # end of the data read by tiles [0, i]:
+            self._consumed_upto = np.maximum.accumulate(extents[..., 1], axis=0)
+        self._advised_upto = [0] * num_files
+        self._dropped_upto = [0] * num_files
+        self._next = 0
+
+    @property
+    def enabled(self) -> bool:
+        return hasattr(os, "posix_fadvise") and any(
+            fd is not None for fd, _ in self._targets
+        )
+
+    def advance(self, idx: int):
+        """
+        Called right before tile :code:`idx` is read.
+        """
+        if self._drop_behind and idx > 0:
+            self._drop(idx)
+        self._next = max(self._next, idx + 1)
+        num_tiles = self._extents.shape[0]
+        while (
+            self._next < num_tiles
+            and self._cum_bytes[self._next] - self._cum_bytes[idx + 1] < self._budget
+        ):
+            self._willneed(self._next)
+            self._next += 1
+
+    def _willneed(self, tile_idx: int):
+        for file_idx, (start, end) in enumerate(self._extents[tile_idx]):
+            fd, _ = self._targets[file_idx]
+            if fd is None or start == -1:
+                continue
+            start = max(int(start), self._advised_upto[file_idx])
+            if end <= start:
+                continue
+            self._advise(fd, start, int(end) - start, os.POSIX_FADV_WILLNEED)
+            self._advised_upto[file_idx] = int(end)
+
+    def _drop(self, idx: int):
+        num_tiles = self._extents.shape[0]
+        for file_idx, (fd, mm) in enumerate(self._targets):
+            if fd is None:
+                continue
+            end = int(self._consumed_upto[idx - 1, file_idx])
+            if idx < num_tiles:
+                end = min(end, int(self._needed_from[idx, file_idx]))
+            # only whole pages, the rest may still be needed:
+            start = -(-self._dropped_upto[file_idx] // _PAGE_SIZE) * _PAGE_SIZE
+            end = (end // _PAGE_SIZE) * _PAGE_SIZE
+            if end <= start:
+                continue
+            mapped_end = min(end, len(mm)) if mm is not None else 0
+            if mapped_end > start and hasattr(mm, "madvise"):
+                # pages that are mapped into our process are not dropped
+                # from the page cache, so unmap them first:
+                try:
+                    mm.madvise(mmap.MADV_DONTNEED, start, mapped_end - start)
+                except (OSError, ValueError) as e:
+                    log.debug("madvise failed: %s", e)
+            self._advise(fd, start, end - start, os.POSIX_FADV_DONTNEED)
+            self._dropped_upto[file_idx] = end
+
+    def _advise(self, fd: int, offset: int, length: int, advice: int):
+        try:
+            os.posix_fadvise(fd, offset, length, advice)
+        except OSError as e:
+            log.debug("posix_fadvise failed: %s", e)
+
+
+def make_readahead(
+    open_files: List, ranges: np.ndarray, budget: int, drop_behind: bool,
+) -> Optional[ReadaheadScheduler]:
+    """
+    Create a :class:`ReadaheadScheduler`, or return :code:`None` if it is
+    disabled or not supported for these files.
+    """
+    if budget <= 0 and not drop_behind:
+        return None
+    if not hasattr(os, "posix_fadvise"):
+        return None
+    scheduler = ReadaheadScheduler(open_files, ranges, budget, drop_behind)
+    if not scheduler.enabled:
+        return None
+    return scheduler
@@ -1,10 +1,11 @@
 import math
 import logging
 import warnings
-from typing import List, TYPE_CHECKING, Optional, Tuple, Union, Sequence
+from typing import List, TYPE_CHECKING, Optional, Tuple, Union, Sequence, Iterable
 from typing_extensions import Literal
 
 import numpy as np
+from sparseconverter import SPARSE_BACKENDS
 
 from libertem.io.corrections import CorrectionSet
 from libertem.common import Shape, Slice
@@ -226,6 +227,7 @@ class Negotiator:
             approx_partition_shape: Shape,
             roi: Optional[np.ndarray] = None,
             corrections: Optional[CorrectionSet] = None,
+            array_backends: Optional[Iterable[str]] = None,
     ) -> TilingScheme:
         """
         Generate a :class:`TilingScheme` instance that is
@@ -254,6 +256,34 @@ class Negotiator:
 
         corrections : CorrectionSet
             Correction set to consider in negotiation
+
+        array_backends : Iterable[str], optional
+            The array backends the UDFs will receive tiles in. If both the
+            dataset and the UDFs only use sparse backends, the tiles are never
+            densified, and the maximum I/O size of the dataset doesn't apply.
+
+            .. versionadded:: 0.12.0
+        """
+        return self._get_scheme(
+            udfs=udfs, dataset=dataset, read_dtype=read_dtype,
+            approx_partition_shape=approx_partition_shape, roi=roi,
+            corrections=corrections, array_backends=array_backends,
+        )
+
+    def _get_scheme(
+            self,
+            udfs: Sequence[UDFProtocol],
+            dataset,
+            read_dtype: "nt.DTypeLike",
+            approx_partition_shape: Shape,
+            roi: Optional[np.ndarray] = None,
+            corrections: Optional[CorrectionSet] = None,
+            array_backends: Optional[Iterable[str]] = None,
+            size_factor: float = 1,
+    ) -> TilingScheme:
+        """
+        Implementation of :meth:`get_scheme`, with the tile size scaled by
+        :code:`size_factor`, see :meth:`_get_size`.
         """
         itemsize = np.dtype(read_dtype).itemsize
 
@@ -266,6 +296,10 @@ class Negotiator:
         # This already takes corrections into account through a different pathway
         need_decode = dataset.need_decode(roi=roi, read_dtype=read_dtype, corrections=corrections)
 
+        if need_decode and self._is_sparse_native(dataset, array_backends):
+            # only the stored values are converted
+            need_decode = False
+
         io_max_size = self._get_io_max_size(dataset, approx_partition_shape, itemsize, need_decode)
 
         depths = [
@@ -280,6 +314,7 @@ class Negotiator:
         sizes = [
             self._get_size(
                 io_max_size, udf, itemsize, approx_partition_shape, base_shape,
+                size_factor=size_factor,
             )
             for udf in udfs
         ]
@@ -376,6 +411,18 @@ class Negotiator:
             }
         )
 
+    def _is_sparse_native(self, dataset, array_backends: Optional[Iterable[str]]) -> bool:
+        if array_backends is None:
+            return False
+        array_backends = frozenset(array_backends)
+        ds_backends = dataset.array_backends
+        return (
+            bool(array_backends)
+            and ds_backends is not None
+            and SPARSE_BACKENDS.issuperset(ds_backends)
+            and SPARSE_BACKENDS.issuperset(array_backends)
+        )
+
     def _get_io_max_size(self, dataset, approx_partition_shape, itemsize, need_decode):
         if need_decode:
             io_max_size = dataset.get_max_io_size()
@@ -463,9 +510,9 @@ class Negotiator:
 
     def _get_size(
             self, io_max_size, udf: UDFProtocol, itemsize,
-            approx_partition_shape: Shape, base_shape):
+            approx_partition_shape: Shape, base_shape, size_factor: float = 1):
         """
-        Calculate the maximum tile size in bytes
+        Calculate the maximum tile size in bytes, scaled by :code:`size_factor`
         """
         udf_method = udf.get_method()
         partition_size = itemsize * prod(tuple(approx_partition_shape))
@@ -485,6 +532,13 @@ class Negotiator:
             # we need to increase the size:
             base_size = itemsize * prod(base_shape)
             size = max(base_size, size)
+        if size_factor != 1:
+            # candidates for auto-tuning, see `AutoTuneNegotiator`:
+            base_size = itemsize * prod(base_shape)
+            size = max(base_size, int(size * size_factor))
+            if udf_method == "tile":
+                # stay within the maximum read size, like the default:
+                size = min(size, max(base_size, io_max_size))
         return size
 
     def _get_base_shape(
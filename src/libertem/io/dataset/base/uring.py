@@ -0,0 +1,438 @@
+"""
+Minimal io_uring interface using raw system calls via :mod:`ctypes`,
+only covering what is needed for batched reads into registered buffers.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import mmap
+import ctypes
+import logging
+import platform
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numba
+import numpy as np
+from llvmlite import ir
+from numba import types
+from numba.extending import intrinsic
+
+log = logging.getLogger(__name__)
+
+# system call numbers are the same on all architectures that we support:
+_SYS_IO_URING_SETUP = 425
+_SYS_IO_URING_ENTER = 426
+_SYS_IO_URING_REGISTER = 427
+
+_IORING_OFF_SQ_RING = 0
+_IORING_OFF_CQ_RING = 0x8000000
+_IORING_OFF_SQES = 0x10000000
+
+_IORING_ENTER_GETEVENTS = 1
+
+_IORING_REGISTER_BUFFERS = 0
+_IORING_UNREGISTER_BUFFERS = 1
+
+_IORING_OP_READV = 1
+_IORING_OP_READ_FIXED = 4
+
+_SUPPORTED_MACHINES = ("x86_64", "AMD64", "aarch64", "arm64")
+
+
+class _SQRingOffsets(ctypes.Structure):
+    _fields_ = [
+        ("head", ctypes.c_uint32),
+        ("tail", ctypes.c_uint32),
+        ("ring_mask", ctypes.c_uint32),
+        ("ring_entries", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("dropped", ctypes.c_uint32),
+        ("array", ctypes.c_uint32),
+        ("resv1", ctypes.c_uint32),
+        ("user_addr", ctypes.c_uint64),
+    ]
+
+
+class _CQRingOffsets(ctypes.Structure):
+    _fields_ = [
+        ("head", ctypes.c_uint32),
+        ("tail", ctypes.c_uint32),
+        ("ring_mask", ctypes.c_uint32),
+        ("ring_entries", ctypes.c_uint32),
+        ("overflow", ctypes.c_uint32),
+        ("cqes", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("resv1", ctypes.c_uint32),
+        ("user_addr", ctypes.c_uint64),
+    ]
+
+
+class _Params(ctypes.Structure):
+    _fields_ = [
+        ("sq_entries", ctypes.c_uint32),
+        ("cq_entries", ctypes.c_uint32),
+        ("flags", ctypes.c_uint32),
+        ("sq_thread_cpu", ctypes.c_uint32),
+        ("sq_thread_idle", ctypes.c_uint32),
+        ("features", ctypes.c_uint32),
+        ("wq_fd", ctypes.c_uint32),
+        ("resv", ctypes.c_uint32 * 3),
+        ("sq_off", _SQRingOffsets),
+        ("cq_off", _CQRingOffsets),
+    ]
+
+
+class _IOVec(ctypes.Structure):
+    _fields_ = [
+        ("iov_base", ctypes.c_void_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+_SQE_DTYPE = np.dtype([
+    ("opcode", np.uint8),
+    ("flags", np.uint8),
+    ("ioprio", np.uint16),
+    ("fd", np.int32),
+    ("off", np.uint64),
+    ("addr", np.uint64),
+    ("len", np.uint32),
+    ("rw_flags", np.uint32),
+    ("user_data", np.uint64),
+    ("buf_index", np.uint16),
+    ("personality", np.uint16),
+    ("splice_fd_in", np.int32),
+    ("addr3", np.uint64),
+    ("pad", np.uint64),
+])
+assert _SQE_DTYPE.itemsize == 64
+
+_CQE_DTYPE = np.dtype([
+    ("user_data", np.uint64),
+    ("res", np.int32),
+    ("flags", np.uint32),
+])
+
+_libc = None
+
+
+def _syscall(*args) -> int:
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _libc.syscall.restype = ctypes.c_long
+    res = _libc.syscall(*args)
+    if res < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return res
+
+
+def _address(buf) -> int:
+    return np.frombuffer(buf, dtype=np.uint8).ctypes.data
+
+
+@intrinsic
+def _load_acquire_u32(typingctx, addr):
+    if not isinstance(addr, types.Integer):
+        return None
+
+    def codegen(context, builder, signature, args):
+        ptr = builder.inttoptr(args[0], ir.IntType(32).as_pointer())
+        return builder.load_atomic(ptr, ordering="acquire", align=4)
+    return types.uint32(addr), codegen
+
+
+@intrinsic
+def _store_release_u32(typingctx, addr, value):
+    if not isinstance(addr, types.Integer) or not isinstance(value, types.Integer):
+        return None
+
+    def codegen(context, builder, signature, args):
+        ptr = builder.inttoptr(args[0], ir.IntType(32).as_pointer())
+        val = context.cast(builder, args[1], signature.args[1], types.uint32)
+        builder.store_atomic(val, ptr, ordering="release", align=4)
+        return context.get_dummy_value()
+    return types.void(addr, value), codegen
+
+
+@numba.njit(cache=True, nogil=True)
+def load_acquire_u32(addr):
+    """
+    Atomically load the 32 bit value at :code:`addr` with acquire ordering,
+    so that later reads see everything that was written before the value
+    was stored with release ordering, even on weakly ordered CPUs.
+    """
+    return _load_acquire_u32(addr)
+
+
+@numba.njit(cache=True, nogil=True)
+def store_release_u32(addr, value):
+    """
+    Atomically store the 32 bit :code:`value` at :code:`addr` with release
+    ordering, the counterpart of :func:`load_acquire_u32`.
+    """
+    _store_release_u32(addr, value)
+
+
+class IoUring:
+    """
+    A submission/completion queue pair for reading into pre-registered
+    buffers. Not thread-safe, use one instance per thread.
+
+    Parameters
+    ----------
+    entries
+        Size of the submission queue, the maximum number of reads in flight
+    """
+    def __init__(self, entries: int = 64):
+        params = _Params()
+        self._fd = _syscall(
+            ctypes.c_long(_SYS_IO_URING_SETUP),
+            ctypes.c_long(entries),
+            ctypes.byref(params),
+        )
+        try:
+            self._map_rings(params)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._entries = params.sq_entries
+        self._in_flight = 0
+        self._registered: List[memoryview] = []
+        # iovecs for unregistered reads need to stay alive until completion:
+        self._iovecs = (_IOVec * self._entries)()
+        self._iovec_free = list(range(self._entries))
+        self._iovec_by_user_data: Dict[int, int] = {}
+
+    def _map_rings(self, params: _Params):
+        sq_off = params.sq_off
+        cq_off = params.cq_off
+        sq_size = sq_off.array + params.sq_entries * 4
+        cq_size = cq_off.cqes + params.cq_entries * _CQE_DTYPE.itemsize
+        prot = mmap.PROT_READ | mmap.PROT_WRITE
+        flags = mmap.MAP_SHARED | getattr(mmap, "MAP_POPULATE", 0)
+        self._sq_mmap = mmap.mmap(
+            self._fd, sq_size, flags=flags, prot=prot, offset=_IORING_OFF_SQ_RING,
+        )
+        self._cq_mmap = mmap.mmap(
+            self._fd, cq_size, flags=flags, prot=prot, offset=_IORING_OFF_CQ_RING,
+        )
+        self._sqe_mmap = mmap.mmap(
+            self._fd, params.sq_entries * _SQE_DTYPE.itemsize,
+            flags=flags, prot=prot, offset=_IORING_OFF_SQES,
+        )
+
+        def u32(buf, offset, count=1):
+            return np.ndarray((count,), dtype=np.uint32, buffer=buf, offset=offset)
+
+        self._sq_head = u32(self._sq_mmap, sq_off.head)
+        self._sq_tail = u32(self._sq_mmap, sq_off.tail)
+        self._sq_mask = int(u32(self._sq_mmap, sq_off.ring_mask)[0])
+        self._sq_array = u32(self._sq_mmap, sq_off.array, params.sq_entries)
+        self._sqes = np.ndarray(
+            (params.sq_entries,), dtype=_SQE_DTYPE, buffer=self._sqe_mmap,
+        )
+        self._cq_head = u32(self._cq_mmap, cq_off.head)
+        self._cq_tail = u32(self._cq_mmap, cq_off.tail)
+        # the kernel updates the completion queue concurrently, so the head
+        # and tail are accessed atomically, like `io_uring_smp_load_acquire`
+        # and `io_uring_smp_store_release` in liburing:
+        self._cq_head_addr = self._cq_head.ctypes.data
+        self._cq_tail_addr = self._cq_tail.ctypes.data
+        self._cq_mask = int(u32(self._cq_mmap, cq_off.ring_mask)[0])
+        self._cqes = np.ndarray(
+            (params.cq_entries,), dtype=_CQE_DTYPE, buffer=self._cq_mmap, offset=cq_off.cqes,
+        )
+        self._to_submit = 0
+
+    @property
+    def entries(self) -> int:
+        return self._entries
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight + self._to_submit
+
+    def register_buffers(self, buffers: List[memoryview]) -> bool:
+        """
+        Register :code:`buffers` with the kernel, so that reads into them don't
+        need to map the pages for each request. Returns :code:`False` if the
+        kernel refused, for example because of the locked memory limit; reads
+        still work in that case, but are a bit slower.
+        """
+        self.unregister_buffers()
+        iovecs = (_IOVec * len(buffers))()
+        for iov, buf in zip(iovecs, buffers):
+            iov.iov_base = _address(buf)
+            iov.iov_len = len(buf)
+        try:
+            _syscall(
+                ctypes.c_long(_SYS_IO_URING_REGISTER), ctypes.c_long(self._fd),
+                ctypes.c_long(_IORING_REGISTER_BUFFERS), iovecs, ctypes.c_long(len(buffers)),
+            )
+        except OSError as e:
+            log.info("could not register io_uring buffers: %s", e)
+            return False
+        self._registered = list(buffers)
+        return True
+
+    def unregister_buffers(self):
+        if not self._registered:
+            return
+        _syscall(
+            ctypes.c_long(_SYS_IO_URING_REGISTER), ctypes.c_long(self._fd),
+            ctypes.c_long(_IORING_UNREGISTER_BUFFERS), None, ctypes.c_long(0),
+        )
+        self._registered = []
+
+    def _get_sqe(self):
+        if self.in_flight >= self._entries:
+            raise RuntimeError("submission queue is full")
+        tail = int(self._sq_tail[0])
+        idx = tail & self._sq_mask
+        self._sqes[idx] = 0
+        self._sq_array[idx] = idx
+        self._sq_tail[0] = (tail + 1) & 0xFFFFFFFF
+        self._to_submit += 1
+        return idx
+
+    def prep_read(
+        self, fd: int, buf: memoryview, offset: int, user_data: int,
+        buf_index: Optional[int] = None,
+    ):
+        """
+        Queue a read of :code:`len(buf)` bytes from :code:`fd` at :code:`offset`.
+        If :code:`buf` is part of the registered buffer with index
+        :code:`buf_index`, a fixed-buffer read is used.
+        """
+        addr = _address(buf)
+        if buf_index is None:
+            iov_idx = self._iovec_free.pop()
+            self._iovecs[iov_idx].iov_base = addr
+            self._iovecs[iov_idx].iov_len = len(buf)
+            self._iovec_by_user_data[user_data] = iov_idx
+        idx = self._get_sqe()
+        sqe = self._sqes[idx:idx + 1]
+        sqe["fd"] = fd
+        sqe["off"] = offset
+        sqe["user_data"] = user_data
+        if buf_index is None:
+            sqe["opcode"] = _IORING_OP_READV
+            sqe["addr"] = ctypes.addressof(self._iovecs[iov_idx])
+            sqe["len"] = 1
+        else:
+            sqe["opcode"] = _IORING_OP_READ_FIXED
+            sqe["addr"] = addr
+            sqe["len"] = len(buf)
+            sqe["buf_index"] = buf_index
+
+    def submit(self, wait_for: int = 0):
+        """
+        Submit all queued reads and wait until at least :code:`wait_for`
+        completions are available.
+        """
+        # the system call is a full memory barrier, so the kernel sees
+        # all the writes to the submission queue from above:
+        while True:
+            try:
+                submitted = _syscall(
+                    ctypes.c_long(_SYS_IO_URING_ENTER), ctypes.c_long(self._fd),
+                    ctypes.c_long(self._to_submit), ctypes.c_long(wait_for),
+                    ctypes.c_long(_IORING_ENTER_GETEVENTS if wait_for else 0),
+                    None, ctypes.c_long(0),
+                )
+            except InterruptedError:
+                continue
+            break
+        self._to_submit -= submitted
+        self._in_flight += submitted
+
+    def completions(self, wait_for: int = 1) -> List[Tuple[int, int]]:
+        """
+        Submit queued reads, and return at least :code:`wait_for` completions
+        as a list of :code:`(user_data, result)` tuples. The result is the number
+        of bytes read, or a negative error number.
+        """
+        wait_for = min(wait_for, self.in_flight)
+        if self._to_submit or wait_for > self._available():
+            self.submit(wait_for=wait_for)
+        head = int(self._cq_head[0])
+        # the CQEs up to `tail` are only guaranteed to be visible after
+        # an acquire load of the tail:
+        tail = int(load_acquire_u32(self._cq_tail_addr))
+        result = []
+        while head != tail:
+            cqe = self._cqes[head & self._cq_mask]
+            user_data = int(cqe["user_data"])
+            result.append((user_data, int(cqe["res"])))
+            iov_idx = self._iovec_by_user_data.pop(user_data, None)
+            if iov_idx is not None:
+                self._iovec_free.append(iov_idx)
+            head = (head + 1) & 0xFFFFFFFF
+        # release the CQEs to the kernel only after we are done reading them:
+        store_release_u32(self._cq_head_addr, head)
+        self._in_flight -= len(result)
+        return result
+
+    def _available(self) -> int:
+        tail = int(load_acquire_u32(self._cq_tail_addr))
+        return (tail - int(self._cq_head[0])) & 0xFFFFFFFF
+
+    def close(self):
+        if self._fd is None:
+            return
+        # wait for outstanding reads, which may still write into our buffers:
+        while self.in_flight:
+            self.completions(wait_for=self.in_flight)
+        self.unregister_buffers()
+        # drop the numpy views before closing the mmaps they point into:
+        del self._sqes, self._cqes, self._sq_array
+        del self._sq_head, self._sq_tail, self._cq_head, self._cq_tail
+        self._sq_mmap.close()
+        self._cq_mmap.close()
+        self._sqe_mmap.close()
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+_supported: Optional[bool] = None
+_supported_lock = threading.Lock()
+
+
+def uring_supported() -> bool:
+    """
+    Check once per process whether io_uring can be used. It may be unavailable
+    because of the platform, an old kernel, or because it is disabled, for
+    example by seccomp filters or the :code:`kernel.io_uring_disabled` sysctl.
+    """
+    global _supported
+    with _supported_lock:
+        if _supported is None:
+            _supported = _probe()
+        return _supported
+
+
+def _probe() -> bool:
+    if platform.system() != "Linux" or platform.machine() not in _SUPPORTED_MACHINES:
+        return False
+    try:
+        with IoUring(entries=2) as ring:
+            buf = bytearray(4096)
+            fd = os.open("/proc/self/stat", os.O_RDONLY)
+            try:
+                ring.prep_read(fd, memoryview(buf), 0, user_data=1)
+                (user_data, res), = ring.completions(wait_for=1)
+            finally:
+                os.close(fd)
+        return user_data == 1 and res > 0
+    except (OSError, ValueError, RuntimeError) as e:
+        log.info("io_uring not supported: %s", e)
+        return False
@@ -1,41 +1,47 @@
 import os
 import json
+import mmap
+import uuid
+import socket
+import struct
 import hashlib
-import sqlite3
+import shutil
+import threading
 import time
 import glob
-from typing import Optional, Union
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
+import psutil
 
 from .base import (
-    DataSet, Partition, PartitionStructure
+    DataSet, Partition, BasePartition, PartitionStructure, MMapBackend
 )
+from .base.index_cache import read_json, write_json_atomic
 from libertem.io.dataset.cluster import ClusterDataSet
+from libertem.io.dataset.raw import RawFile, RawFileSet
+from libertem.io.corrections import CorrectionSet
 from sparseconverter import CUDA, NUMPY, ArrayBackend
 
 
-class VerboseRow(sqlite3.Row):
-    """sqlite3.Row with a __repr__"""
-    def __repr__(self):
-        return "<VerboseRow {!r}>".format(
-            {
-                k: self[k]
-                for k in self.keys()
-            },
-        )
-
-
 class CacheItem:
     """
     A CacheItem describes a single unit of data that is cached, in this case
     a partition of the CachedDataSet.
+
+    .. versionchanged:: 0.12.0
+        Added :code:`hits` and :code:`last_access`, which are set for the
+        items returned by :meth:`CacheStats.get_items`.
     """
-    def __init__(self, dataset: str, partition: int, size: int, path: str):
+    def __init__(self, dataset: str, partition: int, size: int, path: str,
+                 hits: int = 0, last_access: float = 0.0):
         self.dataset = dataset  # dataset id string, for example the cache key
         self.partition = partition  # partition index as integer
         self.size = size  # partition size in bytes
         self.path = path  # full absolute path to the file for the partition
+        self.hits = hits  # access counter
+        self.last_access = last_access  # float timestamp, like time.time()
         self.is_orphan = False  # quack
 
     def __eq__(self, other):
@@ -45,15 +51,6 @@ class CacheItem:
     def __repr__(self):
         return "<CacheItem: %s/%d>" % (self.dataset, self.partition)
 
-    @classmethod
-    def from_row(cls, row):
-        return cls(
-            dataset=row["dataset"],
-            partition=row["partition"],
-            size=row["size"],
-            path=row["path"]
-        )
-
 
 class OrphanItem:
     """
@@ -71,172 +68,452 @@ class OrphanItem:
     def __repr__(self):
         return f"<OrphanItem: {self.path}>"
 
-    @classmethod
-    def from_row(cls, row):
-        return cls(
-            size=row["size"],
-            path=row["path"]
-        )
+
+class _ItemStats:
+    __slots__ = ("hits", "size", "last_access", "path")
+
+    def __init__(self, hits: int, size: int, last_access: float, path: str):
+        self.hits = hits
+        self.size = size
+        self.last_access = last_access
+        self.path = path
+
+
+# record length, operation, timestamp, partition, size; followed by the
+# dataset id and the path, each prefixed with their length:
+_RECORD = struct.Struct("<IBdqq")
+_STR_LEN = struct.Struct("<H")
+
+_OP_HIT = 1
+_OP_MISS = 2
+_OP_EVICT = 3
+_OP_ORPHAN = 4
+_OP_REMOVE_ORPHAN = 5
+
+_SNAPSHOT_NAME = "snapshot.json"
+_SNAPSHOT_VERSION = 1
+
+
+def _encode_record(op: int, timestamp: float, dataset: str, partition: int,
+                   size: int, path: str) -> bytes:
+    dataset_b = dataset.encode("utf-8")
+    path_b = path.encode("utf-8")
+    length = _RECORD.size + 2 * _STR_LEN.size + len(dataset_b) + len(path_b)
+    return b"".join([
+        _RECORD.pack(length, op, timestamp, partition, size),
+        _STR_LEN.pack(len(dataset_b)), dataset_b,
+        _STR_LEN.pack(len(path_b)), path_b,
+    ])
+
+
+def _log_pid(name: str) -> Tuple[str, int]:
+    # log-{host}-{pid}-{instance}-{generation}.bin, the host may contain dashes:
+    host, pid, _, _ = name[len("log-"):-len(".bin")].rsplit("-", 3)
+    return host, int(pid)
 
 
 class CacheStats:
-    def __init__(self, db_path):
-        self._db_path = db_path
-        self._conn = None
-        self._connect()
+    """
+    Statistics about the partitions in the cache of a node, shared by all
+    worker processes on that node.
+
+    Each :class:`CacheStats` instance appends its records to its own log file
+    in the directory :code:`index_path`, so the processes never wait for each
+    other. The statistics are kept in memory and updated with the new
+    records from the logs of the other processes, which are read with
+    :code:`mmap`. Once a log grows beyond :code:`compact_bytes`, its owner
+    writes a snapshot of the statistics, continues with a new log and removes
+    the old one, together with the logs of processes that have exited.
+
+    Use :func:`get_cache_stats` to share an instance within a process.
+
+    .. versionchanged:: 0.12.0
+        Replaced the sqlite database with per-process logs. The
+        :code:`db_path` parameter became :code:`index_path`, a directory.
+
+    Parameters
+    ----------
+    index_path : str
+        Directory for the logs and the snapshot
+
+    compact_bytes : int
+        Size of the log that triggers a compaction
 
-    def _connect(self):
-        conn = sqlite3.connect(self._db_path)
-        conn.row_factory = VerboseRow
-        self._conn = conn
+    refresh_interval : float
+        Read new records of other processes at most this often, in seconds.
+        The own records are visible immediately.
+    """
+    def __init__(self, index_path: str, compact_bytes: int = 1024 * 1024,
+                 refresh_interval: float = 0.05):
+        self._index_path = index_path
+        self._compact_bytes = compact_bytes
+        self._refresh_interval = refresh_interval
+        self._host = socket.gethostname()
+        self._instance = "%s-%d-%s" % (self._host, os.getpid(), uuid.uuid4().hex[:8])
+        self._generation = 0
+        self._fd: Optional[int] = None
+        self._lock = threading.RLock()
+        self._last_refresh: Optional[float] = None
+        self._snapshot_stamp = None
+        self._reset()
+
+    def _reset(self):
+        self._items: Dict[Tuple[str, int], _ItemStats] = {}
+        self._orphans: Dict[str, int] = {}
+        self._paths: Dict[str, Tuple[str, int]] = {}
+        self._used = 0
+        # how many bytes of each log are included in the statistics:
+        self._offsets: Dict[str, int] = {}
+        # logs that are included in the snapshot and about to be removed:
+        self._retired: Set[str] = set()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _log_name(self) -> str:
+        return "log-%s-%06d.bin" % (self._instance, self._generation)
+
+    def initialize(self):
+        """
+        Create the index directory. Safe to call more than once.
+        """
+        os.makedirs(self._index_path, exist_ok=True)
 
     def close(self):
-        self._conn.close()
-        self._conn = None
-
-    def initialize_schema(self):
-        self._conn.execute("""
-        CREATE TABLE IF NOT EXISTS stats (
-            dataset VARCHAR NOT NULL,           -- dataset id, for example the cache key
-            partition INTEGER NOT NULL,         -- partition index as integer
-            hits INTEGER NOT NULL,              -- access counter
-            size INTEGER NOT NULL,              -- in bytes
-            last_access REAL NOT NULL,          -- float timestamp, like time.time()
-            path VARCHAR NOT NULL,              -- full path to the file for this partition
-            PRIMARY KEY (dataset, partition)
-        );""")
-        self._conn.execute("""
-        CREATE TABLE IF NOT EXISTS orphans (
-            path VARCHAR NOT NULL,              -- full path to the orphaned file
-            size INTEGER NOT NULL,              -- in bytes
-            PRIMARY KEY (path)
-        );""")
-        self._conn.execute("PRAGMA user_version = 1;")
-
-    def _have_item(self, cache_item: CacheItem):
-        rows = self._conn.execute("""
-        SELECT hits FROM stats
-        WHERE dataset = ? AND partition = ?
-        """, [cache_item.dataset, cache_item.partition]).fetchall()
-        return len(rows) > 0
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    # applying records to the in-memory statistics:
+
+    def _set_item(self, key, item: _ItemStats):
+        self._pop_item(key)
+        self._items[key] = item
+        self._paths[item.path] = key
+        self._used += item.size
+        self._remove_orphan(item.path)
+
+    def _pop_item(self, key) -> Optional[_ItemStats]:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._used -= item.size
+            if self._paths.get(item.path) == key:
+                del self._paths[item.path]
+        return item
+
+    def _remove_orphan(self, path: str):
+        size = self._orphans.pop(path, None)
+        if size is not None:
+            self._used -= size
+
+    def _apply(self, op: int, timestamp: float, dataset: str, partition: int,
+               size: int, path: str):
+        # records of different processes are not applied in time order, so
+        # the timestamps are used to resolve conflicts:
+        key = (dataset, partition)
+        item = self._items.get(key)
+        if op == _OP_HIT:
+            self._counters["hits"] += 1
+            if item is None:
+                self._set_item(key, _ItemStats(1, size, timestamp, path))
+            else:
+                item.hits = max(item.hits + 1, 1)
+                item.last_access = max(item.last_access, timestamp)
+                self._remove_orphan(path)
+        elif op == _OP_MISS:
+            self._counters["misses"] += 1
+            if item is None or item.last_access <= timestamp:
+                self._set_item(key, _ItemStats(0, size, timestamp, path))
+        elif op == _OP_EVICT:
+            self._counters["evictions"] += 1
+            if item is not None and item.last_access <= timestamp:
+                self._pop_item(key)
+        elif op == _OP_ORPHAN:
+            if path not in self._paths and path not in self._orphans:
+                self._orphans[path] = size
+                self._used += size
+        elif op == _OP_REMOVE_ORPHAN:
+            self._remove_orphan(path)
+
+    # reading the logs and the snapshot of all processes:
+
+    def _replay(self, buf, offset: int, end: int) -> int:
+        while offset + _RECORD.size <= end:
+            length, op, timestamp, partition, size = _RECORD.unpack_from(buf, offset)
+            if offset + length > end:
+                # the record is still being written
+                break
+            pos = offset + _RECORD.size
+            strings = []
+            for _ in range(2):
+                (str_len,) = _STR_LEN.unpack_from(buf, pos)
+                pos += _STR_LEN.size
+                strings.append(bytes(buf[pos:pos + str_len]).decode("utf-8"))
+                pos += str_len
+            self._apply(op, timestamp, strings[0], partition, size, strings[1])
+            offset += length
+        return offset
+
+    def _read_log(self, name: str):
+        offset = self._offsets.get(name, 0)
+        try:
+            with open(os.path.join(self._index_path, name), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > offset:
+                    with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as buf:
+                        offset = self._replay(buf, offset, size)
+        except FileNotFoundError:
+            pass
+        self._offsets[name] = offset
+
+    def _get_snapshot_stamp(self):
+        try:
+            stat = os.stat(os.path.join(self._index_path, _SNAPSHOT_NAME))
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _load_snapshot(self):
+        self._reset()
+        snapshot = read_json(os.path.join(self._index_path, _SNAPSHOT_NAME))
+        if snapshot is None or snapshot.get("version") != _SNAPSHOT_VERSION:
+            return
+        for dataset, partition, hits, size, last_access, path in snapshot["items"]:
+            self._set_item((dataset, partition), _ItemStats(hits, size, last_access, path))
+        for path, size in snapshot["orphans"]:
+            self._orphans[path] = size
+            self._used += size
+        self._offsets.update(snapshot["logs"])
+        self._retired.update(snapshot["retired"])
+        self._counters.update(snapshot.get("counters", {}))
+
+    def _list_logs(self) -> List[str]:
+        try:
+            names = os.listdir(self._index_path)
+        except FileNotFoundError:
+            return []
+        return [n for n in names if n.startswith("log-") and n.endswith(".bin")]
+
+    def refresh(self, force: bool = False):
+        """
+        Include the new records of the other processes. Unless :code:`force`
+        is set, this is only done if the last refresh is older than the
+        :code:`refresh_interval`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                not force and self._last_refresh is not None
+                and now - self._last_refresh < self._refresh_interval
+            ):
+                return
+            self._last_refresh = now
+            # retry if a compaction happened while reading:
+            for _ in range(10):
+                stamp = self._get_snapshot_stamp()
+                if stamp != self._snapshot_stamp:
+                    self._load_snapshot()
+                    self._snapshot_stamp = stamp
+                for name in self._list_logs():
+                    if name not in self._retired:
+                        self._read_log(name)
+                if self._get_snapshot_stamp() == self._snapshot_stamp:
+                    break
+
+    # writing:
+
+    def _append(self, op: int, timestamp: float, dataset: str = "", partition: int = 0,
+                size: int = 0, path: str = ""):
+        with self._lock:
+            self.refresh()
+            record = _encode_record(op, timestamp, dataset, partition, size, path)
+            name = self._log_name()
+            if self._fd is None:
+                self._fd = os.open(
+                    os.path.join(self._index_path, name),
+                    os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0),
+                    0o644,
+                )
+            os.write(self._fd, record)
+            self._offsets[name] = self._offsets.get(name, 0) + len(record)
+            self._apply(op, timestamp, dataset, partition, size, path)
+            if self._offsets[name] >= self._compact_bytes:
+                self.compact()
+
+    def _is_dead(self, name: str) -> bool:
+        try:
+            host, pid = _log_pid(name)
+        except ValueError:
+            return False
+        return host == self._host and pid != os.getpid() and not psutil.pid_exists(pid)
+
+    def compact(self):
+        """
+        Write a snapshot of the statistics, continue with a new log, and
+        remove the old log and the logs of processes that have exited.
+        """
+        with self._lock:
+            self.refresh(force=True)
+            old_name = self._log_name()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._generation += 1
+            names = self._list_logs()
+            retired = {old_name} | {n for n in names if self._is_dead(n)}
+            # keep the names that are still around, so that other processes
+            # don't read them again:
+            self._retired = (self._retired | retired) & set(names)
+            for name in retired:
+                self._offsets.pop(name, None)
+            write_json_atomic(os.path.join(self._index_path, _SNAPSHOT_NAME), {
+                "version": _SNAPSHOT_VERSION,
+                "items": [
+                    (dataset, partition, item.hits, item.size, item.last_access, item.path)
+                    for (dataset, partition), item in self._items.items()
+                ],
+                "orphans": list(self._orphans.items()),
+                "logs": self._offsets,
+                "retired": sorted(self._retired),
+                "counters": self._counters,
+            })
+            self._snapshot_stamp = self._get_snapshot_stamp()
+            for name in retired:
+                try:
+                    os.unlink(os.path.join(self._index_path, name))
+                except FileNotFoundError:
+                    pass
 
     def record_hit(self, cache_item: CacheItem):
-        now = time.time()
-        self._conn.execute("BEGIN")
-        if not self._have_item(cache_item):
-            self._conn.execute("""
-            INSERT INTO stats (partition, dataset, hits, size, last_access, path)
-            VALUES (?, ?, 1, ?, ?, ?)
-            """, [cache_item.partition, cache_item.dataset,
-                  cache_item.size, now, cache_item.path])
-        else:
-            self._conn.execute("""
-            UPDATE stats
-            SET hits = MAX(hits + 1, 1), last_access = ?
-            WHERE dataset = ? AND partition = ?
-            """, [now, cache_item.dataset, cache_item.partition])
-        self._conn.execute("DELETE FROM orphans WHERE path = ?", [cache_item.path])
-        self._conn.commit()
+        self._append(
+            _OP_HIT, time.time(), cache_item.dataset, cache_item.partition,
+            cache_item.size, cache_item.path,
+        )
 
     def record_miss(self, cache_item: CacheItem):
-        now = time.time()
-
-        self._conn.execute("BEGIN")
-        if not self._have_item(cache_item):
-            self._conn.execute("""
-            INSERT INTO stats (partition, dataset, hits, size, last_access, path)
-            VALUES (?, ?, 0, ?, ?, ?)
-            """, [cache_item.partition, cache_item.dataset, cache_item.size,
-                  now, cache_item.path])
-        else:
-            self._conn.execute("""
-            UPDATE stats
-            SET hits = 0, last_access = ?
-            WHERE dataset = ? AND partition = ?
-            """, [now, cache_item.dataset, cache_item.partition])
-        self._conn.execute("DELETE FROM orphans WHERE path = ?", [cache_item.path])
-        self._conn.commit()
+        self._append(
+            _OP_MISS, time.time(), cache_item.dataset, cache_item.partition,
+            cache_item.size, cache_item.path,
+        )
 
     def record_eviction(self, cache_item: Union[CacheItem, OrphanItem]):
         if cache_item.is_orphan:
-            self.remove_orphan(cache_item)
+            self.remove_orphan(cache_item.path)
         else:
-            self._conn.execute("""
-            DELETE FROM stats
-            WHERE partition = ? AND dataset = ?
-            """, [cache_item.partition, cache_item.dataset])
-            self._conn.commit()
+            self._append(
+                _OP_EVICT, time.time(), cache_item.dataset, cache_item.partition,
+                path=cache_item.path,
+            )
 
     def maybe_orphan(self, orphan: OrphanItem):
         """
         Create an entry for a file we don't have any statistics about, after checking
-        the stats table for the given path.
-        Getting a conflict here means concurrently running maybe_orphan processes,
-        so we can safely ignore it.
-        """
-        exists = len(self._conn.execute("""
-        SELECT 1 FROM stats WHERE path = ?
-        """, [orphan.path]).fetchall()) > 0
-        if not exists:
-            self._conn.execute("""
-            INSERT OR IGNORE INTO orphans (path, size)
-            VALUES (?, ?)
-            """, [orphan.path, orphan.size])
-            self._conn.commit()
+        the statistics for the given path.
+        """
+        with self._lock:
+            self.refresh()
+            if orphan.path in self._paths:
+                return None
+            if orphan.path in self._orphans:
+                return orphan
+            self._append(_OP_ORPHAN, time.time(), size=orphan.size, path=orphan.path)
             return orphan
 
-    def get_orphans(self):
-        cursor = self._conn.execute("SELECT path, size FROM orphans ORDER BY size DESC")
-        return [
-            OrphanItem.from_row(row)
-            for row in cursor
-        ]
+    def get_orphans(self) -> List[OrphanItem]:
+        with self._lock:
+            self.refresh()
+            return [
+                OrphanItem(path=path, size=size)
+                for path, size in sorted(self._orphans.items(), key=lambda kv: -kv[1])
+            ]
 
     def remove_orphan(self, path: str):
-        self._conn.execute("""
-        DELETE FROM orphans WHERE path = ?
-        """, [path])
-        self._conn.commit()
+        self._append(_OP_REMOVE_ORPHAN, time.time(), path=path)
+
+    def get_items(self, exclude_dataset: Optional[str] = None) -> List[CacheItem]:
+        """
+        All cached partitions, except those of :code:`exclude_dataset`,
+        including their statistics.
+
+        .. versionadded:: 0.12.0
+        """
+        with self._lock:
+            self.refresh()
+            return [
+                CacheItem(
+                    dataset=dataset, partition=partition, size=item.size, path=item.path,
+                    hits=item.hits, last_access=item.last_access,
+                )
+                for (dataset, partition), item in self._items.items()
+                if dataset != exclude_dataset
+            ]
+
+    def get_item(self, dataset: str, partition: int) -> Optional[CacheItem]:
+        """
+        The cached partition with its statistics, or :code:`None` if it is
+        not in the cache.
+
+        .. versionadded:: 0.12.0
+        """
+        with self._lock:
+            self.refresh()
+            item = self._items.get((dataset, partition))
+            if item is None:
+                return None
+            return CacheItem(
+                dataset=dataset, partition=partition, size=item.size, path=item.path,
+                hits=item.hits, last_access=item.last_access,
+            )
+
+    def get_counters(self) -> Dict[str, int]:
+        """
+        The total number of hits, misses and evictions recorded by all
+        processes
+
+        .. versionadded:: 0.12.0
+        """
+        with self._lock:
+            self.refresh()
+            return dict(self._counters)
 
     def get_stats_for_dataset(self, cache_key):
         """
         Return dataset cache stats as dict mapping partition ids to dicts of their
         properties (keys: size, last_access, hits)
         """
-        cursor = self._conn.execute("""
-        SELECT partition, path, size, hits, last_access
-        FROM stats
-        WHERE dataset = ?
-        """, [cache_key])
         return {
-            row["partition"]: self._format_row(row)
-            for row in cursor.fetchall()
+            item.partition: {
+                "path": item.path,
+                "size": item.size,
+                "last_access": item.last_access,
+                "hits": item.hits,
+            }
+            for item in self.get_items()
+            if item.dataset == cache_key
         }
 
-    def query(self, sql, args=None):
-        """
-        Custom sqlite query, returns a sqlite3 Cursor object
-        """
-        if args is None:
-            args = []
-        return self._conn.execute(sql, args)
+    def get_used_capacity(self) -> int:
+        with self._lock:
+            self.refresh()
+            return self._used
 
-    def _format_row(self, row):
-        return {
-            "path": row["path"],
-            "size": row["size"],
-            "last_access": row["last_access"],
-            "hits": row["hits"],
-        }
 
-    def get_used_capacity(self):
-        size = self._conn.execute("""
-        SELECT SUM(size) AS "total_size" FROM stats;
-        """).fetchone()["total_size"]
-        size_orphans = self._conn.execute("""
-        SELECT SUM(size) AS "total_size" FROM orphans;
-        """).fetchone()["total_size"]
-        return (size or 0) + (size_orphans or 0)
+_cache_stats: Dict[Tuple[str, int], CacheStats] = {}
+_cache_stats_lock = threading.Lock()
+
+
+def get_cache_stats(index_path: str) -> CacheStats:
+    """
+    The :class:`CacheStats` instance of this process for :code:`index_path`
+
+    .. versionadded:: 0.12.0
+    """
+    key = (os.path.abspath(index_path), os.getpid())
+    with _cache_stats_lock:
+        if key not in _cache_stats:
+            stats = CacheStats(index_path)
+            stats.initialize()
+            _cache_stats[key] = stats
+        return _cache_stats[key]
 
 
 class CacheStrategy:
@@ -248,40 +525,42 @@ class CacheStrategy:
         raise NotImplementedError()
 
 
-class LRUCacheStrategy(CacheStrategy):
+class CapacityCacheStrategy(CacheStrategy):
+    """
+    Base class for strategies that keep the size of the cache below
+    :code:`capacity` bytes. Orphaned files are evicted first, followed by the
+    partitions of other data sets in the order of :meth:`victim_order`.
+    Partitions of the data set that is being cached are never evicted, as
+    our accesses are highly correlated in a single data set.
+
+    .. versionadded:: 0.12.0
+    """
     def __init__(self, capacity: int):
         self._capacity = capacity
         super().__init__()
 
+    def victim_order(self, item: CacheItem):
+        """
+        Sort key for the eviction candidates, the smallest are evicted first
+        """
+        raise NotImplementedError()
+
     def get_victim_list(self, cache_key: str, size: int, stats: CacheStats):
         """
         Return a list of `CacheItem`s that should be deleted to make
         place for `partition`.
         """
-        # LRU with the following modifications:
-        # 1) Don't evict from the same dataset, as our accesses
-        #    are highly correlated in a single dataset
-        # 2) Include orphaned files as preferred victims
-        # 3) TODO: work in an estimated miss cost (challenge: estimate I/O cost
-        #    independently from whatever calculation the user decides to run!)
+        # TODO: work in an estimated miss cost (challenge: estimate I/O cost
+        # independently from whatever calculation the user decides to run!)
         if self.sufficient_space_for(size, stats):
             return []
         victims = []
         space_to_free = size - self.get_available(stats)
 
-        orphans = stats.get_orphans()
-
-        candidates = stats.query("""
-        SELECT dataset, partition, size, path
-        FROM stats
-        WHERE dataset != ?
-        ORDER BY last_access ASC
-        """, [cache_key])
-
-        to_check = orphans + [
-            CacheItem.from_row(row)
-            for row in candidates
-        ]
+        to_check = stats.get_orphans() + sorted(
+            stats.get_items(exclude_dataset=cache_key),
+            key=self.victim_order,
+        )
 
         for item in to_check:
             if space_to_free <= 0:
@@ -310,14 +589,112 @@ class LRUCacheStrategy(CacheStrategy):
         return stats.get_used_capacity()
 
 
+class LRUCacheStrategy(CapacityCacheStrategy):
+    """
+    Evict the least recently used partitions first
+    """
+    def victim_order(self, item: CacheItem):
+        return item.last_access
+
+
+class LFUCacheStrategy(CapacityCacheStrategy):
+    """
+    Evict the least frequently used partitions first, and the least recently
+    used of those with the same frequency.
+
+    With :code:`size_aware`, the number of hits is divided by the size of the
+    partition, similar to the GDSF policy: a large partition that is rarely
+    used is evicted before a small one, which frees more space per expected
+    miss.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    capacity : int
+        Cache capacity in bytes
+
+    size_aware : bool
+        Weight the hits by the partition size
+    """
+    def __init__(self, capacity: int, size_aware: bool = True):
+        self._size_aware = size_aware
+        super().__init__(capacity=capacity)
+
+    def victim_order(self, item: CacheItem):
+        # a miss is the first access, so count it:
+        frequency = item.hits + 1
+        if self._size_aware:
+            frequency = frequency / max(item.size, 1)
+        return (frequency, item.last_access)
+
+
+_eviction_pool: Optional[ThreadPoolExecutor] = None
+_eviction_pool_lock = threading.Lock()
+
+
+def _get_eviction_pool() -> ThreadPoolExecutor:
+    global _eviction_pool
+    with _eviction_pool_lock:
+        if _eviction_pool is None:
+            _eviction_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="libertem-cache-evict",
+            )
+        return _eviction_pool
+
+
+def _make_tombstone(path: str) -> Optional[str]:
+    """
+    Rename the file at :code:`path` to a unique name, so that it can be removed
+    later without affecting a new file at :code:`path`. Returns the new name,
+    or :code:`None` if the file doesn't exist. Tombstones that are left behind,
+    for example by a crashed process, are picked up by
+    :meth:`Cache.collect_orphans`.
+    """
+    tombstone = "%s.evicted-%s" % (path, uuid.uuid4().hex[:8])
+    try:
+        os.rename(path, tombstone)
+    except FileNotFoundError:
+        return None
+    return tombstone
+
+
+def _remove_files(paths: List[str]):
+    for path in paths:
+        # if it has been deleted by the user, we don't care:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
 class Cache:
     """
     Cache object, to be used on a worker node. The interface used by `Partition`\\ s
     to manage the cache. May directly remove files, directories, etc.
+
+    .. versionchanged:: 0.12.0
+        Added :code:`background_eviction`
+
+    Parameters
+    ----------
+    stats : CacheStats
+
+    strategy : CacheStrategy
+
+    background_eviction : bool
+        Remove the files of evicted partitions in a background thread. The
+        evictions are recorded right away, so the capacity is available
+        immediately, but the disk space is only freed a bit later. The files
+        are renamed right away, so that a partition that is cached again in
+        the meantime is not removed.
     """
-    def __init__(self, stats: CacheStats, strategy: CacheStrategy):
+    def __init__(self, stats: CacheStats, strategy: CacheStrategy,
+                 background_eviction: bool = False):
         self._stats = stats
         self.strategy = strategy
+        self._background_eviction = background_eviction
+        self._pending: List[Future] = []
 
     def record_hit(self, cache_item: CacheItem):
         self._stats.record_hit(cache_item)
@@ -332,16 +709,33 @@ class Cache:
         """
         victims = self.strategy.get_victim_list(cache_key, size, self._stats)
         for cache_item in victims:
-            # if it has been deleted by the user, we don't care and just remove
-            # the record from the database:
-            if os.path.exists(cache_item.path):
-                os.unlink(cache_item.path)
             self._stats.record_eviction(cache_item)
+        paths = [cache_item.path for cache_item in victims]
+        if not paths:
+            return
+        if self._background_eviction:
+            # the stats say that the partitions are gone, so they can be cached
+            # again before the background thread runs; move the files out of
+            # the way, and only remove the renamed files in the background:
+            tombstones = [t for t in map(_make_tombstone, paths) if t is not None]
+            self._pending.append(_get_eviction_pool().submit(_remove_files, tombstones))
+        else:
+            _remove_files(paths)
+
+    def wait_for_eviction(self):
+        """
+        Wait until the files of evicted partitions are removed
+
+        .. versionadded:: 0.12.0
+        """
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
 
     def collect_orphans(self, base_path: str):
         """
         Check the filesystem structure and record all partitions
-        that are missing in the db as orphans, to be deleted on demand.
+        that are missing in the index as orphans, to be deleted on demand.
         """
         # the structure here is: {base_path}/{dataset_cache_key}/parts/*
         orphans = []
@@ -353,6 +747,63 @@ class Cache:
         return orphans
 
 
+class RAMTier:
+    """
+    Configuration of a RAM tier in front of the disk tier of a
+    :class:`CachedDataSet`. Partitions that are read repeatedly from the disk
+    tier are copied into files on a RAM-backed file system, which are shared
+    by all worker processes on a node and mapped into memory. Full-frame
+    tiles in the native dtype are then served without any copy.
+
+    The RAM tier has its own statistics and eviction strategy, and the
+    :code:`capacity` is shared by all cached data sets on a node. Files are
+    removed from the RAM tier right away when they are evicted, independent
+    of the :code:`background_eviction` setting of the :class:`CachedDataSet`.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    capacity : int
+        Size of the RAM tier on each node, in bytes
+
+    promote_after : int
+        Number of hits in the disk tier after which a partition is copied
+        into the RAM tier
+
+    strategy : CacheStrategy, optional
+        Eviction strategy for the RAM tier, by default an
+        :class:`LRUCacheStrategy` with the given :code:`capacity`
+
+    path : str
+        Directory on a RAM-backed file system
+    """
+    def __init__(self, capacity: int, promote_after: int = 2,
+                 strategy: Optional[CacheStrategy] = None, path: str = "/dev/shm"):
+        if strategy is None:
+            strategy = LRUCacheStrategy(capacity=capacity)
+        self.capacity = capacity
+        self.promote_after = promote_after
+        self.strategy = strategy
+        self.path = os.path.join(path, "libertem-cache")
+
+    def get_index_path(self) -> str:
+        return os.path.join(self.path, "cache-index")
+
+    def get_item_path(self, cache_key: str, partition: int) -> str:
+        # same layout as the disk tier, see :meth:`Cache.collect_orphans`:
+        return os.path.join(self.path, cache_key, "parts", "partition-%08d" % partition)
+
+    def get_stats(self) -> CacheStats:
+        return get_cache_stats(self.get_index_path())
+
+
+def _get_tier_summary(stats: CacheStats) -> Dict[str, int]:
+    summary = stats.get_counters()
+    summary["used"] = stats.get_used_capacity()
+    return summary
+
+
 class CachedDataSet(DataSet):
     """
     Cached DataSet.
@@ -373,8 +824,23 @@ class CachedDataSet(DataSet):
 
     strategy : CacheStrategy
         A class implementing a cache eviction strategy, for example LRUCacheStrategy
+        or LFUCacheStrategy
+
+    background_eviction : bool
+        Remove the files of evicted partitions in a background thread, see
+        :class:`Cache`.
+
+    ram_tier : RAMTier, optional
+        Add a RAM tier in front of the disk tier
+
+    .. versionchanged:: 0.12.0
+        The cache statistics are kept in per-process logs in the
+        :code:`cache-index` directory of :code:`cache_path` instead of a
+        sqlite database, see :class:`CacheStats`. Added the
+        :code:`background_eviction` and :code:`ram_tier` parameters.
     """
-    def __init__(self, source_ds, cache_path, strategy, io_backend=None):
+    def __init__(self, source_ds, cache_path, strategy, io_backend=None,
+                 background_eviction: bool = True, ram_tier: Optional[RAMTier] = None):
         super().__init__(io_backend=io_backend)
         self._source_ds = source_ds
         self._cache_path = cache_path
@@ -383,6 +849,8 @@ class CachedDataSet(DataSet):
         self._cluster_ds = None
         self._executor = None
         self._cache_strategy = strategy
+        self._background_eviction = background_eviction
+        self._ram_tier = ram_tier
 
     def _make_cache_key(self, inp):
         inp_as_str = json.dumps(inp)
@@ -397,19 +865,44 @@ class CachedDataSet(DataSet):
         )
         cluster_ds.check_valid()
         self._cluster_ds = cluster_ds.initialize(executor=executor)
+        self._meta = self._cluster_ds.meta
         self._executor = executor
         return self
 
-    def _get_db_path(self):
-        return os.path.join(self._cache_path, "cache.db")
+    def _get_index_path(self):
+        return os.path.join(self._cache_path, "cache-index")
 
     def _ensure_cache_structure(self):
         os.makedirs(self._path, exist_ok=True)
 
-        cache_stats = CacheStats(self._get_db_path())
-        cache_stats.initialize_schema()
+        cache_stats = get_cache_stats(self._get_index_path())
         cache = Cache(stats=cache_stats, strategy=self._cache_strategy)
         cache.collect_orphans(self._cache_path)
+        if self._ram_tier is not None:
+            os.makedirs(os.path.dirname(self._ram_tier.get_item_path(self._cache_key, 0)),
+                        exist_ok=True)
+            Cache(
+                stats=self._ram_tier.get_stats(), strategy=self._ram_tier.strategy,
+            ).collect_orphans(self._ram_tier.path)
+
+    def _get_tier_stats(self):
+        tiers = {
+            "disk": _get_tier_summary(get_cache_stats(self._get_index_path())),
+        }
+        if self._ram_tier is not None:
+            tiers["ram"] = _get_tier_summary(self._ram_tier.get_stats())
+        return tiers
+
+    def get_tier_stats(self, executor):
+        """
+        The number of hits, misses and evictions and the used capacity in
+        bytes of each tier, for each host, as a dictionary
+        :code:`{host: {"disk": {...}, "ram": {...}}}`. The numbers include
+        all data sets that share the cache.
+
+        .. versionadded:: 0.12.0
+        """
+        return executor.run_each_host(self._get_tier_stats)
 
     @property
     def dtype(self):
@@ -440,7 +933,9 @@ class CachedDataSet(DataSet):
                 partition_slice=cluster_part.slice,
                 cache_key=self._cache_key,
                 cache_strategy=self._cache_strategy,
-                db_path=self._get_db_path(),
+                index_path=self._get_index_path(),
+                background_eviction=self._background_eviction,
+                ram_tier=self._ram_tier,
                 idx=idx,
                 io_backend=self.get_io_backend(),
                 decoder=None,
@@ -459,7 +954,8 @@ class CachedDataSet(DataSet):
 
 class CachedPartition(Partition):
     def __init__(self, source_part, cluster_part, meta, partition_slice,
-                 cache_key, cache_strategy, db_path, idx, io_backend, decoder):
+                 cache_key, cache_strategy, index_path, idx, io_backend, decoder,
+                 background_eviction=False, ram_tier: Optional[RAMTier] = None):
         super().__init__(
             meta=meta,
             partition_slice=partition_slice,
@@ -470,16 +966,94 @@ class CachedPartition(Partition):
         self._cluster_part = cluster_part
         self._cache_key = cache_key
         self._cache_strategy = cache_strategy
-        self._db_path = db_path
+        self._index_path = index_path
+        self._background_eviction = background_eviction
+        self._ram_tier = ram_tier
         self._idx = idx
+        self._corrections = CorrectionSet()
+
+    def set_corrections(self, corrections: Optional[CorrectionSet]):
+        if corrections is None:
+            corrections = CorrectionSet()
+        self._corrections = corrections
+        # the source partition is only read to fill the cache, so it
+        # always yields uncorrected data:
+        self._cluster_part.set_corrections(corrections)
 
     def _get_cache(self):
-        cache_stats = CacheStats(self._db_path)
-        return Cache(stats=cache_stats, strategy=self._cache_strategy)
+        return Cache(
+            stats=get_cache_stats(self._index_path),
+            strategy=self._cache_strategy,
+            background_eviction=self._background_eviction,
+        )
 
     def _sizeof(self):
         return self.slice.shape.size * np.dtype(self.dtype).itemsize
 
+    def _get_ram_item(self) -> CacheItem:
+        return CacheItem(
+            dataset=self._cache_key,
+            partition=self._idx,
+            path=self._ram_tier.get_item_path(self._cache_key, self._idx),
+            size=self._sizeof(),
+        )
+
+    def _get_ram_part(self, path: str) -> BasePartition:
+        """
+        A partition that reads the copy in the RAM tier. The file is always
+        memory mapped, so that tiles in the native dtype are views into the
+        shared memory.
+        """
+        start = self.slice.origin[0]
+        num_frames = self.slice.shape[0]
+        fileset = RawFileSet([
+            RawFile(
+                path=path,
+                start_idx=start,
+                end_idx=start + num_frames,
+                sig_shape=self.meta.shape.sig,
+                native_dtype=self.meta.raw_dtype,
+            )
+        ])
+        part = BasePartition(
+            meta=self.meta,
+            partition_slice=self.slice,
+            fileset=fileset,
+            start_frame=start,
+            num_frames=num_frames,
+            io_backend=MMapBackend(),
+        )
+        part.set_corrections(self._corrections)
+        return part
+
+    def _promote(self, ram_stats: CacheStats, ram_item: CacheItem) -> bool:
+        """
+        Copy the partition from the disk tier into the RAM tier. Returns
+        :code:`False` if there is not enough space in the RAM tier.
+        """
+        # the RAM tier always evicts synchronously: the space is needed for
+        # the copy right away, and a file on a RAM-backed file system that
+        # is removed by mistake can't be restored from the disk:
+        ram_cache = Cache(
+            stats=ram_stats, strategy=self._ram_tier.strategy, background_eviction=False,
+        )
+        try:
+            ram_cache.evict(cache_key=self._cache_key, size=ram_item.size)
+        except RuntimeError:
+            return False
+        os.makedirs(os.path.dirname(ram_item.path), exist_ok=True)
+        tmp_path = "%s.tmp-%s" % (ram_item.path, uuid.uuid4().hex[:8])
+        try:
+            shutil.copyfile(self._cluster_part.get_canonical_path(), tmp_path)
+            os.replace(tmp_path, ram_item.path)
+        except OSError:
+            # for example, the RAM-backed file system is full:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return False
+        ram_stats.record_miss(ram_item)
+        return True
+
     def _write_tiles_noroi(self, wh, source_tiles, dest_dtype):
         """
         Write tiles from source_tiles to the cache. After each tile is written, yield
@@ -497,6 +1071,7 @@ class CachedPartition(Partition):
         """
         Get source tiles without roi, read and cache whole partition, then
         read all tiles selected via roi from the cache (_cluster_part aka cached_tiles).
+        Also used with corrections, which are only applied when reading from the cache.
         """
         with wh:
             for tile in wh.write_tiles(source_tiles):
@@ -521,9 +1096,33 @@ class CachedPartition(Partition):
             path=self._cluster_part.get_canonical_path(),
             size=self._sizeof(),
         )
+        ram_stats = None
+        if self._ram_tier is not None:
+            ram_stats = self._ram_tier.get_stats()
+            ram_item = self._get_ram_item()
+            if ram_stats.get_item(self._cache_key, self._idx) is not None:
+                if os.path.exists(ram_item.path):
+                    ram_stats.record_hit(ram_item)
+                    yield from self._get_ram_part(ram_item.path).get_tiles(
+                        tiling_scheme=tiling_scheme, dest_dtype=dest_dtype, roi=roi,
+                    )
+                    return
+                # the file was removed behind our back:
+                ram_stats.record_eviction(ram_item)
         if self._cluster_part._have_data():
-            yield from cached_tiles
+            disk_item = get_cache_stats(self._index_path).get_item(self._cache_key, self._idx)
+            hits = 0 if disk_item is None else disk_item.hits
             cache.record_hit(cache_item)
+            if (
+                ram_stats is not None
+                and hits + 1 >= self._ram_tier.promote_after
+                and self._promote(ram_stats, ram_item)
+            ):
+                yield from self._get_ram_part(ram_item.path).get_tiles(
+                    tiling_scheme=tiling_scheme, dest_dtype=dest_dtype, roi=roi,
+                )
+            else:
+                yield from cached_tiles
         else:
             cache.evict(cache_key=self._cache_key, size=self._sizeof())
             # NOTE: source_tiles are in native dtype!
@@ -533,7 +1132,7 @@ class CachedPartition(Partition):
                 roi=None,  # NOTE: want to always cache the whole dataset, thus roi=None
             )
             wh = self._cluster_part.get_write_handle()
-            if roi is None:
+            if roi is None and not self._corrections.have_corrections():
                 yield from self._write_tiles_noroi(wh, source_tiles, dest_dtype)
             else:
                 yield from self._write_tiles_roi(wh, source_tiles, cached_tiles)
@@ -547,3 +1146,7 @@ class CachedPartition(Partition):
 
     def evict(self):
         self._cluster_part.delete()
+        if self._ram_tier is not None:
+            path = self._ram_tier.get_item_path(self._cache_key, self._idx)
+            if os.path.exists(path):
+                os.unlink(path)
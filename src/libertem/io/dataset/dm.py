@@ -86,7 +86,7 @@ def _get_metadata(path):
 
 class StackedDMFile(File):
     def get_array_from_memview(self, mem: memoryview, slicing: OffsetsSizes):
-        mem = mem[slicing.file_offset:-slicing.skip_end]
+        mem = mem[slicing.file_offset:len(mem) - slicing.skip_end]
         res = np.frombuffer(mem, dtype="uint8")
         itemsize = np.dtype(self._native_dtype).itemsize
         sigsize = int(prod(self._sig_shape))
@@ -18,6 +18,7 @@ from .base import (
     DataSet, Partition, DataTile, DataSetException, DataSetMeta,
     TilingScheme,
 )
+from .hdf5_chunks import FilterPipeline, H5ChunkReader
 
 
 # alias for mocking:
@@ -260,6 +261,25 @@ class H5DataSet(DataSet):
         Minimum number of partitions, set to number of cores if not specified. Usually
         doesn't need to be specified.
 
+    direct_chunk_read: bool
+        For compressed data, read the compressed chunks directly and decompress
+        them in a thread pool, instead of using the single-threaded filter
+        pipeline of HDF5. This is used if all filters of the dataset are
+        supported: gzip and shuffle, and LZ4 and bitshuffle if the
+        :code:`lz4` and :code:`bitshuffle` packages are installed, respectively.
+        Otherwise, the data is read through HDF5. Enabled by default.
+
+        .. versionadded:: 0.12.0
+
+    decompress_threads: int, optional
+        Number of threads per partition for decompressing chunks with
+        :code:`direct_chunk_read`. Defaults to the number of threads that the
+        executor assigns to each worker, which is one for most executors.
+        Higher values can speed up reading if there are fewer workers than
+        CPU cores, but oversubscribe the CPUs otherwise.
+
+        .. versionadded:: 0.12.0
+
     Note
     ----
     If the HDF5 file to be loaded contains compressed data
@@ -292,7 +312,8 @@ class H5DataSet(DataSet):
     """
     def __init__(self, path, ds_path=None, tileshape=None, nav_shape=None, sig_shape=None,
                  target_size=None, min_num_partitions=None, sig_dims=2, io_backend=None,
-                 sync_offset: int = 0):
+                 sync_offset: int = 0, direct_chunk_read: bool = True,
+                 decompress_threads: Optional[int] = None):
         super().__init__(io_backend=io_backend)
         if io_backend is not None:
             raise ValueError("H5DataSet currently doesn't support alternative I/O backends")
@@ -315,6 +336,8 @@ class H5DataSet(DataSet):
         self._sync_offset = sync_offset
         self._chunks = None
         self._compression = None
+        self._direct_chunk_read = direct_chunk_read
+        self._decompress_threads = decompress_threads
 
     def get_reader(self):
         return H5Reader(
@@ -601,6 +624,8 @@ class H5DataSet(DataSet):
                 chunks=self._chunks,
                 decoder=None,
                 sync_offset=self._sync_offset,
+                direct_chunk_read=self._direct_chunk_read,
+                decompress_threads=self._decompress_threads,
             )
 
     def __repr__(self):
@@ -608,12 +633,15 @@ class H5DataSet(DataSet):
 
 
 class H5Partition(Partition):
-    def __init__(self, reader: H5Reader, slice_nd: Slice, chunks, sync_offset=0, *args, **kwargs):
+    def __init__(self, reader: H5Reader, slice_nd: Slice, chunks, sync_offset=0,
+                 direct_chunk_read=True, decompress_threads=None, *args, **kwargs):
         self.reader = reader
         self.slice_nd = slice_nd
         self._corrections = None
         self._chunks = chunks
         self._sync_offset = sync_offset
+        self._direct_chunk_read = direct_chunk_read
+        self._decompress_threads = decompress_threads
         super().__init__(*args, **kwargs)
 
     def _have_compatible_chunking(self):
@@ -738,88 +766,136 @@ class H5Partition(Partition):
         cache_size = self._get_read_cache_size()
         return self.reader.get_h5ds(cache_size=cache_size)
 
-    def _get_tiles_normal(self, tiling_scheme: TilingScheme, dest_dtype):
-        with self._get_h5ds() as dataset:
-            # because the dtype conversion done by HDF5 itself can be quite slow,
-            # we need to use a buffer for reading in hdf5 native dtype:
-            data_flat = np.zeros(tiling_scheme.shape, dtype=dataset.dtype).reshape((-1,))
-
-            # ... and additionally a result buffer, for re-using the array used in the DataTile:
-            data_flat_res = np.zeros(tiling_scheme.shape, dtype=dest_dtype).reshape((-1,))
-
-            subslices = self._get_subslices(
-                tiling_scheme=tiling_scheme,
-            )
-
-            sync_offset = self._sync_offset
-            ds_num_frames = self.meta.shape.nav.size
-
-            for scheme_idx, tile_slice in subslices:
-                tile_slice_flat: Slice = tile_slice.flatten_nav(self.meta['ds_raw_shape'])
-                raw_origin = tile_slice_flat.origin
-                raw_shape = tile_slice_flat.shape
+    def _get_read_plan(self, tiling_scheme: TilingScheme):
+        """
+        The tiles of this partition, as tuples of
+        :code:`(scheme_idx, tile_slice, tile_slice_flat, raw_shape,
+        corrected_nav_origin, frames_beyond_end)`. Tiles that are completely outside of the dataset,
+        because of the :code:`sync_offset`, are skipped.
+        """
+        subslices = self._get_subslices(
+            tiling_scheme=tiling_scheme,
+        )
 
-                # The following block translates from tile_slice in the raw array
-                # to the partition coordinate system with sync_offset applied
-                # By doing this before reading we can avoid reading some tiles
-                # at the beginning/end of the dataset
-                # We will still read tiles which partially overlap the nav space
-                # and afterwards we drop the unecessary frames
-                corrected_nav_origin = raw_origin[0] - sync_offset
-                if corrected_nav_origin < 0:
-                    # positive sync_offset, drop frames at beginning of DS
-                    if abs(corrected_nav_origin) > tile_slice_flat.shape[0]:
-                        # tile is completely before the first partition, can skip it
-                        continue
-                    # Clip at the beginning so adjust the tile shape
-                    new_nav_size = tile_slice_flat.shape[0] + corrected_nav_origin
-                    tile_slice_flat.shape = (new_nav_size,) + tile_slice_flat.shape.sig
-                # Apply max(0, corrected_nav_origin) so we never provide negative nav coord
-                tile_slice_flat.origin = (max(0, corrected_nav_origin),) + raw_origin[1:]
-                # Now check for clipping at the end of the dataset
-                final_frame_idx = tile_slice_flat.origin[0] + tile_slice_flat.shape[0]
-                frames_beyond_end = final_frame_idx - ds_num_frames
-                # We want to skip any tiles which are completely past the end of the dataset
-                # and clip those which are only partially overlapping the final partition
-                if frames_beyond_end >= tile_slice_flat.shape[0]:
-                    # Empty tile after clip, skip
+        sync_offset = self._sync_offset
+        ds_num_frames = self.meta.shape.nav.size
+
+        for scheme_idx, tile_slice in subslices:
+            tile_slice_flat: Slice = tile_slice.flatten_nav(self.meta['ds_raw_shape'])
+            raw_origin = tile_slice_flat.origin
+            raw_shape = tile_slice_flat.shape
+
+            # The following block translates from tile_slice in the raw array
+            # to the partition coordinate system with sync_offset applied
+            # By doing this before reading we can avoid reading some tiles
+            # at the beginning/end of the dataset
+            # We will still read tiles which partially overlap the nav space
+            # and afterwards we drop the unecessary frames
+            corrected_nav_origin = raw_origin[0] - sync_offset
+            if corrected_nav_origin < 0:
+                # positive sync_offset, drop frames at beginning of DS
+                if abs(corrected_nav_origin) > tile_slice_flat.shape[0]:
+                    # tile is completely before the first partition, can skip it
                     continue
-                elif frames_beyond_end > 0:
-                    # tile partially overlaps end of dataset, adjust the shape
-                    new_nav_size = tile_slice_flat.shape[0] - frames_beyond_end
-                    tile_slice_flat.shape = (new_nav_size,) + tile_slice_flat.shape.sig
-
-                # Read the data in this block
-                # cut buffer into the right size
-                buf_size = tile_slice.shape.size
-                buf = data_flat[:buf_size].reshape(tile_slice.shape)
-                buf_res = data_flat_res[:buf_size].reshape(tile_slice.shape)
-                dataset.read_direct(buf, source_sel=tile_slice.get())
-                buf_res[:] = buf  # extra copy for faster dtype/endianess conversion
-                tile_data = buf_res.reshape(raw_shape)
-
-                # If the true tile origin is before the start of the dataset, must drop frames
-                # This corresponds to the first raw tile which overlaps the first partition
-                # and can only occur when sync_offset > 0
-                if corrected_nav_origin < 0:
-                    tile_data = tile_data[abs(corrected_nav_origin):, ...]
-
-                # The final tiles in the dataset can partially overlap the final partition
-                # Drop frames at end to match the partition size
-                # we already verified if any frames will remain
-                # this can occur for both +ve and -ve sync_offset
-                if frames_beyond_end > 0:
-                    tile_data = tile_data[:-frames_beyond_end, ...]
+                # Clip at the beginning so adjust the tile shape
+                new_nav_size = tile_slice_flat.shape[0] + corrected_nav_origin
+                tile_slice_flat.shape = (new_nav_size,) + tile_slice_flat.shape.sig
+            # Apply max(0, corrected_nav_origin) so we never provide negative nav coord
+            tile_slice_flat.origin = (max(0, corrected_nav_origin),) + raw_origin[1:]
+            # Now check for clipping at the end of the dataset
+            final_frame_idx = tile_slice_flat.origin[0] + tile_slice_flat.shape[0]
+            frames_beyond_end = final_frame_idx - ds_num_frames
+            # We want to skip any tiles which are completely past the end of the dataset
+            # and clip those which are only partially overlapping the final partition
+            if frames_beyond_end >= tile_slice_flat.shape[0]:
+                # Empty tile after clip, skip
+                continue
+            elif frames_beyond_end > 0:
+                # tile partially overlaps end of dataset, adjust the shape
+                new_nav_size = tile_slice_flat.shape[0] - frames_beyond_end
+                tile_slice_flat.shape = (new_nav_size,) + tile_slice_flat.shape.sig
+            yield (
+                scheme_idx, tile_slice, tile_slice_flat, raw_shape,
+                corrected_nav_origin, frames_beyond_end,
+            )
 
-                # NOTE could the above two blocks ever apply simultaneously?
-                # would the two operations conflict ?
+    def _read_tiles_h5py(self, dataset, tile_slices, tiling_scheme, dest_dtype):
+        # because the dtype conversion done by HDF5 itself can be quite slow,
+        # we need to use a buffer for reading in hdf5 native dtype:
+        data_flat = np.zeros(tiling_scheme.shape, dtype=dataset.dtype).reshape((-1,))
+
+        # ... and additionally a result buffer, for re-using the array used in the DataTile:
+        data_flat_res = np.zeros(tiling_scheme.shape, dtype=dest_dtype).reshape((-1,))
+
+        for tile_slice in tile_slices:
+            # cut buffer into the right size
+            buf_size = tile_slice.shape.size
+            buf = data_flat[:buf_size].reshape(tile_slice.shape)
+            buf_res = data_flat_res[:buf_size].reshape(tile_slice.shape)
+            dataset.read_direct(buf, source_sel=tile_slice.get())
+            buf_res[:] = buf  # extra copy for faster dtype/endianess conversion
+            yield buf_res
+
+    def _get_chunk_reader(self, dataset) -> Optional[H5ChunkReader]:
+        if not self._direct_chunk_read:
+            return None
+        pipeline = FilterPipeline.from_dataset(dataset)
+        if pipeline is None:
+            return None
+        num_threads = self._decompress_threads
+        if num_threads is None:
+            # each worker reads its own partitions, so stay within its thread budget:
+            num_threads = self._threads_per_worker or 1
+        return H5ChunkReader(
+            dataset,
+            pipeline=pipeline,
+            num_threads=num_threads,
+            max_bytes=128 * 1024 * 1024,
+        )
 
-                self._preprocess(tile_data, tile_slice_flat)
-                yield DataTile(
-                    tile_data,
-                    tile_slice=tile_slice_flat,
-                    scheme_idx=scheme_idx,
-                )
+    def _get_tiles_normal(self, tiling_scheme: TilingScheme, dest_dtype):
+        with self._get_h5ds() as dataset:
+            plan = list(self._get_read_plan(tiling_scheme))
+            tile_slices = [item[1] for item in plan]
+            chunk_reader = self._get_chunk_reader(dataset)
+            if chunk_reader is not None:
+                # decompress the chunks in parallel, directly into the result buffer:
+                data_flat_res = np.zeros(tiling_scheme.shape, dtype=dest_dtype).reshape((-1,))
+                buffers = chunk_reader.read_tiles(tile_slices, data_flat_res)
+            else:
+                buffers = self._read_tiles_h5py(dataset, tile_slices, tiling_scheme, dest_dtype)
+
+            # make sure the chunk reader is done before the file is closed:
+            with contextlib.closing(buffers):
+                for plan_item, buf_res in zip(plan, buffers):
+                    (
+                        scheme_idx, tile_slice, tile_slice_flat, raw_shape,
+                        corrected_nav_origin, frames_beyond_end,
+                    ) = plan_item
+                    tile_data = buf_res.reshape(raw_shape)
+
+                    # If the true tile origin is before the start of the dataset, must drop frames
+                    # This corresponds to the first raw tile which overlaps the first partition
+                    # and can only occur when sync_offset > 0
+                    if corrected_nav_origin < 0:
+                        tile_data = tile_data[abs(corrected_nav_origin):, ...]
+
+                    # The final tiles in the dataset can partially overlap the final partition
+                    # Drop frames at end to match the partition size
+                    # we already verified if any frames will remain
+                    # this can occur for both +ve and -ve sync_offset
+                    if frames_beyond_end > 0:
+                        tile_data = tile_data[:-frames_beyond_end, ...]
+
+                    # NOTE could the above two blocks ever apply simultaneously?
+                    # would the two operations conflict ?
+
+                    self._preprocess(tile_data, tile_slice_flat)
+                    yield DataTile(
+                        tile_data,
+                        tile_slice=tile_slice_flat,
+                        scheme_idx=scheme_idx,
+                    )
 
     def _get_tiles_with_roi(self, roi, dest_dtype, tiling_scheme):
         # we currently don't chop up the frames when reading with a roi, so
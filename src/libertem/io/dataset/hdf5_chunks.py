@@ -0,0 +1,200 @@
+"""
+Reading of compressed HDF5 datasets chunk by chunk: the raw chunks are
+fetched with :code:`read_direct_chunk` and decompressed in a thread pool,
+instead of going through the single-threaded HDF5 filter pipeline.
+"""
+import zlib
+import struct
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import numba
+import numpy as np
+
+from libertem.common.math import prod
+from .base.chunks import ChunkReader
+
+logger = logging.getLogger(__name__)
+
+H5Z_FILTER_DEFLATE = 1
+H5Z_FILTER_SHUFFLE = 2
+H5Z_FILTER_LZ4 = 32004
+H5Z_FILTER_BITSHUFFLE = 32008
+
+# decode(buf, cd_values, itemsize) -> buffer
+DecodeFn = Callable[[bytes, Tuple[int, ...], int], bytes]
+
+
+def _decode_deflate(buf, cd_values, itemsize):
+    # zlib releases the GIL while decompressing
+    return zlib.decompress(buf)
+
+
+@numba.njit(nogil=True, cache=True)
+def _unshuffle(inp, out, elem_size):
+    num_elems = inp.size // elem_size
+    for byte_idx in range(elem_size):
+        src = inp[byte_idx * num_elems:(byte_idx + 1) * num_elems]
+        for i in range(num_elems):
+            out[i * elem_size + byte_idx] = src[i]
+    # leftover bytes are not shuffled:
+    for i in range(num_elems * elem_size, inp.size):
+        out[i] = inp[i]
+    return out
+
+
+def _decode_shuffle(buf, cd_values, itemsize):
+    elem_size = cd_values[0] if cd_values else itemsize
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    if elem_size <= 1 or arr.size < 2 * elem_size:
+        return buf
+    return _unshuffle(arr, np.empty_like(arr), elem_size)
+
+
+def _decode_lz4(buf, cd_values, itemsize):
+    import lz4.block
+    view = memoryview(buf)
+    total_size, block_size = struct.unpack(">QI", view[:12])
+    res = bytearray(total_size)
+    pos = 12
+    out_pos = 0
+    while out_pos < total_size:
+        size = min(block_size, total_size - out_pos)
+        compressed_size, = struct.unpack(">I", view[pos:pos + 4])
+        pos += 4
+        block = view[pos:pos + compressed_size]
+        if compressed_size == size:
+            # stored uncompressed
+            res[out_pos:out_pos + size] = block
+        else:
+            res[out_pos:out_pos + size] = lz4.block.decompress(block, uncompressed_size=size)
+        pos += compressed_size
+        out_pos += size
+    return res
+
+
+def _decode_bitshuffle(buf, cd_values, itemsize):
+    import bitshuffle
+    elem_size = cd_values[2] if len(cd_values) > 2 else itemsize
+    compression = cd_values[4] if len(cd_values) > 4 else 0
+    dtype = np.dtype(f"u{elem_size}")
+    if compression in (2, 3):
+        total_size, block_bytes = struct.unpack(">QI", memoryview(buf)[:12])
+        arr = np.frombuffer(buf, dtype=np.uint8, offset=12)
+        decompress = bitshuffle.decompress_lz4 if compression == 2 else bitshuffle.decompress_zstd
+        return decompress(arr, (total_size // elem_size,), dtype, block_bytes // elem_size)
+    block_size = cd_values[3] if len(cd_values) > 3 else 0
+    return bitshuffle.bitunshuffle(np.frombuffer(buf, dtype=dtype), block_size)
+
+
+def _have_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def get_filter_decoder(filter_id: int, cd_values: Tuple[int, ...]) -> Optional[DecodeFn]:
+    """
+    Decoder for the HDF5 filter :code:`filter_id`, or :code:`None` if
+    we can't decode it ourselves.
+    """
+    if filter_id == H5Z_FILTER_DEFLATE:
+        return _decode_deflate
+    elif filter_id == H5Z_FILTER_SHUFFLE:
+        return _decode_shuffle
+    elif filter_id == H5Z_FILTER_LZ4 and _have_module("lz4.block"):
+        return _decode_lz4
+    elif filter_id == H5Z_FILTER_BITSHUFFLE and _have_module("bitshuffle"):
+        compression = cd_values[4] if len(cd_values) > 4 else 0
+        if compression in (0, 2, 3):
+            return _decode_bitshuffle
+    return None
+
+
+class FilterPipeline:
+    """
+    The filters of a HDF5 dataset, decoded in reverse order
+
+    Parameters
+    ----------
+    filters
+        List of :code:`(filter_id, cd_values, decode)` in the order they
+        are applied when writing
+    """
+    def __init__(self, filters: List[Tuple[int, Tuple[int, ...], DecodeFn]]):
+        self._filters = filters
+
+    @classmethod
+    def from_dataset(cls, h5ds) -> Optional["FilterPipeline"]:
+        """
+        Returns :code:`None` if the dataset is not chunked, not filtered, or
+        uses a filter we don't support.
+        """
+        if h5ds.chunks is None:
+            return None
+        dcpl = h5ds.id.get_create_plist()
+        filters = []
+        for idx in range(dcpl.get_nfilters()):
+            filter_id, _, cd_values, _ = dcpl.get_filter(idx)
+            cd_values = tuple(cd_values)
+            decode = get_filter_decoder(filter_id, cd_values)
+            if decode is None:
+                logger.debug("unsupported HDF5 filter %d, can't read chunks directly", filter_id)
+                return None
+            filters.append((filter_id, cd_values, decode))
+        if not filters:
+            return None
+        return cls(filters)
+
+    def decode(self, buf, filter_mask: int, itemsize: int):
+        for idx in reversed(range(len(self._filters))):
+            # filters that were skipped for this chunk have their bit set:
+            if filter_mask & (1 << idx):
+                continue
+            _, cd_values, decode = self._filters[idx]
+            buf = decode(buf, cd_values, itemsize)
+        return buf
+
+
+class H5ChunkReader(ChunkReader):
+    """
+    Read tiles from a chunked HDF5 dataset by decompressing the chunks
+    that are fetched with :code:`read_direct_chunk` in a thread pool.
+
+    Parameters
+    ----------
+    h5ds : h5py.Dataset
+
+    pipeline : FilterPipeline
+
+    num_threads : int
+
+    max_bytes : int
+        How many bytes of decompressed chunks to keep around
+    """
+    def __init__(self, h5ds, pipeline: FilterPipeline, num_threads: int, max_bytes: int):
+        self._h5ds = h5ds
+        self._pipeline = pipeline
+        super().__init__(
+            chunks=tuple(h5ds.chunks),
+            dtype=h5ds.dtype,
+            fillvalue=h5ds.fillvalue,
+            num_threads=num_threads,
+            max_bytes=max_bytes,
+        )
+
+    def _decode_chunk(self, offset: Tuple[int, ...]) -> Optional[np.ndarray]:
+        dsid = self._h5ds.id
+        try:
+            filter_mask, buf = dsid.read_direct_chunk(offset)
+        except RuntimeError:
+            if dsid.get_chunk_info_by_coord(offset).byte_offset is None:
+                # chunk was never written, it only contains the fill value
+                return None
+            raise
+        data = self._pipeline.decode(buf, filter_mask, self._dtype.itemsize)
+        return np.frombuffer(
+            data, dtype=self._dtype, count=prod(self._chunks)
+        ).reshape(self._chunks)
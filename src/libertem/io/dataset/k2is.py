@@ -2,6 +2,7 @@ import os
 import re
 import glob
 import math
+import hashlib
 import typing
 import logging
 import itertools
@@ -21,6 +22,7 @@ from .base import (
     TilingScheme, IOBackend,
 )
 from .base.file import OffsetsSizes
+from .base.index_cache import get_file_stamp, get_index_dir, read_json, write_json_atomic
 
 log = logging.getLogger(__name__)
 
@@ -291,26 +293,121 @@ def _nav_shape_without_flyback(path):
         return None
 
 
-def _get_num_frames_w_shutter_active_flag_set(syncer):
-    syncer.sync()
-    with syncer.sectors[0] as s:
-        num_frames = (
-            s.last_block_offset - s.first_block_offset + BLOCK_SIZE
-        ) // BLOCK_SIZE // BLOCKS_PER_SECTOR_PER_FRAME
-    return num_frames
+def _count_frames(syncer):
+    s = syncer.sectors[0]
+    return (
+        s.last_block_offset - s.first_block_offset + BLOCK_SIZE
+    ) // BLOCK_SIZE // BLOCKS_PER_SECTOR_PER_FRAME
 
 
 def _get_num_frames(syncer):
     syncer.sync_sectors()
-    with syncer.sectors[0] as s:
-        num_frames = (
-            s.last_block_offset - s.first_block_offset + BLOCK_SIZE
-        ) // BLOCK_SIZE // BLOCKS_PER_SECTOR_PER_FRAME
-    return num_frames
+    return _count_frames(syncer)
 
 
-def _get_syncer_for_detect_params(files):
-    return K2Syncer(files)
+def _scan_sync_info(paths):
+    """
+    Synchronize the sectors, and return the number of frames before and after
+    synchronizing to the shutter_active flag, and the resulting block offsets.
+    """
+    syncer = K2Syncer(paths)
+    image_count = _get_num_frames(syncer)
+    syncer.sync_to_first_frame()
+    syncer.validate_sync()
+    return {
+        'image_count': int(image_count),
+        'num_frames_w_shutter_active_flag_set': int(_count_frames(syncer)),
+        'first_block_offsets': [int(s.first_block_offset) for s in syncer.sectors],
+        'last_block_offsets': [int(s.last_block_offset) for s in syncer.sectors],
+    }
+
+
+def get_sync_index_dir():
+    '''
+    Directory where :class:`K2SyncIndex` files are stored, from the
+    :code:`LIBERTEM_K2IS_SYNC_INDEX` environment variable, or in the user's
+    cache directory otherwise. Setting the variable to :code:`0` disables
+    the index.
+
+    .. versionadded:: 0.12.0
+    '''
+    return get_index_dir("LIBERTEM_K2IS_SYNC_INDEX", "k2is-sync")
+
+
+class K2SyncIndex:
+    '''
+    Result of synchronizing the sectors of a K2IS data set, stored as a JSON
+    file. It is only valid as long as the size and modification time of all
+    .bin files match.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    path : str
+        Path of the index file
+    '''
+    VERSION = 1
+
+    def __init__(self, path):
+        self._path = path
+
+    @classmethod
+    def for_files(cls, paths):
+        '''
+        The index for the data set consisting of :code:`paths`, or :code:`None`
+        if the index is disabled.
+        '''
+        index_dir = get_sync_index_dir()
+        if index_dir is None:
+            return None
+        key = "\n".join(os.path.abspath(path) for path in paths)
+        digest = hashlib.sha1(key.encode("utf-8", errors="surrogateescape")).hexdigest()
+        return cls(os.path.join(index_dir, "%s.json" % digest))
+
+    @property
+    def path(self):
+        return self._path
+
+    def _get_files(self, paths):
+        return [
+            dict(get_file_stamp(os.stat(path)), path=os.path.abspath(path))
+            for path in paths
+        ]
+
+    def get(self, paths):
+        content = read_json(self._path)
+        if not isinstance(content, dict) or content.get("version") != self.VERSION:
+            return None
+        if content.get("files") != self._get_files(paths):
+            return None
+        return content.get("info")
+
+    def put(self, paths, info):
+        write_json_atomic(self._path, {
+            "version": self.VERSION,
+            "files": self._get_files(paths),
+            "info": info,
+        })
+
+
+def get_sync_info(paths):
+    '''
+    Frame counts and block offsets of the synchronized sectors, see
+    :func:`_scan_sync_info`. The result is taken from the :class:`K2SyncIndex`
+    if the files didn't change, so the sectors don't have to be scanned again.
+
+    .. versionadded:: 0.12.0
+    '''
+    index = K2SyncIndex.for_files(paths)
+    if index is not None:
+        info = index.get(paths)
+        if info is not None:
+            return info
+    info = _scan_sync_info(paths)
+    if index is not None:
+        index.put(paths, info)
+    return info
 
 
 class K2Syncer:
@@ -762,9 +859,11 @@ class K2ISDataSet(DataSet):
         self._native_sync_offset = 0
         self._user_sync_offset = sync_offset
         self._cached_user_sync_offset = None
+        self._sync_info = None
 
     def _do_initialize(self):
         self._files = self._get_files()
+        self._sync_info = get_sync_info(self._files)
         self._set_skip_frames_and_nav_shape()
         if self._sig_shape is None:
             self._sig_shape = (SECTOR_SIZE[0], NUM_SECTORS * SECTOR_SIZE[1])
@@ -776,7 +875,7 @@ class K2ISDataSet(DataSet):
                     (SECTOR_SIZE[0], NUM_SECTORS * SECTOR_SIZE[1])
                 ))
             )
-        self._image_count = _get_num_frames(self._get_syncer(do_sync=False))
+        self._image_count = self._sync_info['image_count']
         self._set_sync_offset()
         self._get_syncer(do_sync=True)
         self._meta = DataSetMeta(
@@ -807,12 +906,12 @@ class K2ISDataSet(DataSet):
             self._skip_frames = 0
             if self._nav_shape is None:
                 self._nav_shape = (
-                    _get_num_frames_w_shutter_active_flag_set(self._get_syncer(do_sync=False)),
+                    self._sync_info['num_frames_w_shutter_active_flag_set'],
                 )
 
     def _set_sync_offset(self):
-        self._num_frames_w_shutter_active_flag_set = _get_num_frames_w_shutter_active_flag_set(
-            self._get_syncer(do_sync=False)
+        self._num_frames_w_shutter_active_flag_set = (
+            self._sync_info['num_frames_w_shutter_active_flag_set']
         )
         self._native_sync_offset = self._image_count - self._num_frames_w_shutter_active_flag_set
         if self._user_sync_offset is None:
@@ -885,11 +984,9 @@ class K2ISDataSet(DataSet):
                 return False
         except DataSetException:
             return False
-        s = executor.run_function(_get_syncer_for_detect_params, files)
-        num_frames = executor.run_function(_get_num_frames, s)
-        num_frames_w_shutter_active_flag_set = executor.run_function(
-            _get_num_frames_w_shutter_active_flag_set, s
-        )
+        sync_info = executor.run_function(get_sync_info, list(sorted(files)))
+        num_frames = sync_info['image_count']
+        num_frames_w_shutter_active_flag_set = sync_info['num_frames_w_shutter_active_flag_set']
         sync_offset = num_frames - num_frames_w_shutter_active_flag_set
         nav_shape = executor.run_function(_get_nav_shape, path)
         if nav_shape is None:
@@ -968,20 +1065,13 @@ class K2ISDataSet(DataSet):
             ))
         return list(sorted(files))
 
-    def _cache_first_block_offsets(self, fs):
-        self._start_offsets = [
-            s.first_block_offset
-            for s in fs.sectors
-        ]
+    def _cache_first_block_offsets(self, first_block_offsets):
         # apply skip_frames value to the start_offsets
         self._start_offsets = [o + BLOCK_SIZE * self._skip_frames * BLOCKS_PER_SECTOR_PER_FRAME
-                               for o in self._start_offsets]
+                               for o in first_block_offsets]
 
-    def _cache_last_block_offsets(self, fs):
-        self._last_offsets = [
-            s.last_block_offset
-            for s in fs.sectors
-        ]
+    def _cache_last_block_offsets(self, last_block_offsets):
+        self._last_offsets = list(last_block_offsets)
 
     def _cache_user_sync_offset(self, user_sync_offset):
         self._cached_user_sync_offset = user_sync_offset
@@ -990,16 +1080,14 @@ class K2ISDataSet(DataSet):
         if not do_sync:
             return K2Syncer(self._files)
         if self._start_offsets is None or self._user_sync_offset != self._cached_user_sync_offset:
-            sy = K2Syncer(self._files)
-            sy.sync()
-            self._cache_first_block_offsets(sy)
-            self._cache_last_block_offsets(sy)
+            if self._sync_info is None:
+                self._sync_info = get_sync_info(self._files)
+            self._cache_first_block_offsets(self._sync_info['first_block_offsets'])
+            self._cache_last_block_offsets(self._sync_info['last_block_offsets'])
             self._cache_user_sync_offset(self._user_sync_offset)
-        else:
-            sy = K2Syncer(
-                self._files, start_offsets=self._start_offsets, last_offsets=self._last_offsets
-            )
-        return sy
+        return K2Syncer(
+            self._files, start_offsets=self._start_offsets, last_offsets=self._last_offsets
+        )
 
     def get_decoder(self) -> Decoder:
         return K2ISDecoder()
@@ -1,8 +1,11 @@
 import re
 import os
+import sys
+import hashlib
 from glob import glob, escape
 import logging
-from typing import TYPE_CHECKING, Generator, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Generator, List, Optional, Sequence, Tuple, Union
 from typing_extensions import Literal, TypedDict
 import warnings
 
@@ -18,8 +21,9 @@ from .base import (
     DataSet, DataSetException, DataSetMeta,
     BasePartition, FileSet, File, make_get_read_ranges,
     Decoder, TilingScheme, default_get_read_ranges,
-    DtypeConversionDecoder, IOBackend,
+    DtypeConversionDecoder, IOBackend, Follow,
 )
+from .base.index_cache import get_file_stamp, get_index_dir, read_json, write_json_atomic
 
 log = logging.getLogger(__name__)
 
@@ -130,10 +134,11 @@ def get_image_count_and_sig_shape(
     disable_glob: bool = False,
 ) -> Tuple[int, Tuple[int, int]]:
     fns = get_filenames(path, disable_glob=disable_glob)
+    headers = read_headers(fns, index=MIBHeaderIndex.for_path(path, disable_glob))
     count = 0
     files = []
     for path in fns:
-        f = MIBHeaderReader(path)
+        f = MIBHeaderReader(path, fields=headers[path])
         count += f.fields['num_images']
         files.append(f)
     try:
@@ -656,12 +661,245 @@ def decode_r24_swap(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
         out[idx // 2, out_pos] += out_val
 
 
+# Vectorized variants of the RAW decoders above: instead of going
+# byte-by-byte, the input is viewed as 64bit words, which are unpacked with
+# a fixed number of shifts per word, so LLVM can turn the inner loops into
+# SIMD code. They assume a little endian host, see `get_decode_impl`.
+# The decoders above stay as the reference implementation.
+
+# bit position in a little endian 64bit word of each of the 64 pixels that
+# are packed into it (the bytes are stored in reverse order):
+_R1_SHIFTS = np.array([8 * (7 - p // 8) + p % 8 for p in range(64)], dtype=np.uint64)
+
+
+@numba.njit(inline='always', cache=True)
+def _bswap64(x):
+    x = (
+        ((x & np.uint64(0x00FF00FF00FF00FF)) << np.uint64(8))
+        | ((x >> np.uint64(8)) & np.uint64(0x00FF00FF00FF00FF))
+    )
+    x = (
+        ((x & np.uint64(0x0000FFFF0000FFFF)) << np.uint64(16))
+        | ((x >> np.uint64(16)) & np.uint64(0x0000FFFF0000FFFF))
+    )
+    return (x << np.uint64(32)) | (x >> np.uint64(32))
+
+
+@numba.njit(inline='always', cache=True)
+def _as_words(inp, num_words):
+    return inp[:num_words * 8].view(np.uint64)
+
+
+@numba.njit(inline='always', cache=True)
+def _unpack_r1_words(words, out_row, flip):
+    """
+    Unpack RAW 1bit data: each word contains 64 pixels. With `flip`,
+    `out_row` is filled in reverse order.
+    """
+    last = out_row.shape[0] - 1
+    for w in range(words.shape[0]):
+        word = words[w]
+        base = 64 * w
+        if flip:
+            for p in range(64):
+                out_row[last - base - p] = (word >> _R1_SHIFTS[p]) & np.uint64(1)
+        else:
+            for p in range(64):
+                out_row[base + p] = (word >> _R1_SHIFTS[p]) & np.uint64(1)
+
+
+@numba.njit(inline='always', cache=True)
+def _unpack_r6_words(words, out_row, flip):
+    """
+    Unpack RAW 6bit data: each word contains 8 pixels, in reverse order.
+    """
+    last = out_row.shape[0] - 1
+    for w in range(words.shape[0]):
+        word = words[w]
+        base = 8 * w
+        if flip:
+            for j in range(8):
+                out_row[last - base - j] = np.uint8(word >> np.uint64(8 * (7 - j)))
+        else:
+            for j in range(8):
+                out_row[base + j] = np.uint8(word >> np.uint64(8 * (7 - j)))
+
+
+@numba.njit(inline='always', cache=True)
+def _unpack_r12_words(words, out_row, flip, shift):
+    """
+    Unpack RAW 12bit data: each word contains 4 big endian 16bit pixels,
+    in reverse order. The values are shifted left by `shift` bits and
+    added to `out_row`, which needs to be cleared beforehand.
+    """
+    last = out_row.shape[0] - 1
+    for w in range(words.shape[0]):
+        word = _bswap64(words[w])
+        base = 4 * w
+        if flip:
+            for j in range(4):
+                out_row[last - base - j] += np.uint32(np.uint16(word >> np.uint64(16 * j))) << shift
+        else:
+            for j in range(4):
+                out_row[base + j] += np.uint32(np.uint16(word >> np.uint64(16 * j))) << shift
+
+
+@numba.njit(inline='always', cache=True)
+def _unpack_r12_words_set(words, out_row, flip):
+    """
+    Like `_unpack_r12_words`, but assigning to `out_row` without shifting.
+    """
+    last = out_row.shape[0] - 1
+    for w in range(words.shape[0]):
+        word = _bswap64(words[w])
+        base = 4 * w
+        if flip:
+            for j in range(4):
+                out_row[last - base - j] = np.uint16(word >> np.uint64(16 * j))
+        else:
+            for j in range(4):
+                out_row[base + j] = np.uint16(word >> np.uint64(16 * j))
+
+
+@numba.njit(inline='always', cache=True)
+def _get_out_cut_2x2(out, idx, shape):
+    # see `decode_r1_swap_2x2` for how read ranges map to the output
+    num_rows_tile = shape[1]
+    out_3d = out.reshape(out.shape[0], -1, shape[-1])
+    out_y = (idx // 2) % num_rows_tile
+    out_x_start = (idx % 2) * (shape[-1] // 2)
+    depth = idx // (num_rows_tile * 2)
+    return out_3d[depth, out_y, out_x_start:out_x_start + out_3d.shape[2] // 2]
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r1_swap_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r1_swap`
+    """
+    _unpack_r1_words(_as_words(inp, inp.shape[0] // 8), out[idx], False)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r6_swap_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r6_swap`
+    """
+    _unpack_r6_words(_as_words(inp, out.shape[1] // 8), out[idx], False)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r12_swap_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r12_swap`
+    """
+    _unpack_r12_words_set(_as_words(inp, out.shape[1] // 4), out[idx], False)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r24_swap_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r24_swap`
+    """
+    # from first frame: most significant bits
+    shift = np.uint32(12) if idx % 2 == 0 else np.uint32(0)
+    _unpack_r12_words(_as_words(inp, out.shape[1] // 4), out[idx // 2], False, shift)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r1_swap_2x2_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r1_swap_2x2`
+    """
+    out_cut = _get_out_cut_2x2(out, idx, shape)
+    _unpack_r1_words(_as_words(inp, inp.shape[0] // 8), out_cut, rr[3] != 0)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r6_swap_2x2_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r6_swap_2x2`
+    """
+    out_cut = _get_out_cut_2x2(out, idx, shape)
+    _unpack_r6_words(_as_words(inp, out_cut.shape[0] // 8), out_cut, rr[3] != 0)
+
+
+@numba.njit(inline='always', cache=True)
+def decode_r12_swap_2x2_vec(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+    """
+    Vectorized variant of :func:`decode_r12_swap_2x2`
+    """
+    out_cut = _get_out_cut_2x2(out, idx, shape)
+    _unpack_r12_words_set(_as_words(inp, out_cut.shape[0] // 4), out_cut, rr[3] != 0)
+
+
+# (bit depth, is quad) -> {implementation name: decoder}
+_RAW_DECODERS = {
+    (1, False): {'reference': decode_r1_swap, 'vectorized': decode_r1_swap_vec},
+    (6, False): {'reference': decode_r6_swap, 'vectorized': decode_r6_swap_vec},
+    (12, False): {'reference': decode_r12_swap, 'vectorized': decode_r12_swap_vec},
+    (24, False): {'reference': decode_r24_swap, 'vectorized': decode_r24_swap_vec},
+    (1, True): {'reference': decode_r1_swap_2x2, 'vectorized': decode_r1_swap_2x2_vec},
+    (6, True): {'reference': decode_r6_swap_2x2, 'vectorized': decode_r6_swap_2x2_vec},
+    (12, True): {'reference': decode_r12_swap_2x2, 'vectorized': decode_r12_swap_2x2_vec},
+}
+
+DECODE_IMPLS = ('reference', 'vectorized')
+
+
+def _host_supports_vectorized() -> bool:
+    if sys.byteorder != 'little':
+        return False
+    try:
+        from llvmlite import binding
+        features = binding.get_host_cpu_features()
+    except Exception:
+        return False
+    return any(features.get(f, False) for f in ('sse2', 'neon', 'simd128'))
+
+
+def get_decode_impl() -> str:
+    '''
+    Which implementation of the RAW decoders to use on this machine: the
+    :code:`LIBERTEM_MIB_DECODE_IMPL` environment variable can be set to
+    :code:`reference` or :code:`vectorized`. Otherwise, the vectorized
+    decoders are used on little endian CPUs with SIMD support.
+
+    .. versionadded:: 0.12.0
+    '''
+    impl = os.environ.get("LIBERTEM_MIB_DECODE_IMPL", "auto").lower()
+    if impl in DECODE_IMPLS:
+        return impl
+    if impl not in ("", "auto"):
+        raise ValueError(
+            f"invalid LIBERTEM_MIB_DECODE_IMPL {impl!r}, "
+            f"should be one of {DECODE_IMPLS + ('auto',)}"
+        )
+    return 'vectorized' if _host_supports_vectorized() else 'reference'
+
+
 class MIBDecoder(Decoder):
-    def __init__(self, header: "HeaderDict"):
+    """
+    Parameters
+    ----------
+    header : HeaderDict
+        Parsed header of the first MIB file
+
+    impl : str, optional
+        Implementation of the RAW decoders, :code:`reference` or
+        :code:`vectorized`. By default, it is chosen for the CPU where
+        the data is decoded, see :func:`get_decode_impl`.
+
+        .. versionadded:: 0.12.0
+    """
+    def __init__(self, header: "HeaderDict", impl: Optional[str] = None):
+        if impl is not None and impl not in DECODE_IMPLS:
+            raise ValueError(f"invalid impl {impl!r}, should be one of {DECODE_IMPLS}")
         self._kind = header['mib_kind']
         self._dtype = header['dtype']
         self._bit_depth = header['bits_per_pixel']
         self._header = header
+        self._impl = impl
 
     def do_clear(self):
         """
@@ -678,27 +916,17 @@ class MIBDecoder(Decoder):
         bit_depth = self._bit_depth
         layout = self._header['sensor_layout']
         num_chips = self._header['num_chips']
-        if layout == (2, 2) and num_chips == 4:
-            if bit_depth == 1:
-                return decode_r1_swap_2x2
-            elif bit_depth == 6:
-                return decode_r6_swap_2x2
-            elif bit_depth == 12:
-                return decode_r12_swap_2x2
-            else:
+        is_quad = layout == (2, 2) and num_chips == 4
+        try:
+            decoders = _RAW_DECODERS[(bit_depth, is_quad)]
+        except KeyError:
+            if is_quad:
                 raise NotImplementedError(
                     f"bit depth {bit_depth} not implemented for layout {layout}"
                 )
-        if bit_depth == 1:
-            return decode_r1_swap
-        elif bit_depth == 6:
-            return decode_r6_swap
-        elif bit_depth == 12:
-            return decode_r12_swap
-        elif bit_depth == 24:
-            return decode_r24_swap
-        else:
             raise ValueError("unknown raw bitdepth")
+        impl = self._impl if self._impl is not None else get_decode_impl()
+        return decoders[impl]
 
     def get_decode(self, native_dtype, read_dtype):
         kind = self._kind
@@ -888,13 +1116,150 @@ class MIBHeaderReader:
         return self._fields
 
 
+def get_header_index_dir() -> Optional[str]:
+    '''
+    Directory where :class:`MIBHeaderIndex` files are stored, from the
+    :code:`LIBERTEM_MIB_HEADER_INDEX` environment variable, or in the user's
+    cache directory otherwise. Setting the variable to :code:`0` disables
+    the index.
+
+    .. versionadded:: 0.12.0
+    '''
+    return get_index_dir("LIBERTEM_MIB_HEADER_INDEX", "mib-headers")
+
+
+def _header_to_json(fields: HeaderDict) -> Dict:
+    res = dict(fields)
+    res['dtype'] = np.dtype(fields['dtype']).str
+    return res
+
+
+def _header_from_json(entry: Dict) -> HeaderDict:
+    fields = dict(entry)
+    fields['dtype'] = np.dtype(entry['dtype'])
+    fields['image_size'] = tuple(entry['image_size'])
+    fields['sensor_layout'] = tuple(entry['sensor_layout'])
+    return fields  # type: ignore
+
+
+class MIBHeaderIndex:
+    '''
+    Parsed headers of the files of a MIB data set, stored as a JSON file.
+    Entries are keyed by the absolute path of the .mib file, and are only
+    valid as long as the size and modification time of the file match.
+
+    Writes replace the whole file atomically, so concurrent scans of the
+    same data set at most re-parse some headers.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    path : str
+        Path of the index file
+    '''
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self._path = path
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    @classmethod
+    def for_path(cls, path: str, disable_glob: bool = False) -> Optional["MIBHeaderIndex"]:
+        '''
+        The index for the data set that is loaded from :code:`path`, or
+        :code:`None` if the index is disabled.
+        '''
+        index_dir = get_header_index_dir()
+        if index_dir is None:
+            return None
+        key = os.path.abspath(path if disable_glob else _pattern(path))
+        digest = hashlib.sha1(key.encode("utf-8", errors="surrogateescape")).hexdigest()
+        return cls(os.path.join(index_dir, "%s.json" % digest))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is not None:
+            return self._entries
+        content = read_json(self._path)
+        if not isinstance(content, dict) or content.get("version") != self.VERSION:
+            self._entries = {}
+        else:
+            self._entries = content.get("entries", {})
+        return self._entries
+
+    def get(self, path: str, stat: os.stat_result) -> Optional[HeaderDict]:
+        entry = self._load().get(os.path.abspath(path))
+        if entry is None:
+            return None
+        stamp = get_file_stamp(stat)
+        if any(entry.get(k) != v for k, v in stamp.items()):
+            return None
+        try:
+            return _header_from_json(entry['fields'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def save(self, headers: Dict[str, Tuple[os.stat_result, HeaderDict]]):
+        '''
+        Replace the content of the index with :code:`headers`, which maps
+        paths to their stat result and parsed header.
+        '''
+        self._entries = {
+            os.path.abspath(path): dict(
+                get_file_stamp(stat),
+                fields=_header_to_json(fields),
+            )
+            for path, (stat, fields) in headers.items()
+        }
+        write_json_atomic(self._path, {"version": self.VERSION, "entries": self._entries})
+
+
+def _read_header(path: str) -> HeaderDict:
+    return MIBHeaderReader(path).read_header()
+
+
+def read_headers(
+    paths: Sequence[str],
+    index: Optional[MIBHeaderIndex] = None,
+    num_threads: int = 16,
+) -> Dict[str, HeaderDict]:
+    '''
+    Parse the headers of the MIB files :code:`paths`. Headers that are
+    not found in :code:`index` are parsed in a thread pool, and the index
+    is updated afterwards.
+
+    .. versionadded:: 0.12.0
+    '''
+    stats = {path: os.stat(path) for path in paths}
+    headers: Dict[str, HeaderDict] = {}
+    missing = []
+    for path in paths:
+        fields = index.get(path, stats[path]) if index is not None else None
+        if fields is None:
+            missing.append(path)
+        else:
+            headers[path] = fields
+    if len(missing) > 1 and num_threads > 1:
+        with ThreadPoolExecutor(max_workers=min(num_threads, len(missing))) as pool:
+            headers.update(zip(missing, pool.map(_read_header, missing)))
+    else:
+        headers.update((path, _read_header(path)) for path in missing)
+    if index is not None and missing:
+        index.save({path: (stats[path], headers[path]) for path in paths})
+    return {path: headers[path] for path in paths}
+
+
 class MIBFile(File):
     def __init__(self, header, *args, **kwargs):
         self._header = header
         super().__init__(*args, **kwargs)
 
     def get_array_from_memview(self, mem: memoryview, slicing: OffsetsSizes):
-        mem = mem[slicing.file_offset:-slicing.skip_end]
+        mem = mem[slicing.file_offset:len(mem) - slicing.skip_end]
         res = np.frombuffer(mem, dtype="uint8")
         cutoff = self._header['num_images'] * (
             self._header['image_size_bytes'] + self._header['header_size_bytes']
@@ -1018,9 +1383,20 @@ class MIBDataSet(DataSet):
         (for example, a.mib, a1.mib and a2.mib), loading a.mib would include a1.mib and a2.mib
         in the data set. Setting :code:`disable_glob` to :code:`True` will only load the single
         .mib file specified as :code:`path`.
+
+    follow : bool or Follow, optional
+        Set to :code:`True` or a :class:`~libertem.io.dataset.base.Follow`
+        instance if the acquisition is still running. New frames and new
+        files of the series are then picked up while processing, and
+        partitions are processed as soon as their frames are written, see
+        :meth:`libertem.api.Context.run_udf_iter`. The first file of the
+        series has to exist when the data set is loaded.
+
+        .. versionadded:: 0.12.0
     """
     def __init__(self, path, tileshape=None, scan_size=None, disable_glob=False,
-                 nav_shape=None, sig_shape=None, sync_offset=0, io_backend=None):
+                 nav_shape=None, sig_shape=None, sync_offset=0, io_backend=None,
+                 follow=False):
         super().__init__(io_backend=io_backend)
         self._sig_dims = 2
         self._path = path
@@ -1055,6 +1431,7 @@ class MIBDataSet(DataSet):
         self._total_filesize = None
         self._sequence_start = None
         self._disable_glob = disable_glob
+        self._follow = Follow.from_param(follow)
 
     def _do_initialize(self):
         self._headers = self._preread_headers()
@@ -1078,8 +1455,8 @@ class MIBDataSet(DataSet):
         shape = Shape(self._nav_shape + self._sig_shape, sig_dims=self._sig_dims)
         dtype = first_file.fields['dtype']
         self._total_filesize = sum(
-            os.stat(path).st_size
-            for path in self._filenames()
+            header['filesize']
+            for header in self._headers.values()
         )
         self._sequence_start = first_file.fields['sequence_first_image']
         self._files_sorted = list(sorted(self._files(),
@@ -1096,7 +1473,24 @@ class MIBDataSet(DataSet):
         return self
 
     def initialize(self, executor):
-        return executor.run_function(self._do_initialize)
+        ds = executor.run_function(self._do_initialize)
+        ds._wait_for_first_frame(executor)
+        return ds
+
+    def _scan_files(self):
+        self._filename_cache = None
+        return self._filenames(), self._preread_headers()
+
+    def refresh(self, executor):
+        self._filename_cache, self._headers = executor.run_function(self._scan_files)
+        self._files_sorted = list(sorted(self._files(),
+                                         key=lambda f: f.fields['sequence_first_image']))
+        self._total_filesize = sum(
+            header['filesize']
+            for header in self._headers.values()
+        )
+        self._set_image_count(self._num_images())
+        return self._image_count
 
     def get_diagnostics(self):
         assert self._files_sorted is not None
@@ -1144,15 +1538,20 @@ class MIBDataSet(DataSet):
         }
 
     def _preread_headers(self):
-        res = {}
-        for f in self._files():
-            res[f.path] = f.fields
-        return res
+        if self._follow is not None:
+            # the files are still growing, so an index would be outdated right away:
+            index = None
+        else:
+            index = MIBHeaderIndex.for_path(self._path, disable_glob=self._disable_glob)
+        return read_headers(self._filenames(), index=index)
 
     def _filenames(self):
         if self._filename_cache is not None:
             return self._filename_cache
         fns = get_filenames(self._path, disable_glob=self._disable_glob)
+        if self._follow is not None:
+            # files that were just created don't have a header yet:
+            fns = [fn for fn in fns if os.stat(fn).st_size > 0]
         if len(fns) > 16384:
             warnings.warn(
                 "Saving data in many small files (here: %d) is not efficient, please increase "
@@ -1169,7 +1568,16 @@ class MIBDataSet(DataSet):
             yield f
 
     def _num_images(self):
-        return sum(f.fields['num_images'] for f in self._files())
+        if self._follow is None:
+            return sum(f.fields['num_images'] for f in self._files())
+        # only count the frames up to the first file that is still missing
+        # or incomplete, as files may not be written in order:
+        num_images = 0
+        for f in self._files_sorted:
+            if f.start_idx != num_images:
+                break
+            num_images += f.num_frames
+        return num_images
 
     @property
     def dtype(self):
@@ -1219,6 +1627,8 @@ class MIBDataSet(DataSet):
                 header=f.fields,
             )
             for f in self._files_sorted
+            # followed files may not contain a complete frame yet:
+            if f.num_frames > 0
         ], header=first_file.fields, frame_header_bytes=header_size)
 
     def get_base_shape(self, roi: Optional[np.ndarray]) -> Tuple[int, ...]:
@@ -13,6 +13,7 @@ from libertem.common.messageconverter import MessageConverter
 
 from libertem.io.dataset.base import (
     DataSet, FileSet, BasePartition, DataSetException, DataSetMeta, File, IOBackend,
+    Follow,
 )
 from libertem.common import Shape
 from libertem.common.math import prod
@@ -243,6 +244,15 @@ class NPYDataSet(DataSet):
         If negative, number of blank frames to insert at start
     io_backend : IOBackend, optional
         The I/O backend to use, see :ref:`io backends`, by default None.
+    follow : bool or Follow, optional
+        Set to :code:`True` or a :class:`~libertem.io.dataset.base.Follow`
+        instance if the data is still being appended to the file, after a
+        header with the final shape. Partitions are then processed as soon
+        as their frames are written, see :meth:`libertem.api.Context.run_udf_iter`.
+        Files created with :func:`numpy.lib.format.open_memmap` have their full
+        size from the start and can't be followed.
+
+        .. versionadded:: 0.12.0
 
     Raises
     ------
@@ -262,6 +272,7 @@ class NPYDataSet(DataSet):
         sig_shape: Optional[Tuple[int, int]] = None,
         sync_offset: int = 0,
         io_backend: Optional[IOBackend] = None,
+        follow: typing.Union[bool, Follow] = False,
     ):
         super().__init__(io_backend=io_backend)
         self._meta = None
@@ -279,10 +290,20 @@ class NPYDataSet(DataSet):
         self._path = path
         self._sync_offset = sync_offset
         self._npy_info: typing.Optional[NPYInfo] = None
+        self._follow = Follow.from_param(follow)
 
     def _get_filesize(self):
         return os.stat(self._path).st_size
 
+    def _get_image_count(self, sig_size: int) -> int:
+        image_count = self._npy_info.count // sig_size
+        if self._follow is not None:
+            # only the frames that are completely written yet:
+            frame_bytes = sig_size * np.dtype(self._npy_info.dtype).itemsize
+            written = max(0, self._filesize - self._npy_info.offset) // frame_bytes
+            image_count = min(image_count, written)
+        return image_count
+
     def initialize(self, executor) -> "DataSet":
         self._filesize = executor.run_function(self._get_filesize)
         npyinfo = executor.run_function(read_npy_info, self._path)
@@ -295,7 +316,7 @@ class NPYDataSet(DataSet):
         # is the whole block of data interpreted as N frames of sig_shape, noting that
         # here sig_shape can be either user-supplied or from the npy metadata
         # if prod(sig_shape) is not a factor then bytes will be dropped at the end
-        self._image_count = np_shape.size // prod(sig_shape)
+        self._image_count = self._get_image_count(prod(sig_shape))
         self._nav_shape_product = shape.nav.size
         self._sync_offset_info = self.get_sync_offset_info()
         self._meta = DataSetMeta(
@@ -304,6 +325,7 @@ class NPYDataSet(DataSet):
             sync_offset=self._sync_offset or 0,
             image_count=self._image_count,
         )
+        self._wait_for_first_frame(executor)
         return self
 
     @property
@@ -356,6 +378,11 @@ class NPYDataSet(DataSet):
             )
         ])
 
+    def refresh(self, executor):
+        self._filesize = executor.run_function(self._get_filesize)
+        self._set_image_count(self._get_image_count(prod(self.shape.sig)))
+        return self._image_count
+
     def check_valid(self):
         try:
             fileset = self._get_fileset()
@@ -7,7 +7,7 @@ from libertem.common import Shape
 from libertem.common.messageconverter import MessageConverter
 from .base import (
     DataSet, DataSetException, DataSetMeta,
-    BasePartition, File, FileSet, DirectBackend, IOBackend,
+    BasePartition, File, FileSet, DirectBackend, IOBackend, Follow,
 )
 
 
@@ -95,10 +95,19 @@ class RawFileDataSet(DataSet):
     dtype: numpy dtype
         The dtype of the data as it is on disk. Can contain endian indicator, for
         example >u2 for big-endian 16bit data.
+
+    follow: bool or Follow, optional
+        Set to :code:`True` or a :class:`~libertem.io.dataset.base.Follow`
+        instance if the file is still being written. Partitions are then
+        processed as soon as their frames are written, see
+        :meth:`libertem.api.Context.run_udf_iter`.
+
+        .. versionadded:: 0.12.0
     """
     def __init__(self, path, dtype, scan_size=None, detector_size=None, enable_direct=False,
                  detector_size_raw=None, crop_detector_to=None, tileshape=None,
-                 nav_shape=None, sig_shape=None, sync_offset=0, io_backend=None):
+                 nav_shape=None, sig_shape=None, sync_offset=0, io_backend=None,
+                 follow=False):
         if enable_direct and io_backend is not None:
             raise ValueError("can't specify io_backend and enable_direct at the same time")
         if enable_direct:
@@ -156,20 +165,21 @@ class RawFileDataSet(DataSet):
         self._sig_dims = len(self._sig_shape)
         self._dtype = dtype
         self._filesize = None
+        self._follow = Follow.from_param(follow)
 
     def initialize(self, executor):
         self._filesize = executor.run_function(self._get_filesize)
-        if int(prod(self._sig_shape)) > int(self._filesize / np.dtype(self._dtype).itemsize):
+        too_small = (
+            int(prod(self._sig_shape)) > int(self._filesize / np.dtype(self._dtype).itemsize)
+        )
+        # a followed file may not contain a complete frame yet:
+        if too_small and self._follow is None:
             raise DataSetException(
                 "sig_shape must be less than size: %s" % (
                     int(self._filesize / np.dtype(self._dtype).itemsize)
                 )
             )
-        self._image_count = int(
-            self._filesize / (
-                np.dtype(self._dtype).itemsize * prod(self._sig_shape)
-            )
-        )
+        self._image_count = self._get_image_count(self._filesize)
         self._nav_shape_product = int(prod(self._nav_shape))
         self._sync_offset_info = self.get_sync_offset_info()
         shape = Shape(self._nav_shape + self._sig_shape, sig_dims=self._sig_dims)
@@ -179,11 +189,24 @@ class RawFileDataSet(DataSet):
             sync_offset=self._sync_offset,
             image_count=self._image_count,
         )
+        self._wait_for_first_frame(executor)
         return self
 
     def _get_filesize(self):
         return os.stat(self._path).st_size
 
+    def _get_image_count(self, filesize):
+        return int(
+            filesize / (
+                np.dtype(self._dtype).itemsize * prod(self._sig_shape)
+            )
+        )
+
+    def refresh(self, executor):
+        self._filesize = executor.run_function(self._get_filesize)
+        self._set_image_count(self._get_image_count(self._filesize))
+        return self._image_count
+
     @property
     def dtype(self):
         return self._meta.raw_dtype
@@ -219,7 +219,8 @@ class RawCSRDataSet(DataSet):
     def get_max_io_size(self):
         # High value since referring to dense for the time being
         # Compromise between memory use during densification and
-        # performance with native sparse
+        # performance with native sparse. If no UDF densifies the tiles,
+        # the negotiator doesn't apply this limit.
         return int(1024*1024*20)
 
     def check_valid(self) -> bool:
@@ -1,21 +1,20 @@
 import os
 import logging
-from typing import Optional
+from typing import List, Optional, Tuple
 import warnings
-import contextlib
 
 import numpy as np
 from ncempy.io.ser import fileSER
-from sparseconverter import CUDA, NUMPY, ArrayBackend
 
-from libertem.common.math import prod, flat_nonzero
-from libertem.common import Shape, Slice
-from libertem.io.dataset.base.tiling_scheme import TilingScheme
+from libertem.common.math import prod
+from libertem.common import Shape
+from libertem.common.numba import cached_njit
 from libertem.common.messageconverter import MessageConverter
 from .base import (
-    DataSet, FileSet, BasePartition, DataSetException, DataSetMeta,
-    DataTile,
+    DataSet, File, FileSet, BasePartition, DataSetException, DataSetMeta,
 )
+from .base.file import OffsetsSizes
+from .base.decode import Decoder, default_decode
 
 log = logging.getLogger(__name__)
 
@@ -60,36 +59,132 @@ class SERDatasetParams(MessageConverter):
         return data
 
 
-class SERFile:
-    def __init__(self, path, num_frames):
-        self._path = path
-        self._num_frames = num_frames
-
-    def _get_handle(self):
-        return fileSER(self._path)
+_ELEMENT_HEADER_BYTES = {
+    # 2 calibrations (offset, delta, element), data type, array size x and y:
+    0x4122: 2 * (8 + 8 + 4) + 2 + 2 * 4,
+    # 1 calibration, data type, array length:
+    0x4120: (8 + 8 + 4) + 2 + 4,
+}
 
-    @contextlib.contextmanager
-    def get_handle(self):
-        with self._get_handle() as f:
-            yield f
+_SER_DTYPES = {
+    1: '<u1', 2: '<u2', 3: '<u4', 4: '<i1', 5: '<i2', 6: '<i4', 7: '<f4', 8: '<f8',
+    9: '<c8', 10: '<c16',
+}
 
-    @property
-    def num_frames(self):
-        return self._num_frames
 
-    @property
-    def start_idx(self):
-        return 0
+def _read_element_header(
+    path: str, offset: int, data_type_id: int
+) -> Tuple[np.dtype, Tuple[int, ...]]:
+    """
+    Read dtype and shape of the data element at :code:`offset`
+    """
+    header_bytes = _ELEMENT_HEADER_BYTES[data_type_id]
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        header = f.read(header_bytes)
+    if len(header) != header_bytes:
+        raise DataSetException("data offset points beyond the end of the file")
+    if data_type_id == 0x4122:
+        type_offset = 2 * (8 + 8 + 4)
+        size = np.frombuffer(header, dtype='<i4', count=2, offset=type_offset + 2)
+        # stored as (x, y):
+        shape = (int(size[1]), int(size[0]))
+    else:
+        type_offset = 8 + 8 + 4
+        shape = (int(np.frombuffer(header, dtype='<i4', count=1, offset=type_offset + 2)[0]),)
+    type_id = int(np.frombuffer(header, dtype='<i2', count=1, offset=type_offset)[0])
+    if type_id not in _SER_DTYPES:
+        raise DataSetException("unknown data type: %s" % type_id)
+    return np.dtype(_SER_DTYPES[type_id]), shape
+
+
+def _get_runs(offsets: np.ndarray, min_stride: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Split the data offset table into runs of frames that are stored
+    with a constant stride.
 
-    @property
-    def end_idx(self):
-        return self.num_frames
+    Returns the stride and a list of :code:`(start_idx, end_idx)` tuples.
+    """
+    if len(offsets) < 2:
+        return min_stride, [(0, len(offsets))]
+    diffs = np.diff(offsets)
+    values, counts = np.unique(diffs, return_counts=True)
+    stride = int(values[np.argmax(counts)])
+    if stride < min_stride:
+        stride = min_stride
+    breaks = np.flatnonzero(diffs != stride) + 1
+    bounds = [0] + breaks.tolist() + [len(offsets)]
+    return stride, list(zip(bounds[:-1], bounds[1:]))
+
+
+class SERFile(File):
+    """
+    A run of frames in a SER file that are stored with a constant stride. Each
+    frame is preceded by its element header, which is not necessarily a
+    multiple of the item size, so the frames may not be aligned.
+    """
+    def get_offsets_sizes(self, size: int) -> OffsetsSizes:
+        return OffsetsSizes(
+            file_offset=self._file_header,
+            skip_end=0,
+            frame_offset=0,
+            frame_size=int(prod(self._sig_shape)),
+        )
+
+    def get_array_from_memview(self, mem: memoryview, slicing: OffsetsSizes) -> np.ndarray:
+        itemsize = np.dtype(self._native_dtype).itemsize
+        stride = self._frame_header + slicing.frame_size * itemsize + self._frame_footer
+        return np.ndarray(
+            shape=(self.num_frames, slicing.frame_size),
+            dtype=self._native_dtype,
+            buffer=mem,
+            offset=slicing.file_offset + self._frame_header,
+            strides=(stride, itemsize),
+        )
 
 
 class SERFileSet(FileSet):
     pass
 
 
+def _make_decode_flipped(width):
+    @cached_njit(inline='always')
+    def decode_flipped(inp, out, idx, native_dtype, rr, origin, shape, ds_shape):
+        # rows of 2D elements are stored bottom-up:
+        data = inp.view(native_dtype)
+        out_frame = out[idx]
+        height = data.shape[0] // width
+        for row in range(height):
+            src_offset = (height - row - 1) * width
+            dest_offset = row * width
+            for col in range(width):
+                out_frame[dest_offset + col] = data[src_offset + col]
+    return decode_flipped
+
+
+_flipped_decoders = {}
+
+
+class SERDecoder(Decoder):
+    """
+    Decode full frames of a SER file, flipping the rows of 2D elements
+
+    Parameters
+    ----------
+    width : int or None
+        Width of the 2D elements, as stored in the file, or :code:`None` for 1D elements
+    """
+    def __init__(self, width: Optional[int]):
+        self._width = width
+
+    def get_decode(self, native_dtype, read_dtype):
+        if self._width is None:
+            return default_decode
+        if self._width not in _flipped_decoders:
+            _flipped_decoders[self._width] = _make_decode_flipped(self._width)
+        return _flipped_decoders[self._width]
+
+
 class SERDataSet(DataSet):
     """
     Read TIA SER files.
@@ -119,12 +214,11 @@ class SERDataSet(DataSet):
     def __init__(self, path, emipath=None, nav_shape=None,
                  sig_shape=None, sync_offset=0, io_backend=None):
         super().__init__(io_backend=io_backend)
-        if io_backend is not None:
-            raise ValueError("SERDataSet currently doesn't support alternative I/O backends")
         self._path = path
         self._meta = None
         self._filesize = None
         self._num_frames = None
+        self._runs = None
         if emipath is not None:
             warnings.warn(
                 "emipath is not used anymore, as it was removed from ncempy", DeprecationWarning
@@ -135,39 +229,55 @@ class SERDataSet(DataSet):
 
     def _do_initialize(self):
         self._filesize = os.stat(self._path).st_size
-        reader = SERFile(path=self._path, num_frames=None)
 
-        with reader.get_handle() as f1:
+        with fileSER(self._path) as f1:
             self._num_frames = f1.head['ValidNumberElements']
             if f1.head['ValidNumberElements'] == 0:
                 raise DataSetException("no data found in file")
 
-            data, meta_data = f1.getDataset(0)
-            dtype = f1._dictDataType[meta_data['DataType']]
+            data_type_id = int(f1.head['DataTypeID'])
+            if data_type_id not in _ELEMENT_HEADER_BYTES:
+                raise DataSetException("unknown datatype id: %s" % data_type_id)
             nav_dims = tuple(
                 reversed([
                     int(dim['DimensionSize'])
                     for dim in f1.head['Dimensions']
                 ])
             )
-            self._image_count = int(self._num_frames)
-            if self._nav_shape is None:
-                self._nav_shape = nav_dims
-            if self._sig_shape is None:
-                self._sig_shape = tuple(data.shape)
-            elif int(prod(self._sig_shape)) != int(prod(data.shape)):
-                raise DataSetException(
-                    "sig_shape must be of size: %s" % int(prod(data.shape))
-                )
-            self._nav_shape_product = int(prod(self._nav_shape))
-            self._sync_offset_info = self.get_sync_offset_info()
-            self._shape = Shape(self._nav_shape + self._sig_shape, sig_dims=len(self._sig_shape))
-            self._meta = DataSetMeta(
-                shape=self._shape,
-                raw_dtype=dtype,
-                sync_offset=self._sync_offset,
-                image_count=self._image_count,
+            offsets = np.array(f1.head['DataOffsetArray'][:self._num_frames], dtype=np.int64)
+
+        # the metadata of the first element is taken to be valid for all elements
+        dtype, native_sig_shape = _read_element_header(self._path, int(offsets[0]), data_type_id)
+
+        # instead of reading each frame separately, describe runs of frames with
+        # a constant stride as files, so they can be read by the I/O backends:
+        self._frame_header_bytes = _ELEMENT_HEADER_BYTES[data_type_id]
+        frame_bytes = int(prod(native_sig_shape)) * dtype.itemsize
+        stride, self._runs = _get_runs(offsets, self._frame_header_bytes + frame_bytes)
+        self._frame_footer_bytes = stride - self._frame_header_bytes - frame_bytes
+        self._run_offsets = [int(offsets[start]) for start, _ in self._runs]
+        if offsets.max() + self._frame_header_bytes + frame_bytes > self._filesize:
+            raise DataSetException("data offsets point beyond the end of the file")
+        self._native_width = native_sig_shape[-1] if data_type_id == 0x4122 else None
+
+        self._image_count = int(self._num_frames)
+        if self._nav_shape is None:
+            self._nav_shape = nav_dims
+        if self._sig_shape is None:
+            self._sig_shape = native_sig_shape
+        elif int(prod(self._sig_shape)) != int(prod(native_sig_shape)):
+            raise DataSetException(
+                "sig_shape must be of size: %s" % int(prod(native_sig_shape))
             )
+        self._nav_shape_product = int(prod(self._nav_shape))
+        self._sync_offset_info = self.get_sync_offset_info()
+        self._shape = Shape(self._nav_shape + self._sig_shape, sig_dims=len(self._sig_shape))
+        self._meta = DataSetMeta(
+            shape=self._shape,
+            raw_dtype=dtype,
+            sync_offset=self._sync_offset,
+            image_count=self._image_count,
+        )
         return self
 
     def initialize(self, executor):
@@ -181,10 +291,6 @@ class SERDataSet(DataSet):
     def get_supported_extensions(cls):
         return {"ser"}
 
-    @classmethod
-    def get_supported_io_backends(self):
-        return []
-
     @classmethod
     def detect_params(cls, path, executor):
         if path.lower().endswith(".ser"):
@@ -230,33 +336,40 @@ class SERDataSet(DataSet):
         }
 
     def _get_fileset(self):
-        assert self._num_frames is not None
+        assert self._runs is not None
         return SERFileSet([
             SERFile(
                 path=self._path,
-                num_frames=self._num_frames,
+                start_idx=start,
+                end_idx=end,
+                native_dtype=self._meta.raw_dtype,
+                sig_shape=self.shape.sig,
+                frame_header=self._frame_header_bytes,
+                frame_footer=self._frame_footer_bytes,
+                file_header=offset,
             )
-        ])
+            for (start, end), offset in zip(self._runs, self._run_offsets)
+        ], frame_header_bytes=self._frame_header_bytes,
+            frame_footer_bytes=self._frame_footer_bytes)
+
+    def get_decoder(self) -> Decoder:
+        return SERDecoder(width=self._native_width)
 
     def get_base_shape(self, roi):
+        # rows are flipped while decoding, so we always read full frames
         return (1,) + tuple(self.shape.sig)
 
-    def adjust_tileshape(self, tileshape, roi):
-        # force single-frame tiles
-        return (1,) + tileshape[1:]
-
     def get_partitions(self):
         fileset = self._get_fileset()
         for part_slice, start, stop in self.get_slices():
             yield SERPartition(
-                path=self._path,
                 meta=self._meta,
                 partition_slice=part_slice,
                 fileset=fileset,
                 start_frame=start,
                 num_frames=stop - start,
                 io_backend=self.get_io_backend(),
-                decoder=None,
+                decoder=self.get_decoder(),
             )
 
     def __repr__(self):
@@ -264,67 +377,8 @@ class SERDataSet(DataSet):
 
 
 class SERPartition(BasePartition):
-    def __init__(self, path, *args, **kwargs):
-        self._path = path
-        super().__init__(*args, **kwargs)
-
     def validate_tiling_scheme(self, tiling_scheme):
         if tiling_scheme.shape.sig != self.shape.sig:
             raise ValueError(
                 f"invalid tiling scheme ({tiling_scheme.shape!r}): sig shape must match"
             )
-
-    def _preprocess(self, tile_data, tile_slice):
-        if self._corrections is None:
-            return
-        self._corrections.apply(tile_data, tile_slice)
-
-    def get_tiles(self, tiling_scheme: TilingScheme, dest_dtype="float32", roi=None,
-            array_backend: Optional[ArrayBackend] = None):
-        if array_backend is None:
-            array_backend = self.meta.array_backends[0]
-        assert array_backend in (NUMPY, CUDA)
-        sync_offset = self.meta.sync_offset
-        shape = Shape((1,) + tuple(self.shape.sig), sig_dims=self.shape.sig.dims)
-        tiling_scheme = tiling_scheme.adjust_for_partition(self)
-        self.validate_tiling_scheme(tiling_scheme)
-
-        start = self._start_frame
-        if start < self.meta.image_count:
-            stop = min(start + self._num_frames, self.meta.image_count)
-            if roi is None:
-                indices = np.arange(max(0, start), stop)
-                # in case of a negative sync_offset, 'start' can be negative
-                if start < 0:
-                    offset = abs(sync_offset)
-                else:
-                    offset = start - sync_offset
-            else:
-                # The following is taken (effectively) from _default_get_read_ranges
-                roi_nonzero = flat_nonzero(roi)
-
-                shifted_roi = roi_nonzero + sync_offset
-                roi_mask = np.logical_and(shifted_roi >= max(0, start),
-                                          shifted_roi < stop)
-                indices = shifted_roi[roi_mask]
-
-                # in case of a negative sync_offset, 'start' can be negative
-                if start < 0:
-                    offset = np.sum(roi_nonzero < abs(sync_offset))
-                else:
-                    offset = np.sum(roi_nonzero < start - sync_offset)
-
-            with fileSER(self._path) as f:
-                for num, idx in enumerate(indices):
-                    origin = (num + offset,) + tuple([0] * self.shape.sig.dims)
-                    tile_slice = Slice(origin=origin, shape=shape)
-                    data, metadata = f.getDataset(int(idx))
-                    if data.dtype != np.dtype(dest_dtype):
-                        data = data.astype(dest_dtype)
-                    data = data.reshape(shape)
-                    self._preprocess(data, tile_slice)
-                    yield DataTile(
-                        data,
-                        tile_slice=tile_slice,
-                        scheme_idx=0,
-                    )
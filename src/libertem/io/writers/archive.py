@@ -0,0 +1,287 @@
+"""
+Export of any :class:`~libertem.io.dataset.base.DataSet` to a LiberTEM
+archive, see :mod:`libertem.io.dataset.archive` for the format.
+
+The tiles are streamed through a UDF, so that the partitions are read,
+encoded and written in parallel on the workers. Each worker writes the
+file for its partition, and the description of the archive is only written
+at the end, after all partitions were written successfully.
+
+.. versionadded:: 0.12.0
+"""
+import os
+import glob
+from typing import TYPE_CHECKING, Optional, Union
+
+import numpy as np
+
+from libertem.common.math import prod
+from libertem.common import Slice
+from libertem.common.progress import ProgressReporter
+from libertem.io.corrections import CorrectionSet
+from libertem.io.dataset.base import DataSet
+from libertem.io.dataset.base.index_cache import write_json_atomic
+from libertem.io.dataset.archive import (
+    ARCHIVE_FORMAT, ARCHIVE_VERSION, INFO_NAME, PART_MAGIC, PART_TRAILER, CHUNK_BYTES,
+    choose_chunks, encode_chunk, get_archive_codecs, get_part_name,
+)
+from libertem.udf import UDF
+
+if TYPE_CHECKING:
+    from libertem.api import Context
+
+
+class ArchivePartWriter:
+    """
+    Assemble the tiles of a partition into chunks, and write each chunk as
+    soon as all of its frames are complete. The file is written under a
+    temporary name, and only renamed to :code:`path` in :meth:`close`.
+
+    Parameters
+    ----------
+    path : str
+        Path of the partition file
+
+    part_slice : Slice
+        The slice of the partition, in flattened navigation dimensions
+
+    chunks : Tuple[int, ...]
+        Chunk shape, see :func:`~libertem.io.dataset.archive.choose_chunks`
+
+    dtype : numpy.dtype
+        The dtype that is stored in the archive
+
+    codec : str or None
+        Codec for :func:`~libertem.io.dataset.archive.encode_chunk`
+
+    level : int
+        Compression level
+
+    shuffle : bool
+        Shuffle the bytes of each item before compressing
+    """
+    def __init__(self, path: str, part_slice: Slice, chunks, dtype, codec: Optional[str],
+                 level: int, shuffle: bool):
+        self._path = path
+        self._tmp_path = path + ".tmp"
+        self._chunks = tuple(chunks)
+        self._dtype = np.dtype(dtype)
+        self._codec = codec
+        self._level = level
+        self._shuffle = shuffle
+        self._start = part_slice.origin[0]
+        self._num_frames = part_slice.shape[0]
+        self._sig_shape = tuple(part_slice.shape.sig)
+        depth, rows = self._chunks[:2]
+        self._num_blocks = -(-self._num_frames // depth)
+        self._num_stripes = -(-self._sig_shape[0] // rows)
+        # offset and size of each chunk in the file, -1 for chunks that
+        # were never written:
+        self._index = np.full((self._num_blocks * self._num_stripes, 2), -1, dtype=np.int64)
+        # blocks of `depth` frames that are being assembled, with the number of
+        # elements that were written so far:
+        self._blocks = {}
+        self._offset = 0
+        self._elements = 0
+        self._file = open(self._tmp_path, "wb")
+
+    def _block_frames(self, block: int) -> int:
+        depth = self._chunks[0]
+        return min(depth, self._num_frames - block * depth)
+
+    def write(self, data: np.ndarray, tile_slice: Slice):
+        """
+        Write the data of a tile, with :code:`tile_slice` in the flattened
+        navigation dimensions of the data set.
+        """
+        depth = self._chunks[0]
+        sig_slice = tile_slice.get(sig_only=True)
+        sig_size = tile_slice.shape.sig.size
+        frame = tile_slice.origin[0] - self._start
+        pos = 0
+        while pos < data.shape[0]:
+            block, block_pos = divmod(frame + pos, depth)
+            num = min(data.shape[0] - pos, depth - block_pos)
+            if block not in self._blocks:
+                # rows are padded to complete stripes, like the chunks:
+                block_shape = (depth, self._num_stripes * self._chunks[1]) + self._sig_shape[1:]
+                self._blocks[block] = [np.zeros(block_shape, dtype=self._dtype), 0]
+            entry = self._blocks[block]
+            entry[0][(slice(block_pos, block_pos + num),) + sig_slice] = data[pos:pos + num]
+            entry[1] += num * sig_size
+            if entry[1] == self._block_frames(block) * prod(self._sig_shape):
+                self._write_block(block)
+            pos += num
+        self._elements += data.shape[0] * sig_size
+
+    def _write_block(self, block: int):
+        block_data, _ = self._blocks.pop(block)
+        rows = self._chunks[1]
+        for stripe in range(self._num_stripes):
+            chunk = block_data[:, stripe * rows:(stripe + 1) * rows]
+            encoded = encode_chunk(chunk, self._codec, self._level, self._shuffle)
+            self._file.write(encoded)
+            self._index[block * self._num_stripes + stripe] = (self._offset, len(encoded))
+            self._offset += len(encoded)
+
+    def close(self) -> int:
+        """
+        Write the remaining blocks and the index, and move the file to its
+        final name. Frames that were not written, for example because of a
+        :code:`sync_offset` in the source data set, are read as zeros.
+
+        Returns
+        -------
+        int
+            The number of frames that were written
+        """
+        for block in sorted(self._blocks):
+            self._write_block(block)
+        self._file.write(self._index.astype("<i8").tobytes())
+        self._file.write(PART_TRAILER.pack(self._offset, len(self._index), PART_MAGIC))
+        self._file.close()
+        os.replace(self._tmp_path, self._path)
+        return self._elements // prod(self._sig_shape)
+
+
+class ArchiveWriterUDF(UDF):
+    """
+    Write the partitions of a data set to the files of an archive.
+    Use :meth:`libertem.api.Context.export_dataset` instead of running this
+    directly.
+
+    The :code:`frames` result is the total number of frames written.
+
+    Parameters
+    ----------
+    path : str
+        The archive directory
+
+    chunks : Tuple[int, ...]
+        Chunk shape in flattened navigation dimensions
+
+    dtype : str
+        The dtype that is stored in the archive
+
+    codec : str or None
+        The codec for the chunks
+
+    level : int
+        Compression level
+
+    shuffle : bool
+        Shuffle the bytes of each item before compressing
+    """
+    def __init__(self, path, chunks, dtype, codec, level, shuffle):
+        super().__init__(
+            path=path, chunks=chunks, dtype=dtype, codec=codec, level=level, shuffle=shuffle,
+        )
+
+    def get_preferred_input_dtype(self):
+        ''
+        return self.USE_NATIVE_DTYPE
+
+    def get_result_buffers(self):
+        ''
+        return {
+            'frames': self.buffer(kind='single', dtype=np.int64),
+        }
+
+    def get_task_data(self):
+        ''
+        part_slice = self.meta.slice
+        return {
+            'writer': ArchivePartWriter(
+                path=os.path.join(self.params.path, get_part_name(part_slice.origin[0])),
+                part_slice=part_slice,
+                chunks=self.params.chunks,
+                dtype=self.params.dtype,
+                codec=self.params.codec,
+                level=self.params.level,
+                shuffle=self.params.shuffle,
+            ),
+        }
+
+    def process_tile(self, tile):
+        ''
+        self.task_data.writer.write(tile, self.meta.slice)
+
+    def postprocess(self):
+        ''
+        self.results.frames[:] += self.task_data.writer.close()
+
+    def merge(self, dest, src):
+        ''
+        dest.frames[:] += src.frames
+
+
+def _remove_archive_files(path: str):
+    for pattern in (INFO_NAME, "part-*.bin", "part-*.bin.tmp"):
+        for filename in glob.glob(os.path.join(path, pattern)):
+            os.unlink(filename)
+
+
+def export_dataset(
+    ctx: "Context", dataset: DataSet, path: str, codec: Optional[str] = "zlib",
+    level: int = 1, shuffle: bool = True, chunk_bytes: int = CHUNK_BYTES,
+    corrections: Optional[CorrectionSet] = None, overwrite: bool = False,
+    progress: Union[bool, ProgressReporter] = False,
+):
+    """
+    See :meth:`libertem.api.Context.export_dataset`
+    """
+    if codec not in get_archive_codecs():
+        raise ValueError(
+            f"codec {codec!r} is not available, use one of {get_archive_codecs()!r}"
+        )
+    os.makedirs(path, exist_ok=True)
+    if os.listdir(path):
+        if not overwrite:
+            raise FileExistsError(f"{path} is not empty, pass overwrite=True to replace it")
+        if not os.path.exists(os.path.join(path, INFO_NAME)):
+            raise FileExistsError(f"{path} is not empty and does not contain an archive")
+        _remove_archive_files(path)
+
+    if corrections is None:
+        corrections = dataset.get_correction_data()
+    partition_slices = [p.slice for p in dataset.get_partitions()]
+    dtype = np.dtype(corrections.get_read_dtype(dataset.dtype))
+    chunks = choose_chunks(
+        sig_shape=tuple(dataset.shape.sig),
+        dtype=dtype,
+        max_depth=min(s.shape[0] for s in partition_slices),
+        chunk_bytes=chunk_bytes,
+    )
+    udf = ArchiveWriterUDF(
+        path=os.path.abspath(path), chunks=chunks, dtype=dtype.str,
+        codec=codec, level=level, shuffle=shuffle,
+    )
+    try:
+        ctx.run_udf(dataset=dataset, udf=udf, corrections=corrections, progress=progress)
+    except BaseException:
+        _remove_archive_files(path)
+        raise
+    info = {
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "shape": tuple(dataset.shape),
+        "sig_dims": dataset.shape.sig.dims,
+        "dtype": dtype.str,
+        "chunks": chunks,
+        "codec": codec,
+        "level": level,
+        "shuffle": shuffle,
+        "parts": [
+            {
+                "file": get_part_name(s.origin[0]),
+                "start": s.origin[0],
+                "stop": s.origin[0] + s.shape[0],
+            }
+            for s in partition_slices
+        ],
+        "source": repr(dataset),
+    }
+    # written last, so that incomplete archives can't be loaded:
+    info_path = os.path.join(path, INFO_NAME)
+    if not write_json_atomic(info_path, info):
+        raise OSError(f"could not write {info_path}")
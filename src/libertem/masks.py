@@ -345,6 +345,104 @@ def radial_bins(centerX, centerY, imageSizeX, imageSizeY,
         return np.stack(slices)
 
 
+def radial_bin_index(centerX, centerY, imageSizeX, imageSizeY,
+        radius=None, radius_inner=0, n_bins=None, antialiased=True):
+    '''
+    Bin index of each pixel for the rings of :func:`radial_bins`, as a lookup
+    table instead of a mask stack. This is meant for
+    :class:`~libertem.udf.bins.BinIndexUDF`, which only has to make one
+    pass over the data regardless of the number of bins.
+
+    Since antialiased rings overlap, a pixel can belong to several bins. The
+    result therefore has several layers, each with the bin index and the
+    weight of a pixel. Pixels that don't belong to a bin in a layer have the
+    index -1.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    centerX, centerY : float
+        Center of the rings
+    imageSizeX, imageSizeY : int
+        Size of the frame
+    radius : float, optional
+        Outer radius of the outermost ring, see :func:`bounding_radius`
+        for the default
+    radius_inner : float
+        Inner radius of the innermost ring
+    n_bins : int, optional
+        Number of rings, default one per pixel of radius
+    antialiased : bool
+        If True, the weights are the same as the values of
+        :code:`radial_bins(..., normalize=False)`. If False, each pixel
+        belongs to the ring that contains its center, with weight 1.
+
+    Returns
+    -------
+    index, weights : Tuple[numpy.ndarray, numpy.ndarray]
+        Arrays of shape :code:`(layers, imageSizeY, imageSizeX)` with the
+        bin index as :code:`numpy.intp`, and the weight as :code:`numpy.float32`
+
+    Examples
+    --------
+
+    >>> index, weights = radial_bin_index(16, 16, 32, 32, radius=8, n_bins=4)
+    >>> rings = radial_bins(16, 16, 32, 32, radius=8, n_bins=4, use_sparse=False)
+    >>> stack = np.zeros((4, 32, 32))
+    >>> for i, w in zip(index, weights):
+    ...     y, x = np.nonzero(i >= 0)
+    ...     stack[i[y, x], y, x] += w[y, x]
+    >>> np.allclose(stack, rings)
+    True
+    '''
+    if radius is None:
+        radius = bounding_radius(centerX, centerY, imageSizeX, imageSizeY)
+
+    if n_bins is None:
+        n_bins = int(np.round(radius - radius_inner))
+
+    r, phi = polar_map(centerX, centerY, imageSizeX, imageSizeY)
+    width = (radius - radius_inner) / n_bins
+
+    if not antialiased:
+        index = np.floor((r - radius_inner) / width).astype(np.intp)
+        index[(index < 0) | (index >= n_bins) | (r >= radius)] = -1
+        return index[np.newaxis], np.ones((1, ) + r.shape, dtype=np.float32)
+
+    # Each bin covers the radii within width/2 + 0.5 of its center,
+    # see radial_bins(), which limits the number of bins per pixel:
+    reach = width / 2 + 0.5
+    layers = int(np.ceil(2 * reach / width)) + 1
+    first = np.ceil((r - radius_inner - width / 2 - reach) / width).astype(np.intp)
+    first = np.maximum(first, 0)
+    index = np.full((layers, ) + r.shape, -1, dtype=np.intp)
+    weights = np.zeros((layers, ) + r.shape, dtype=np.float32)
+    for layer in range(layers):
+        b = first + layer
+        center = radius_inner + width / 2 + b * width
+        vals = np.maximum(0, np.minimum(1, reach - np.abs(r - center)))
+        select = (b < n_bins) & (vals != 0)
+        index[layer][select] = b[select]
+        weights[layer][select] = vals[select]
+    # Patch a singularity at the center, like radial_bins()
+    if radius_inner < 0.5:
+        yy = int(np.round(centerY))
+        xx = int(np.round(centerX))
+        if yy >= 0 and yy < imageSizeY and xx >= 0 and xx < imageSizeX:
+            zero = index[:, yy, xx] == 0
+            if np.any(zero):
+                weights[np.argmax(zero), yy, xx] = 1 - radius_inner
+            else:
+                free = np.argmax(index[:, yy, xx] < 0)
+                index[free, yy, xx] = 0
+                weights[free, yy, xx] = 1 - radius_inner
+    # Drop layers that are empty everywhere
+    keep = np.any(index >= 0, axis=(1, 2))
+    keep[0] = True
+    return index[keep], weights[keep]
+
+
 def background_subtraction(centerX, centerY, imageSizeX, imageSizeY, radius, radius_inner,
         antialiased=False):
     mask_1 = circular(
@@ -1,12 +1,14 @@
 from collections import defaultdict, OrderedDict
 from contextlib import contextmanager
 from typing import (
-    Any, AsyncGenerator, Dict, Generator, Iterator, Mapping, Optional, List, Sequence,
-    Tuple, Type, Iterable, TypeVar, Union, TYPE_CHECKING
+    Any, AsyncGenerator, Dict, FrozenSet, Generator, Hashable, Iterator, Mapping, Optional, List,
+    Sequence, Set, Tuple, Type, Iterable, TypeVar, Union, TYPE_CHECKING
 )
 from typing_extensions import Protocol, runtime_checkable, Literal
 import warnings
 import logging
+import threading
+import time
 import uuid
 
 import cloudpickle
@@ -34,11 +36,13 @@ from libertem.common import Shape, Slice
 from libertem.common.udf import TilingPreferences, UDFProtocol
 from libertem.common.math import prod
 from libertem.io.dataset.base import (
-    TilingScheme, Negotiator, Partition, DataSet, get_coordinates
+    TilingScheme, Partition, DataSet, get_coordinates
 )
 from libertem.io.corrections import CorrectionSet
 from libertem.io.dataset.base.roi import roi_for_partition
+from libertem.io.dataset.base.autotune import make_negotiator
 from libertem.common.backend import get_use_cuda, get_device_class
+from libertem.common.prefetch import TilePrefetcher, get_prefetch_depth
 from libertem.common.async_utils import async_generator_eager
 from libertem.executor.inline import InlineJobExecutor
 from libertem.common.executor import (
@@ -73,8 +77,8 @@ def _get_dtype(
     array_backends: Iterable[ArrayBackend],
 ) -> "nt.DTypeLike":
     tmp_dtype: "nt.DTypeLike"
-    if corrections is not None and corrections.have_corrections():
-        tmp_dtype = np.result_type(np.float32, dtype)
+    if corrections is not None:
+        tmp_dtype = corrections.get_read_dtype(dtype)
     else:
         tmp_dtype = np.dtype(dtype)
     for udf in udfs:
@@ -279,6 +283,32 @@ def _execution_plan(
     return ds_backend, reordered_plan
 
 
+def _get_tile_backends(
+    udfs, ds: Union[DataSet, DataSetMeta], available_backends: Iterable[ArrayBackend]
+) -> FrozenSet[ArrayBackend]:
+    '''
+    The array backends that the UDFs may receive tiles in, on CPU workers and,
+    if CuPy is available, on CUDA workers.
+    '''
+    available_backends = frozenset(available_backends)
+    device_classes: List[Tuple[DeviceClass, FrozenSet[ArrayBackend]]] = [
+        ('cpu', available_backends.intersection(CPU_BACKENDS)),
+    ]
+    if has_cupy():
+        device_classes.append(('cuda', available_backends))
+    result: Set[ArrayBackend] = set()
+    for device_class, backends in device_classes:
+        try:
+            _, plan = _execution_plan(
+                udfs, ds, device_class=device_class, available_backends=backends,
+            )
+        except RuntimeError:
+            # the UDFs can't run on this device class
+            continue
+        result.update(plan.keys())
+    return frozenset(result)
+
+
 class UDFMeta:
     """
     UDF metadata. Makes all relevant metadata accessible to the UDF. Can be different
@@ -1252,6 +1282,28 @@ class UDF(UDFBase):
             self._requires_custom_merge = any(buffer.kind != 'nav' for buffer in buffers.values())
         return self._requires_custom_merge
 
+    def accumulate_on_worker(self) -> bool:
+        """
+        Return :code:`True` to merge the results of all partitions that a
+        worker process handles in a run into a single accumulator on that
+        worker, which is only sent to the main node at the end of the run.
+        This reduces allocations and result transfers from one per partition
+        to one per worker.
+
+        This is only correct if :meth:`merge` gives the same result
+        independent of the order and grouping of partitions, and all result
+        buffers that are used on the workers are of kind :code:`'sig'` or
+        :code:`'single'`. Intermediate results, for example from
+        :meth:`libertem.api.Context.run_udf_iter`, don't include the
+        contributions of this UDF until the run is finished.
+
+        Not supported with the :class:`~libertem.executor.delayed.DelayedJobExecutor`,
+        where this setting is ignored.
+
+        .. versionadded:: 0.12.0
+        """
+        return False
+
     def merge(self, dest: MergeAttrMapping, src: MergeAttrMapping):
         """
         Merge a partial result `src` into the current global result `dest`.
@@ -1438,6 +1490,28 @@ class UDF(UDFBase):
     def cleanup(self) -> None:  # FIXME: name? implement cleanup as context manager somehow?
         pass
 
+    def _get_fusion_key(self) -> Optional[Hashable]:
+        '''
+        Tile-based UDFs of the same class that return the same key, other than
+        :code:`None`, are processed together by the :class:`FusedTileUDFs`
+        instance that :meth:`_fuse_tile_udfs` returns, instead of calling
+        :meth:`process_tile` on each of them. This is called on the worker
+        after :meth:`get_task_data`.
+
+        .. versionadded:: 0.12.0
+        '''
+        return None
+
+    @classmethod
+    def _fuse_tile_udfs(cls, udfs: List["UDF"]) -> "FusedTileUDFs":
+        '''
+        Create a :class:`FusedTileUDFs` instance for UDFs with the same
+        fusion key, see :meth:`_get_fusion_key`.
+
+        .. versionadded:: 0.12.0
+        '''
+        raise NotImplementedError()
+
     def buffer(
         self,
         kind: BufferKind,
@@ -1568,6 +1642,24 @@ def check_cast(fromvar, tovar):
         raise TypeError(f"Unsafe automatic casting from {fromvar.dtype} to {tovar.dtype}")
 
 
+class FusedTileUDFs:
+    '''
+    Process tiles for several compatible UDFs at once, for example to
+    stream each tile through memory only once.
+
+    Before :meth:`process_tile` is called, the views and meta data
+    of all UDFs are set for the current tile, so that it can
+    update their result buffers.
+
+    .. versionadded:: 0.12.0
+    '''
+    def __init__(self, udfs: List[UDF]):
+        self.udfs = udfs
+
+    def process_tile(self, tile) -> None:
+        raise NotImplementedError()
+
+
 class UDFParams:
     def __init__(
         self,
@@ -1575,6 +1667,8 @@ class UDFParams:
         roi: Optional[np.ndarray],
         corrections: Optional[CorrectionSet],
         tiling_scheme: TilingScheme,
+        accumulate: Optional[List[bool]] = None,
+        run_id: Optional[str] = None,
     ):
         """
         Container class for UDF parameters for multiple UDFs
@@ -1588,11 +1682,24 @@ class UDFParams:
             Boolean array to select parts of the navigation space
         corrections
             Corrections to apply
+        accumulate
+            For each UDF, whether the results are accumulated on the
+            workers, see :meth:`UDF.accumulate_on_worker`
+
+            .. versionadded:: 0.12.0
+        run_id
+            Identifies the run for accumulating results on the workers
+
+            .. versionadded:: 0.12.0
         """
         self._kwargs = kwargs
         self._roi = roi
         self._corrections = corrections
         self._tiling_scheme = tiling_scheme
+        if accumulate is None:
+            accumulate = [False] * len(kwargs)
+        self._accumulate = accumulate
+        self._run_id = run_id
 
     @classmethod
     def from_udfs(
@@ -1601,9 +1708,19 @@ class UDFParams:
         roi: Optional[np.ndarray],
         corrections: Optional[CorrectionSet],
         tiling_scheme: TilingScheme,
+        accumulate: Optional[List[bool]] = None,
+        run_id: Optional[str] = None,
     ):
         kwargs = [udf._kwargs for udf in udfs]
-        return cls(kwargs, roi, corrections, tiling_scheme)
+        return cls(kwargs, roi, corrections, tiling_scheme, accumulate, run_id)
+
+    @property
+    def accumulate(self) -> List[bool]:
+        return self._accumulate
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self._run_id
 
     @property
     def roi(self):
@@ -1622,6 +1739,89 @@ class UDFParams:
         return self._tiling_scheme
 
 
+class _SlicePartition:
+    """
+    Stand-in for a :class:`Partition` that only provides the :code:`slice`
+    and :code:`shape`, as used for creating views into result buffers.
+    """
+    def __init__(self, slice_: Slice):
+        self.slice = slice_
+
+    @property
+    def shape(self) -> Shape:
+        return self.slice.shape
+
+
+class _WorkerAccumulators:
+    """
+    Results of UDFs that are accumulated across all partitions
+    that a worker process handles in a run, see :meth:`UDF.accumulate_on_worker`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[Tuple[str, int], Tuple[UDFData, Set[int]]] = {}
+
+    def merge(
+        self,
+        run_id: str,
+        udf_idx: int,
+        udf: UDF,
+        partition: Partition,
+        results: UDFData,
+        task_idx: int,
+    ) -> None:
+        # only sig and single buffers, so the nav extent of the partition doesn't matter:
+        part = _SlicePartition(partition.slice)
+        with self._lock:
+            key = (run_id, udf_idx)
+            if key not in self._results:
+                dest = UDFData(udf.get_result_buffers())
+                dest.allocate_for_part(part, None)
+                self._results[key] = (dest, set())
+            dest, task_ids = self._results[key]
+            dest.set_view_for_partition(part)
+            udf.merge(dest=dest.get_proxy(), src=results.get_proxy())
+            dest.clear_views()
+            task_ids.add(task_idx)
+
+    def collect(self, run_id: str) -> Dict[int, Tuple[UDFData, Set[int]]]:
+        with self._lock:
+            keys = [k for k in self._results if k[0] == run_id]
+            return {k[1]: self._results.pop(k) for k in keys}
+
+
+_worker_accumulators = _WorkerAccumulators()
+
+
+def _collect_accumulated(run_id: str) -> Dict[int, Tuple[UDFData, Set[int]]]:
+    return _worker_accumulators.collect(run_id)
+
+
+def _accumulate_part_results(
+    udfs: List[UDF],
+    part_results: Tuple[UDFData, ...],
+    params: UDFParams,
+    partition: Partition,
+    task_idx: int,
+) -> Tuple[Optional[UDFData], ...]:
+    """
+    Merge the results of UDFs that accumulate on the worker into the
+    worker-local accumulator, and return :code:`None` for them instead.
+    """
+    if not any(params.accumulate):
+        return part_results
+    result: List[Optional[UDFData]] = []
+    for udf_idx, (udf, results) in enumerate(zip(udfs, part_results)):
+        if params.accumulate[udf_idx]:
+            _worker_accumulators.merge(
+                params.run_id, udf_idx, udf, partition, results, task_idx
+            )
+            result.append(None)
+        else:
+            result.append(results)
+    return tuple(result)
+
+
 class Task:
     """
     A computation on a partition. Inherit from this class and implement ``__call__``
@@ -1813,15 +2013,18 @@ class UDFTask(Task):
         self._runner_cls = runner_cls
         self._task_frames = task_frames
 
-    def __call__(self, params: UDFParams, env: Environment) -> Tuple[UDFData, ...]:
+    def __call__(self, params: UDFParams, env: Environment) -> Tuple[Optional[UDFData], ...]:
         with self._propagate_tracing(), tracer.start_as_current_span("UDFTask.__call__"):
             udfs = [
                 cls.new_for_partition(kwargs, self.partition, params.roi)
                 for cls, kwargs in zip(self._udf_classes, params.kwargs)
             ]
-            return self._runner_cls(udfs, progress=self._progress).run_for_partition(
+            part_results = self._runner_cls(udfs, progress=self._progress).run_for_partition(
                 self.partition, params, env, self._user_backends,
             )
+            return _accumulate_part_results(
+                udfs, part_results, params, self.partition, self.idx,
+            )
 
     @contextmanager
     def _propagate_tracing(self):
@@ -1861,6 +2064,100 @@ class UDFTask(Task):
         """
         return self._task_frames
 
+    def get_result_partition(self) -> Partition:
+        """
+        The partition that the results of this task cover, used for
+        merging them on the main node.
+
+        .. versionadded:: 0.12.0
+        """
+        return self.partition
+
+
+class MergedUDFTask(UDFTask):
+    """
+    Run the UDFs for several consecutive partitions on one worker, and
+    merge the partition results there using :meth:`UDF.merge`, so that
+    only a single, pre-merged result is sent back to the main node.
+
+    Progress is only reported once the whole task is completed.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    partitions : List[Partition]
+        Consecutive partitions of a dataset. The first one is used
+        for scheduling and progress reporting.
+
+    Other parameters are the same as for :class:`UDFTask`.
+    """
+    def __init__(
+        self,
+        partitions: List[Partition],
+        idx: int,
+        udf_classes: List[Type[UDF]],
+        udf_backends: List[BackendSpec],
+        user_backends: Optional[BackendSpec],
+        runner_cls: Type['UDFPartRunner'],
+        span_context: "SpanContext",
+        task_frames: int,
+    ):
+        super().__init__(
+            partition=partitions[0], idx=idx, udf_classes=udf_classes,
+            udf_backends=udf_backends, user_backends=user_backends,
+            runner_cls=runner_cls, span_context=span_context, task_frames=task_frames,
+        )
+        self.partitions = partitions
+        first = partitions[0].slice
+        last = partitions[-1].slice
+        self._slice = Slice(
+            origin=first.origin,
+            shape=Shape(
+                (last.origin[0] + last.shape[0] - first.origin[0],) + tuple(first.shape.sig),
+                sig_dims=first.shape.sig.dims,
+            ),
+        )
+
+    def get_result_partition(self) -> Partition:
+        return _SlicePartition(self._slice)
+
+    def __call__(self, params: UDFParams, env: Environment) -> Tuple[Optional[UDFData], ...]:
+        with self._propagate_tracing(), tracer.start_as_current_span("MergedUDFTask.__call__"):
+            # the merged results are allocated in coordinates relative to the
+            # start of the first partition:
+            roi = params.roi
+            if roi is not None:
+                nav_slice = self._slice.get(nav_only=True)
+                roi = roi.reshape((-1,))[nav_slice]
+            merged: List[UDFData] = []
+            for partition in self.partitions:
+                udfs = [
+                    cls.new_for_partition(kwargs, partition, params.roi)
+                    for cls, kwargs in zip(self._udf_classes, params.kwargs)
+                ]
+                part_results = self._runner_cls(udfs, progress=False).run_for_partition(
+                    partition, params, env, self._user_backends,
+                )
+                if not merged:
+                    for udf in udfs:
+                        dest = UDFData(udf.get_result_buffers())
+                        dest.allocate_for_part(
+                            _SlicePartition(self._slice.shift(self._slice)), roi
+                        )
+                        merged.append(dest)
+                rel_partition = _SlicePartition(partition.slice.shift(self._slice))
+                for udf, dest, src in zip(udfs, merged, part_results):
+                    dest.set_view_for_partition(rel_partition)
+                    udf.merge(dest=dest.get_proxy(), src=src.get_proxy())
+                    dest.clear_views()
+            return _accumulate_part_results(
+                udfs, tuple(merged), params, _SlicePartition(self._slice), self.idx,
+            )
+
+    def __repr__(self):
+        return f"<MergedUDFTask {self._udf_classes!r} ({len(self.partitions)} partitions)>"
+
 
 class UDFPartRunner:
     def __init__(self, udfs: List[UDF], debug: bool = False, progress: bool = False):
@@ -1913,6 +2210,7 @@ class UDFPartRunner:
                     params.tiling_scheme,
                 )
                 partition.set_corrections(corrections)
+                partition.set_threads_per_worker(env.threads_per_worker)
                 if env.worker_context is not None:
                     partition.set_worker_context(env.worker_context)
                 self._run_udfs(
@@ -1942,6 +2240,11 @@ class UDFPartRunner:
             roi=roi, dest_dtype=dtype,
             array_backend=ds_backend,
         )
+        prefetch_depth = get_prefetch_depth()
+        prefetch = prefetch_depth > 0 and ds_backend in (NUMPY, CUDA)
+        if prefetch:
+            # read and decode the next tiles in a background thread:
+            tiles = iter(TilePrefetcher(tiles, depth=prefetch_depth))
 
         # type explicitly to help mypy
         partition_progress: Union[PartitionProgressTracker, PartitionTrackerNoOp]
@@ -1951,10 +2254,15 @@ class UDFPartRunner:
             partition_progress = PartitionTrackerNoOp()
         partition_progress.signal_start()
 
+        fused_plan = {
+            backend: self._fuse_udfs(udfs)
+            for backend, udfs in execution_plan.items()
+        }
+
         try:
             for tile in tiles:
                 converter = TileConverter(tile)
-                for backend, udfs in execution_plan.items():
+                for backend, udfs in fused_plan.items():
                     device_tile = converter.get(backend)
                     self._run_tile(udfs, partition, tile, backend, device_tile, roi=roi)
                 partition_progress.signal_tile_complete(tile)
@@ -1969,6 +2277,10 @@ class UDFPartRunner:
                         f'Attribute {r} for input tiles was removed. Please use {repl} instead.'
                     )
             raise
+        finally:
+            if prefetch:
+                # stop the prefetch thread right away in case of errors
+                tiles.close()
 
         # We could signal partition completion here, but this is already
         # handled on the main node via ProgressManager.finalize_task(task)
@@ -2049,9 +2361,32 @@ class UDFPartRunner:
 
         return dtype
 
+    @staticmethod
+    def _fuse_udfs(udfs: Iterable[UDF]) -> List[Union[UDF, FusedTileUDFs]]:
+        '''
+        Replace groups of UDFs that can be processed together with
+        a :class:`FusedTileUDFs` instance, see :meth:`UDF._get_fusion_key`.
+        '''
+        result: List[Union[UDF, FusedTileUDFs]] = []
+        groups: Dict[Hashable, List[UDF]] = OrderedDict()
+        for udf in udfs:
+            key = None
+            if isinstance(udf, UDF) and isinstance(udf, UDFTileMixin):
+                key = udf._get_fusion_key()
+            if key is None:
+                result.append(udf)
+            else:
+                groups.setdefault((type(udf), key), []).append(udf)
+        for (cls, _), group in groups.items():
+            if len(group) == 1:
+                result.extend(group)
+            else:
+                result.append(cls._fuse_tile_udfs(group))
+        return result
+
     def _run_tile(
         self,
-        udfs: Iterable[UDF],
+        udfs: Iterable[Union[UDF, FusedTileUDFs]],
         partition: Partition,
         tile: DataTile,
         array_backend: ArrayBackend,
@@ -2059,7 +2394,13 @@ class UDFPartRunner:
         roi: Optional[np.ndarray],
     ) -> None:
         for udf in udfs:
-            if isinstance(udf, UDFTileMixin):
+            if isinstance(udf, FusedTileUDFs):
+                for member in udf.udfs:
+                    member.set_contiguous_views_for_tile(partition, tile)
+                    member.set_slice(tile.tile_slice)
+                    member.set_tile_idx(tile.scheme_idx)
+                udf.process_tile(device_tile)
+            elif isinstance(udf, UDFTileMixin):
                 udf.set_contiguous_views_for_tile(partition, tile)
                 udf.set_slice(tile.tile_slice)
                 udf.set_tile_idx(tile.scheme_idx)
@@ -2120,15 +2461,22 @@ class UDFPartRunner:
 
 
 class UDFRunner:
+    # can results be accumulated on the workers, see `UDF.accumulate_on_worker`:
+    _supports_worker_accumulation = True
+
     @staticmethod
     def _apply_part_result(udfs, damage, part_results, task):
+        partition = task.get_result_partition()
         for results, udf in zip(part_results, udfs):
-            udf.set_views_for_partition(task.partition)
+            if results is None:
+                # accumulated on the worker, merged at the end of the run
+                continue
+            udf.set_views_for_partition(partition)
             udf.merge(
                 dest=udf.results.get_proxy(),
                 src=results.get_proxy()
             )
-        v = damage.get_view_for_partition(task.partition)
+        v = damage.get_view_for_partition(partition)
         v[:] = True
 
     @staticmethod
@@ -2149,6 +2497,9 @@ class UDFRunner:
         self._debug = debug
         self._pool = TracedThreadPoolExecutor(tracer, max_workers=4)
         self._progress_reporter = progress_reporter
+        self._accumulate: List[bool] = []
+        self._run_id: Optional[str] = None
+        self._task_ids: Set[int] = set()
 
     @classmethod
     def inspect_udf(
@@ -2218,6 +2569,44 @@ class UDFRunner:
         if self._debug:
             cloudpickle.loads(cloudpickle.dumps(tasks))
 
+    def _accumulate_on_worker(self, udf: UDF) -> bool:
+        if not self._supports_worker_accumulation or not udf.accumulate_on_worker():
+            return False
+        nav_buffers = [
+            name for name, buf in udf.results.items()
+            if buf.kind == 'nav' and buf.use != 'result_only'
+        ]
+        if nav_buffers:
+            raise UDFException(
+                f"{udf} can't accumulate on the workers because it has "
+                f"buffers of kind 'nav': {nav_buffers}"
+            )
+        return True
+
+    def _merge_accumulated(self, dataset: DataSet, executor: JobExecutor, task_ids: Set[int]):
+        """
+        Collect the results that were accumulated on the workers,
+        and merge them into the results on the main node.
+        """
+        collected = executor.run_each_worker(_collect_accumulated, self._run_id)
+        full = _SlicePartition(Slice.from_shape(
+            tuple(dataset.shape.flatten_nav()), sig_dims=dataset.shape.sig.dims
+        ))
+        seen: Dict[int, Set[int]] = defaultdict(set)
+        for worker_results in collected.values():
+            for udf_idx, (results, merged_ids) in worker_results.items():
+                udf = self._udfs[udf_idx]
+                udf.set_views_for_partition(full)
+                udf.merge(dest=udf.results.get_proxy(), src=results.get_proxy())
+                udf.clear_views()
+                seen[udf_idx].update(merged_ids)
+        for udf_idx, udf in enumerate(self._udfs):
+            if self._accumulate[udf_idx] and seen[udf_idx] != task_ids:
+                raise RuntimeError(
+                    f"results of {udf} were not collected from all workers, "
+                    "maybe a worker was restarted during the run"
+                )
+
     def _check_preconditions(self, dataset: DataSet, roi: Optional[np.ndarray]) -> None:
         if roi is not None and prod(roi.shape) != prod(dataset.shape.nav):
             raise ValueError(
@@ -2270,7 +2659,7 @@ class UDFRunner:
             if isinstance(udf, UDFPreprocessMixin):
                 udf.set_views_for_dataset(dataset)
                 udf.preprocess()
-        neg = Negotiator()
+        neg = make_negotiator()
         # FIXME take compute backend into consideration as well
         # Other boundary conditions when moving input data to device
         # FIXME: approximate partition shape here
@@ -2282,17 +2671,28 @@ class UDFRunner:
             read_dtype=meta.input_dtype,
             roi=roi,
             corrections=corrections,
+            array_backends=_get_tile_backends(self._udfs, dataset, backends),
         )
+        accumulate = [self._accumulate_on_worker(udf) for udf in self._udfs]
+        self._accumulate = accumulate
+        self._run_id = str(uuid.uuid4())
         params = UDFParams.from_udfs(
             udfs=self._udfs,
             roi=roi,
             corrections=corrections,
             tiling_scheme=tiling_scheme,
+            accumulate=accumulate,
+            run_id=self._run_id,
         )
         if dry:
             tasks = []
         else:
             tasks = list(self._make_udf_tasks(dataset, roi, backends))
+            group_size = executor.get_merge_group_size(len(tasks))
+            # partitions of a followed data set become ready one by one:
+            if group_size > 1 and dataset.follow is None:
+                tasks = self._merge_udf_tasks(tasks, group_size)
+        self._task_ids = {task.idx for task in tasks}
         return (tasks, params)
 
     def run_for_dataset(
@@ -2349,7 +2749,21 @@ class UDFRunner:
                 for task in tasks:
                     task.report_progress()
             with executor.scatter(params) as params_handle:
-                if tasks:
+                if tasks and dataset.follow is not None:
+                    for res in self._run_tasks_follow(
+                        dataset,
+                        executor,
+                        roi,
+                        backends,
+                        tasks,
+                        params_handle,
+                        cancel_id,
+                        task_comm_handler,
+                    ):
+                        if progress:
+                            pman.finalize_task(res[1])
+                        yield res
+                elif tasks:
                     for res in executor.run_tasks(
                         tasks,
                         params_handle,
@@ -2363,6 +2777,62 @@ class UDFRunner:
             if progress and tasks:
                 pman.close()
 
+    def _run_tasks_follow(
+        self,
+        dataset: DataSet,
+        executor: JobExecutor,
+        roi: Optional[np.ndarray],
+        backends: Optional[BackendSpec],
+        tasks: List[UDFTask],
+        params_handle,
+        cancel_id,
+        task_comm_handler: TaskCommHandler,
+    ) -> Iterable[Tuple[Tuple[UDFData, ...], TaskProtocol]]:
+        """
+        Run the tasks for a data set that is still being written, see
+        :class:`~libertem.io.dataset.base.Follow`: the data set is refreshed
+        periodically, and tasks are run as soon as all frames of their
+        partition are available, or when the acquisition has ended.
+        """
+        follow = dataset.follow
+        sync_offset = dataset.meta.sync_offset
+        expected_count = dataset.shape.nav.size + sync_offset
+        pending = {task.idx for task in tasks}
+        self._task_ids = set()
+        last_count = None
+        last_growth = time.monotonic()
+        while pending:
+            image_count = dataset.refresh(executor)
+            now = time.monotonic()
+            if image_count != last_count:
+                last_count = image_count
+                last_growth = now
+            finished = (
+                image_count >= expected_count
+                or now - last_growth >= follow.timeout
+            )
+            # the partitions have to be re-created to pick up the new frames:
+            ready = [
+                task
+                for task in self._make_udf_tasks(dataset, roi, backends)
+                if task.idx in pending and (
+                    finished
+                    or _partition_stop_frame(task.partition, sync_offset) <= image_count
+                )
+            ]
+            if not ready:
+                time.sleep(follow.poll_interval)
+                continue
+            for task in ready:
+                pending.discard(task.idx)
+                self._task_ids.add(task.idx)
+            yield from executor.run_tasks(
+                ready,
+                params_handle,
+                cancel_id,
+                task_comm_handler,
+            )
+
     def run_for_dataset_sync(
         self,
         dataset: DataSet,
@@ -2388,25 +2858,39 @@ class UDFRunner:
         damage.set_shape_ds(dataset.shape, roi)
         damage.allocate()
         any_result = False
-        for part_results, task in result_iter:
-            any_result = True
-            with tracer.start_as_current_span("_apply_part_result -> UDF.merge"):
-                self._apply_part_result(
-                    udfs=self._udfs,
-                    damage=damage,
-                    part_results=part_results,
-                    task=task
-                )
-            if iterate:
+        collected = False
+        try:
+            for part_results, task in result_iter:
+                any_result = True
+                with tracer.start_as_current_span("_apply_part_result -> UDF.merge"):
+                    self._apply_part_result(
+                        udfs=self._udfs,
+                        damage=damage,
+                        part_results=part_results,
+                        task=task
+                    )
+                if iterate:
+                    yield self._make_udf_result(
+                        udfs=self._udfs,
+                        damage=damage
+                    )
+            accumulated = any_result and any(self._accumulate)
+            if accumulated:
+                with tracer.start_as_current_span("_merge_accumulated"):
+                    collected = True
+                    self._merge_accumulated(dataset, executor, self._task_ids)
+            if not any_result or not iterate or accumulated:
                 yield self._make_udf_result(
                     udfs=self._udfs,
                     damage=damage
                 )
-        if not any_result or not iterate:
-            yield self._make_udf_result(
-                udfs=self._udfs,
-                damage=damage
-            )
+        finally:
+            if any(self._accumulate) and not collected:
+                # don't leave partial results behind on the workers:
+                try:
+                    executor.run_each_worker(_collect_accumulated, self._run_id)
+                except Exception:
+                    log.exception("could not discard accumulated results")
 
     async def run_for_dataset_async(
         self,
@@ -2471,6 +2955,38 @@ class UDFRunner:
             )
             yield tasks
 
+    def _merge_udf_tasks(self, tasks: List[UDFTask], group_size: int) -> List[UDFTask]:
+        """
+        Combine runs of up to `group_size` tasks for consecutive partitions
+        into :class:`MergedUDFTask` instances.
+        """
+        groups: List[List[UDFTask]] = []
+        for task in tasks:
+            if groups:
+                prev = groups[-1][-1].partition.slice
+                contiguous = task.partition.slice.origin[0] == prev.origin[0] + prev.shape[0]
+                if contiguous and len(groups[-1]) < group_size:
+                    groups[-1].append(task)
+                    continue
+            groups.append([task])
+        result: List[UDFTask] = []
+        for group in groups:
+            if len(group) == 1:
+                result.extend(group)
+                continue
+            first = group[0]
+            result.append(MergedUDFTask(
+                partitions=[t.partition for t in group],
+                idx=first.idx,
+                udf_classes=first._udf_classes,
+                udf_backends=first._udf_backends,
+                user_backends=first._user_backends,
+                runner_cls=first._runner_cls,
+                span_context=first._span_context,
+                task_frames=sum(t.task_frames for t in group),
+            ))
+        return result
+
     @classmethod
     def get_part_runner_cls(cls) -> Type['UDFPartRunner']:
         return UDFPartRunner
@@ -2479,6 +2995,14 @@ class UDFRunner:
 UDFResultDict = Mapping[str, BufferWrapper]
 
 
+def _partition_stop_frame(partition: Partition, sync_offset: int) -> int:
+    """
+    Index of the frame in the files after the last frame of :code:`partition`
+    """
+    part_slice = partition.slice
+    return part_slice.origin[0] + part_slice.shape[0] + sync_offset
+
+
 class UDFResults:
     '''
     Container class to combine UDF results with additional information.
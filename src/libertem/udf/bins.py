@@ -0,0 +1,344 @@
+"""
+Integration over bins of detector pixels that are given by a lookup table
+with the bin index of each pixel, instead of a stack of masks. Each tile is
+reduced in a single pass that scatters the pixels into their bins, so that
+the cost doesn't grow with the number of bins.
+
+.. versionadded:: 0.12.0
+"""
+import functools
+
+import numba
+import numpy as np
+
+from libertem import masks
+from libertem.common.math import prod
+from libertem.common.numba.csr import is_numba_csr
+from libertem.udf import UDF
+
+# average number of pixels per run of the same bin, above which the
+# runs are summed up instead of scattering each pixel:
+RUN_LENGTH = 8
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def _bin_dense(tile, index, weights, out):
+    for frame in range(tile.shape[0]):
+        for layer in range(index.shape[0]):
+            for pixel in range(tile.shape[1]):
+                b = index[layer, pixel]
+                if b >= 0:
+                    if weights is None:
+                        out[frame, b] += tile[frame, pixel]
+                    else:
+                        out[frame, b] += tile[frame, pixel] * weights[layer, pixel]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def _bin_dense_entries(tile, pixels, bins, weights, out):
+    for frame in range(tile.shape[0]):
+        for e in range(len(pixels)):
+            if weights is None:
+                out[frame, bins[e]] += tile[frame, pixels[e]]
+            else:
+                out[frame, bins[e]] += tile[frame, pixels[e]] * weights[e]
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def _bin_dense_runs(tile, runs, weights, out):
+    # runs: (start, stop, layer, bin) of pixels that belong to the same bin
+    for frame in range(tile.shape[0]):
+        for r in range(runs.shape[0]):
+            layer = runs[r, 2]
+            acc = 0.
+            for pixel in range(runs[r, 0], runs[r, 1]):
+                if weights is None:
+                    acc += tile[frame, pixel]
+                else:
+                    acc += tile[frame, pixel] * weights[layer, pixel]
+            out[frame, runs[r, 3]] += acc
+
+
+def _get_runs(row):
+    """
+    Runs of consecutive pixels in the same bin, as rows of
+    :code:`(start, stop, bin)`.
+    """
+    change = np.flatnonzero(np.diff(row)) + 1
+    starts = np.concatenate(((0, ), change))
+    stops = np.concatenate((change, (len(row), )))
+    bins = row[starts]
+    select = bins >= 0
+    return np.stack((starts[select], stops[select], bins[select]), axis=1)
+
+
+class _BinTable:
+    """
+    The lookup table for a signal slice, prepared for the dense kernels.
+    Each layer is processed in the way that fits its content best:
+
+    * Long runs of pixels in the same bin are summed up, which avoids
+      repeated updates of the same bin.
+    * Layers where most pixels belong to a bin are scattered pixel by pixel.
+    * The few pixels of the other layers are scattered from a list.
+    """
+    def __init__(self, index, weights):
+        self.index = index
+        self.weights = weights
+        runs = []
+        scan = []
+        entries = np.zeros(index.shape, dtype=bool)
+        for layer, row in enumerate(index):
+            valid = row >= 0
+            num_valid = np.count_nonzero(valid)
+            if num_valid == 0:
+                continue
+            layer_runs = _get_runs(row)
+            if num_valid / len(layer_runs) >= RUN_LENGTH:
+                runs.append(np.insert(layer_runs, 2, layer, axis=1))
+            elif num_valid >= len(row) / 2:
+                scan.append(layer)
+            else:
+                entries[layer] = valid
+        self.runs = np.ascontiguousarray(
+            np.concatenate(runs) if runs else np.zeros((0, 4)), dtype=np.intp
+        )
+        self.scan_index = np.ascontiguousarray(index[scan])
+        self.scan_weights = None if weights is None else np.ascontiguousarray(weights[scan])
+        # ordered by pixel, for locality:
+        pixels, layers = np.nonzero(entries.T)
+        self.pixels = pixels.astype(np.intp)
+        self.bins = np.ascontiguousarray(index[layers, pixels], dtype=np.intp)
+        self.entry_weights = None
+        if weights is not None:
+            self.entry_weights = np.ascontiguousarray(weights[layers, pixels])
+
+    def apply(self, tile, out):
+        if is_numba_csr(tile):
+            _bin_csr(tile.data, tile.indices, tile.indptr, self.index, self.weights, out)
+            return
+        if len(self.runs):
+            _bin_dense_runs(tile, self.runs, self.weights, out)
+        if len(self.scan_index):
+            _bin_dense(tile, self.scan_index, self.scan_weights, out)
+        if len(self.pixels):
+            _bin_dense_entries(tile, self.pixels, self.bins, self.entry_weights, out)
+
+
+@numba.njit(fastmath=True, cache=True, nogil=True)
+def _bin_csr(data, indices, indptr, index, weights, out):
+    for frame in range(len(indptr) - 1):
+        for k in range(indptr[frame], indptr[frame + 1]):
+            pixel = indices[k]
+            for layer in range(index.shape[0]):
+                b = index[layer, pixel]
+                if b >= 0:
+                    if weights is None:
+                        out[frame, b] += data[k]
+                    else:
+                        out[frame, b] += data[k] * weights[layer, pixel]
+
+
+@functools.lru_cache(maxsize=8)
+def _get_radial_bin_index(cx, cy, sx, sy, ro, ri, n_bins, antialiased):
+    index, weights = masks.radial_bin_index(
+        centerX=cx, centerY=cy, imageSizeX=sx, imageSizeY=sy,
+        radius=ro, radius_inner=ri, n_bins=n_bins, antialiased=antialiased,
+    )
+    # shared between all tasks of this process:
+    index.flags.writeable = False
+    weights.flags.writeable = False
+    return index, weights
+
+
+def _flatten(tile):
+    flat_shape = (tile.shape[0], prod(tile.shape[1:]))
+    return tile.reshape(flat_shape) if tile.shape != flat_shape else tile
+
+
+class BinIndexUDF(UDF):
+    """
+    Integrate each frame over bins of pixels. The bins are given by a lookup
+    table with the bin index of each pixel, so that the frames are only read
+    once, no matter how many bins there are. This is much faster than
+    :class:`~libertem.udf.masks.ApplyMasksUDF` for many bins that don't
+    overlap, for example for azimuthal integration.
+
+    The result buffer :code:`intensity` has the shape
+    :code:`(*nav_shape, n_bins)`, like the one of
+    :class:`~libertem.udf.masks.ApplyMasksUDF`.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    index_factory : Callable
+        Function without arguments that returns either an integer array
+        with the bin index of each pixel, with the shape of the frames, or a
+        tuple :code:`(index, weights)` of arrays. Pixels with a negative
+        index don't belong to any bin. The arrays can have an additional
+        first axis, so that a pixel can belong to several bins, one per
+        layer, like the result of :func:`libertem.masks.radial_bin_index`.
+    n_bins : int
+        Number of bins
+
+    Examples
+    --------
+
+    >>> def quadrants():
+    ...     y, x = np.mgrid[0:32, 0:32]
+    ...     return (y // 16) * 2 + (x // 16)
+    >>> udf = BinIndexUDF(index_factory=quadrants, n_bins=4)
+    >>> res = ctx.run_udf(dataset=dataset, udf=udf)
+    >>> res['intensity'].data.shape
+    (16, 16, 4)
+    >>> expected = dataset.data[..., :16, :16].sum(axis=(2, 3))
+    >>> np.allclose(res['intensity'].data[..., 0], expected)
+    True
+    """
+    def __init__(self, index_factory, n_bins):
+        super().__init__(index_factory=index_factory, n_bins=n_bins)
+
+    def get_bin_index(self):
+        """
+        The bin index and weights for the whole frame, each with shape
+        :code:`(layers, *sig_shape)`. The weights can be :code:`None`.
+        Override this in subclasses to compute the lookup table from other
+        parameters.
+        """
+        res = self.params.index_factory()
+        if isinstance(res, tuple):
+            index, weights = res
+        else:
+            index, weights = res, None
+        return index, weights
+
+    def get_bin_count(self) -> int:
+        """
+        Number of bins, which is the size of the last axis of the result
+        """
+        return self.params.n_bins
+
+    def get_backends(self):
+        ''
+        return (self.BACKEND_NUMPY, self.BACKEND_SCIPY_CSR)
+
+    def get_result_buffers(self):
+        ''
+        dtype = np.result_type(self.meta.input_dtype, np.float32)
+        return {
+            'intensity': self.buffer(
+                kind='nav', extra_shape=(self.get_bin_count(), ), dtype=dtype,
+            ),
+        }
+
+    def get_task_data(self):
+        ''
+        index, weights = self.get_bin_index()
+        sig_shape = tuple(self.meta.dataset_shape.sig)
+        index = np.asarray(index)
+        n_bins = self.get_bin_count()
+        if not np.issubdtype(index.dtype, np.integer):
+            raise ValueError(f"bin index must have an integer dtype, got {index.dtype}")
+        # the kernels don't check bounds, and the index is narrowed below:
+        if index.size and index.max() >= n_bins:
+            raise ValueError(
+                f"bin index contains values up to {index.max()}, "
+                f"but there are only {n_bins} bins"
+            )
+        layer_shape = (-1, ) + sig_shape
+        # negative values don't belong to a bin; unify them so that they
+        # can't wrap around into valid bins when narrowed:
+        index = np.where(index < 0, -1, index).reshape(layer_shape)
+        if weights is not None:
+            weights = np.broadcast_to(np.asarray(weights, dtype=np.float32), index.shape)
+        # The lookup tables for the signal slices of all tiles, flattened
+        # and contiguous, so that each tile only needs a single pass:
+        index_dtype = np.int16 if n_bins <= np.iinfo(np.int16).max else np.intp
+        tables = []
+        for idx, sig_slice in self.meta.tiling_scheme.slices:
+            sliced_index = np.ascontiguousarray(
+                sig_slice.get(index, sig_only=True).reshape((len(index), -1)),
+                dtype=index_dtype,
+            )
+            sliced_weights = None
+            if weights is not None:
+                sliced_weights = np.ascontiguousarray(
+                    sig_slice.get(weights, sig_only=True).reshape((len(index), -1)),
+                )
+            tables.append(_BinTable(sliced_index, sliced_weights))
+        return {
+            'tables': tables,
+        }
+
+    def process_tile(self, tile):
+        ''
+        table = self.task_data.tables[self.meta.tiling_scheme_idx]
+        table.apply(_flatten(tile), self.results.intensity)
+
+
+class RadialBinsUDF(BinIndexUDF):
+    """
+    Integrate each frame over concentric rings, like
+    :class:`~libertem.udf.masks.ApplyMasksUDF` with the masks of
+    :func:`libertem.masks.radial_bins`, but in a single pass over the data
+    regardless of the number of rings. The lookup table is computed once
+    per process for the same parameters.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    cx, cy : float
+        Center of the rings, default the center of the frame
+    ri : float
+        Inner radius of the innermost ring
+    ro : float, optional
+        Outer radius of the outermost ring, default covers the whole frame
+    n_bins : int, optional
+        Number of rings, default one per pixel of radius
+    antialiased : bool
+        If True, pixels on the border between rings are shared between them
+        like in :func:`~libertem.masks.radial_bins`. If False, each pixel
+        belongs to one ring.
+
+    Examples
+    --------
+
+    >>> udf = RadialBinsUDF(cx=16, cy=16, ro=16, n_bins=16)
+    >>> res = ctx.run_udf(dataset=dataset, udf=udf)
+    >>> res['intensity'].data.shape
+    (16, 16, 16)
+    """
+    def __init__(self, cx=None, cy=None, ri=0, ro=None, n_bins=None, antialiased=True):
+        # skip the parameters of BinIndexUDF
+        UDF.__init__(
+            self, cx=cx, cy=cy, ri=ri, ro=ro, n_bins=n_bins, antialiased=antialiased,
+        )
+
+    def _get_geometry(self):
+        if self.meta.dataset_shape.sig.dims != 2:
+            raise ValueError("can only handle 2D signals currently")
+        sy, sx = tuple(self.meta.dataset_shape.sig)
+        p = self.params
+        cx = sx / 2 if p.cx is None else p.cx
+        cy = sy / 2 if p.cy is None else p.cy
+        ro = p.ro
+        if ro is None:
+            ro = masks.bounding_radius(cx, cy, sx, sy)
+        n_bins = p.n_bins
+        if n_bins is None:
+            n_bins = int(np.round(ro - p.ri))
+        return cx, cy, sx, sy, ro, p.ri, n_bins, p.antialiased
+
+    def get_bin_index(self):
+        ''
+        index, weights = _get_radial_bin_index(*self._get_geometry())
+        if not self.params.antialiased:
+            # all ones
+            weights = None
+        return index, weights
+
+    def get_bin_count(self) -> int:
+        ''
+        return self._get_geometry()[6]
@@ -10,6 +10,14 @@ class LogsumUDF(UDF):
     In comparison to log-scaling the sum, this highlights regions with slightly higher
     intensity that appear in many frames in relation to very high intensity in a few frames.
 
+    Parameters
+    ----------
+    accumulate_on_worker : bool, optional
+        Sum up the results of all partitions on each worker and only send them to
+        the main node at the end of the run, see :meth:`UDF.accumulate_on_worker`.
+
+        .. versionadded:: 0.12.0
+
     Examples
     --------
     >>> udf = LogsumUDF()
@@ -17,8 +25,12 @@ class LogsumUDF(UDF):
     >>> np.array(result["logsum"]).shape
     (32, 32)
     """
-    def __init__(self):
-        super().__init__()
+    def __init__(self, accumulate_on_worker=False):
+        super().__init__(accumulate_on_worker=accumulate_on_worker)
+
+    def accumulate_on_worker(self):
+        ''
+        return self.params.accumulate_on_worker
 
     def get_backends(self):
         return [
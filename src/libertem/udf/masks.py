@@ -3,8 +3,12 @@ import numpy as np
 from sparseconverter import CUPY_BACKENDS, NUMPY, SCIPY_COO, SCIPY_CSC, SCIPY_CSR
 
 from libertem.udf import UDF
+from libertem.udf.base import FusedTileUDFs
 from libertem.common.container import MaskContainer
-from libertem.common.numba import rmatmul
+from libertem.common.numba import rmatmul, numba_dtypes
+from libertem.common.numba.csr import (
+    is_numba_csr, csr_matmul_dense, csr_rmatmul, csr_rmatmul_parallel,
+)
 
 
 class ApplyMasksUDF(UDF):
@@ -82,6 +86,19 @@ class ApplyMasksUDF(UDF):
     True
 
     .. versionadded:: 0.4.0
+
+    .. versionchanged:: 0.12.0
+        Dense masks are applied to :code:`scipy.sparse.csr_matrix` tiles
+        by only reading the mask values for the non-zero pixels.
+
+    .. versionchanged:: 0.12.0
+        Sparse masks with a :code:`scipy.sparse` back-end are applied to
+        dense tiles from a :class:`~libertem.common.container.CSRMaskIndex`
+        that is built once per run on each worker, and the product is
+        accumulated directly into the result buffer, using several Numba
+        threads if :attr:`UDFMeta.threads_per_worker` allows.
+        The mask factories are expected to return the same masks each
+        time they are called.
     '''
     def __init__(self, mask_factories, use_torch=True, use_sparse=None, mask_count=None,
                 mask_dtype=None, preferred_dtype=None, backends=None):
@@ -151,12 +168,31 @@ class ApplyMasksUDF(UDF):
                 or self.meta.device_class != 'cpu' or self.masks.use_sparse
                 or self.meta.array_backend != NUMPY):
             use_torch = False
+        return {
+            'use_torch': use_torch,
+            'process_flat': self._make_process_flat(self.masks, use_torch),
+            'accumulate': self._use_csr_index(self.masks, use_torch),
+        }
+
+    def _use_csr_index(self, mask_container, use_torch):
+        m = self.meta
+        return (
+            not use_torch
+            and m.array_backend == NUMPY
+            and m.tiling_scheme is not None
+            and bool(mask_container.use_sparse)
+            and 'scipy.sparse' in mask_container.use_sparse
+            and np.dtype(m.input_dtype) in numba_dtypes
+            and np.dtype(mask_container.dtype) in numba_dtypes
+        )
+
+    def _make_process_flat(self, mask_container, use_torch):
         backend = self.meta.array_backend
         if use_torch:
 
             def process_flat(flat_tile):
                 import torch
-                masks = self.masks.get_for_sig_slice(
+                masks = mask_container.get_for_sig_slice(
                     self.meta.sig_slice, transpose=True
                 )
                 # CuPy back-end disables torch in get_task_data
@@ -167,13 +203,28 @@ class ApplyMasksUDF(UDF):
                 ).numpy()
                 return result
 
+        elif self._use_csr_index(mask_container, use_torch):
+            index = mask_container.get_csr_index(self.meta.tiling_scheme)
+            if (self.meta.threads_per_worker or 1) > 1:
+                rmatmul_kernel = csr_rmatmul_parallel
+            else:
+                rmatmul_kernel = csr_rmatmul
+            result_dtype = np.result_type(self.meta.input_dtype, mask_container.dtype)
+
+            def process_flat(flat_tile, out=None):
+                if out is None:
+                    out = np.zeros((flat_tile.shape[0], index.num_masks), dtype=result_dtype)
+                data, indices, indptr = index[self.meta.tiling_scheme_idx]
+                rmatmul_kernel(flat_tile, data, indices, indptr, out)
+                return out
+
         # Required due to https://github.com/scipy/scipy/issues/13211
         elif (backend == NUMPY
-              and self.masks.use_sparse
-              and 'scipy.sparse' in self.masks.use_sparse):
+              and mask_container.use_sparse
+              and 'scipy.sparse' in mask_container.use_sparse):
 
             def process_flat(flat_tile):
-                masks = self.masks.get_for_sig_slice(
+                masks = mask_container.get_for_sig_slice(
                     self.meta.sig_slice, transpose=True
                 )
                 result = rmatmul(flat_tile, masks)
@@ -181,12 +232,12 @@ class ApplyMasksUDF(UDF):
 
         elif (
             backend in (SCIPY_COO, SCIPY_CSR, SCIPY_CSC)
-            and self.masks.use_sparse
-            and 'sparse.pydata' in self.masks.use_sparse
+            and mask_container.use_sparse
+            and 'sparse.pydata' in mask_container.use_sparse
         ):
 
             def process_flat(flat_tile):
-                masks = self.masks.get_for_sig_slice(
+                masks = mask_container.get_for_sig_slice(
                     self.meta.sig_slice, transpose=False
                 )
                 # Make sure the sparse.pydata mask comes first
@@ -194,20 +245,35 @@ class ApplyMasksUDF(UDF):
                 result = (masks @ flat_tile.T).T
                 return result
 
+        elif backend == SCIPY_CSR and not mask_container.use_sparse:
+
+            def process_flat(flat_tile):
+                masks = mask_container.get_for_sig_slice(
+                    self.meta.sig_slice, transpose=True
+                )
+                if not is_numba_csr(flat_tile) or masks.dtype not in numba_dtypes:
+                    return flat_tile @ masks
+                # Only the mask rows for the non-zero pixels are read
+                result = np.zeros(
+                    (flat_tile.shape[0], masks.shape[1]),
+                    dtype=np.result_type(flat_tile.dtype, masks.dtype),
+                )
+                csr_matmul_dense(
+                    flat_tile.data, flat_tile.indices, flat_tile.indptr, masks, result
+                )
+                return result
+
         else:
 
             def process_flat(flat_tile):
-                masks = self.masks.get_for_sig_slice(
+                masks = mask_container.get_for_sig_slice(
                     self.meta.sig_slice, transpose=True
                 )
 
                 result = flat_tile @ masks
                 return result
 
-        return {
-            'use_torch': use_torch,
-            'process_flat': process_flat,
-        }
+        return process_flat
 
     def get_result_buffers(self):
         ''
@@ -225,11 +291,61 @@ class ApplyMasksUDF(UDF):
 
     def process_tile(self, tile):
         ''
-        flat_shape = (tile.shape[0], prod(tile.shape[1:]))
-        # Avoid reshape since older versions of scipy.sparse don't support it
-        flat_data = tile.reshape(flat_shape) if tile.shape != flat_shape else tile
+        if self.task_data.accumulate:
+            self.task_data.process_flat(_flatten(tile), out=self.results.intensity)
+            return
         # '+' is the correct merge for dot product
         self.results.intensity[:] += self.forbuf(
-            self.task_data.process_flat(flat_data),
+            self.task_data.process_flat(_flatten(tile)),
             self.results.intensity,
         )
+
+    def _get_fusion_key(self):
+        # Subclasses may change how tiles are processed
+        if type(self) is not ApplyMasksUDF:
+            return None
+        return (
+            self.meta.array_backend,
+            np.dtype(self.meta.input_dtype),
+            np.dtype(self.masks.dtype),
+            self.masks.use_sparse,
+            self.masks.backend,
+            self.task_data.use_torch,
+        )
+
+    @classmethod
+    def _fuse_tile_udfs(cls, udfs):
+        return _FusedApplyMasks(udfs)
+
+
+def _flatten(tile):
+    flat_shape = (tile.shape[0], prod(tile.shape[1:]))
+    # Avoid reshape since older versions of scipy.sparse don't support it
+    return tile.reshape(flat_shape) if tile.shape != flat_shape else tile
+
+
+class _FusedApplyMasks(FusedTileUDFs):
+    '''
+    Apply the masks of several compatible :class:`ApplyMasksUDF` instances
+    with a single product per tile, using a stacked :class:`MaskContainer`,
+    and distribute the result columns to the individual UDFs.
+    '''
+    def __init__(self, udfs):
+        super().__init__(udfs)
+        first = udfs[0]
+        masks = MaskContainer.stack([udf.masks for udf in udfs])
+        self._process_flat = first._make_process_flat(masks, first.task_data.use_torch)
+        self._bounds = []
+        start = 0
+        for udf in udfs:
+            stop = start + len(udf.masks.computed_masks)
+            self._bounds.append((start, stop))
+            start = stop
+
+    def process_tile(self, tile):
+        result = self._process_flat(_flatten(tile))
+        for udf, (start, stop) in zip(self.udfs, self._bounds):
+            udf.results.intensity[:] += udf.forbuf(
+                result[:, start:stop],
+                udf.results.intensity,
+            )
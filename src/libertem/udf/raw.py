@@ -1,8 +1,11 @@
 import logging
 
 import numpy as np
+import scipy.sparse
 
 from libertem.common.math import prod, count_nonzero
+from libertem.common.buffers import reshaped_view
+from libertem.common.numba.csr import is_numba_csr, csr_scatter
 from libertem.udf import UDF
 
 
@@ -17,6 +20,10 @@ class PickUDF(UDF):
 
     .. versionadded:: 0.4.0
 
+    .. versionchanged:: 0.12.0
+        :code:`scipy.sparse.csr_matrix` tiles are written into the result
+        directly instead of being converted to dense tiles first.
+
     Examples
     --------
     >>> udf = PickUDF()
@@ -33,6 +40,10 @@ class PickUDF(UDF):
         ''
         return self.USE_NATIVE_DTYPE
 
+    def get_backends(self):
+        ''
+        return (self.BACKEND_NUMPY, self.BACKEND_SCIPY_CSR)
+
     def get_result_buffers(self):
         ''
         dtype = self.meta.input_dtype
@@ -61,7 +72,24 @@ class PickUDF(UDF):
         ''
         # We work in flattened nav space with ROI applied
         sl = self.meta.slice.get()
-        self.results.intensity[sl] = tile
+        if is_numba_csr(tile):
+            dest = self.results.intensity[sl]
+            try:
+                flat = reshaped_view(dest, tile.shape)
+            except AttributeError:
+                # partial frames in the tile, the view isn't contiguous
+                flat = np.zeros(tile.shape, dtype=dest.dtype)
+                csr_scatter(tile.data, tile.indices, tile.indptr, flat)
+                dest[:] = flat.reshape(dest.shape)
+            else:
+                flat[:] = 0
+                csr_scatter(tile.data, tile.indices, tile.indptr, flat)
+        elif scipy.sparse.issparse(tile):
+            # dtypes that the numba kernels don't support, like big endian:
+            dest = self.results.intensity[sl]
+            dest[:] = tile.toarray().reshape(dest.shape)
+        else:
+            self.results.intensity[sl] = tile
 
     def merge(self, dest, src):
         ''
@@ -3,10 +3,12 @@ import functools
 
 import numpy as np
 import numba
-from sparseconverter import SPARSE_BACKENDS
+import scipy.sparse
+from sparseconverter import SPARSE_BACKENDS, SCIPY_CSR
 
 from libertem.udf import UDF
 from libertem.common.buffers import reshaped_view
+from libertem.common.numba.csr import is_numba_csr, csr_sum_varsum_columns
 
 
 @numba.njit(fastmath=True, cache=True, nogil=True)
@@ -242,6 +244,34 @@ def process_tile_ndarray(tile, n_0, sum_inout, varsum_inout, forbuf):
     return n
 
 
+def process_tile_csr(tile, n_0, sum_inout, varsum_inout):
+    '''
+    Version of :func:`process_tile` for :class:`scipy.sparse.csr_matrix` tiles
+    that only visits the stored values, see
+    :func:`libertem.common.numba.csr.csr_sum_varsum_columns`.
+    Unlike :func:`process_tile`, the case :code:`n_0 == 0` is allowed.
+
+    .. versionadded:: 0.12.0
+    '''
+    if not tile.has_canonical_format:
+        # summing duplicates rewrites the arrays in place:
+        tile = tile.copy()
+        tile.sum_duplicates()
+    n_frames = tile.shape[0]
+    sumsum = np.zeros_like(sum_inout)
+    varsum = np.zeros_like(varsum_inout)
+    csr_sum_varsum_columns(tile.data, tile.indices, tile.indptr, sumsum, varsum)
+    return merge(
+        dest_n=n_0,
+        dest_sum=sum_inout,
+        dest_varsum=varsum_inout,
+        src_n=n_frames,
+        src_sum=sumsum,
+        src_varsum=varsum,
+        src_mean=sumsum / n_frames,
+    )
+
+
 # Helper function to make sure the frame count
 # is consistent at the merge stage
 def _validate_n(num_frame):
@@ -270,6 +300,10 @@ class StdDevUDF(UDF):
     ..versionchanged:: 0.11
         added dtype and use_numba parameters, added support for sparse input.
 
+    ..versionchanged:: 0.12.0
+        :code:`scipy.sparse.csr_matrix` input is processed without densifying
+        it if :code:`use_numba` is set.
+
     Parameters
     ----------
 
@@ -279,6 +313,12 @@ class StdDevUDF(UDF):
     use_numba : bool
         Use the Numba-accelerated version if input array format and backend allow.
 
+    accumulate_on_worker : bool
+        Merge the results of all partitions on each worker and only send them to
+        the main node at the end of the run, see :meth:`UDF.accumulate_on_worker`.
+
+        .. versionadded:: 0.12.0
+
     Examples
     --------
 
@@ -297,14 +337,23 @@ class StdDevUDF(UDF):
     >>> np.array(result["std"])
     array(...)
     """
-    def __init__(self, dtype=None, use_numba=True) -> None:
-        super().__init__(dtype=dtype, use_numba=use_numba)
+    def __init__(self, dtype=None, use_numba=True, accumulate_on_worker=False) -> None:
+        super().__init__(
+            dtype=dtype, use_numba=use_numba, accumulate_on_worker=accumulate_on_worker
+        )
+
+    def accumulate_on_worker(self):
+        ''
+        return self.params.accumulate_on_worker
 
     def get_backends(self):
-        # TODO supporting sparse backends efficiently requires a dedicated implementation
-        # since the generic one calculates the difference from a mean value,
-        # which can densify a sparse array.
-        return tuple(b for b in self.BACKEND_ALL if b not in SPARSE_BACKENDS)
+        # The generic implementation calculates the difference from a mean value,
+        # which densifies a sparse array. Only CSR has a dedicated implementation
+        # that works on the stored values, see process_tile_csr()
+        return tuple(
+            b for b in self.BACKEND_ALL
+            if b not in SPARSE_BACKENDS or (b == SCIPY_CSR and self.params.use_numba)
+        )
 
     def get_result_buffers(self):
         ''
@@ -421,6 +470,14 @@ class StdDevUDF(UDF):
         else:
             return input
 
+    def _adjust_dtype_csr(self, tile):
+        # only convert the values, and share the index arrays, which can
+        # be as large as the values for partition-sized tiles:
+        data = self._adjust_dtype(tile.data)
+        if data is tile.data:
+            return tile
+        return scipy.sparse.csr_matrix((data, tile.indices, tile.indptr), shape=tile.shape)
+
     def process_tile(self, tile):
         # Calculate a sum and variance minibatch for the tile and update partition buffers
         # with it.
@@ -428,7 +485,14 @@ class StdDevUDF(UDF):
         n_0 = self.task_data.num_frames[key]
         n_1 = tile.shape[0]
 
-        if n_0 == 0:
+        if self.params.use_numba and is_numba_csr(tile):
+            self.task_data.num_frames[key] = process_tile_csr(
+                tile=self._adjust_dtype_csr(tile),
+                n_0=n_0,
+                sum_inout=reshaped_view(self.results.sum, (-1, )),
+                varsum_inout=reshaped_view(self.results.varsum, (-1, )),
+            )
+        elif n_0 == 0:
             # Make sure we calculate with full precision
             tile = self._adjust_dtype(tile)
             self.results.sum[:] = self.forbuf(tile.sum(axis=0), self.results.sum)
@@ -1,6 +1,7 @@
 import numpy as np
 
 from libertem.udf import UDF
+from libertem.common.numba.csr import is_numba_csr, csr_sum_columns
 
 
 class SumUDF(UDF):
@@ -13,6 +14,11 @@ class SumUDF(UDF):
         Preferred dtype for computation, default 'float32'. The actual dtype will be determined
         from this value and the dataset's dtype using :meth:`numpy.result_type`.
         See also :ref:`udf dtype`.
+    accumulate_on_worker : bool, optional
+        Sum up the results of all partitions on each worker and only send them to
+        the main node at the end of the run, see :meth:`UDF.accumulate_on_worker`.
+
+        .. versionadded:: 0.12.0
 
     Examples
     --------
@@ -21,8 +27,12 @@ class SumUDF(UDF):
     >>> np.array(result["intensity"]).shape
     (32, 32)
     """
-    def __init__(self, dtype='float32'):
-        super().__init__(dtype=dtype)
+    def __init__(self, dtype='float32', accumulate_on_worker=False):
+        super().__init__(dtype=dtype, accumulate_on_worker=accumulate_on_worker)
+
+    def accumulate_on_worker(self):
+        ''
+        return self.params.accumulate_on_worker
 
     def get_preferred_input_dtype(self):
         ''
@@ -42,6 +52,13 @@ class SumUDF(UDF):
 
     def process_tile(self, tile):
         ''
+        if is_numba_csr(tile):
+            # Sum up the stored values directly instead of going through
+            # the matrix product that scipy.sparse uses
+            intensity = np.zeros(tile.shape[1], dtype=self.results.intensity.dtype)
+            csr_sum_columns(tile.data, tile.indices, tile.indptr, intensity)
+            self.results.intensity[:] += intensity.reshape(self.results.intensity.shape)
+            return
         self.results.intensity[:] += self.forbuf(
             np.sum(tile, axis=0),
             self.results.intensity
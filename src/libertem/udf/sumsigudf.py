@@ -1,6 +1,7 @@
 import numpy as np
 
 from libertem.udf import UDF
+from libertem.common.numba.csr import is_numba_csr, csr_sum_rows
 
 
 class SumSigUDF(UDF):
@@ -29,6 +30,11 @@ class SumSigUDF(UDF):
 
     def process_tile(self, tile):
         ""
+        if is_numba_csr(tile):
+            intensity = np.zeros(tile.shape[0], dtype=self.results.intensity.dtype)
+            csr_sum_rows(tile.data, tile.indptr, intensity)
+            self.results.intensity[:] += intensity
+            return
         self.results.intensity[:] += self.forbuf(
             np.sum(
                 # Flatten and sum axis 1 for cupyx.scipy.sparse support
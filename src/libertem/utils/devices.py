@@ -1,3 +1,4 @@
+import os
 import functools
 import warnings
 import logging
@@ -72,3 +73,54 @@ def has_cupy():
     except Exception as e:  # possibly: AttributeError or CompileException
         warnings.warn(repr(e), RuntimeWarning)
         return False
+
+
+def _parse_cache_size(size: str) -> int:
+    size = size.strip().upper()
+    for suffix, factor in (("K", 1024), ("M", 1024**2), ("G", 1024**3)):
+        if size.endswith(suffix):
+            return int(size[:-1]) * factor
+    return int(size)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache_size(level: int = 2, default: int = 256 * 1024) -> int:
+    '''
+    Size of the data or unified CPU cache of the given level, in bytes, for a
+    single core. Read from sysfs on Linux, and from :code:`os.sysconf`
+    where available.
+
+    .. versionadded:: 0.12.0
+
+    Parameters
+    ----------
+    level : int
+        Cache level, usually 1, 2 or 3
+
+    default : int
+        Returned if the size can't be determined
+    '''
+    base = "/sys/devices/system/cpu/cpu0/cache"
+    try:
+        for name in sorted(os.listdir(base)):
+            if not name.startswith("index"):
+                continue
+            path = os.path.join(base, name)
+            with open(os.path.join(path, "level")) as f:
+                if int(f.read()) != level:
+                    continue
+            with open(os.path.join(path, "type")) as f:
+                if f.read().strip() not in ("Data", "Unified"):
+                    continue
+            with open(os.path.join(path, "size")) as f:
+                return _parse_cache_size(f.read())
+    except (OSError, ValueError):
+        pass
+    try:
+        size = os.sysconf(f"SC_LEVEL{level}_DCACHE_SIZE" if level == 1 else
+                          f"SC_LEVEL{level}_CACHE_SIZE")
+        if size > 0:
+            return size
+    except (AttributeError, ValueError, OSError):
+        pass
+    return default
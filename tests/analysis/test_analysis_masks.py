@@ -13,6 +13,9 @@ from libertem.common import Shape, Slice
 from libertem.io.dataset.memory import MemoryDataSet
 from libertem.udf.masks import ApplyMasksUDF
 from libertem.udf import UDF, UDFMeta
+from libertem.api import Context
+from libertem.executor.inline import InlineJobExecutor
+from libertem.masks import radial_bins
 
 
 def _run_mask_test_program(lt_ctx, dataset, mask, expected, do_sparse=True):
@@ -381,6 +384,28 @@ def test_multi_mask_stack_force_scipy_sparse_csc(lt_ctx, backend):
         )
 
 
+@pytest.mark.with_numba
+@pytest.mark.parametrize('threads', (1, 2))
+@pytest.mark.filterwarnings("ignore:Attempting to set threads")
+def test_radial_bins_csr_index(threads):
+    ctx = Context(executor=InlineJobExecutor(inline_threads=threads))
+    data = _mk_random(size=(4, 5, 32, 32), dtype="float32")
+    dataset = MemoryDataSet(data=data, tileshape=(3, 7, 32), num_partitions=2)
+    masks = radial_bins(
+        centerX=13, centerY=17, imageSizeX=32, imageSizeY=32, n_bins=12, use_sparse=True,
+        dtype=np.complex64,
+    )
+    udf = ApplyMasksUDF(mask_factories=lambda: masks, use_sparse='scipy.sparse')
+    res = ctx.run_udf(dataset=dataset, udf=udf)
+    expected = np.einsum('abxy,mxy->abm', data, masks.todense())
+    assert res['intensity'].data.dtype == np.complex64
+    assert np.allclose(res['intensity'].data, expected, rtol=1e-5, atol=1e-5)
+
+    roi = np.random.choice([True, False], size=(4, 5))
+    res = ctx.run_udf(dataset=dataset, udf=udf, roi=roi)
+    assert np.allclose(res['intensity'].raw_data, expected[roi], rtol=1e-5, atol=1e-5)
+
+
 @pytest.mark.parametrize(
     'backend', (None, ) + tuple(ApplyMasksUDF(lambda x: None).get_backends())
 )
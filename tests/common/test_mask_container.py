@@ -1,10 +1,13 @@
+import threading
+
+import cloudpickle
 import numpy as np
 import scipy.sparse as sp
 import sparse
 import pytest
 
-from libertem.common.container import MaskContainer
-from libertem.io.dataset.base import DataTile
+from libertem.common.container import MaskContainer, CSRMaskIndex
+from libertem.io.dataset.base import DataTile, TilingScheme
 from libertem.common import Slice, Shape
 from libertem.masks import gradient_x
 
@@ -138,3 +141,68 @@ def test_for_datatile_with_frame_origin(masks):
 
 def test_merge_masks(masks):
     assert masks.computed_masks.shape == (5, 128, 128)
+
+
+def test_unpicklable_factory():
+    lock = threading.Lock()
+    with pytest.raises(TypeError):
+        MaskContainer(mask_factories=[lambda: lock and np.ones((16, 16))], dtype=np.float32)
+
+
+def _check_csr_index(index, masks, scheme):
+    assert len(index) == len(scheme)
+    for idx, slice_ in scheme.slices:
+        data, indices, indptr = index[idx]
+        csr = sp.csr_matrix(
+            (data, indices, indptr), shape=(len(masks), slice_.shape.size)
+        )
+        expected = slice_.get(masks.todense(), sig_only=True).reshape((len(masks), -1))
+        assert np.allclose(csr.toarray(), expected)
+
+
+@pytest.mark.parametrize('tileshape', [(1, 7, 16), (1, 5, 3), (1, 16, 16)])
+def test_csr_index(tileshape):
+    masks = sparse.COO.from_numpy(
+        np.random.choice([0, 1, 2.5], p=[0.8, 0.1, 0.1], size=(6, 16, 16))
+    )
+    scheme = TilingScheme.make_for_shape(
+        tileshape=Shape(tileshape, sig_dims=2),
+        dataset_shape=Shape((4, 16, 16), sig_dims=2),
+    )
+    index = CSRMaskIndex(masks, scheme.slices_array, np.float32)
+    assert index.num_masks == 6
+    _check_csr_index(index, masks, scheme)
+
+
+def test_csr_index_not_a_grid():
+    masks = sparse.COO.from_numpy(np.random.choice([0, 1], size=(3, 8, 8)))
+    slices = [
+        Slice(origin=(0, 0), shape=Shape((4, 8), sig_dims=2)),
+        Slice(origin=(4, 0), shape=Shape((4, 3), sig_dims=2)),
+        Slice(origin=(4, 3), shape=Shape((4, 5), sig_dims=2)),
+    ]
+    scheme = TilingScheme(
+        slices=slices, tileshape=Shape((1, 4, 8), sig_dims=2),
+        dataset_shape=Shape((2, 8, 8), sig_dims=2),
+    )
+    _check_csr_index(CSRMaskIndex(masks, scheme.slices_array, np.float64), masks, scheme)
+
+
+def test_csr_index_cached():
+    masks = sparse.COO.from_numpy(np.random.choice([0, 1], size=(3, 16, 16)))
+    scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((1, 4, 16), sig_dims=2),
+        dataset_shape=Shape((4, 16, 16), sig_dims=2),
+    )
+    c1 = MaskContainer(lambda: masks, use_sparse='scipy.sparse')
+    index = c1.get_csr_index(scheme)
+    assert c1.get_csr_index(scheme) is index
+    assert c1.get_csr_index(scheme, dtype=np.float64) is not index
+    _check_csr_index(index, masks, scheme)
+
+    # the index is neither shared between containers nor pickled:
+    c2 = MaskContainer(lambda: masks, use_sparse='scipy.sparse')
+    assert c2.get_csr_index(scheme) is not index
+    c3 = cloudpickle.loads(cloudpickle.dumps(c1))
+    assert c3._csr_indices == {}
+    assert c1.get_csr_index(scheme) is index
@@ -113,3 +113,42 @@ def test_numba_dtype(dtype):
     res = numba_sum(arr)
     assert arr.dtype in numba_dtypes
     assert res == len(arr)
+
+
+@numba.njit
+def _add_one(x):
+    return x + 1
+
+
+@numba.njit
+def _add_two(x):
+    return x + 2
+
+
+@numba.njit
+def _calls_add_one(x):
+    return _add_one(x)
+
+
+@numba.njit
+def _calls_add_two(x):
+    return _add_two(x)
+
+
+def _make_caller(fn):
+    def caller(x):
+        return fn(x)
+    return caller
+
+
+def test_cache_key_closure_globals():
+    cache = pytest.importorskip("libertem.common.numba.cache")
+    if not hasattr(cache, "MyFunctionCache"):
+        pytest.skip("custom numba cache not available")
+    # same bytecode, but calling different functions:
+    assert _calls_add_one.py_func.__code__.co_code == _calls_add_two.py_func.__code__.co_code
+    caller_one = _make_caller(_calls_add_one)
+    caller_two = _make_caller(_calls_add_two)
+    fc = cache.MyFunctionCache(caller_one)
+    assert fc._get_dependencies(caller_one) != fc._get_dependencies(caller_two)
+    assert fc._get_dependencies(caller_one) == fc._get_dependencies(_make_caller(_calls_add_one))
@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+import scipy.sparse
+
+from libertem.common.numba.csr import (
+    is_numba_csr, csr_sum_rows, csr_sum_columns, csr_scatter, csr_matmul_dense,
+    csr_sum_varsum_columns, csr_rmatmul, csr_rmatmul_parallel,
+)
+
+
+def _non_canonical_csr():
+    # row 1 has a duplicate entry for column 2, and unsorted indices
+    data = np.array((1, 2, 3, 4, -5), dtype=np.float32)
+    indices = np.array((0, 2, 1, 2, 3), dtype=np.int32)
+    indptr = np.array((0, 1, 4, 4, 5), dtype=np.int32)
+    return scipy.sparse.csr_matrix((data, indices, indptr), shape=(4, 5))
+
+
+@pytest.fixture(params=('canonical', 'non_canonical'))
+def csr(request):
+    if request.param == 'canonical':
+        dense = np.random.random((7, 13)).astype(np.float32)
+        dense[dense < 0.8] = 0
+        return scipy.sparse.csr_matrix(dense)
+    else:
+        return _non_canonical_csr()
+
+
+def test_is_numba_csr():
+    assert is_numba_csr(_non_canonical_csr())
+    assert not is_numba_csr(_non_canonical_csr().tocsc())
+    assert not is_numba_csr(np.zeros((3, 3)))
+    big_endian = _non_canonical_csr()
+    big_endian.data = big_endian.data.astype('>f4')
+    assert not is_numba_csr(big_endian)
+
+
+def test_sums(csr):
+    dense = csr.toarray()
+    rows = np.ones(csr.shape[0])
+    csr_sum_rows(csr.data, csr.indptr, rows)
+    assert np.allclose(rows, dense.sum(axis=1) + 1)
+    columns = np.zeros(csr.shape[1])
+    csr_sum_columns(csr.data, csr.indices, csr.indptr, columns)
+    assert np.allclose(columns, dense.sum(axis=0))
+
+
+def test_sums_row_slice(csr):
+    # indptr doesn't have to start at zero
+    sliced = csr.indptr[1:3]
+    columns = np.zeros(csr.shape[1])
+    csr_sum_columns(csr.data, csr.indices, sliced, columns)
+    assert np.allclose(columns, csr.toarray()[1:2].sum(axis=0))
+
+
+def test_scatter(csr):
+    out = np.zeros(csr.shape, dtype=np.float64)
+    csr_scatter(csr.data, csr.indices, csr.indptr, out)
+    assert np.allclose(out, csr.toarray())
+
+
+def test_matmul_dense(csr):
+    right = np.random.random((csr.shape[1], 3))
+    out = np.zeros((csr.shape[0], 3))
+    csr_matmul_dense(csr.data, csr.indices, csr.indptr, right, out)
+    assert np.allclose(out, csr.toarray() @ right)
+
+
+def test_sum_varsum_columns(csr):
+    csr = csr.copy()
+    csr.sum_duplicates()
+    dense = csr.toarray().astype(np.float64)
+    sumsum = np.zeros(csr.shape[1])
+    varsum = np.zeros(csr.shape[1])
+    csr_sum_varsum_columns(csr.data, csr.indices, csr.indptr, sumsum, varsum)
+    assert np.allclose(sumsum, dense.sum(axis=0))
+    assert np.allclose(varsum, dense.var(axis=0) * dense.shape[0])
+
+
+def test_sum_varsum_columns_complex():
+    dense = np.zeros((5, 4), dtype=np.complex128)
+    dense[1, 2] = 1 + 2j
+    dense[3, 2] = -3j
+    dense[4, 0] = 2
+    csr = scipy.sparse.csr_matrix(dense)
+    sumsum = np.zeros(4, dtype=np.complex128)
+    varsum = np.zeros(4, dtype=np.float64)
+    csr_sum_varsum_columns(csr.data, csr.indices, csr.indptr, sumsum, varsum)
+    assert np.allclose(sumsum, dense.sum(axis=0))
+    assert np.allclose(varsum, dense.var(axis=0) * dense.shape[0])
+
+
+@pytest.mark.parametrize('kernel', (csr_rmatmul, csr_rmatmul_parallel))
+def test_rmatmul(csr, kernel):
+    left = np.random.random((5, csr.shape[1])).astype(np.float32)
+    out = np.ones((5, csr.shape[0]), dtype=np.float64)
+    kernel(left, csr.data, csr.indices, csr.indptr, out)
+    assert np.allclose(out, 1 + left @ csr.toarray().T)
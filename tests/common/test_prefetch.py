@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from libertem.api import Context
+from libertem.common import Shape, Slice
+from libertem.common.prefetch import TilePrefetcher
+from libertem.io.dataset.base import DataTile
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.stddev import StdDevUDF
+
+from utils import _mk_random
+
+
+def _reusing_tiles(data, fail_at=None):
+    # like the I/O backends, decode into the same buffer for each tile
+    buf = np.zeros(data.shape[1:], dtype=data.dtype)
+    for i, frame in enumerate(data):
+        if i == fail_at:
+            raise RuntimeError("decoding failed")
+        buf[:] = frame
+        tile_slice = Slice(
+            origin=(i, 0, 0),
+            shape=Shape((1,) + frame.shape, sig_dims=2),
+        )
+        yield DataTile(buf.reshape((1,) + frame.shape), tile_slice=tile_slice, scheme_idx=0)
+
+
+@pytest.mark.parametrize('depth', (1, 2, 4))
+def test_prefetch_copies_tiles(depth):
+    data = _mk_random(size=(16, 8, 8), dtype='float32')
+    # tiles are only valid until the next one is requested, so compare while iterating:
+    for i, tile in enumerate(TilePrefetcher(_reusing_tiles(data), depth=depth)):
+        assert tile.tile_slice.origin == (i, 0, 0)
+        assert np.allclose(tile.data[0], data[i])
+    assert i == 15
+
+
+def test_prefetch_error():
+    data = _mk_random(size=(16, 8, 8), dtype='float32')
+    seen = []
+    with pytest.raises(RuntimeError, match="decoding failed"):
+        for tile in TilePrefetcher(_reusing_tiles(data, fail_at=5)):
+            seen.append(tile.tile_slice.origin[0])
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_prefetch_stop_early():
+    data = _mk_random(size=(16, 8, 8), dtype='float32')
+    closed = threading.Event()
+
+    def tiles():
+        try:
+            yield from _reusing_tiles(data)
+        finally:
+            closed.set()
+
+    it = iter(TilePrefetcher(tiles()))
+    next(it)
+    it.close()
+    assert closed.is_set()
+    assert not any(t.name == "libertem-tile-prefetch" for t in threading.enumerate())
+
+
+def test_prefetch_invalid_depth():
+    with pytest.raises(ValueError):
+        TilePrefetcher(iter([]), depth=0)
+
+
+def test_udfs_with_prefetch(lt_ctx: Context, monkeypatch):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='uint16')
+    ds = lt_ctx.load('memory', data=data, num_partitions=2, tileshape=(3, 16, 16))
+    roi = np.random.choice([True, False], size=(8, 8))
+    monkeypatch.setenv("LIBERTEM_TILE_PREFETCH", "2")
+    res = lt_ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF(), StdDevUDF()], roi=roi)
+    assert np.allclose(res[0]['intensity'].data, data[roi].sum(axis=0))
+    assert np.allclose(res[1]['intensity'].raw_data, data[roi].sum(axis=(1, 2)))
+    assert np.allclose(res[2]['var'].data, data[roi].var(axis=0))
+
+
+@pytest.mark.parametrize('dsname', ('default_raw', 'buffered_raw'))
+def test_raw_with_prefetch(lt_ctx: Context, dsname, default_raw_data, monkeypatch, request):
+    ds = request.getfixturevalue(dsname)
+    monkeypatch.setenv("LIBERTEM_TILE_PREFETCH", "1")
+    res = lt_ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF()])
+    assert np.allclose(res[0]['intensity'].data, default_raw_data.sum(axis=(0, 1)))
+    assert np.allclose(res[1]['intensity'].data, default_raw_data.sum(axis=(2, 3)))
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+from libertem.common.runtime import file_lock, get_private_dir, make_private_dir
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == 'win32', reason="permissions are not checked on Windows"
+)
+
+
+def test_private_dir(tmp_path):
+    path = get_private_dir(base=str(tmp_path), name="something")
+    assert path == os.path.join(str(tmp_path), f"something-{os.getuid()}")
+    assert os.stat(path).st_mode & 0o777 == 0o700
+    # existing private directories are reused:
+    assert get_private_dir(base=str(tmp_path), name="something") == path
+
+
+def test_private_dir_shared(tmp_path):
+    path = tmp_path / "shared"
+    path.mkdir()
+    path.chmod(0o777)
+    with pytest.raises(PermissionError):
+        make_private_dir(str(path))
+
+
+def test_private_dir_symlink(tmp_path):
+    target = tmp_path / "target"
+    target.mkdir(mode=0o700)
+    link = tmp_path / "link"
+    link.symlink_to(target)
+    with pytest.raises(PermissionError):
+        make_private_dir(str(link))
+
+
+def test_file_lock(tmp_path):
+    path = str(tmp_path / "lock")
+    with file_lock(path):
+        # a second holder, like another process or thread, has to wait:
+        with pytest.raises(TimeoutError):
+            with file_lock(path, timeout=0.1):
+                pass
+    with file_lock(path, timeout=0.1):
+        pass
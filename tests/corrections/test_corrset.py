@@ -3,10 +3,13 @@ import pytest
 import sparse
 
 from libertem.io.corrections import CorrectionSet
-from libertem.io.corrections.detector import RepairValueError
+from libertem.io.corrections.detector import RepairValueError, correct
+from libertem.io.dataset.base import BufferedBackend, MMapBackend, TilingScheme
+from libertem.common import Shape, Slice
 from libertem.utils.generate import exclude_pixels
 from libertem.udf.sum import SumUDF
 from libertem.udf.base import NoOpUDF
+from libertem.udf.raw import PickUDF
 
 
 def _validate(excluded_coords, adjusted, sig_shape):
@@ -136,6 +139,102 @@ def test_patch_pixels_only_excluded_pixels(lt_ctx, default_raw, default_raw_data
     assert np.allclose(res['intensity'], np.sum(default_raw_data, axis=(0, 1)))
 
 
+@pytest.mark.parametrize("io_backend", [MMapBackend(), BufferedBackend()])
+@pytest.mark.parametrize("dtype", ["<u2", ">u2"])
+@pytest.mark.parametrize("with_dark,with_gain,with_excluded", [
+    (True, True, True),
+    (True, False, False),
+    (False, True, False),
+    (False, False, True),
+    (True, True, False),
+])
+def test_fused_corrections(
+    lt_ctx, tmp_path, io_backend, dtype, with_dark, with_gain, with_excluded
+):
+    data = np.random.randint(0, 1024, size=(4, 5, 16, 12)).astype(dtype)
+    path = str(tmp_path / "data.raw")
+    data.tofile(path)
+    ds = lt_ctx.load(
+        "raw", path=path, nav_shape=(4, 5), sig_shape=(16, 12), dtype=dtype,
+        io_backend=io_backend,
+    )
+    dark = np.random.random((16, 12)) if with_dark else None
+    gain = np.random.random((16, 12)).astype(np.float32) if with_gain else None
+    excluded = None
+    if with_excluded:
+        excluded = sparse.COO(coords=np.array([(3, 9), (2, 7)]), shape=(16, 12), data=True)
+    corr = CorrectionSet(dark=dark, gain=gain, excluded_pixels=excluded)
+    expected = correct(
+        buffer=data.astype(np.float32), dark_image=dark, gain_map=gain,
+        excluded_pixels=None if excluded is None else excluded.coords, sig_shape=(16, 12),
+    )
+    # tiles that are split in the signal dimension, to check the cropping:
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((3, 8, 12), sig_dims=2),
+        dataset_shape=ds.shape,
+    )
+    flat = expected.reshape((-1, 16, 12))
+    fused = CorrectionSet(dark=dark, gain=gain, excluded_pixels=excluded)
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("corrections should be fused into decoding")
+
+    fused.apply = _fail
+    for p in ds.get_partitions():
+        p.set_corrections(fused)
+        for tile in p.get_tiles(tiling_scheme=tiling_scheme, dest_dtype=np.float32):
+            assert np.allclose(tile.data, flat[tile.tile_slice.get()])
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF(), corrections=corr)
+    assert np.allclose(res['intensity'].data, expected.sum(axis=(0, 1)))
+
+
+def test_fused_corrections_integer_read_dtype(tmp_path):
+    # no fusing for integer output, the error from `apply` is kept:
+    corr = CorrectionSet(dark=np.ones((16, 12)))
+    assert not MMapBackend().get_impl().fuse_corrections(corr, np.uint16)
+    assert MMapBackend().get_impl().fuse_corrections(corr, np.float32)
+    assert not MMapBackend().get_impl().fuse_corrections(CorrectionSet(), np.float32)
+    with pytest.raises(TypeError):
+        corr.apply(np.zeros((2, 16, 12), dtype=np.uint16), Slice(
+            origin=(0, 0, 0), shape=Shape((2, 16, 12), sig_dims=2),
+        ))
+
+
+def test_get_dark_gain():
+    dark = np.arange(16 * 12).reshape((16, 12))
+    corr = CorrectionSet(dark=dark)
+    sig_slice = Slice(origin=(0, 8, 0), shape=Shape((1, 8, 12), sig_dims=2)).discard_nav()
+    cropped_dark, cropped_gain = corr.get_dark_gain(sig_slice)
+    assert cropped_gain is None
+    assert np.array_equal(cropped_dark, dark[8:].reshape((-1,)))
+    assert corr.get_dark_gain(sig_slice)[0] is cropped_dark
+
+
+def test_keep_integer(lt_ctx):
+    data = np.random.randint(0, 1000, size=(4, 4, 16, 16)).astype(np.uint16)
+    ds = lt_ctx.load("memory", data=data, num_partitions=2)
+    excluded = sparse.COO(
+        coords=np.array([(3, 7), (4, 7)]), data=True, shape=(16, 16)
+    )
+    corr = CorrectionSet(excluded_pixels=excluded, keep_integer=True)
+    assert corr.get_read_dtype(np.uint16) == np.uint16
+    assert corr.get_read_dtype(np.float32) == np.float32
+    assert CorrectionSet(
+        excluded_pixels=excluded, dark=np.zeros((16, 16)), keep_integer=True
+    ).get_read_dtype(np.uint16) == np.float32
+    assert CorrectionSet(excluded_pixels=excluded).get_read_dtype(np.uint16) == np.float32
+
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=np.ones((4, 4), dtype=bool),
+                         corrections=corr)
+    picked = res['intensity'].raw_data
+    assert picked.dtype == np.uint16
+    expected = correct(
+        buffer=data.reshape((-1, 16, 16)), excluded_pixels=np.array([(3, 7), (4, 7)]),
+        sig_shape=(16, 16),
+    )
+    assert np.all(np.abs(picked.astype(np.float32) - expected) <= 0.5)
+
+
 @pytest.mark.with_numba
 def test_tileshape_adjustment_1():
     sig_shape = (123, 456)
@@ -423,3 +522,19 @@ def test_tileshape_adjustment_many(large_raw, lt_ctx):
     )
     with pytest.raises(EarlyExit):
         lt_ctx.run_udf(dataset=large_raw, udf=udf, corrections=corr)
+
+
+def test_repair_plan_shared():
+    import cloudpickle
+    excluded = exclude_pixels(sig_dims=(128, 128), num_excluded=500)
+    corr = CorrectionSet(excluded_pixels=excluded, allow_empty=True)
+    plan = corr.get_repair_plan()
+    assert plan.num_pixels == sparse.COO(excluded).nnz
+    clone = cloudpickle.loads(cloudpickle.dumps(corr))
+    assert clone.get_repair_plan().key == plan.key
+    sig_slice = Slice(origin=(0, 32, 0), shape=Shape((1, 32, 128), sig_dims=2))
+    assert clone.repair_descriptor(sig_slice) is corr.repair_descriptor(sig_slice)
+    adjusted = corr.adjust_tileshape((17, 128), sig_shape=(128, 128), base_shape=(1, 1))
+    assert clone.adjust_tileshape((17, 128), sig_shape=(128, 128), base_shape=(1, 1)) == adjusted
+    assert CorrectionSet().get_repair_plan() is None
+    assert len(CorrectionSet().repair_descriptor(sig_slice).exclude_flat) == 0
@@ -1,3 +1,5 @@
+import pickle
+
 import numpy as np
 import sparse
 import pytest
@@ -5,6 +7,7 @@ import pytest
 from libertem.utils.generate import gradient_data, exclude_pixels
 from libertem.io.corrections import detector
 from libertem.common.sparse import is_sparse
+from libertem.common import Shape, Slice
 
 
 REPEATS = 1
@@ -553,3 +556,126 @@ def test_mask_patch_overlapping():
             data=correct_dot, corrected=reconstructed_dot,
             atol=1e-8, rtol=1e-5
         )
+
+
+def _random_excluded(sig_shape, num):
+    coords = np.stack([np.random.randint(0, s, size=num) for s in sig_shape])
+    return sparse.COO(coords=coords, data=True, shape=sig_shape)
+
+
+@pytest.mark.parametrize("sig_shape", [(64, 48), (16, 12, 10)])
+def test_repair_plan_matches_descriptor(sig_shape):
+    excluded = _random_excluded(sig_shape, 200)
+    plan = detector.RepairPlan(sig_shape, excluded.coords, allow_empty=True)
+    sig_dims = len(sig_shape)
+    for _ in range(20):
+        origin = tuple(np.random.randint(0, s) for s in sig_shape)
+        shape = tuple(np.random.randint(1, s - o + 1) for o, s in zip(origin, sig_shape))
+        sig_slice = Slice(origin=(0,) + origin, shape=Shape((1,) + shape, sig_dims=sig_dims))
+        cropped = excluded[sig_slice.get(sig_only=True)]
+        expected = detector.RepairDescriptor(shape, cropped.coords, allow_empty=True)
+        desc = plan.get_descriptor(sig_slice)
+        assert np.array_equal(desc.exclude_flat, expected.exclude_flat)
+        assert np.array_equal(desc.repair_counts, expected.repair_counts)
+        for i, count in enumerate(expected.repair_counts):
+            assert np.array_equal(desc.repair_flat[i, :count], expected.repair_flat[i, :count])
+        # cached per process:
+        assert plan.get_descriptor(sig_slice) is desc
+
+
+def test_repair_plan_pickle():
+    excluded = _random_excluded((64, 48), 100)
+    plan = detector.RepairPlan((64, 48), excluded.coords, allow_empty=True)
+    clone = pickle.loads(pickle.dumps(plan))
+    assert clone.key == plan.key
+    sig_slice = Slice(origin=(0, 16, 0), shape=Shape((1, 16, 48), sig_dims=2))
+    assert clone.get_descriptor(sig_slice) is plan.get_descriptor(sig_slice)
+
+
+def test_repair_plan_empty_environment():
+    # a fully excluded block of 3x3 pixels:
+    excluded = np.zeros((16, 16), dtype=bool)
+    excluded[4:7, 4:7] = True
+    coords = np.array(np.nonzero(excluded))
+    with pytest.raises(detector.RepairValueError):
+        detector.RepairPlan((16, 16), coords)
+    plan = detector.RepairPlan((16, 16), coords, allow_empty=True)
+    assert plan.num_pixels == 9
+    # the center pixel can't be repaired in this slice either:
+    sig_slice = Slice(origin=(0, 0, 0), shape=Shape((1, 8, 16), sig_dims=2))
+    desc = plan.get_descriptor(sig_slice)
+    assert len(desc.empty_repairs()) == 1
+    # a pixel at the boundary of a slice without neighbours inside the slice:
+    plan = detector.RepairPlan((16, 16), np.array([(4,), (4,)]))
+    with pytest.raises(detector.RepairValueError):
+        plan.get_descriptor(Slice(origin=(0, 4, 4), shape=Shape((1, 1, 1), sig_dims=2)))
+
+
+@pytest.mark.parametrize("have_dark", [True, False])
+@pytest.mark.parametrize("have_gain", [True, False])
+@pytest.mark.parametrize("have_repair", [True, False])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_correction_kernels(have_dark, have_gain, have_repair, dtype):
+    sig_shape = (37, 41)
+    data = np.random.random((9, ) + sig_shape).astype(dtype)
+    dark = np.random.random(sig_shape).astype(dtype) if have_dark else None
+    gain = np.random.random(sig_shape).astype(dtype) if have_gain else None
+    excluded = exclude_pixels(sig_dims=sig_shape, num_excluded=7) if have_repair else None
+
+    expected = data.astype(np.float64)
+    if have_dark:
+        expected -= dark
+    if have_gain:
+        expected *= gain
+    if have_repair:
+        expected = detector.correct(
+            buffer=expected, excluded_pixels=excluded, sig_shape=sig_shape, allow_empty=True,
+        )
+
+    corrected = detector.correct(
+        buffer=data, dark_image=dark, gain_map=gain, excluded_pixels=excluded,
+        sig_shape=sig_shape, allow_empty=True,
+    )
+    assert corrected.dtype == dtype
+    _check_result(data=expected, corrected=corrected, atol=1e-5)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int32])
+def test_correct_integer_inplace(dtype):
+    data = np.zeros((3, 5, 5), dtype=dtype)
+    data[:, 1, 1] = 7
+    data[:, 2, 1] = 2
+    data[:, 2, 2] = 123
+    excluded = np.array([(2, ), (2, )])
+    res = detector.correct(
+        buffer=data, excluded_pixels=excluded, sig_shape=(5, 5), inplace=True,
+    )
+    assert res is data
+    # rounded mean of the environment, 9 / 8 -> 1:
+    assert np.all(data[:, 2, 2] == 1)
+    data[:, 2, 1] = 6
+    detector.correct(buffer=data, excluded_pixels=excluded, sig_shape=(5, 5), inplace=True)
+    assert np.all(data[:, 2, 2] == 2)
+    with pytest.raises(TypeError):
+        detector.correct(
+            buffer=data, dark_image=np.zeros((5, 5)), excluded_pixels=excluded, inplace=True,
+        )
+
+
+def test_correction_kernel_cache():
+    dark = np.zeros(16, dtype=np.float32)
+    k1 = detector.get_correction_kernel(np.float32, dark_image=dark)
+    assert detector.get_correction_kernel(np.float32, dark_image=dark) is k1
+    assert detector.get_correction_kernel(np.float32, gain_map=dark) is not k1
+    with pytest.raises(TypeError):
+        detector.get_correction_kernel(np.uint16, dark_image=dark)
+
+
+def test_block_sizes():
+    from libertem.utils.devices import get_cache_size
+    nav_blocksize, sig_blocksize = detector.get_block_sizes(itemsize=4, aux_itemsize=8)
+    assert sig_blocksize % 64 == 0
+    assert sig_blocksize >= 64
+    assert (nav_blocksize * 4 + 8) * sig_blocksize <= max(
+        get_cache_size(level=2) // 2, (nav_blocksize * 4 + 8) * 64
+    )
@@ -11,10 +11,14 @@ import numpy as np
 
 from libertem.api import Context
 from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
 from libertem.executor.pipelined import (
-    PipelinedExecutor, WorkerPool, _order_results, pipelined_worker
+    PipelinedExecutor, WorkerPool, _order_results, pipelined_worker,
+    _least_loaded_worker,
 )
 import libertem.executor.pipelined
+import libertem.executor.utils.shmqueue
+from libertem.executor.utils.shmqueue import dump_shm_payload, load_shm_payload
 from libertem.udf import UDF
 
 
@@ -53,6 +57,114 @@ def test_pipelined_executor(pipelined_ex):
     )
 
 
+class BigParamUDF(UDF):
+    def __init__(self, weights):
+        super().__init__(weights=weights)
+
+    def get_result_buffers(self):
+        return {
+            "weighted": self.buffer(kind='sig', dtype=np.float64),
+            "writeable": self.buffer(kind='single', dtype=bool),
+        }
+
+    def process_frame(self, frame):
+        self.results.weighted += frame * self.params.weights
+        self.results.writeable[:] = self.params.weights.flags.writeable
+
+    def merge(self, dest, src):
+        dest.weighted += src.weighted
+        dest.writeable[:] = src.writeable
+
+
+@pytest.mark.skipif(
+    not libertem.executor.utils.shmqueue.HAS_OUT_OF_BAND,
+    reason="out-of-band pickling requires Python 3.8",
+)
+def test_shm_params_and_results(pipelined_ex):
+    ctx = Context(executor=pipelined_ex)
+    data = np.random.randn(4, 4, 512, 512)
+    weights = np.random.randn(512, 512)
+    ds = ctx.load("memory", data=data, num_partitions=4)
+    res = ctx.run_udf(dataset=ds, udf=BigParamUDF(weights=weights))
+    assert np.allclose(
+        res['weighted'].data,
+        (data * weights).sum(axis=(0, 1)),
+    )
+    # params are shared read-only between workers:
+    assert not res['writeable'].data[0]
+
+
+def test_shm_disabled():
+    executor = None
+    try:
+        executor = PipelinedExecutor(
+            spec=PipelinedExecutor.make_spec(cpus=range(2), cudas=[]),
+            pin_workers=False,
+            shm_min_size=None,
+        )
+        ctx = Context(executor=executor)
+        data = np.random.randn(4, 4, 512, 512)
+        weights = np.random.randn(512, 512)
+        ds = ctx.load("memory", data=data, num_partitions=4)
+        res = ctx.run_udf(dataset=ds, udf=BigParamUDF(weights=weights))
+        assert np.allclose(
+            res['weighted'].data,
+            (data * weights).sum(axis=(0, 1)),
+        )
+        assert res['writeable'].data[0]
+    finally:
+        if executor is not None:
+            executor.close()
+
+
+@pytest.mark.skipif(
+    not libertem.executor.utils.shmqueue.HAS_OUT_OF_BAND,
+    reason="out-of-band pickling requires Python 3.8",
+)
+def test_shm_payload_roundtrip():
+    obj = {
+        "small": np.arange(16),
+        "large": np.random.randn(256, 256),
+        "strided": np.random.randn(256, 256)[::2],
+    }
+    payload, shm = dump_shm_payload(obj, min_size=1024)
+    assert shm is not None
+    assert len(payload.buffers) == 1
+    shm.close()
+    try:
+        loaded, shm_loaded = load_shm_payload(payload)
+        for k in obj:
+            assert np.allclose(loaded[k], obj[k])
+        assert not loaded["large"].flags.writeable
+        del loaded
+        shm_loaded.close()
+    finally:
+        copied, _ = load_shm_payload(payload, copy=True)
+    assert copied["large"].flags.writeable
+    assert np.allclose(copied["large"], obj["large"])
+    # consumed:
+    with pytest.raises(FileNotFoundError):
+        load_shm_payload(payload)
+
+
+def test_shm_payload_below_min_size():
+    payload, shm = dump_shm_payload(np.zeros(16), min_size=1024)
+    assert shm is None
+    assert payload.shm_name is None
+    loaded, _ = load_shm_payload(payload)
+    assert np.allclose(loaded, 0)
+
+
+def test_shm_payload_in_band_fallback(monkeypatch):
+    # as on Python 3.7, where out-of-band pickling is not available:
+    monkeypatch.setattr(libertem.executor.utils.shmqueue, "HAS_OUT_OF_BAND", False)
+    payload, shm = dump_shm_payload(np.ones((256, 256)), min_size=1024)
+    assert shm is None
+    assert payload.shm_name is None
+    loaded, _ = load_shm_payload(payload)
+    assert np.allclose(loaded, 1)
+
+
 def test_run_function(pipelined_ex):
     assert pipelined_ex.run_function(lambda: 42) == 42
 
@@ -349,6 +461,85 @@ def test_success_with_delay(pipelined_ex):
     assert np.allclose(res['intensity'].data, np.sum(data, axis=(2, 3)))
 
 
+def test_dynamic_scheduling():
+    executor = None
+    try:
+        executor = PipelinedExecutor(
+            spec=PipelinedExecutor.make_spec(cpus=range(2), cudas=[]),
+            pin_workers=False,
+            scheduling='dynamic',
+            max_tasks_per_worker=1,
+        )
+        ctx = Context(executor=executor)
+        udf = SucceedEventuallyUDF()
+        data = np.random.randn(1, 32, 16, 16)
+        ds = ctx.load("memory", data=data, num_partitions=32)
+        res = ctx.run_udf(dataset=ds, udf=udf)
+        assert np.allclose(res['intensity'].data, np.sum(data, axis=(2, 3)))
+
+        # errors are still propagated, and the executor stays usable:
+        with pytest.raises(CustomException):
+            ctx.run_udf(dataset=ds, udf=FailEventuallyUDF())
+        res = ctx.run_udf(dataset=ds, udf=udf)
+        assert np.allclose(res['intensity'].data, np.sum(data, axis=(2, 3)))
+    finally:
+        if executor is not None:
+            executor.close()
+
+
+def test_tree_reduce():
+    executor = None
+    try:
+        executor = PipelinedExecutor(
+            spec=PipelinedExecutor.make_spec(cpus=range(2), cudas=[]),
+            pin_workers=False,
+            tree_reduce=True,
+        )
+        assert executor.get_merge_group_size(32) == 8
+        ctx = Context(executor=executor)
+        data = np.random.randn(4, 32, 16, 16)
+        ds = ctx.load("memory", data=data, num_partitions=32)
+        res = ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF()])
+        assert np.allclose(res[0]['intensity'].data, np.sum(data, axis=(0, 1)))
+        assert np.allclose(res[1]['intensity'].data, np.sum(data, axis=(2, 3)))
+    finally:
+        if executor is not None:
+            executor.close()
+
+
+def test_accumulate_on_worker():
+    executor = None
+    try:
+        executor = PipelinedExecutor(
+            spec=PipelinedExecutor.make_spec(cpus=range(2), cudas=[]),
+            pin_workers=False,
+            tree_reduce=True,
+        )
+        ctx = Context(executor=executor)
+        data = np.random.randn(4, 32, 16, 16)
+        ds = ctx.load("memory", data=data, num_partitions=32)
+        res = ctx.run_udf(
+            dataset=ds, udf=[SumUDF(accumulate_on_worker=True), SumSigUDF()]
+        )
+        assert np.allclose(res[0]['intensity'].data, np.sum(data, axis=(0, 1)))
+        assert np.allclose(res[1]['intensity'].data, np.sum(data, axis=(2, 3)))
+    finally:
+        if executor is not None:
+            executor.close()
+
+
+def test_invalid_scheduling():
+    with pytest.raises(ValueError):
+        PipelinedExecutor(spec=[], scheduling='fifo')
+
+
+def test_least_loaded_worker():
+    assert _least_loaded_worker([1, 0, 1], start=0) == 1
+    assert _least_loaded_worker([0, 0, 0], start=2) == 2
+    assert _least_loaded_worker([0, 1, 0], start=1) == 2
+    assert _least_loaded_worker([2, 2, 1], start=0) == 2
+
+
 def test_make_spec_multi_cuda():
     spec = PipelinedExecutor.make_spec(cpus=[0], cudas=[0, 1, 2, 2])
     assert spec == [
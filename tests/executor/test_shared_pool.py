@@ -0,0 +1,133 @@
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from dask import distributed as dd
+
+from libertem.api import Context
+import libertem.executor.shared_pool
+from libertem.udf.sum import SumUDF
+from libertem.executor.shared_pool import (
+    connect_pool, shutdown_pool, start_pool, get_default_address, get_pool_dir,
+    _is_running, _normalize_address,
+)
+
+pytest.importorskip("cryptography")
+
+
+@pytest.fixture(autouse=True)
+def pool_dir(tmp_path, monkeypatch):
+    # don't interfere with a pool that the user may be running:
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    monkeypatch.delenv("LIBERTEM_POOL_ADDRESS", raising=False)
+    return tmp_path
+
+
+def _free_address():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"tls://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def pool_address(pool_dir):
+    address = _free_address()
+    start_pool(address, cpus=[3, 5], cudas=[])
+    try:
+        yield address
+    finally:
+        shutdown_pool(address)
+
+
+@pytest.mark.slow
+def test_shared_between_contexts(pool_address):
+    data = np.random.randn(4, 4, 16, 16)
+    pids = []
+    for i in range(2):
+        executor = connect_pool(pool_address, start=False)
+        with Context(executor=executor) as ctx:
+            ds = ctx.load("memory", data=data)
+            res = ctx.run_udf(dataset=ds, udf=SumUDF())
+            assert np.allclose(res['intensity'].data, data.sum(axis=(0, 1)))
+            pids.append(ctx.executor.run_each_worker(os.getpid))
+    # the same, warm worker processes were used by both contexts:
+    assert pids[0] == pids[1]
+    assert _is_running(pool_address)
+    # the IDs of the CPU workers were passed through:
+    with dd.Client(pool_address, security=executor.client.security) as client:
+        names = [w['name'] for w in client.scheduler_info()['workers'].values()]
+    assert sorted(n for n in names if '-cpu-' in n) == ['shared-pool-cpu-3', 'shared-pool-cpu-5']
+
+
+@pytest.mark.slow
+def test_requires_credentials(pool_address):
+    # connections with the certificate of another user are rejected:
+    with pytest.raises(OSError):
+        dd.Client(
+            pool_address, timeout=2, set_as_default=False, security=dd.Security.temporary(),
+        )
+    # and in plain TCP:
+    with pytest.raises(OSError):
+        dd.Client(pool_address.replace("tls://", "tcp://"), timeout=2, set_as_default=False)
+
+
+@pytest.mark.slow
+def test_connect_starts_pool():
+    assert get_default_address() is None
+    executor = connect_pool(cpus=1, cudas=[])
+    try:
+        with Context(executor=executor) as ctx:
+            assert ctx.executor.run_function(lambda: 42) == 42
+        # the address of the pool with a free port was stored privately:
+        address = get_default_address()
+        assert address.startswith("tls://127.0.0.1:")
+        assert _is_running(address)
+        assert connect_pool(start=False).client.scheduler.address == address
+    finally:
+        shutdown_pool()
+
+
+@pytest.mark.slow
+def test_concurrent_start(monkeypatch):
+    spawned = []
+    spawn = libertem.executor.shared_pool._spawn_pool
+
+    def _count_spawn(*args, **kwargs):
+        spawned.append(args)
+        return spawn(*args, **kwargs)
+
+    monkeypatch.setattr(libertem.executor.shared_pool, "_spawn_pool", _count_spawn)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            addresses = list(pool.map(lambda _: start_pool(cpus=1, cudas=[]), range(2)))
+        # only one pool was started, which both callers use:
+        assert len(spawned) == 1
+        assert addresses[0] == addresses[1]
+    finally:
+        shutdown_pool()
+
+
+def test_connect_no_start():
+    address = _free_address()
+    with pytest.raises(TimeoutError):
+        connect_pool(address, start=False, startup_timeout=0.5)
+    with pytest.raises(TimeoutError):
+        connect_pool(start=False, startup_timeout=0.5)
+
+
+def test_tls_only():
+    assert _normalize_address("127.0.0.1:1234") == "tls://127.0.0.1:1234"
+    with pytest.raises(ValueError):
+        connect_pool("tcp://127.0.0.1:1234")
+
+
+def test_pool_dir(pool_dir):
+    path = get_pool_dir()
+    assert os.path.dirname(path) == str(pool_dir)
+    if hasattr(os, "getuid"):
+        st = os.stat(path)
+        assert st.st_uid == os.getuid()
+        assert st.st_mode & 0o777 == 0o700
@@ -0,0 +1,226 @@
+import os
+
+import numpy as np
+import pytest
+
+from libertem.common import Shape
+from libertem.io.corrections import CorrectionSet
+from libertem.io.dataset.archive import (
+    ArchiveDataSet, ArchiveDatasetParams, choose_chunks, decode_chunk, encode_chunk,
+)
+from libertem.io.dataset.base import DataSetException, TilingScheme
+from libertem.io.writers.archive import export_dataset
+from libertem.udf.raw import PickUDF
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+
+from utils import _mk_random
+
+
+@pytest.fixture
+def data():
+    return _mk_random(size=(5, 7, 16, 12), dtype="uint16")
+
+
+@pytest.fixture
+def mem_ds(lt_ctx, data):
+    return lt_ctx.load("memory", data=data, num_partitions=3, sig_dims=2)
+
+
+def _pick_all(lt_ctx, ds, roi=None):
+    if roi is None:
+        roi = np.ones(ds.shape.nav, dtype=bool)
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=roi)
+    return res['intensity'].raw_data
+
+
+@pytest.mark.parametrize("codec", ["zlib", None])
+@pytest.mark.parametrize("shuffle", [True, False])
+def test_roundtrip(lt_ctx, mem_ds, data, tmp_path, codec, shuffle):
+    path = str(tmp_path / "archive")
+    ds = lt_ctx.export_dataset(mem_ds, path, codec=codec, shuffle=shuffle)
+    assert isinstance(ds, ArchiveDataSet)
+    assert tuple(ds.shape) == data.shape
+    assert ds.dtype == data.dtype
+    assert len(list(ds.get_partitions())) == 3
+    picked = _pick_all(lt_ctx, ds)
+    assert picked.dtype == data.dtype
+    assert np.array_equal(picked, data.reshape((-1, 16, 12)))
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF())
+    assert np.allclose(res['intensity'].data, data.sum(axis=(0, 1)))
+
+
+@pytest.mark.parametrize(
+    # stacked frames that don't divide the partitions, and stripes
+    # of rows that don't divide the frame:
+    "chunk_bytes", [16 * 12 * 2 * 4, 5 * 12 * 2]
+)
+def test_chunk_layouts(lt_ctx, mem_ds, data, tmp_path, chunk_bytes):
+    path = str(tmp_path / "archive")
+    export_dataset(lt_ctx, mem_ds, path, chunk_bytes=chunk_bytes)
+    ds = lt_ctx.load("archive", path=path)
+    assert ds.chunks == choose_chunks((16, 12), data.dtype, max_depth=11, chunk_bytes=chunk_bytes)
+    assert np.array_equal(_pick_all(lt_ctx, ds), data.reshape((-1, 16, 12)))
+
+    # tiles that are split in the signal dimensions:
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((3, 5, 12), sig_dims=2),
+        dataset_shape=ds.shape,
+    )
+    flat = data.reshape((-1, 16, 12))
+    num_tiles = 0
+    for p in ds.get_partitions():
+        for tile in p.get_tiles(tiling_scheme=tiling_scheme, dest_dtype=np.float32):
+            assert tile.dtype == np.float32
+            assert np.array_equal(tile.data, flat[tile.tile_slice.get()])
+            num_tiles += 1
+    # 3 partitions with 4 tiles of depth 3 and 4 stripes of rows each:
+    assert num_tiles == 3 * 4 * 4
+
+
+@pytest.mark.parametrize("chunk_bytes", [16 * 12 * 2 * 4, 5 * 12 * 2])
+def test_roi(lt_ctx, mem_ds, data, tmp_path, chunk_bytes):
+    path = str(tmp_path / "archive")
+    export_dataset(lt_ctx, mem_ds, path, chunk_bytes=chunk_bytes)
+    ds = lt_ctx.load("archive", path=path)
+    roi = np.random.choice([True, False], size=ds.shape.nav)
+    roi[0, 0] = True
+    roi[-1, -1] = True
+    assert np.array_equal(_pick_all(lt_ctx, ds, roi), data[roi])
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF(), roi=roi)
+    assert np.allclose(res['intensity'].data, data[roi].sum(axis=0))
+
+
+def test_macrotile(lt_ctx, mem_ds, data, tmp_path):
+    path = str(tmp_path / "archive")
+    ds = lt_ctx.export_dataset(mem_ds, path)
+    flat = data.reshape((-1, 16, 12))
+    for p in ds.get_partitions():
+        tile = p.get_macrotile(dest_dtype=data.dtype)
+        assert np.array_equal(tile.data, flat[p.slice.get()])
+
+
+def test_lz4(lt_ctx, mem_ds, data, tmp_path):
+    pytest.importorskip("lz4")
+    path = str(tmp_path / "archive")
+    ds = lt_ctx.export_dataset(mem_ds, path, codec="lz4")
+    assert ds.codec == "lz4"
+    assert np.array_equal(_pick_all(lt_ctx, ds), data.reshape((-1, 16, 12)))
+
+
+def test_unknown_codec(lt_ctx, mem_ds, tmp_path):
+    with pytest.raises(ValueError):
+        lt_ctx.export_dataset(mem_ds, str(tmp_path / "archive"), codec="bzip3")
+
+
+def test_encode_decode():
+    chunk = _mk_random(size=(3, 4, 5), dtype=">u2")
+    for codec in ("zlib", None):
+        for shuffle in (True, False):
+            encoded = encode_chunk(chunk, codec=codec, level=1, shuffle=shuffle)
+            decoded = decode_chunk(
+                encoded, codec=codec, shuffle=shuffle, dtype=chunk.dtype, chunks=chunk.shape,
+            )
+            assert decoded.dtype == chunk.dtype
+            assert np.array_equal(decoded, chunk)
+
+
+def test_choose_chunks():
+    # small frames are stacked:
+    assert choose_chunks((64, 64), np.float32) == (64, 64, 64)
+    assert choose_chunks((64, 64), np.float32, max_depth=10) == (10, 64, 64)
+    # large frames are split into stripes of rows:
+    assert choose_chunks((1024, 1024), np.float32) == (1, 256, 1024)
+    assert choose_chunks((16,), np.float32, chunk_bytes=8) == (1, 2)
+
+
+def test_overwrite(lt_ctx, mem_ds, data, tmp_path):
+    path = str(tmp_path / "archive")
+    lt_ctx.export_dataset(mem_ds, path)
+    with pytest.raises(FileExistsError):
+        lt_ctx.export_dataset(mem_ds, path)
+    other = lt_ctx.load("memory", data=data[:2], num_partitions=2, sig_dims=2)
+    ds = lt_ctx.export_dataset(other, path, overwrite=True)
+    assert tuple(ds.shape) == (2, 7, 16, 12)
+    assert sorted(os.listdir(path)) == [
+        "archive.json", "part-000000000000.bin", "part-000000000007.bin",
+    ]
+    assert np.array_equal(_pick_all(lt_ctx, ds), data[:2].reshape((-1, 16, 12)))
+
+
+def test_not_an_archive(lt_ctx, tmp_path):
+    (tmp_path / "something").write_text("hello")
+    with pytest.raises(FileExistsError):
+        lt_ctx.export_dataset(
+            lt_ctx.load("memory", data=np.zeros((2, 2, 4, 4)), sig_dims=2),
+            str(tmp_path), overwrite=True,
+        )
+    with pytest.raises(DataSetException):
+        lt_ctx.load("archive", path=str(tmp_path))
+
+
+def test_missing_part(lt_ctx, mem_ds, tmp_path):
+    path = tmp_path / "archive"
+    lt_ctx.export_dataset(mem_ds, str(path))
+    os.unlink(path / "part-000000000000.bin")
+    with pytest.raises(DataSetException):
+        lt_ctx.load("archive", path=str(path))
+
+
+def test_corrections(lt_ctx, mem_ds, data, tmp_path):
+    dark = np.random.random((16, 12)).astype(np.float32)
+    corrections = CorrectionSet(dark=dark)
+    ds = lt_ctx.export_dataset(mem_ds, str(tmp_path / "archive"), corrections=corrections)
+    assert ds.dtype == np.float32
+    expected = lt_ctx.run_udf(dataset=mem_ds, udf=SumSigUDF(), corrections=corrections)
+    res = lt_ctx.run_udf(dataset=ds, udf=SumSigUDF())
+    assert np.allclose(res['intensity'].data, expected['intensity'].data)
+
+
+def test_sync_offset(lt_ctx, data, tmp_path):
+    raw_path = str(tmp_path / "data.raw")
+    data.tofile(raw_path)
+    raw_ds = lt_ctx.load(
+        "raw", path=raw_path, nav_shape=(5, 7), sig_shape=(16, 12), dtype=data.dtype,
+        sync_offset=3,
+    )
+    raw_ds.set_num_cores(3)
+    ds = lt_ctx.export_dataset(raw_ds, str(tmp_path / "archive"))
+    flat = data.reshape((-1, 16, 12))
+    picked = _pick_all(lt_ctx, ds)
+    assert np.array_equal(picked[:-3], flat[3:])
+    assert np.all(picked[-3:] == 0)
+
+
+def test_detect_params(lt_ctx, mem_ds, tmp_path):
+    path = str(tmp_path / "archive")
+    lt_ctx.export_dataset(mem_ds, path)
+    assert ArchiveDataSet.detect_params(path, lt_ctx.executor)["parameters"]["path"] == path
+    assert not ArchiveDataSet.detect_params(str(tmp_path), lt_ctx.executor)
+    ds = lt_ctx.load("auto", path=os.path.join(path, "archive.json"))
+    assert isinstance(ds, ArchiveDataSet)
+
+
+def test_message_converter():
+    params = ArchiveDatasetParams().to_python({"type": "ARCHIVE", "path": "/some/archive"})
+    assert params == {"path": "/some/archive"}
+
+
+def test_cache_key_json_serializable(lt_ctx, mem_ds, tmp_path):
+    import json
+    ds = lt_ctx.export_dataset(mem_ds, str(tmp_path / "archive"))
+    json.dumps(ds.get_cache_key())
+
+
+def test_decompress_threads(lt_ctx, mem_ds, tmp_path):
+    path = str(tmp_path / "archive")
+    ds = lt_ctx.export_dataset(mem_ds, path)
+    p = next(ds.get_partitions())
+    # not more threads than the executor gives to each worker:
+    assert p._get_num_threads() == 1
+    p.set_threads_per_worker(3)
+    assert p._get_num_threads() == 3
+    ds = lt_ctx.load("archive", path=path, decompress_threads=5)
+    p = next(ds.get_partitions())
+    p.set_threads_per_worker(3)
+    assert p._get_num_threads() == 5
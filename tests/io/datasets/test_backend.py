@@ -29,6 +29,8 @@ def test_supported_backends():
     backends = IOBackend.get_supported()
     if platform.system() == "Darwin":
         assert backends == ["mmap", "buffered", "fake"]
+    elif platform.system() == "Linux":
+        assert backends == ["mmap", "buffered", "direct", "uring", "fake"]
     else:
         assert backends == ["mmap", "buffered", "direct", "fake"]
 
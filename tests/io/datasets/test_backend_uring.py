@@ -0,0 +1,137 @@
+import platform
+
+import numpy as np
+import pytest
+
+from libertem.udf.sum import SumUDF
+from libertem.udf.raw import PickUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.common import Shape
+from libertem.io.dataset.base import UringBackend, TilingScheme
+from libertem.io.dataset.base.backend_buffered import BufferedBackendImpl
+from libertem.io.dataset.base.backend_uring import UringBackendImpl
+from libertem.io.dataset.base import uring
+from libertem.io.dataset.base.uring import (
+    IoUring, uring_supported, load_acquire_u32, store_release_u32,
+)
+
+needs_uring = pytest.mark.skipif(
+    platform.system() != "Linux" or not uring_supported(),
+    reason="io_uring not available"
+)
+
+
+def _load(lt_ctx, uring_raw, **kwargs):
+    return lt_ctx.load(
+        "raw",
+        path=uring_raw._path,
+        dtype="float32",
+        nav_shape=(16, 16),
+        sig_shape=(128, 128),
+        io_backend=UringBackend(**kwargs),
+    )
+
+
+@needs_uring
+@pytest.mark.parametrize('kwargs', (
+    {},
+    {'direct_io': True},
+    # many more reads than queue entries:
+    {'chunk_size': 4096, 'queue_depth': 4},
+))
+@pytest.mark.parametrize('with_roi', (False, True))
+def test_uring_sum(lt_ctx, uring_raw, default_raw_data, kwargs, with_roi):
+    ds = _load(lt_ctx, uring_raw, **kwargs)
+    assert isinstance(ds.get_io_backend().get_impl(), UringBackendImpl)
+    roi = np.random.choice([True, False], size=(16, 16)) if with_roi else None
+    mask = np.ones((16, 16), dtype=bool) if roi is None else roi
+    res = lt_ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF()], roi=roi)
+    assert np.allclose(
+        res[0]['intensity'].data, default_raw_data[mask].sum(axis=0), atol=1e-3,
+    )
+    assert np.allclose(
+        res[1]['intensity'].raw_data, default_raw_data[mask].sum(axis=(1, 2)), atol=1e-3,
+    )
+
+
+@needs_uring
+def test_uring_pick(lt_ctx, uring_raw, default_raw_data):
+    roi = np.zeros((16, 16), dtype=bool)
+    roi[0, 0] = roi[7, 3] = roi[-1, -1] = True
+    res = lt_ctx.run_udf(dataset=uring_raw, udf=PickUDF(), roi=roi)
+    assert np.allclose(res['intensity'].raw_data, default_raw_data[roi])
+
+
+@needs_uring
+def test_uring_unregistered(lt_ctx, uring_raw, default_raw_data, monkeypatch):
+    # fall back to plain reads if buffers can't be registered:
+    monkeypatch.setattr(IoUring, 'register_buffers', lambda self, buffers: False)
+    res = lt_ctx.run_udf(dataset=uring_raw, udf=SumUDF())
+    assert np.allclose(res['intensity'].data, default_raw_data.sum(axis=(0, 1)), atol=1e-3)
+
+
+@needs_uring
+def test_uring_read_error(lt_ctx, uring_raw, monkeypatch):
+    orig = IoUring.completions
+
+    def completions(self, wait_for=1):
+        return [(user_data, -5) for user_data, _ in orig(self, wait_for)]
+
+    monkeypatch.setattr(IoUring, 'completions', completions)
+    with pytest.raises(OSError):
+        lt_ctx.run_udf(dataset=uring_raw, udf=SumUDF())
+
+
+@needs_uring
+def test_uring_stop_early(uring_raw):
+    p = next(uring_raw.get_partitions())
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((4, 32, 128), sig_dims=2),
+        dataset_shape=uring_raw.shape,
+    )
+    tiles = p.get_tiles(tiling_scheme=tiling_scheme)
+    next(tiles)
+    # the outstanding reads are waited for before the buffers are released:
+    tiles.close()
+
+
+@needs_uring
+def test_ring_read(tmpdir):
+    data = np.random.randint(0, 255, size=3 * 4096 + 17, dtype=np.uint8)
+    path = str(tmpdir / "data.bin")
+    data.tofile(path)
+    buf = bytearray(len(data))
+    with IoUring(entries=4) as ring, open(path, "rb") as f:
+        mv = memoryview(buf)
+        for i, start in enumerate(range(0, len(buf), 4096)):
+            ring.prep_read(f.fileno(), mv[start:start + 4096], start, user_data=i)
+        results = ring.completions(wait_for=4)
+    assert sorted(results) == [(0, 4096), (1, 4096), (2, 4096), (3, 17)]
+    assert np.array_equal(np.frombuffer(buf, dtype=np.uint8), data)
+
+
+def test_uring_fallback(uring_raw, monkeypatch):
+    monkeypatch.setattr(uring, '_supported', False)
+    impl = UringBackend(direct_io=True).get_impl()
+    assert type(impl) is BufferedBackendImpl
+    assert impl._direct_io
+
+
+def test_uring_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        UringBackend(chunk_size=1000)
+
+
+def test_uring_from_json():
+    backend = UringBackend.from_json({'direct_io': True, 'chunk_size': 8192})
+    assert backend._direct_io
+    assert backend._chunk_size == 8192
+    assert backend._queue_depth == 64
+
+
+def test_atomic_u32():
+    arr = np.zeros(2, dtype=np.uint32)
+    store_release_u32(arr.ctypes.data + 4, 0xFFFFFFFF)
+    assert arr[1] == 0xFFFFFFFF
+    assert arr[0] == 0
+    assert load_acquire_u32(arr.ctypes.data + 4) == 0xFFFFFFFF
@@ -0,0 +1,212 @@
+import numpy as np
+import pytest
+
+from libertem.io.dataset.base import Follow, DataSetException
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.raw import PickUDF
+
+NAV_SHAPE = (4, 4)
+SIG_SHAPE = (8, 8)
+NUM_PARTITIONS = 4
+MIB_HEADER_SIZE = 384
+
+
+@pytest.fixture
+def data():
+    return np.random.random(NAV_SHAPE + SIG_SHAPE).astype(np.float32)
+
+
+def _grow_on_refresh(ds, append, num_frames, frames_per_refresh=3):
+    """
+    Call `append(start, stop)` to write the next frames each time
+    `ds` is checked for new data, and record the available frames.
+    """
+    counts = []
+    written = [0]
+    orig = ds.refresh
+
+    def refresh(executor):
+        stop = min(num_frames, written[0] + frames_per_refresh)
+        append(written[0], stop)
+        written[0] = stop
+        counts.append(orig(executor))
+        return counts[-1]
+
+    ds.refresh = refresh
+    return counts
+
+
+def _raw_appender(path, data):
+    flat = data.reshape((-1,) + SIG_SHAPE)
+
+    def append(start, stop):
+        with open(path, "ab") as f:
+            f.write(flat[start:stop].tobytes())
+    return append
+
+
+def _load_raw(lt_ctx, path, follow, **kwargs):
+    ds = lt_ctx.load(
+        "raw", path=path, nav_shape=NAV_SHAPE, sig_shape=SIG_SHAPE,
+        dtype="float32", follow=follow, **kwargs
+    )
+    ds.set_num_cores(NUM_PARTITIONS)
+    return ds
+
+
+def test_follow_param():
+    assert Follow.from_param(False) is None
+    assert Follow.from_param(None) is None
+    assert isinstance(Follow.from_param(True), Follow)
+    follow = Follow(poll_interval=0.1)
+    assert Follow.from_param(follow) is follow
+    with pytest.raises(TypeError):
+        Follow.from_param("yes")
+    with pytest.raises(ValueError):
+        Follow(poll_interval=0)
+
+
+def test_follow_raw_iter(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.raw")
+    append = _raw_appender(path, data)
+    append(0, 1)
+    ds = _load_raw(lt_ctx, path, Follow(poll_interval=0.001))
+    assert ds.follow is not None
+    assert ds.meta.image_count == 1
+    assert tuple(ds.shape) == NAV_SHAPE + SIG_SHAPE
+    counts = _grow_on_refresh(ds, lambda start, stop: append(start + 1, stop + 1), num_frames=15)
+
+    num_results = 0
+    for res in lt_ctx.run_udf_iter(dataset=ds, udf=SumSigUDF()):
+        num_results += 1
+        damage = res.damage.data.reshape((-1,))
+        # only partitions that were completely written are processed:
+        assert np.count_nonzero(damage) <= counts[-1]
+        intensity = res.buffers[0]['intensity'].data.reshape((-1,))
+        assert np.allclose(intensity[damage], data.sum(axis=(2, 3)).reshape((-1,))[damage])
+    assert num_results == NUM_PARTITIONS
+    assert damage.all()
+    assert counts[-1] == 16
+
+
+def test_follow_raw_wait_for_first_frame(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.raw")
+    with open(path, "wb") as f:
+        # not a complete frame yet:
+        f.write(data[0, 0, :4].tobytes())
+    with pytest.raises(DataSetException):
+        _load_raw(lt_ctx, path, Follow(poll_interval=0.001, timeout=0.05))
+
+
+def test_follow_raw_run_udf(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.raw")
+    append = _raw_appender(path, data)
+    append(0, 3)
+    ds = _load_raw(lt_ctx, path, Follow(poll_interval=0.001))
+    _grow_on_refresh(ds, lambda start, stop: append(start + 3, stop + 3), num_frames=13)
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF())
+    assert np.allclose(res['intensity'].data, data.sum(axis=(0, 1)))
+
+
+def test_follow_raw_timeout(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "aborted.raw")
+    flat = data.reshape((-1,) + SIG_SHAPE)
+    with open(path, "wb") as f:
+        # the acquisition stopped in the middle of the third partition:
+        f.write(flat[:10].tobytes())
+    ds = _load_raw(lt_ctx, path, Follow(poll_interval=0.001, timeout=0.05))
+    assert ds.meta.image_count == 10
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=np.ones(NAV_SHAPE, dtype=bool))
+    picked = res['intensity'].raw_data
+    assert np.allclose(picked[:10], flat[:10])
+    assert np.allclose(picked[10:], 0)
+
+
+def test_follow_raw_sync_offset(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.raw")
+    flat = data.reshape((-1,) + SIG_SHAPE)
+    with open(path, "wb") as f:
+        f.write(flat[:2].tobytes())
+    ds = _load_raw(lt_ctx, path, Follow(poll_interval=0.001), sync_offset=2)
+    _grow_on_refresh(ds, lambda start, stop: None, num_frames=0)
+    with open(path, "ab") as f:
+        f.write(flat.tobytes())
+    res = lt_ctx.run_udf(dataset=ds, udf=SumSigUDF())
+    assert np.allclose(res['intensity'].data, data.sum(axis=(2, 3)))
+
+
+def test_raw_without_follow_ignores_growth(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.raw")
+    flat = data.reshape((-1,) + SIG_SHAPE)
+    with open(path, "wb") as f:
+        f.write(flat[:16].tobytes())
+    ds = lt_ctx.load(
+        "raw", path=path, nav_shape=(2, 4), sig_shape=SIG_SHAPE, dtype="float32",
+    )
+    assert ds.follow is None
+    with open(path, "ab") as f:
+        f.write(flat[:4].tobytes())
+    res = lt_ctx.run_udf(dataset=ds, udf=SumSigUDF())
+    assert np.allclose(res['intensity'].data.reshape((-1,)), flat[:8].sum(axis=(1, 2)))
+
+
+def test_follow_npy(lt_ctx, tmp_path, data):
+    path = str(tmp_path / "growing.npy")
+    with open(path, "wb") as f:
+        np.lib.format.write_array_header_1_0(f, {
+            'descr': np.lib.format.dtype_to_descr(data.dtype),
+            'fortran_order': False,
+            'shape': data.shape,
+        })
+    append = _raw_appender(path, data)
+    append(0, 2)
+    ds = lt_ctx.load("npy", path=path, follow=Follow(poll_interval=0.001))
+    ds.set_num_cores(NUM_PARTITIONS)
+    assert ds.meta.image_count == 2
+    counts = _grow_on_refresh(ds, lambda start, stop: append(start + 2, stop + 2), num_frames=14)
+    res = lt_ctx.run_udf(dataset=ds, udf=SumSigUDF())
+    assert np.allclose(res['intensity'].data, data.sum(axis=(2, 3)))
+    assert counts[-1] == 16
+
+
+def _append_mib(path, frames, first_image):
+    with open(path, 'ab') as f:
+        for idx, frame in enumerate(frames):
+            header = ",".join([
+                "MQ1", "%06d" % (first_image + idx), "%05d" % MIB_HEADER_SIZE, "01",
+                "%04d" % frame.shape[1], "%04d" % frame.shape[0], "U16", "   1x1",
+                "01", "2020-01-01 00:00:00.000000", "0.001000", "0", "0", "0",
+                "1.200000E+2", "12", "",
+            ]).encode("ascii")
+            f.write(header + b"\x00" * (MIB_HEADER_SIZE - len(header)))
+            f.write(frame.astype(">u2").tobytes())
+
+
+def test_follow_mib(lt_ctx, tmp_path, monkeypatch):
+    monkeypatch.setenv("LIBERTEM_MIB_HEADER_INDEX", str(tmp_path / "index"))
+    data = np.random.randint(0, 4096, size=(16,) + SIG_SHAPE).astype(np.uint16)
+    frames_per_file = 5
+
+    def append(start, stop):
+        # continue the current file, or start a new one:
+        for idx in range(start, stop):
+            file_idx = idx // frames_per_file
+            path = tmp_path / ("scan%d.mib" % (file_idx + 1))
+            _append_mib(path, data[idx:idx + 1], first_image=idx + 1)
+
+    append(0, 1)
+    ds = lt_ctx.load(
+        "mib", path=str(tmp_path / "scan1.mib"), nav_shape=NAV_SHAPE,
+        follow=Follow(poll_interval=0.001),
+    )
+    ds.set_num_cores(NUM_PARTITIONS)
+    assert ds.meta.image_count == 1
+    counts = _grow_on_refresh(
+        ds, lambda start, stop: append(start + 1, stop + 1), num_frames=15,
+    )
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=np.ones(NAV_SHAPE, dtype=bool))
+    assert counts[-1] == 16
+    assert np.array_equal(res['intensity'].raw_data, data)
+    # the header index is not used for files that are still growing:
+    assert not (tmp_path / "index").exists()
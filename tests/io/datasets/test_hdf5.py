@@ -15,6 +15,7 @@ import h5py
 from libertem.io.dataset.hdf5 import H5DataSet
 from libertem.analysis.sum import SumAnalysis
 from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.sum import SumUDF
 from libertem.udf.auto import AutoUDF
 from libertem.io.dataset.base import TilingScheme, DataSetException
 from libertem.common import Shape
@@ -850,3 +851,130 @@ def test_sync_offset_beyond_ds(lt_ctx, tmpdir_factory):
         )
 
     os.unlink(filename)
+
+
+@pytest.mark.parametrize('chunks,sync_offset', [
+    ((1, 1, 16, 16), 0),
+    ((1, 1, 16, 16), 5),
+    ((2, 4, 16, 16), 0),
+    ((2, 4, 16, 16), 5),
+    ((4, 4, 8, 8), 0),
+    ((3, 5, 7, 9), 0),
+])
+@pytest.mark.parametrize('filters', [
+    {'compression': 'gzip'},
+    {'compression': 'gzip', 'shuffle': True},
+])
+def test_direct_chunk_read(lt_ctx, tmpdir_factory, chunks, filters, sync_offset):
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'compressed.h5')
+    data = _mk_random(size=(8, 8, 16, 16), dtype='uint16')
+    with h5py.File(filename, "w") as f:
+        f.create_dataset("data", data=data, chunks=chunks, **filters)
+
+    ds = lt_ctx.load(
+        "hdf5", path=filename, ds_path="data", sync_offset=sync_offset,
+        target_size=16 * 16 * 2 * 16,
+    )
+    p = next(ds.get_partitions())
+    with p._get_h5ds() as h5ds:
+        assert p._get_chunk_reader(h5ds) is not None
+
+    res = lt_ctx.run_udf(dataset=ds, udf=[SumSigUDF(), SumUDF()])
+    flat = data.reshape((64, 16, 16)).astype(np.float32)
+    expected = np.zeros_like(flat)
+    expected[:64 - sync_offset] = flat[sync_offset:]
+    assert np.allclose(res[0]['intensity'].raw_data, expected.sum(axis=(1, 2)))
+    assert np.allclose(res[1]['intensity'].data, expected.sum(axis=0))
+
+
+def test_direct_chunk_read_matches_h5py(lt_ctx, tmpdir_factory):
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'compressed.h5')
+    data = _mk_random(size=(8, 8, 32, 32), dtype='>f4')
+    with h5py.File(filename, "w") as f:
+        f.create_dataset(
+            "data", data=data, chunks=(2, 2, 16, 32), compression='gzip', shuffle=True,
+        )
+    results = []
+    for direct in (True, False):
+        ds = lt_ctx.load("hdf5", path=filename, ds_path="data", direct_chunk_read=direct)
+        results.append(lt_ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF()]))
+    assert np.allclose(results[0][0]['intensity'].data, data.sum(axis=(0, 1)))
+    assert np.array_equal(results[0][0]['intensity'].data, results[1][0]['intensity'].data)
+    assert np.array_equal(results[0][1]['intensity'].data, results[1][1]['intensity'].data)
+
+
+def test_direct_chunk_read_threads(lt_ctx, tmpdir_factory):
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'compressed.h5')
+    with h5py.File(filename, "w") as f:
+        f.create_dataset(
+            "data", data=np.ones((4, 4, 16, 16)), chunks=(1, 1, 16, 16), compression='gzip',
+        )
+    ds = lt_ctx.load("hdf5", path=filename, ds_path="data")
+    p = next(ds.get_partitions())
+    with p._get_h5ds() as h5ds:
+        # not more threads than the executor gives to each worker:
+        assert p._get_chunk_reader(h5ds)._num_threads == 1
+        p.set_threads_per_worker(3)
+        assert p._get_chunk_reader(h5ds)._num_threads == 3
+    ds = lt_ctx.load("hdf5", path=filename, ds_path="data", decompress_threads=5)
+    p = next(ds.get_partitions())
+    p.set_threads_per_worker(3)
+    with p._get_h5ds() as h5ds:
+        assert p._get_chunk_reader(h5ds)._num_threads == 5
+
+
+def test_direct_chunk_read_unallocated(lt_ctx, tmpdir_factory):
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'sparse.h5')
+    with h5py.File(filename, "w") as f:
+        d = f.create_dataset(
+            "data", shape=(4, 4, 16, 16), dtype='float32', chunks=(1, 2, 16, 16),
+            compression='gzip', fillvalue=3,
+        )
+        d[1] = 1
+    expected = np.full((4, 4, 16, 16), 3, dtype=np.float32)
+    expected[1] = 1
+    ds = lt_ctx.load("hdf5", path=filename, ds_path="data")
+    res = lt_ctx.run_udf(dataset=ds, udf=SumSigUDF())
+    assert np.allclose(res['intensity'].data, expected.sum(axis=(2, 3)))
+
+
+def test_direct_chunk_read_unsupported_filter(lt_ctx, tmpdir_factory):
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'lzf.h5')
+    with h5py.File(filename, "w") as f:
+        f.create_dataset(
+            "data", data=np.ones((4, 4, 16, 16)), chunks=(1, 1, 16, 16), compression='lzf',
+        )
+        f.create_dataset(
+            "uncompressed", data=np.ones((4, 4, 16, 16)), chunks=(1, 1, 16, 16),
+        )
+    ds = lt_ctx.load("hdf5", path=filename, ds_path="data")
+    p = next(ds.get_partitions())
+    with h5py.File(filename, "r") as f:
+        # falls back to reading through HDF5:
+        assert p._get_chunk_reader(f["data"]) is None
+        assert p._get_chunk_reader(f["uncompressed"]) is None
+
+
+@pytest.mark.parametrize('filter_name', ['LZ4', 'Bitshuffle'])
+def test_direct_chunk_read_plugins(lt_ctx, tmpdir_factory, filter_name):
+    hdf5plugin = pytest.importorskip("hdf5plugin")
+    pytest.importorskip({"LZ4": "lz4", "Bitshuffle": "bitshuffle"}[filter_name])
+    datadir = tmpdir_factory.mktemp('data')
+    filename = os.path.join(datadir, 'plugin.h5')
+    data = _mk_random(size=(8, 8, 16, 16), dtype='uint16')
+    with h5py.File(filename, "w") as f:
+        f.create_dataset(
+            "data", data=data, chunks=(1, 2, 16, 16),
+            **getattr(hdf5plugin, filter_name)(),
+        )
+    ds = lt_ctx.load("hdf5", path=filename, ds_path="data")
+    p = next(ds.get_partitions())
+    with p._get_h5ds() as h5ds:
+        assert p._get_chunk_reader(h5ds) is not None
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF())
+    assert np.allclose(res['intensity'].data, data.sum(axis=(0, 1)))
@@ -0,0 +1,137 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from libertem.io.dataset import k2is
+from libertem.io.dataset.k2is import (
+    K2ISDataSet, K2SyncIndex, get_sync_info, BLOCK_SIZE, HEADER_SIZE, NUM_SECTORS,
+    BLOCKS_PER_SECTOR_PER_FRAME,
+)
+from libertem.udf.raw import PickUDF
+
+LEADING_BLOCKS = 5
+NUM_FRAMES = 3
+TRAILING_BLOCKS = 7
+
+
+def _write_sectors(directory):
+    """
+    Write the .bin files of a small K2IS data set: in each sector, a partial
+    frame, followed by `NUM_FRAMES` complete frames and another partial frame.
+    """
+    header_dtype = np.dtype([
+        (name, dtype) for name, dtype in k2is.DataBlock.header_dtype
+    ])
+    block_dtype = np.dtype([
+        ('header', header_dtype),
+        ('data', np.uint8, BLOCK_SIZE - HEADER_SIZE),
+    ])
+    first_block = BLOCKS_PER_SECTOR_PER_FRAME - LEADING_BLOCKS
+    block_counts = np.arange(
+        first_block,
+        (NUM_FRAMES + 1) * BLOCKS_PER_SECTOR_PER_FRAME + TRAILING_BLOCKS,
+    )
+    paths = []
+    for sector in range(NUM_SECTORS):
+        blocks = np.zeros(len(block_counts), dtype=block_dtype)
+        header = blocks['header']
+        header['sync'] = 0xFFFF0055
+        header['block_count'] = block_counts
+        header['width'] = 256
+        header['height'] = 1860
+        header['frame_id'] = block_counts // BLOCKS_PER_SECTOR_PER_FRAME
+        header['flags'] = 1
+        header['block_size'] = BLOCK_SIZE
+        blocks['data'] = (header['frame_id'] * 16 + sector)[:, np.newaxis]
+        path = os.path.join(directory, "k2is_%d.bin" % (sector + 1))
+        blocks.tofile(path)
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def k2is_files(tmp_path, monkeypatch):
+    # there is no .gtg file, so the data set is treated as a time series:
+    monkeypatch.setattr(k2is, '_get_nav_shape', lambda path: None)
+    return _write_sectors(str(tmp_path))
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "index")
+    monkeypatch.setenv("LIBERTEM_K2IS_SYNC_INDEX", path)
+    return path
+
+
+def _no_scan(monkeypatch):
+    def _scan_sync_info(paths):
+        raise AssertionError("sectors should not be scanned")
+    monkeypatch.setattr(k2is, '_scan_sync_info', _scan_sync_info)
+
+
+def test_sync_info(k2is_files, index_dir):
+    info = get_sync_info(k2is_files)
+    first = LEADING_BLOCKS * BLOCK_SIZE
+    last = first + (NUM_FRAMES * BLOCKS_PER_SECTOR_PER_FRAME - 1) * BLOCK_SIZE
+    assert info == {
+        'image_count': NUM_FRAMES,
+        'num_frames_w_shutter_active_flag_set': NUM_FRAMES,
+        'first_block_offsets': NUM_SECTORS * [first],
+        'last_block_offsets': NUM_SECTORS * [last],
+    }
+
+
+def test_load_uses_index(lt_ctx, k2is_files, index_dir, monkeypatch):
+    ds = lt_ctx.load("k2is", path=k2is_files[0])
+    assert tuple(ds.shape) == (NUM_FRAMES, 1860, 2048)
+    assert len(os.listdir(index_dir)) == 1
+    roi = np.ones(NUM_FRAMES, dtype=bool)
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=roi)
+
+    _no_scan(monkeypatch)
+    ds2 = lt_ctx.load("k2is", path=k2is_files[0])
+    assert ds2._start_offsets == ds._start_offsets
+    assert ds2._last_offsets == ds._last_offsets
+    assert tuple(ds2.shape) == tuple(ds.shape)
+    res2 = lt_ctx.run_udf(dataset=ds2, udf=PickUDF(), roi=roi)
+    assert np.array_equal(res['intensity'].raw_data, res2['intensity'].raw_data)
+    # the frames of the synthetic data are distinguishable:
+    assert len({frame.sum() for frame in res2['intensity'].raw_data}) == NUM_FRAMES
+
+
+def test_detect_uses_index(lt_ctx, k2is_files, index_dir, monkeypatch):
+    params = K2ISDataSet.detect_params(k2is_files[3], lt_ctx.executor)
+    _no_scan(monkeypatch)
+    assert K2ISDataSet.detect_params(k2is_files[3], lt_ctx.executor) == params
+    assert params['info']['image_count'] == NUM_FRAMES
+
+
+def test_index_invalidation(k2is_files, index_dir, monkeypatch):
+    info = get_sync_info(k2is_files)
+    path = k2is_files[5]
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    index = K2SyncIndex.for_files(k2is_files)
+    assert index.get(k2is_files) is None
+    assert get_sync_info(k2is_files) == info
+    assert index.get(k2is_files) == info
+
+
+def test_index_other_version(k2is_files, index_dir):
+    info = get_sync_info(k2is_files)
+    index = K2SyncIndex.for_files(k2is_files)
+    with open(index.path) as f:
+        content = json.load(f)
+    content['version'] = -1
+    with open(index.path, "w") as f:
+        json.dump(content, f)
+    assert index.get(k2is_files) is None
+    assert get_sync_info(k2is_files) == info
+
+
+def test_index_disabled(k2is_files, monkeypatch):
+    monkeypatch.setenv("LIBERTEM_K2IS_SYNC_INDEX", "0")
+    assert K2SyncIndex.for_files(k2is_files) is None
+    assert get_sync_info(k2is_files)['image_count'] == NUM_FRAMES
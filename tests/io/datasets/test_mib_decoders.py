@@ -12,6 +12,13 @@ from libertem.io.dataset.mib import (
     decode_r1_swap,
     decode_r6_swap,
     decode_r12_swap,
+    decode_r24_swap,
+    decode_r1_swap_vec,
+    decode_r6_swap_vec,
+    decode_r12_swap_vec,
+    decode_r24_swap_vec,
+    get_decode_impl,
+    MIBDecoder,
 )
 
 
@@ -43,6 +50,9 @@ def encode_roundtrip(encode, decode, bits_per_pixel, shape=(512, 512)):
         (encode_r1, decode_r1_swap, 1),
         (encode_r6, decode_r6_swap, 8),
         (encode_r12, decode_r12_swap, 16),
+        (encode_r1, decode_r1_swap_vec, 1),
+        (encode_r6, decode_r6_swap_vec, 8),
+        (encode_r12, decode_r12_swap_vec, 16),
         (encode_u1,  default_decode, 8),
         (encode_u2,  decode_swap_2, 16),
     ],
@@ -50,3 +60,76 @@ def encode_roundtrip(encode, decode, bits_per_pixel, shape=(512, 512)):
 def test_encode_roundtrip(encode, decode, bits_per_pixel):
     data, decoded = encode_roundtrip(encode, decode, bits_per_pixel, shape=(256, 256))
     assert_allclose(data, decoded)
+
+
+@pytest.mark.parametrize('dtype', (np.float32, np.uint16))
+@pytest.mark.parametrize(
+    'encode,reference,vectorized,bits_per_pixel', [
+        (encode_r1, decode_r1_swap, decode_r1_swap_vec, 1),
+        (encode_r6, decode_r6_swap, decode_r6_swap_vec, 8),
+        (encode_r12, decode_r12_swap, decode_r12_swap_vec, 16),
+    ],
+)
+def test_vectorized_matches_reference(encode, reference, vectorized, bits_per_pixel, dtype):
+    data = np.random.randint(0, 1 << min(bits_per_pixel, 12), (3, 256, 256))
+    encoded = np.zeros((3, 256, 256 * bits_per_pixel // 8), dtype=np.uint8)
+    for i in range(3):
+        encode(inp=data[i], out=encoded[i])
+    zeros = np.zeros(1, dtype=np.uint64)
+    results = []
+    for decode in (reference, vectorized):
+        out = np.zeros((3, 256 * 256), dtype=dtype)
+        for i in range(3):
+            # inputs at an odd offset, as they are in the files:
+            buf = np.zeros(encoded[i].size + 1, dtype=np.uint8)
+            buf[1:] = encoded[i].reshape((-1,))
+            decode(buf[1:], out, i, np.uint8, zeros, zeros, zeros, zeros)
+        results.append(out)
+    assert np.array_equal(results[0], results[1])
+    assert np.array_equal(results[1], data.reshape((3, -1)))
+
+
+def test_r24_vectorized_matches_reference():
+    data = np.random.randint(0, 1 << 24, (2, 256, 256))
+    # two 12bit frames, the first one with the most significant bits:
+    encoded = np.zeros((2, 256, 256 * 2), dtype=np.uint8)
+    encode_r12(inp=data[0] >> 12, out=encoded[0])
+    encode_r12(inp=data[0] & 0xFFF, out=encoded[1])
+    zeros = np.zeros(1, dtype=np.uint64)
+    results = []
+    for decode in (decode_r24_swap, decode_r24_swap_vec):
+        out = np.zeros((1, 256 * 256), dtype=np.uint32)
+        for idx in range(2):
+            decode(encoded[idx].reshape((-1,)), out, idx, np.uint8, zeros, zeros, zeros, zeros)
+        results.append(out)
+    assert np.array_equal(results[0], results[1])
+    assert np.array_equal(results[1], data[:1].reshape((1, -1)))
+
+
+@pytest.mark.parametrize('impl', ('reference', 'vectorized'))
+def test_decode_impl_env(monkeypatch, impl):
+    monkeypatch.setenv("LIBERTEM_MIB_DECODE_IMPL", impl)
+    assert get_decode_impl() == impl
+
+
+def test_decode_impl_invalid(monkeypatch):
+    monkeypatch.setenv("LIBERTEM_MIB_DECODE_IMPL", "fastest")
+    with pytest.raises(ValueError):
+        get_decode_impl()
+    with pytest.raises(ValueError):
+        MIBDecoder(header={}, impl="fastest")
+
+
+@pytest.mark.parametrize(
+    'impl,decode', [
+        ('reference', decode_r6_swap),
+        ('vectorized', decode_r6_swap_vec),
+    ],
+)
+def test_decoder_impl(impl, decode):
+    header = {
+        'mib_kind': 'r', 'dtype': np.uint8, 'bits_per_pixel': 6,
+        'sensor_layout': (1, 1), 'num_chips': 1,
+    }
+    decoder = MIBDecoder(header=header, impl=impl)
+    assert decoder.get_decode(native_dtype=np.uint8, read_dtype=np.float32) is decode
@@ -115,7 +115,7 @@ class MMapBackendImplInMem(MMapBackendImpl):
 
 def encode_roundtrip_quad(
     encode, bits_per_pixel, input_data=None, dataset_shape=None, tileshape=None,
-    start_at_frame=2, stop_before_frame=6
+    start_at_frame=2, stop_before_frame=6, impl=None,
 ):
     if dataset_shape is None:
         # make some read ranges:
@@ -192,7 +192,7 @@ def encode_roundtrip_quad(
     file.data = encoded_data
 
     # wrapping the numba decoder function:
-    decoder = MIBDecoder(header=fields)
+    decoder = MIBDecoder(header=fields, impl=impl)
 
     outer_slice = Slice(
         origin=(start_at_frame, 0, 0),
@@ -261,6 +261,21 @@ def test_encode_roundtrip_quad_slow(encode, bits_per_pixel):
     assert_allclose(data, decoded)
 
 
+@pytest.mark.parametrize('impl', ('reference', 'vectorized'))
+@pytest.mark.parametrize(
+    'encode,bits_per_pixel', [
+        (encode_r1, 1),
+        (encode_r6, 8),
+        (encode_r12, 16),
+    ],
+)
+def test_encode_roundtrip_quad_impl(encode, bits_per_pixel, impl):
+    data, decoded = encode_roundtrip_quad(
+        encode, bits_per_pixel, tileshape=(3, 64, 512), impl=impl,
+    )
+    assert_allclose(data, decoded)
+
+
 @pytest.mark.parametrize('bits_per_pixel', (1, 8, 16))
 def test_readranges_quad(bits_per_pixel):
     # make some read ranges:
@@ -0,0 +1,133 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from libertem.io.dataset import mib
+from libertem.io.dataset.mib import (
+    MIBHeaderIndex, MIBHeaderReader, read_headers, get_image_count_and_sig_shape,
+)
+from libertem.udf.raw import PickUDF
+
+HEADER_SIZE = 384
+
+
+def _write_mib(path, data, first_image):
+    with open(path, 'wb') as f:
+        for idx, frame in enumerate(data):
+            header = ",".join([
+                "MQ1", "%06d" % (first_image + idx), "%05d" % HEADER_SIZE, "01",
+                "%04d" % frame.shape[1], "%04d" % frame.shape[0], "U16", "   1x1",
+                "01", "2020-01-01 00:00:00.000000", "0.001000", "0", "0", "0",
+                "1.200000E+2", "12", "",
+            ]).encode("ascii")
+            f.write(header + b"\x00" * (HEADER_SIZE - len(header)))
+            f.write(frame.astype(">u2").tobytes())
+
+
+@pytest.fixture
+def mib_files(tmp_path):
+    data = np.random.randint(0, 4096, size=(8 * 4, 16, 16)).astype(np.uint16)
+    for i in range(8):
+        _write_mib(tmp_path / ("scan%d.mib" % (i + 1)), data[i * 4:(i + 1) * 4], i * 4 + 1)
+    return str(tmp_path / "scan1.mib"), data
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "index")
+    monkeypatch.setenv("LIBERTEM_MIB_HEADER_INDEX", path)
+    return path
+
+
+def _count_reads(monkeypatch):
+    paths = []
+    orig = MIBHeaderReader.read_header
+
+    def read_header(self):
+        paths.append(self.path)
+        return orig(self)
+
+    monkeypatch.setattr(MIBHeaderReader, "read_header", read_header)
+    return paths
+
+
+def test_read_headers_matches_sequential(mib_files, index_dir):
+    path, _ = mib_files
+    fns = mib.get_filenames(path)
+    headers = read_headers(fns, num_threads=4)
+    assert list(headers.keys()) == fns
+    for fn in fns:
+        assert headers[fn] == MIBHeaderReader(fn).read_header()
+
+
+def test_load_uses_index(lt_ctx, mib_files, index_dir, monkeypatch):
+    path, data = mib_files
+    ds = lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    assert len(os.listdir(index_dir)) == 1
+
+    reads = _count_reads(monkeypatch)
+    ds2 = lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    assert reads == []
+    assert ds2.shape == ds.shape
+    assert ds2.dtype == ds.dtype
+    assert ds2._headers == ds._headers
+    res = lt_ctx.run_udf(dataset=ds2, udf=PickUDF(), roi=np.ones((4, 8), dtype=bool))
+    assert np.array_equal(res['intensity'].raw_data, data)
+
+
+def test_index_invalidation(lt_ctx, mib_files, index_dir, monkeypatch):
+    path, data = mib_files
+    lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    changed = os.path.join(os.path.dirname(path), "scan3.mib")
+    _write_mib(changed, data[8:14], 9)
+    st = os.stat(changed)
+    os.utime(changed, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    reads = _count_reads(monkeypatch)
+    ds = lt_ctx.load("mib", path=path, nav_shape=(4, 9))
+    assert reads == [changed]
+    assert ds._headers[changed]['num_images'] == 6
+
+    reads.clear()
+    lt_ctx.load("mib", path=path, nav_shape=(4, 9))
+    assert reads == []
+
+
+def test_detect_uses_index(mib_files, index_dir, monkeypatch):
+    path, data = mib_files
+    assert get_image_count_and_sig_shape(path) == (32, (16, 16))
+    reads = _count_reads(monkeypatch)
+    assert get_image_count_and_sig_shape(path) == (32, (16, 16))
+    assert reads == []
+
+
+def test_index_disabled(lt_ctx, mib_files, monkeypatch):
+    monkeypatch.setenv("LIBERTEM_MIB_HEADER_INDEX", "0")
+    path, _ = mib_files
+    assert MIBHeaderIndex.for_path(path) is None
+    reads = _count_reads(monkeypatch)
+    lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    assert len(reads) == 8
+
+
+def test_corrupt_index(lt_ctx, mib_files, index_dir):
+    path, _ = mib_files
+    index = MIBHeaderIndex.for_path(path)
+    os.makedirs(index_dir)
+    with open(index.path, "w") as f:
+        f.write("{not json")
+    ds = lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    assert tuple(ds.shape) == (4, 8, 16, 16)
+    with open(index.path) as f:
+        assert len(json.load(f)["entries"]) == 8
+
+
+def test_unwritable_index(lt_ctx, mib_files, tmp_path, monkeypatch):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    monkeypatch.setenv("LIBERTEM_MIB_HEADER_INDEX", str(blocker / "index"))
+    path, _ = mib_files
+    ds = lt_ctx.load("mib", path=path, nav_shape=(4, 8))
+    assert tuple(ds.shape) == (4, 8, 16, 16)
@@ -16,6 +16,10 @@ from libertem.udf.sum import SumUDF
 from libertem.udf.sumsigudf import SumSigUDF
 from libertem.udf.masks import ApplyMasksUDF
 from libertem.udf.stddev import StdDevUDF
+from libertem.udf.raw import PickUDF
+from libertem.udf import raw as raw_module
+from libertem.udf import base as udf_base
+from libertem.io.dataset.base.tiling_scheme import Negotiator
 from libertem.common.math import prod
 
 from utils import _mk_random, get_testdata_path
@@ -440,3 +444,77 @@ def test_large_file_detect(monkeypatch, default_raw, inline_executor_fast):
     detects = RawCSRDataSet.detect_params(filepath, inline_executor_fast)
     assert not detects
     assert not load_called
+
+
+@pytest.fixture
+def no_densify(monkeypatch):
+    def for_backend(arr, backend):
+        raise AssertionError(f"tile converted to {backend}")
+    monkeypatch.setattr(udf_base, "for_backend", for_backend)
+
+
+@pytest.mark.parametrize(
+    'use_roi', (False, True)
+)
+def test_sparse_native_udfs(raw_csr_generated, mock_sparse_data, lt_ctx, no_densify, use_roi):
+    _, data_flat = mock_sparse_data
+    ds = raw_csr_generated
+    if use_roi:
+        roi = np.random.choice([True, False], data_flat.shape[0])
+    else:
+        roi = np.ones(data_flat.shape[0], dtype=bool)
+    masks = np.random.random(size=(3, *ds.shape.sig))
+    udfs = [
+        SumUDF(), SumSigUDF(), StdDevUDF(), ApplyMasksUDF(mask_factories=lambda: masks),
+        PickUDF(),
+    ]
+    res = lt_ctx.run_udf(dataset=ds, udf=udfs, roi=roi.reshape(ds.shape.nav))
+    ref = data_flat[roi].astype(np.float64)
+
+    assert_allclose(res[0]['intensity'].data.reshape((-1, )), ref.sum(axis=0), rtol=1e-5)
+    assert_allclose(res[1]['intensity'].raw_data, ref.sum(axis=1), rtol=1e-5)
+    assert_allclose(res[2]['std'].data.reshape((-1, )), ref.std(axis=0), rtol=1e-5)
+    assert_allclose(res[2]['mean'].data.reshape((-1, )), ref.mean(axis=0), rtol=1e-5)
+    assert res[2]['num_frames'].data == np.count_nonzero(roi)
+    assert_allclose(
+        res[3]['intensity'].raw_data,
+        ref @ masks.reshape((3, -1)).T,
+        rtol=1e-5,
+    )
+    assert np.array_equal(
+        res[4]['intensity'].raw_data.reshape((-1, data_flat.shape[1])),
+        data_flat[roi],
+    )
+
+
+def test_pick_non_numba_csr(raw_csr_generated, mock_sparse_data, lt_ctx, monkeypatch):
+    # tiles with dtypes that the numba kernels don't support are densified:
+    monkeypatch.setattr(raw_module, "is_numba_csr", lambda tile: False)
+    _, data_flat = mock_sparse_data
+    ds = raw_csr_generated
+    roi = np.random.choice([True, False], data_flat.shape[0])
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=roi.reshape(ds.shape.nav))
+    assert np.array_equal(
+        res['intensity'].raw_data.reshape((-1, data_flat.shape[1])),
+        data_flat[roi],
+    )
+
+
+def test_sparse_native_tiles(raw_csr_generated, monkeypatch):
+    ds = raw_csr_generated
+    sig_size = prod(tuple(ds.shape.sig))
+    # two frames as dense float64, which has to be converted from float32:
+    monkeypatch.setattr(ds, "get_max_io_size", lambda: 2 * sig_size * 8)
+    partition = next(ds.get_partitions())
+
+    def depth(array_backends):
+        scheme = Negotiator().get_scheme(
+            udfs=[SumUDF()], dataset=ds, read_dtype=np.float64,
+            approx_partition_shape=partition.shape, array_backends=array_backends,
+        )
+        return scheme.depth
+
+    assert depth(None) == 2
+    assert depth((SCIPY_CSR, NUMPY)) == 2
+    # no densification, so the tiles can span the partition:
+    assert depth((SCIPY_CSR, )) == partition.shape[0]
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+import pytest
+
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.common import Shape
+from libertem.io.dataset.base import MMapBackend, TilingScheme
+from libertem.io.dataset.base import readahead
+from libertem.io.dataset.base.readahead import ReadaheadScheduler, _get_tile_extents
+
+needs_fadvise = pytest.mark.skipif(
+    not hasattr(os, "posix_fadvise"), reason="posix_fadvise not available"
+)
+
+
+def _load(lt_ctx, raw, **kwargs):
+    return lt_ctx.load(
+        "raw",
+        path=raw._path,
+        dtype="float32",
+        nav_shape=(16, 16),
+        sig_shape=(128, 128),
+        io_backend=MMapBackend(**kwargs),
+    )
+
+
+def _record_advice(monkeypatch):
+    calls = []
+    orig = os.posix_fadvise
+
+    def posix_fadvise(fd, offset, length, advice):
+        calls.append((offset, length, advice))
+        return orig(fd, offset, length, advice)
+
+    monkeypatch.setattr(readahead.os, 'posix_fadvise', posix_fadvise)
+    return calls
+
+
+@needs_fadvise
+@pytest.mark.parametrize('kwargs', (
+    {'readahead_bytes': 2**20},
+    {'readahead_bytes': 2**20, 'drop_behind': True},
+    {'drop_behind': True},
+))
+@pytest.mark.parametrize('read_dtype', ('float32', 'float64'))
+@pytest.mark.parametrize('with_roi', (False, True))
+def test_readahead_results(lt_ctx, default_raw, default_raw_data, kwargs, read_dtype, with_roi):
+    ds = _load(lt_ctx, default_raw, **kwargs)
+    roi = np.random.choice([True, False], size=(16, 16)) if with_roi else None
+    mask = np.ones((16, 16), dtype=bool) if roi is None else roi
+    res = lt_ctx.run_udf(
+        dataset=ds, udf=[SumUDF(dtype=read_dtype), SumSigUDF()], roi=roi,
+    )
+    assert np.allclose(
+        res[0]['intensity'].data, default_raw_data[mask].sum(axis=0), atol=1e-3,
+    )
+    assert np.allclose(
+        res[1]['intensity'].raw_data, default_raw_data[mask].sum(axis=(1, 2)), atol=1e-3,
+    )
+
+
+@needs_fadvise
+def test_readahead_budget(lt_ctx, default_raw, monkeypatch):
+    frame_bytes = 128 * 128 * 4
+    ds = _load(lt_ctx, default_raw, readahead_bytes=8 * frame_bytes)
+    p = next(ds.get_partitions())
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((2, 128, 128), sig_dims=2),
+        dataset_shape=ds.shape,
+    )
+    calls = _record_advice(monkeypatch)
+    tiles = p.get_tiles(tiling_scheme=tiling_scheme)
+    next(tiles)
+    # the next four tiles of two frames each are announced, excluding the current one:
+    assert calls == [
+        (p.slice.origin[0] * frame_bytes + i * 2 * frame_bytes, 2 * frame_bytes,
+         os.POSIX_FADV_WILLNEED)
+        for i in range(1, 5)
+    ]
+    calls.clear()
+    next(tiles)
+    assert [c[2] for c in calls] == [os.POSIX_FADV_WILLNEED]
+    tiles.close()
+
+
+@needs_fadvise
+def test_drop_behind(lt_ctx, default_raw, monkeypatch):
+    frame_bytes = 128 * 128 * 4
+    ds = _load(lt_ctx, default_raw, drop_behind=True)
+    p = next(ds.get_partitions())
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((4, 128, 128), sig_dims=2),
+        dataset_shape=ds.shape,
+    )
+    calls = _record_advice(monkeypatch)
+    num_tiles = len(list(p.get_tiles(tiling_scheme=tiling_scheme)))
+    start = p.slice.origin[0] * frame_bytes
+    dropped = [(offset, length) for offset, length, advice in calls
+               if advice == os.POSIX_FADV_DONTNEED]
+    # each tile is dropped right before the next one is read:
+    assert dropped == [
+        (start + i * 4 * frame_bytes, 4 * frame_bytes)
+        for i in range(num_tiles - 1)
+    ]
+
+
+def test_drop_behind_overlapping_tiles():
+    # two tiles per frame stack, split in the signal dimension; ranges of
+    # the first tile must not be dropped while the second one still needs them:
+    ranges = np.array([
+        [[0, 0, 100], [0, 200, 300]],
+        [[0, 100, 200], [0, 300, 400]],
+        [[0, 400, 500], [0, 600, 700]],
+    ], dtype=np.int64)
+    extents = _get_tile_extents(1, ranges)
+    assert np.array_equal(extents[:, 0], [[0, 300], [100, 400], [400, 700]])
+    sched = ReadaheadScheduler([None], ranges, budget=0, drop_behind=True)
+    assert list(sched._needed_from[:, 0]) == [0, 100, 400]
+    assert list(sched._consumed_upto[:, 0]) == [300, 400, 700]
+
+
+def test_not_a_file(lt_ctx):
+    data = np.zeros((4, 4, 16, 16), dtype=np.float32)
+    ds = lt_ctx.load('memory', data=data, num_partitions=2)
+    p = next(ds.get_partitions())
+    with p.get_io_backend().get_impl().open_files(p._fileset) as open_files:
+        ranges = np.zeros((1, 1, 3), dtype=np.int64)
+        assert readahead.make_readahead(open_files, ranges, 2**20, True) is None
+
+
+def test_invalid_budget():
+    with pytest.raises(ValueError):
+        MMapBackend(readahead_bytes=-1)
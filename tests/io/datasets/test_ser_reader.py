@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+from ncempy.io.ser import fileSER
+
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.raw import PickUDF
+from libertem.io.dataset.base import (
+    TilingScheme, MMapBackend, BufferedBackend, DirectBackend,
+)
+from libertem.io.dataset.ser import SERDataSet
+from libertem.common import Shape
+
+from utils import _mk_random
+
+_DTYPE_IDS = {
+    np.dtype('uint8'): 1, np.dtype('uint16'): 2, np.dtype('uint32'): 3,
+    np.dtype('int16'): 5, np.dtype('int32'): 6, np.dtype('float32'): 7,
+}
+
+
+def _write_ser(path, data, nav_dims, gaps=None, tags_between=False):
+    """
+    Write a minimal TIA SER file (version 0x0220) with 2D elements.
+
+    `gaps` maps frame indices to the number of padding bytes inserted
+    before that frame, and with `tags_between`, the tags are stored
+    between the frames instead of at the end.
+    """
+    gaps = gaps or {}
+    num_frames = data.shape[0]
+    header = np.array([0x4949, 0x0197, 0x0220], dtype='<i2').tobytes()
+    header += np.array([0x4122, 0x4152, num_frames, num_frames], dtype='<i4').tobytes()
+    offset_array_pos = len(header)
+    header += np.zeros(1, dtype='<i8').tobytes()  # patched below
+    header += np.array([len(nav_dims)], dtype='<i4').tobytes()
+    for size in nav_dims:
+        header += np.array([size], dtype='<i4').tobytes()
+        header += np.array([0.0, 1.0], dtype='<f8').tobytes()
+        header += np.array([0, 0], dtype='<i4').tobytes()  # element, description length
+        header += np.array([0], dtype='<i4').tobytes()  # units length
+    buf = bytearray(header)
+    data_offsets = []
+    tag_offsets = []
+    for idx, frame in enumerate(data):
+        buf += b'\xff' * gaps.get(idx, 0)
+        data_offsets.append(len(buf))
+        for _ in range(2):
+            buf += np.array([0.0, 1.0], dtype='<f8').tobytes()
+            buf += np.array([0], dtype='<i4').tobytes()
+        buf += np.array([_DTYPE_IDS[data.dtype]], dtype='<i2').tobytes()
+        buf += np.array([frame.shape[1], frame.shape[0]], dtype='<i4').tobytes()
+        buf += np.flipud(frame).astype(data.dtype.newbyteorder('<')).tobytes()
+        if tags_between:
+            tag_offsets.append(len(buf))
+            buf += np.array([0x4152, 0], dtype='<i2').tobytes()
+            buf += np.array([idx], dtype='<i4').tobytes()
+    if not tags_between:
+        for idx in range(num_frames):
+            tag_offsets.append(len(buf))
+            buf += np.array([0x4152, 0], dtype='<i2').tobytes()
+            buf += np.array([idx], dtype='<i4').tobytes()
+    offset_array = len(buf)
+    buf += np.array(data_offsets, dtype='<i8').tobytes()
+    buf += np.array(tag_offsets, dtype='<i8').tobytes()
+    buf[offset_array_pos:offset_array_pos + 8] = np.array([offset_array], dtype='<i8').tobytes()
+    with open(path, 'wb') as f:
+        f.write(buf)
+
+
+@pytest.fixture(scope='module')
+def ser_data():
+    return _mk_random(size=(6 * 5, 16, 24), dtype='float32')
+
+
+@pytest.fixture(scope='module', params=['regular', 'tags_between', 'gaps'])
+def ser_file(request, tmpdir_factory, ser_data):
+    path = str(tmpdir_factory.mktemp('data') / f'{request.param}.ser')
+    _write_ser(
+        path, ser_data, nav_dims=(5, 6),
+        tags_between=request.param == 'tags_between',
+        gaps={7: 3, 8: 1, 20: 9} if request.param == 'gaps' else None,
+    )
+    return path
+
+
+def test_matches_ncempy(ser_file, ser_data):
+    with fileSER(ser_file) as f:
+        for idx in (0, 7, len(ser_data) - 1):
+            data, _ = f.getDataset(idx)
+            assert np.array_equal(data, ser_data[idx])
+
+
+def test_runs(lt_ctx, ser_file):
+    ds = lt_ctx.load('ser', path=ser_file)
+    assert tuple(ds.shape) == (6, 5, 16, 24)
+    if ser_file.endswith('gaps.ser'):
+        assert ds._runs == [(0, 7), (7, 8), (8, 20), (20, 30)]
+    else:
+        assert ds._runs == [(0, 30)]
+
+
+@pytest.mark.parametrize('backend', (None, MMapBackend(), BufferedBackend(), DirectBackend()))
+@pytest.mark.parametrize('with_roi', (False, True))
+def test_read(lt_ctx, ser_file, ser_data, backend, with_roi):
+    ds = lt_ctx.load('ser', path=ser_file, io_backend=backend)
+    roi = np.random.choice([True, False], size=ds.shape.nav) if with_roi else None
+    mask = np.ones(tuple(ds.shape.nav), dtype=bool) if roi is None else roi
+    expected = ser_data.reshape((6, 5, 16, 24))[mask]
+    res = lt_ctx.run_udf(dataset=ds, udf=[SumUDF(), SumSigUDF(), PickUDF()], roi=roi)
+    assert np.allclose(res[0]['intensity'].data, expected.sum(axis=0))
+    assert np.allclose(res[1]['intensity'].raw_data, expected.sum(axis=(1, 2)))
+    assert np.array_equal(res[2]['intensity'].raw_data, expected)
+
+
+def test_multi_frame_tiles(lt_ctx, ser_file, ser_data):
+    ds = lt_ctx.load('ser', path=ser_file)
+    p = next(ds.get_partitions())
+    tiling_scheme = TilingScheme.make_for_shape(
+        tileshape=Shape((4, 16, 24), sig_dims=2),
+        dataset_shape=ds.shape,
+    )
+    for tile in p.get_tiles(tiling_scheme=tiling_scheme):
+        assert tile.tile_slice.shape[0] <= 4
+        assert np.array_equal(tile.data, ser_data[tile.tile_slice.get(nav_only=True)])
+    assert tile.tile_slice.shape[0] > 1
+
+
+@pytest.mark.parametrize('dtype', ('uint8', 'uint16', 'int32'))
+def test_dtypes(lt_ctx, tmpdir_factory, dtype):
+    path = str(tmpdir_factory.mktemp('data') / 'dtype.ser')
+    data = _mk_random(size=(12, 8, 8), dtype=dtype)
+    _write_ser(path, data, nav_dims=(12,))
+    ds = lt_ctx.load('ser', path=path, sync_offset=2)
+    assert ds.dtype == np.dtype(dtype)
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=np.ones(12, dtype=bool))
+    assert np.array_equal(res['intensity'].raw_data[:10], data[2:])
+
+
+def test_sig_reshape(lt_ctx, ser_file, ser_data):
+    ds = SERDataSet(path=ser_file, sig_shape=(24, 16)).initialize(lt_ctx.executor)
+    res = lt_ctx.run_udf(dataset=ds, udf=PickUDF(), roi=np.ones(ds.shape.nav, dtype=bool))
+    assert np.array_equal(res['intensity'].raw_data, ser_data.reshape((-1, 24, 16)))
@@ -1,16 +1,26 @@
+import os
+import threading
 from unittest import mock
 
 
 import pytest
 
 
-from libertem.io.dataset.cached import CacheStats, CacheItem, OrphanItem
+from libertem.io.dataset.cached import (
+    CacheStats, CacheItem, OrphanItem, Cache, LRUCacheStrategy, LFUCacheStrategy,
+    get_cache_stats, _get_eviction_pool,
+)
 
 
 @pytest.fixture
-def cs():
-    cs = CacheStats(":memory:")
-    cs.initialize_schema()
+def index_path(tmp_path):
+    return str(tmp_path / "cache-index")
+
+
+@pytest.fixture
+def cs(index_path):
+    cs = CacheStats(index_path)
+    cs.initialize()
     yield cs
     cs.close()
 
@@ -33,12 +43,13 @@ def oi():
     )
 
 
-def test_cache_stats_starts_connected(cs):
-    assert cs._conn is not None
+def test_cache_stats_starts_empty(cs):
+    assert cs.get_items() == []
+    assert cs.get_used_capacity() == 0
 
 
-def test_initialize_schema_idempotent(cs):
-    cs.initialize_schema()  # already called in fixture, should not raise here
+def test_initialize_idempotent(cs):
+    cs.initialize()  # already called in fixture, should not raise here
 
 
 def test_first_miss(cs, ci):
@@ -83,11 +94,11 @@ def test_eviction(cs, ci):
 def test_record_orphan(cs, oi):
     cs.maybe_orphan(oi)
 
-    cursor = cs.query("SELECT * FROM stats")
-    assert len(cursor.fetchall()) == 0
+    assert len(cs.get_items()) == 0
 
     orphans = cs.get_orphans()
     assert len(orphans) == 1
+    assert cs.get_used_capacity() == 512
 
 
 def test_hit_after_orphan(cs, ci, oi):
@@ -131,3 +142,154 @@ def test_miss_after_orphan(cs, ci, oi):
 
     orphans = cs.get_orphans()
     assert len(orphans) == 0
+
+
+def _item(partition, size=100, dataset="deadbeef"):
+    return CacheItem(
+        dataset=dataset,
+        partition=partition,
+        size=size,
+        path=f"/tmp/{dataset}/parts/{partition}",
+    )
+
+
+def test_shared_between_processes(index_path):
+    # each instance has its own log, like the worker processes on a node:
+    a = CacheStats(index_path, refresh_interval=0)
+    b = CacheStats(index_path, refresh_interval=0)
+    a.initialize()
+    a.record_miss(_item(1))
+    b.record_miss(_item(2, size=50))
+    b.record_hit(_item(1))
+    assert a.get_stats_for_dataset("deadbeef")[1]["hits"] == 1
+    assert a.get_used_capacity() == 150
+    a.record_eviction(_item(2))
+    assert list(b.get_stats_for_dataset("deadbeef").keys()) == [1]
+    a.close()
+    b.close()
+
+
+def test_incomplete_record_is_ignored(cs, index_path):
+    cs.record_miss(_item(1))
+    cs.close()
+    (name,) = os.listdir(index_path)
+    with open(os.path.join(index_path, name), "rb") as f:
+        record = f.read()
+    # another process is in the middle of writing a record:
+    with open(os.path.join(index_path, "log-otherhost-1-0-000000.bin"), "wb") as f:
+        f.write(record[:len(record) // 2])
+    other = CacheStats(index_path)
+    assert list(other.get_stats_for_dataset("deadbeef").keys()) == [1]
+
+
+def test_compaction(index_path):
+    a = CacheStats(index_path, compact_bytes=1024, refresh_interval=0)
+    b = CacheStats(index_path, refresh_interval=0)
+    a.initialize()
+    b.record_miss(_item(100))
+    for i in range(64):
+        a.record_miss(_item(i))
+    a.record_eviction(_item(0))
+    logs = [n for n in os.listdir(index_path) if n.startswith("log-")]
+    # the old logs of `a` were removed:
+    assert len(logs) == 2
+    assert "snapshot.json" in os.listdir(index_path)
+    for stats in (a, b, CacheStats(index_path)):
+        assert sorted(stats.get_stats_for_dataset("deadbeef").keys()) == list(range(1, 64)) + [100]
+        assert stats.get_used_capacity() == 64 * 100
+    a.close()
+    b.close()
+
+
+def test_compaction_removes_logs_of_exited_processes(index_path):
+    a = CacheStats(index_path)
+    a.initialize()
+    a.record_miss(_item(1))
+    a.close()
+    (name,) = os.listdir(index_path)
+    dead = name.replace("-%d-" % os.getpid(), "-%d-" % 2**22)
+    os.rename(os.path.join(index_path, name), os.path.join(index_path, dead))
+    b = CacheStats(index_path)
+    b.record_hit(_item(1))
+    b.compact()
+    assert not os.path.exists(os.path.join(index_path, dead))
+    assert CacheStats(index_path).get_stats_for_dataset("deadbeef")[1]["hits"] == 1
+
+
+def test_get_cache_stats_shared(index_path):
+    assert get_cache_stats(index_path) is get_cache_stats(index_path)
+
+
+def test_lru_victims(cs):
+    strategy = LRUCacheStrategy(capacity=300)
+    for i, t in enumerate([3, 1, 2]):
+        with mock.patch('time.time', side_effect=lambda: t):
+            cs.record_miss(_item(i, dataset="other"))
+    assert strategy.get_victim_list("deadbeef", 100, cs) == [_item(1, dataset="other")]
+    victims = strategy.get_victim_list("deadbeef", 200, cs)
+    assert victims == [_item(1, dataset="other"), _item(2, dataset="other")]
+    # the data set that is being cached is not evicted:
+    assert strategy.get_victim_list("other", 0, cs) == []
+    with pytest.raises(RuntimeError):
+        strategy.get_victim_list("other", 100, cs)
+
+
+def test_lfu_victims(cs):
+    cs.record_miss(_item(0, size=100, dataset="other"))
+    cs.record_miss(_item(1, size=100, dataset="other"))
+    cs.record_hit(_item(1, size=100, dataset="other"))
+    cs.record_miss(_item(2, size=400, dataset="other"))
+    cs.record_hit(_item(2, size=400, dataset="other"))
+    # the large partition has the fewest hits per byte:
+    strategy = LFUCacheStrategy(capacity=600)
+    assert strategy.get_victim_list("deadbeef", 100, cs) == [_item(2, dataset="other")]
+    strategy = LFUCacheStrategy(capacity=600, size_aware=False)
+    assert strategy.get_victim_list("deadbeef", 100, cs) == [_item(0, dataset="other")]
+
+
+@pytest.mark.parametrize("background_eviction", [True, False])
+def test_evict(cs, tmp_path, background_eviction):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"part{i}"
+        path.write_bytes(b"x" * 100)
+        paths.append(path)
+        cs.record_miss(CacheItem(dataset="other", partition=i, size=100, path=str(path)))
+    orphan = tmp_path / "orphan"
+    orphan.write_bytes(b"x" * 50)
+    cs.maybe_orphan(OrphanItem(path=str(orphan), size=50))
+    cache = Cache(
+        stats=cs, strategy=LRUCacheStrategy(capacity=400),
+        background_eviction=background_eviction,
+    )
+    cache.evict("deadbeef", 200)
+    # capacity is available right away:
+    assert cs.get_used_capacity() == 200
+    cache.wait_for_eviction()
+    assert not orphan.exists()
+    assert not paths[0].exists()
+    assert paths[1].exists()
+
+
+def test_background_eviction_recached(cs, tmp_path):
+    path = tmp_path / "part0"
+    path.write_bytes(b"x" * 100)
+    cs.record_miss(CacheItem(dataset="other", partition=0, size=100, path=str(path)))
+    cache = Cache(
+        stats=cs, strategy=LRUCacheStrategy(capacity=150), background_eviction=True,
+    )
+    # hold up the background thread:
+    release = threading.Event()
+    blocker = _get_eviction_pool().submit(release.wait)
+    try:
+        cache.evict("deadbeef", 100)
+        assert not path.exists()
+        # the partition is cached again before the eviction is done:
+        path.write_bytes(b"y" * 100)
+    finally:
+        release.set()
+    blocker.result()
+    cache.wait_for_eviction()
+    assert path.read_bytes() == b"y" * 100
+    # the renamed file of the evicted partition is removed:
+    assert not any(name.startswith("part0.evicted") for name in os.listdir(tmp_path))
@@ -5,9 +5,12 @@ import pytest
 import dask.distributed as dd
 import cloudpickle
 
-from libertem.io.dataset.cached import CachedDataSet, LRUCacheStrategy
-from libertem.io.dataset.base import TilingScheme
+from libertem.io.dataset import cached
+from libertem.io.dataset.cached import CachedDataSet, LRUCacheStrategy, RAMTier
+from libertem.io.dataset.base import TilingScheme, DataTile
+from libertem.io.corrections import CorrectionSet
 from libertem.common import Shape
+from libertem.udf.sum import SumUDF
 
 
 @pytest.fixture
@@ -107,3 +110,153 @@ def test_partition_pickles(default_cached_ds):
     """
     p = next(default_cached_ds.get_partitions())
     cloudpickle.loads(cloudpickle.dumps(p))
+
+
+@pytest.fixture
+def ram_cached_ds(tmp_path, default_raw, lt_ctx):
+    ram_tier = RAMTier(capacity=1024*1024*1024, promote_after=2, path=str(tmp_path / "shm"))
+    ds = CachedDataSet(
+        source_ds=default_raw,
+        cache_path=str(tmp_path / "cache"),
+        strategy=LRUCacheStrategy(capacity=1024*1024*1024),
+        ram_tier=ram_tier,
+    )
+    ds = ds.initialize(executor=lt_ctx.executor)
+    yield ds
+
+
+def _full_frame_scheme(ds):
+    return TilingScheme.make_for_shape(
+        tileshape=Shape((16,) + tuple(ds.shape.sig), sig_dims=ds.shape.sig.dims),
+        dataset_shape=ds.shape,
+    )
+
+
+def _read_all(p, tiling_scheme, copy=False, **kwargs):
+    # tile buffers may be re-used, unless they are views into the cache:
+    return [
+        DataTile(tile.data.copy(), tile.tile_slice, tile.scheme_idx) if copy else tile
+        for tile in p.get_tiles(tiling_scheme=tiling_scheme, **kwargs)
+    ]
+
+
+def test_ram_tier_promotion(ram_cached_ds, default_raw_data):
+    ds = ram_cached_ds
+    tiling_scheme = _full_frame_scheme(ds)
+    p = next(ds.get_partitions())
+    ram_path = ds._ram_tier.get_item_path(ds._cache_key, 0)
+    flat = default_raw_data.reshape((-1,) + tuple(ds.shape.sig))
+
+    # miss, then the first hit on disk:
+    for _ in range(2):
+        _read_all(p, tiling_scheme, dest_dtype=ds.dtype)
+        assert not os.path.exists(ram_path)
+    # the second hit promotes the partition:
+    for _ in range(2):
+        tiles = _read_all(p, tiling_scheme, dest_dtype=ds.dtype)
+        assert os.path.exists(ram_path)
+        for tile in tiles:
+            assert np.array_equal(tile.data, flat[tile.tile_slice.get()])
+            # full frames in the native dtype are views into shared memory:
+            assert not tile.data.flags.owndata
+            assert not tile.data.flags.writeable
+
+    stats = ds._get_tier_stats()
+    assert stats["disk"]["misses"] == 1
+    assert stats["disk"]["hits"] == 2
+    assert stats["ram"]["misses"] == 1
+    assert stats["ram"]["hits"] == 1
+    assert stats["ram"]["used"] == p._sizeof()
+
+
+def test_ram_tier_roi_and_dtype(ram_cached_ds, default_raw_data):
+    ds = ram_cached_ds
+    tiling_scheme = _full_frame_scheme(ds)
+    flat = default_raw_data.reshape((-1,) + tuple(ds.shape.sig))
+    roi = np.random.choice([True, False], size=tuple(ds.shape.nav))
+    for _ in range(4):
+        for p in ds.get_partitions():
+            tiles = _read_all(p, tiling_scheme, copy=True, dest_dtype=np.float32, roi=roi)
+            assert tiles
+            part_roi = roi.reshape((-1,))[p.slice.get(nav_only=True)]
+            data = np.concatenate([tile.data for tile in tiles])
+            assert data.dtype == np.float32
+            assert np.allclose(data, flat[p.slice.get(nav_only=True)][part_roi])
+    assert ds._get_tier_stats()["ram"]["hits"] > 0
+
+
+def test_ram_tier_missing_file(ram_cached_ds, default_raw_data):
+    ds = ram_cached_ds
+    tiling_scheme = _full_frame_scheme(ds)
+    p = next(ds.get_partitions())
+    for _ in range(3):
+        _read_all(p, tiling_scheme)
+    ram_path = ds._ram_tier.get_item_path(ds._cache_key, 0)
+    os.unlink(ram_path)
+    flat = default_raw_data.reshape((-1,) + tuple(ds.shape.sig))
+    # served from the disk tier, and promoted again:
+    for tile in _read_all(p, tiling_scheme, copy=True):
+        assert np.allclose(tile.data, flat[tile.tile_slice.get()])
+    assert os.path.exists(ram_path)
+    assert ds._get_tier_stats()["ram"]["evictions"] == 1
+
+
+def test_ram_tier_capacity(tmp_path, default_raw, lt_ctx):
+    # too small for a single partition, so nothing is promoted:
+    ds = CachedDataSet(
+        source_ds=default_raw,
+        cache_path=str(tmp_path / "cache"),
+        strategy=LRUCacheStrategy(capacity=1024*1024*1024),
+        ram_tier=RAMTier(capacity=1024, promote_after=1, path=str(tmp_path / "shm")),
+    ).initialize(executor=lt_ctx.executor)
+    tiling_scheme = _full_frame_scheme(ds)
+    p = next(ds.get_partitions())
+    for _ in range(3):
+        _read_all(p, tiling_scheme)
+    assert not os.path.exists(ds._ram_tier.get_item_path(ds._cache_key, 0))
+    stats = ds.get_tier_stats(lt_ctx.executor)
+    (host_stats,) = stats.values()
+    assert host_stats["disk"]["hits"] == 2
+    assert host_stats["ram"]["misses"] == 0
+
+
+def test_ram_tier_eviction_is_synchronous(tmp_path, default_raw, lt_ctx, monkeypatch):
+    # room for one of the first two partitions, but not for both:
+    itemsize = np.dtype(default_raw.dtype).itemsize
+    part_size = max(p.shape.size * itemsize for p in list(default_raw.get_partitions())[:2])
+    ds = CachedDataSet(
+        source_ds=default_raw,
+        cache_path=str(tmp_path / "cache"),
+        strategy=LRUCacheStrategy(capacity=1024*1024*1024),
+        background_eviction=True,
+        ram_tier=RAMTier(capacity=part_size, promote_after=1, path=str(tmp_path / "shm")),
+    ).initialize(executor=lt_ctx.executor)
+
+    def _no_background(*args, **kwargs):
+        raise AssertionError("the RAM tier should not evict in the background")
+
+    monkeypatch.setattr(cached, "_get_eviction_pool", _no_background)
+    tiling_scheme = _full_frame_scheme(ds)
+    p0, p1 = list(ds.get_partitions())[:2]
+    for _ in range(2):
+        _read_all(p0, tiling_scheme)
+    assert os.path.exists(ds._ram_tier.get_item_path(ds._cache_key, 0))
+    # promoting the second partition evicts the first one right away:
+    for _ in range(2):
+        _read_all(p1, tiling_scheme)
+    assert os.path.exists(ds._ram_tier.get_item_path(ds._cache_key, 1))
+    assert not os.path.exists(ds._ram_tier.get_item_path(ds._cache_key, 0))
+
+
+def test_ram_tier_run_udf(lt_ctx, ram_cached_ds, default_raw):
+    ds = ram_cached_ds
+    dark = np.random.random(tuple(ds.shape.sig)).astype(np.float32)
+    corrections = CorrectionSet(dark=dark)
+    expected = lt_ctx.run_udf(dataset=default_raw, udf=SumUDF(), corrections=corrections)
+    for _ in range(4):
+        res = lt_ctx.run_udf(dataset=ds, udf=SumUDF(), corrections=corrections)
+        assert np.allclose(res['intensity'].data, expected['intensity'].data)
+    expected = lt_ctx.run_udf(dataset=default_raw, udf=SumUDF())
+    res = lt_ctx.run_udf(dataset=ds, udf=SumUDF())
+    assert np.allclose(res['intensity'].data, expected['intensity'].data)
+    assert ds._get_tier_stats()["ram"]["hits"] > 0
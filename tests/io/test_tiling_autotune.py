@@ -0,0 +1,135 @@
+import json
+
+import numpy as np
+
+from libertem.io.dataset.base import AutoTuneNegotiator, Negotiator
+from libertem.io.dataset.base.autotune import make_negotiator
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.base import UDF
+
+from utils import _mk_random
+
+
+class TilingUDFPartition(UDF):
+    def process_partition(self, partition):
+        pass
+
+
+def _get_scheme(neg, ds, udfs):
+    return neg.get_scheme(
+        udfs=udfs,
+        dataset=ds,
+        approx_partition_shape=next(ds.get_partitions()).shape,
+        read_dtype=np.float32,
+        roi=None,
+    )
+
+
+def _count_timings(neg, monkeypatch):
+    calls = []
+    orig = neg._time_scheme
+
+    def _time_scheme(partition, scheme, read_dtype, roi):
+        calls.append(tuple(scheme.shape))
+        return orig(partition, scheme, read_dtype, roi)
+
+    monkeypatch.setattr(neg, '_time_scheme', _time_scheme)
+    return calls
+
+
+def test_candidates_are_valid(default_raw, tmpdir):
+    neg = AutoTuneNegotiator(cache_path=str(tmpdir / "cache.json"))
+    udfs = [SumUDF()]
+    default = _get_scheme(Negotiator(), default_raw, udfs)
+    candidates = neg._get_candidates(
+        default, udfs, default_raw, np.float32,
+        next(default_raw.get_partitions()).shape, None, None,
+    )
+    shapes = [tuple(c.shape) for c in candidates]
+    assert shapes[0] == tuple(default.shape)
+    assert len(set(shapes)) == len(shapes) > 1
+    for c in candidates:
+        assert c.shape.sig.dims == 2
+        assert c.intent == default.intent
+
+
+def test_autotune_cache(default_raw, tmpdir, monkeypatch):
+    cache_path = tmpdir / "cache.json"
+    neg = AutoTuneNegotiator(cache_path=str(cache_path), sample_bytes=2**20, repeats=1)
+    calls = _count_timings(neg, monkeypatch)
+    scheme = _get_scheme(neg, default_raw, [SumUDF(), SumSigUDF()])
+    assert calls
+    with open(cache_path) as f:
+        entries = json.load(f)
+    assert len(entries) == 1
+    entry, = entries.values()
+    assert tuple(entry['tileshape']) == tuple(scheme.shape)
+
+    # a new negotiator uses the on-disk cache:
+    neg2 = AutoTuneNegotiator(cache_path=str(cache_path))
+    calls2 = _count_timings(neg2, monkeypatch)
+    scheme2 = _get_scheme(neg2, default_raw, [SumUDF(), SumSigUDF()])
+    assert calls2 == []
+    assert tuple(scheme2.shape) == tuple(scheme.shape)
+
+    # different UDFs are tuned separately:
+    _get_scheme(neg2, default_raw, [SumUDF()])
+    assert calls2
+    with open(cache_path) as f:
+        assert len(json.load(f)) == 2
+
+
+def test_stale_cache_entry(default_raw, tmpdir, monkeypatch):
+    cache_path = tmpdir / "cache.json"
+    neg = AutoTuneNegotiator(cache_path=str(cache_path), sample_bytes=2**20, repeats=1)
+    _get_scheme(neg, default_raw, [SumUDF()])
+    with open(cache_path) as f:
+        entries = json.load(f)
+    for entry in entries.values():
+        entry['tileshape'] = [3, 5, 7]
+    with open(cache_path, "w") as f:
+        json.dump(entries, f)
+    # invalid tile shapes from the cache are not used:
+    neg2 = AutoTuneNegotiator(cache_path=str(cache_path), sample_bytes=2**20, repeats=1)
+    calls = _count_timings(neg2, monkeypatch)
+    scheme = _get_scheme(neg2, default_raw, [SumUDF()])
+    assert calls
+    assert tuple(scheme.shape) != (3, 5, 7)
+
+
+def test_partition_not_tuned(default_raw, tmpdir, monkeypatch):
+    neg = AutoTuneNegotiator(cache_path=str(tmpdir / "cache.json"))
+    calls = _count_timings(neg, monkeypatch)
+    scheme = _get_scheme(neg, default_raw, [TilingUDFPartition()])
+    assert calls == []
+    assert scheme.intent == "partition"
+
+
+def test_no_cache_key(lt_ctx, tmpdir, monkeypatch):
+    cache_path = tmpdir / "cache.json"
+    data = _mk_random(size=(16, 16, 64, 64), dtype='float32')
+    ds = lt_ctx.load('memory', data=data, num_partitions=2)
+    neg = AutoTuneNegotiator(cache_path=str(cache_path), sample_bytes=2**20, repeats=1)
+    calls = _count_timings(neg, monkeypatch)
+    scheme = _get_scheme(neg, ds, [SumUDF()])
+    # the memory dataset can't be cached, so it is not tuned either:
+    assert calls == []
+    assert not cache_path.exists()
+    assert tuple(scheme.shape) == tuple(_get_scheme(Negotiator(), ds, [SumUDF()]).shape)
+
+
+def test_run_udf_autotune(lt_ctx, default_raw, default_raw_data, tmpdir, monkeypatch):
+    cache_path = tmpdir / "cache.json"
+    monkeypatch.setenv("LIBERTEM_TILING_AUTOTUNE", "1")
+    monkeypatch.setenv("LIBERTEM_TILING_AUTOTUNE_CACHE", str(cache_path))
+    assert isinstance(make_negotiator(), AutoTuneNegotiator)
+    res = lt_ctx.run_udf(dataset=default_raw, udf=[SumUDF(), SumSigUDF()])
+    assert np.allclose(res[0]['intensity'].data, default_raw_data.sum(axis=(0, 1)))
+    assert np.allclose(res[1]['intensity'].data, default_raw_data.sum(axis=(2, 3)))
+    assert cache_path.exists()
+
+
+def test_autotune_disabled(monkeypatch):
+    monkeypatch.delenv("LIBERTEM_TILING_AUTOTUNE", raising=False)
+    assert type(make_negotiator()) is Negotiator
@@ -158,3 +158,32 @@ def test_empty_rectmask():
     assert not np.any(m.rectangular(2, 2, 0, 3, 5, 5))
     assert not np.any(m.rectangular(2, 2, 3, 0, 5, 5))
     assert not np.any(m.rectangular(2, 2, 0, 0, 5, 5))
+
+
+@pytest.mark.parametrize(
+    'params', [
+        dict(centerX=35, centerY=37, imageSizeX=80, imageSizeY=80, n_bins=42),
+        dict(centerX=12.3, centerY=40.7, imageSizeX=50, imageSizeY=64, radius=30,
+             radius_inner=4.5, n_bins=7),
+        dict(centerX=20, centerY=20, imageSizeX=40, imageSizeY=40, radius=10, n_bins=1),
+    ]
+)
+def test_radial_bin_index(params):
+    bins = m.radial_bins(**params, use_sparse=False)
+    n_bins = bins.shape[0]
+    index, weights = m.radial_bin_index(**params)
+    assert index.shape == weights.shape
+    assert index.shape[1:] == bins.shape[1:]
+    stack = np.stack([((index == b) * weights).sum(axis=0) for b in range(n_bins)])
+    assert np.allclose(stack, bins, atol=1e-6)
+
+
+def test_radial_bin_index_hard():
+    index, weights = m.radial_bin_index(40, 41, 80, 80, radius=30, radius_inner=10, n_bins=5,
+                                        antialiased=False)
+    assert index.shape == (1, 80, 80)
+    assert np.all(weights == 1)
+    assert index[0, 41, 40] == -1
+    assert index[0, 41, 40 + 10] == 0
+    assert index[0, 41, 40 + 29] == 4
+    assert index[0, 41, 40 + 30] == -1
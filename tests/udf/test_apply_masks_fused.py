@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from utils import _mk_random
+
+from libertem.common.sparse import to_sparse
+from libertem.udf.base import UDFPartRunner
+from libertem.udf.masks import ApplyMasksUDF, _FusedApplyMasks
+
+
+def _count_fused(monkeypatch):
+    calls = []
+    orig = _FusedApplyMasks.process_tile
+
+    def process_tile(self, tile):
+        calls.append(len(self.udfs))
+        return orig(self, tile)
+
+    monkeypatch.setattr(_FusedApplyMasks, 'process_tile', process_tile)
+    return calls
+
+
+@pytest.mark.parametrize('use_sparse', (False, True, 'sparse.pydata'))
+def test_fused_masks(lt_ctx, use_sparse, monkeypatch):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = lt_ctx.load('memory', data=data, num_partitions=2, tileshape=(3, 16, 16))
+    masks = [_mk_random(size=(n, 16, 16), dtype='float32') for n in (1, 3, 2)]
+    if use_sparse:
+        masks = [to_sparse(m > 0.5) * 1. for m in masks]
+    udfs = [
+        ApplyMasksUDF(
+            mask_factories=lambda m=m: m, use_sparse=use_sparse, mask_dtype=np.float32
+        )
+        for m in masks
+    ]
+    calls = _count_fused(monkeypatch)
+    res = lt_ctx.run_udf(dataset=ds, udf=udfs)
+    assert calls and all(c == 3 for c in calls)
+    for m, r in zip(masks, res):
+        expected = np.einsum('abxy,mxy->abm', data, np.asarray(
+            m.todense() if use_sparse else m
+        ))
+        assert np.allclose(r['intensity'].data, expected, rtol=1e-5)
+
+
+def test_incompatible_not_fused(lt_ctx, monkeypatch):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = lt_ctx.load('memory', data=data, num_partitions=2)
+    mask_dense = _mk_random(size=(16, 16), dtype='float32')
+    mask_complex = _mk_random(size=(16, 16), dtype='complex64')
+    udfs = [
+        ApplyMasksUDF(mask_factories=[lambda: mask_dense]),
+        ApplyMasksUDF(mask_factories=[lambda: mask_dense], use_sparse=True),
+        ApplyMasksUDF(mask_factories=[lambda: mask_complex]),
+    ]
+    calls = _count_fused(monkeypatch)
+    res = lt_ctx.run_udf(dataset=ds, udf=udfs)
+    assert calls == []
+    assert np.allclose(res[0]['intensity'].data[..., 0], (data * mask_dense).sum(axis=(2, 3)))
+    assert np.allclose(res[2]['intensity'].data[..., 0], (data * mask_complex).sum(axis=(2, 3)))
+
+
+def test_fuse_udfs_groups(monkeypatch):
+    class Other(ApplyMasksUDF):
+        pass
+
+    a, b, c = (ApplyMasksUDF(mask_factories=[]) for _ in range(3))
+    other = Other(mask_factories=[])
+    for udf, key in ((a, 1), (b, 2), (c, 1)):
+        udf._get_fusion_key = lambda key=key: key
+    monkeypatch.setattr(
+        ApplyMasksUDF, '_fuse_tile_udfs', classmethod(lambda cls, udfs: tuple(udfs))
+    )
+    # subclasses are not fused, single UDFs are left alone:
+    assert UDFPartRunner._fuse_udfs([a, other, b, c]) == [other, (a, c), b]
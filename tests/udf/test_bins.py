@@ -0,0 +1,133 @@
+import numpy as np
+import pytest
+import scipy.sparse
+
+from libertem import masks
+from libertem.udf.bins import BinIndexUDF, RadialBinsUDF, _BinTable
+from libertem.udf.masks import ApplyMasksUDF
+
+from utils import _mk_random
+
+
+@pytest.fixture
+def data():
+    return _mk_random(size=(6, 7, 32, 40), dtype="float32")
+
+
+@pytest.fixture
+def ds(lt_ctx, data):
+    # tiles that are split in the signal dimensions:
+    return lt_ctx.load("memory", data=data, num_partitions=3, tileshape=(4, 9, 40))
+
+
+@pytest.mark.parametrize("antialiased", (True, False))
+def test_radial_bins(lt_ctx, ds, data, antialiased):
+    udf = RadialBinsUDF(cx=13.5, cy=17, ri=2, ro=18, n_bins=24, antialiased=antialiased)
+    roi = np.random.choice([True, False], size=ds.shape.nav)
+    roi[0, 0] = True
+    res = lt_ctx.run_udf(dataset=ds, udf=udf, roi=roi)
+    if antialiased:
+        stack = masks.radial_bins(
+            13.5, 17, 40, 32, radius=18, radius_inner=2, n_bins=24, use_sparse=False,
+        )
+        ref = lt_ctx.run_udf(
+            dataset=ds, udf=ApplyMasksUDF(mask_factories=lambda: stack), roi=roi,
+        )
+        expected = ref['intensity'].raw_data
+    else:
+        index, _ = masks.radial_bin_index(
+            13.5, 17, 40, 32, radius=18, radius_inner=2, n_bins=24, antialiased=False,
+        )
+        stack = np.stack([index[0] == b for b in range(24)])
+        expected = np.einsum('nyx,myx->nm', data[roi], stack)
+    assert res['intensity'].raw_data.shape == (np.count_nonzero(roi), 24)
+    assert np.allclose(res['intensity'].raw_data, expected, rtol=1e-5, atol=1e-4)
+
+
+def test_radial_bins_defaults(lt_ctx, ds, data):
+    res = lt_ctx.run_udf(dataset=ds, udf=RadialBinsUDF(antialiased=False))
+    # one bin per pixel of radius up to the corners:
+    n_bins = int(np.round(masks.bounding_radius(20, 16, 40, 32)))
+    assert res['intensity'].data.shape == (6, 7, n_bins)
+    # all pixels belong to a bin:
+    assert np.allclose(res['intensity'].data.sum(axis=-1), data.sum(axis=(2, 3)), rtol=1e-5)
+
+
+def test_radial_bins_1d(lt_ctx):
+    ds = lt_ctx.load("memory", data=np.zeros((4, 16)), sig_dims=1)
+    with pytest.raises(ValueError, match="can only handle 2D signals"):
+        lt_ctx.run_udf(dataset=ds, udf=RadialBinsUDF())
+
+
+@pytest.mark.parametrize("with_weights", (True, False))
+def test_bin_index(lt_ctx, ds, data, with_weights):
+    y, x = np.mgrid[0:32, 0:40]
+    index = (y // 8) * 5 + (x // 8)
+    index[0] = -1
+    # a second layer, where pixels also belong to a bin for their row:
+    rows = np.broadcast_to(20 + y // 8, (32, 40))
+    layers = np.stack((index, rows))
+    weights = np.random.random(layers.shape).astype(np.float32)
+
+    def factory():
+        if with_weights:
+            return layers, weights
+        return layers
+
+    res = lt_ctx.run_udf(dataset=ds, udf=BinIndexUDF(index_factory=factory, n_bins=24))
+    w = weights if with_weights else np.ones_like(weights)
+    stack = np.stack([
+        ((layers == b) * w).sum(axis=0) for b in range(24)
+    ])
+    expected = np.einsum('abyx,myx->abm', data, stack)
+    assert np.allclose(res['intensity'].data, expected, rtol=1e-5, atol=1e-4)
+
+
+def test_bin_table_strategies():
+    row = np.full(64, -1, dtype=np.int16)
+    index = np.stack((
+        # long runs:
+        np.repeat(np.arange(4, dtype=np.int16), 16),
+        # mostly valid, but short runs:
+        np.arange(64, dtype=np.int16) % 3,
+        # few pixels:
+        np.where(np.arange(64) % 16 == 0, 5, row),
+    ))
+    weights = np.random.random(index.shape).astype(np.float32)
+    table = _BinTable(index, weights)
+    assert np.array_equal(np.unique(table.runs[:, 2]), [0])
+    assert table.scan_index.shape == (1, 64)
+    assert np.array_equal(table.pixels, [0, 16, 32, 48])
+
+    tile = np.random.random((3, 64)).astype(np.float32)
+    stack = np.stack([((index == b) * weights).sum(axis=0) for b in range(6)])
+    expected = tile @ stack.T
+
+    out = np.zeros((3, 6), dtype=np.float32)
+    table.apply(tile, out)
+    assert np.allclose(out, expected)
+
+    out = np.zeros((3, 6), dtype=np.float32)
+    table.apply(scipy.sparse.csr_matrix(tile), out)
+    assert np.allclose(out, expected)
+
+
+@pytest.mark.parametrize(
+    "index", [
+        np.full((32, 40), 4),
+        np.full((32, 40), 1000),
+        np.full((32, 40), 0.5),
+    ]
+)
+def test_bin_index_invalid(lt_ctx, ds, index):
+    with pytest.raises(ValueError):
+        lt_ctx.run_udf(dataset=ds, udf=BinIndexUDF(index_factory=lambda: index, n_bins=4))
+
+
+def test_bin_index_negative(lt_ctx, ds, data):
+    # large negative values must not wrap around into valid bins:
+    index = np.full((32, 40), -40000)
+    index[:16] = 1
+    res = lt_ctx.run_udf(dataset=ds, udf=BinIndexUDF(index_factory=lambda: index, n_bins=2))
+    assert np.allclose(res['intensity'].data[..., 0], 0)
+    assert np.allclose(res['intensity'].data[..., 1], data[:, :, :16].sum(axis=(2, 3)), rtol=1e-5)
@@ -6,7 +6,7 @@ from sparseconverter import (
     SPARSE_COO, SPARSE_GCXS, get_backend
 )
 from libertem.io.dataset.memory import MemoryDataSet
-from libertem.udf.base import _execution_plan
+from libertem.udf.base import _execution_plan, _get_tile_backends
 from libertem.udf.base import UDF, _get_canonical_backends
 
 from utils import set_device_class
@@ -376,3 +376,12 @@ def test_no_solution_udf():
             # restrict to CPU only
             available_backends=CPU_BACKENDS,
         )
+
+
+def test_tile_backends():
+    ds = MemoryDataSet(datashape=(2, 2, 2, 2), array_backends=(SCIPY_CSR, ))
+    sparse_udf = BackendUDF(array_backends=(SCIPY_CSR, NUMPY))
+    dense_udf = BackendUDF(array_backends=(NUMPY, ))
+    assert _get_tile_backends([sparse_udf], ds, CPU_BACKENDS) == {SCIPY_CSR}
+    assert _get_tile_backends([sparse_udf, dense_udf], ds, CPU_BACKENDS) == {SCIPY_CSR, NUMPY}
+    assert _get_tile_backends([sparse_udf], ds, (NUMPY, )) == {NUMPY}
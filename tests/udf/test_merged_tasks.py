@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from libertem.api import Context
+from libertem.common.executor import merge_group_size
+from libertem.executor.inline import InlineJobExecutor
+from libertem.udf.base import MergedUDFTask, UDFRunner
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.stddev import StdDevUDF
+from libertem.udf.raw import PickUDF
+
+from utils import _mk_random
+
+
+class GroupingExecutor(InlineJobExecutor):
+    def __init__(self, group_size, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.group_size = group_size
+        self.num_tasks = []
+
+    def run_tasks(self, tasks, *args, **kwargs):
+        tasks = list(tasks)
+        self.num_tasks.append(len(tasks))
+        yield from super().run_tasks(tasks, *args, **kwargs)
+
+    def get_merge_group_size(self, num_tasks):
+        return self.group_size
+
+
+@pytest.mark.parametrize('group_size', (2, 3, 16))
+@pytest.mark.parametrize('with_roi', (False, True))
+def test_merged_results(group_size, with_roi):
+    executor = GroupingExecutor(group_size=group_size)
+    ctx = Context(executor=executor)
+    data = _mk_random(size=(8, 7, 16, 16), dtype='float32')
+    ds = ctx.load('memory', data=data, num_partitions=7)
+    roi = None
+    if with_roi:
+        roi = np.random.choice([True, False], size=(8, 7))
+        # make sure no partition is empty, which would split the groups:
+        roi.reshape((-1,))[::8] = True
+    udfs = [SumUDF(), SumSigUDF(), StdDevUDF(), PickUDF()]
+    res = ctx.run_udf(dataset=ds, udf=udfs, roi=roi, progress=True)
+    assert executor.num_tasks == [int(np.ceil(7 / group_size))]
+
+    mask = np.ones((8, 7), dtype=bool) if roi is None else roi
+    assert np.allclose(res[0]['intensity'].data, data[mask].sum(axis=0))
+    assert np.allclose(res[1]['intensity'].raw_data, data[mask].sum(axis=(1, 2)))
+    assert np.allclose(res[2]['var'].data, data[mask].var(axis=0), rtol=1e-4)
+    assert np.allclose(res[3]['intensity'].raw_data, data[mask])
+
+
+def test_merge_skips_gaps():
+    data = _mk_random(size=(8, 8, 4, 4), dtype='float32')
+    ctx = Context(executor=InlineJobExecutor())
+    ds = ctx.load('memory', data=data, num_partitions=4)
+    # the second partition has no frames in the roi:
+    roi = np.ones((8, 8), dtype=bool)
+    roi[2:4] = False
+    runner = UDFRunner([SumUDF()])
+    tasks, _ = runner._prepare_run_for_dataset(
+        ds, ctx.executor, roi=roi, corrections=None, backends=None, dry=False,
+    )
+    assert len(tasks) == 3
+    merged = runner._merge_udf_tasks(tasks, group_size=4)
+    assert len(merged) == 2
+    assert not isinstance(merged[0], MergedUDFTask)
+    assert isinstance(merged[1], MergedUDFTask)
+    assert merged[1].task_frames == 32
+
+
+@pytest.mark.parametrize(
+    'num_tasks, num_workers, expected', [
+        (256, 64, 2),
+        (10, 4, 1),
+        (100, 1, 50),
+        (0, 4, 1),
+    ]
+)
+def test_merge_group_size(num_tasks, num_workers, expected):
+    assert merge_group_size(num_tasks, num_workers) == expected
@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 import numba
+import scipy.sparse
 from sparseconverter import NUMPY, SPARSE_COO, SPARSE_BACKENDS, get_device_class, for_backend
 
 from libertem.udf.stddev import StdDevUDF, run_stddev, process_tile, merge
@@ -164,3 +165,14 @@ def test_stability(lt_ctx):
     assert N == np.prod(data.shape)
     assert np.allclose(data.sum(), s)
     assert np.allclose(data.var(ddof=N-1), varsum)
+
+
+def test_adjust_dtype_csr():
+    tile = scipy.sparse.random(16, 32, density=0.1, format='csr', dtype=np.float32)
+    adjusted = StdDevUDF()._adjust_dtype_csr(tile)
+    assert adjusted.dtype == np.float64
+    assert np.allclose(adjusted.toarray(), tile.toarray())
+    # only the values are converted:
+    assert adjusted.indices is tile.indices
+    assert adjusted.indptr is tile.indptr
+    assert StdDevUDF()._adjust_dtype_csr(adjusted) is adjusted
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from libertem.api import Context
+from libertem.executor.inline import InlineJobExecutor
+from libertem.udf.base import UDF, UDFException, _worker_accumulators
+from libertem.udf.sum import SumUDF
+from libertem.udf.sumsigudf import SumSigUDF
+from libertem.udf.stddev import StdDevUDF
+from libertem.udf.logsum import LogsumUDF
+
+from utils import _mk_random
+
+
+class CountingExecutor(InlineJobExecutor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.results = []
+
+    def run_tasks(self, *args, **kwargs):
+        for result, task in super().run_tasks(*args, **kwargs):
+            self.results.append(result)
+            yield result, task
+
+
+class NavAccumulateUDF(UDF):
+    def get_result_buffers(self):
+        return {'nav': self.buffer(kind='nav')}
+
+    def accumulate_on_worker(self):
+        return True
+
+    def process_frame(self, frame):
+        self.results.nav[:] = frame.sum()
+
+
+def _udfs(accumulate_on_worker):
+    return [
+        SumUDF(accumulate_on_worker=accumulate_on_worker),
+        StdDevUDF(accumulate_on_worker=accumulate_on_worker),
+        LogsumUDF(accumulate_on_worker=accumulate_on_worker),
+        SumSigUDF(),
+    ]
+
+
+def _check(res, data, roi):
+    mask = np.ones(data.shape[:2], dtype=bool) if roi is None else roi
+    assert np.allclose(res[0]['intensity'].data, data[mask].sum(axis=0))
+    assert np.allclose(res[1]['var'].data, data[mask].var(axis=0), rtol=1e-4)
+    minimum = data[mask].min()
+    assert np.allclose(res[2]['logsum'].data, np.log(data[mask] - minimum + 1).sum(axis=0))
+    assert np.allclose(res[3]['intensity'].raw_data, data[mask].sum(axis=(1, 2)))
+
+
+@pytest.mark.parametrize('with_roi', (False, True))
+def test_accumulate_inline(with_roi):
+    executor = CountingExecutor()
+    ctx = Context(executor=executor)
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = ctx.load('memory', data=data, num_partitions=4)
+    roi = np.random.choice([True, False], size=(8, 8)) if with_roi else None
+    res = ctx.run_udf(dataset=ds, udf=_udfs(True), roi=roi)
+    _check(res, data, roi)
+    # only the SumSigUDF results are sent back per partition:
+    assert executor.results
+    for part_results in executor.results:
+        assert part_results[:3] == (None, None, None)
+        assert part_results[3] is not None
+    assert not _worker_accumulators._results
+
+
+def test_accumulate_concurrent(concurrent_executor):
+    ctx = Context(executor=concurrent_executor)
+    data = _mk_random(size=(16, 8, 16, 16), dtype='float32')
+    ds = ctx.load('memory', data=data, num_partitions=16)
+    res = ctx.run_udf(dataset=ds, udf=_udfs(True))
+    _check(res, data, None)
+    assert not _worker_accumulators._results
+
+
+def test_accumulate_iter(lt_ctx):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = lt_ctx.load('memory', data=data, num_partitions=4)
+    intermediate = []
+    for res in lt_ctx.run_udf_iter(dataset=ds, udf=_udfs(True)):
+        intermediate.append(np.allclose(res.buffers[0]['intensity'].data, 0))
+    # one intermediate result per partition, plus the final result, and
+    # accumulated results are only available at the end:
+    assert intermediate == [True] * 4 + [False]
+    _check(res.buffers, data, None)
+
+
+def test_accumulate_nav_buffer(lt_ctx):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = lt_ctx.load('memory', data=data, num_partitions=4)
+    with pytest.raises(UDFException):
+        lt_ctx.run_udf(dataset=ds, udf=NavAccumulateUDF())
+
+
+def test_accumulate_delayed(delayed_ctx):
+    data = _mk_random(size=(8, 8, 16, 16), dtype='float32')
+    ds = delayed_ctx.load('memory', data=data, num_partitions=4)
+    # ignored by the DelayedJobExecutor:
+    res = delayed_ctx.run_udf(dataset=ds, udf=_udfs(True))
+    _check(res, data, None)
@@ -106,3 +106,12 @@ def test_detect_broken(monkeypatch):
         result = detect()
 
     assert not result['has_cupy']
+
+
+def test_cache_size():
+    from libertem.utils.devices import get_cache_size, _parse_cache_size
+    assert get_cache_size(level=2) > 0
+    assert get_cache_size(level=17, default=1234) == 1234
+    assert _parse_cache_size("2048K\n") == 2 * 1024 * 1024
+    assert _parse_cache_size("1M") == 1024 * 1024
+    assert _parse_cache_size("512") == 512